@@ -0,0 +1,264 @@
+"""
+Batch-scoped audit aggregation.
+
+A calculation batch or file import saves thousands of rows, and each save
+normally becomes its own model audit record. Inside ``aggregated_audit`` the
+save/delete signals hand rows to an AuditBatch instead, which logs
+BATCH_SUMMARY records per model with:
+
+- counts per action (CREATE / UPDATE / DELETE)
+- the primary keys written, collapsed into [first, last] ranges
+- a SHA-256 fingerprint of the saved field values: the sum of the per-row
+  digests, so it does not depend on the order the rows were saved in
+- for UPDATE rows the changed fields with their old and new values, and for
+  DELETE rows the deleted values, since the tables keep neither
+
+Rows are folded into the summary as they arrive. Every
+MODEL_AUDIT_BATCH_SUMMARY_ROWS rows of a model the summary so far is logged as
+a part with completed=False and a new part starts; when the block ends the
+last part of each model is logged with completed set to whether the block
+succeeded. Parts are numbered from 1.
+
+Created rows are the detail themselves: they can be read back from the id
+ranges (Payroll and GarnishmentResult also carry the batch_id).
+
+Used as a context manager or decorator::
+
+    with aggregated_audit(batch_id, source='garnishment_calculation') as audit_batch:
+        ...
+
+    @aggregated_audit(source='employee_import')
+    def run_import(self, ...):
+        ...
+
+Worker threads do not see the caller's batch; wrap their work in
+``bind_audit_batch(audit_batch)``. Work run outside a request (background
+jobs) passes the user it runs for, e.g. ``aggregated_audit(job_id, user=...)``.
+"""
+import functools
+import hashlib
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_ACTION = 'BATCH_SUMMARY'
+
+# Key of the per-row detail kept in the summary, by action
+DETAIL_KEYS = {'UPDATE': 'changes', 'DELETE': 'old_values'}
+
+# Row digests are summed modulo 2**256 into changes_hash
+HASH_MODULUS = 1 << 256
+
+_thread_locals = threading.local()
+
+
+def get_current_audit_batch():
+    """
+    The AuditBatch collecting row events on this thread, if any
+    """
+    return getattr(_thread_locals, 'audit_batch', None)
+
+
+@contextmanager
+def bind_audit_batch(audit_batch):
+    """
+    Collect this thread's row events into audit_batch (no-op for None)
+    """
+    if audit_batch is None:
+        yield None
+        return
+    previous = get_current_audit_batch()
+    _thread_locals.audit_batch = audit_batch
+    try:
+        yield audit_batch
+    finally:
+        _thread_locals.audit_batch = previous
+
+
+def collapse_id_ranges(ids):
+    """
+    Collapse sorted integer ids into [first, last] pairs, e.g.
+    [1, 2, 3, 7] -> [[1, 3], [7, 7]]
+    """
+    ranges = []
+    for object_id in ids:
+        if ranges and object_id == ranges[-1][1] + 1:
+            ranges[-1][1] = object_id
+        elif not ranges or object_id != ranges[-1][1]:
+            ranges.append([object_id, object_id])
+    return ranges
+
+
+def _id_sort_key(object_id):
+    # Integer ids in numeric order, then any other ids as text
+    return (0, object_id, '') if isinstance(object_id, int) else (1, 0, str(object_id))
+
+
+class ModelSummary:
+    """
+    Running summary of one model's rows in the current part of a batch.
+    """
+
+    __slots__ = ('part', 'count', 'counts', 'hash_sum', 'object_ids', 'details')
+
+    def __init__(self, part=1):
+        self.part = part
+        self.count = 0
+        self.counts = {}
+        self.hash_sum = 0
+        self.object_ids = set()
+        self.details = {}
+
+    def add(self, action, object_id, values, detail=None):
+        self.count += 1
+        self.counts[action] = self.counts.get(action, 0) + 1
+        row_digest = hashlib.sha256(repr((action, object_id, values)).encode('utf-8')).digest()
+        self.hash_sum = (self.hash_sum + int.from_bytes(row_digest, 'big')) % HASH_MODULUS
+        self.object_ids.add(object_id)
+        if detail:
+            self.details.setdefault(action, []).append({'id': object_id, DETAIL_KEYS[action]: detail})
+
+    def as_dict(self, batch_id, source):
+        summary = {
+            'batch_id': batch_id,
+            'source': source,
+            'part': self.part,
+            'count': self.count,
+            'counts': dict(self.counts),
+            'changes_hash': self.hash_sum.to_bytes(32, 'big').hex(),
+        }
+        if all(isinstance(object_id, int) for object_id in self.object_ids):
+            summary['id_ranges'] = collapse_id_ranges(sorted(self.object_ids))
+        else:
+            summary['object_ids'] = sorted(str(object_id) for object_id in self.object_ids)
+        for action, key in (('UPDATE', 'updates'), ('DELETE', 'deletes')):
+            if action in self.details:
+                summary[key] = sorted(self.details[action], key=lambda row: _id_sort_key(row['id']))
+        return summary
+
+
+class AuditBatch:
+    """
+    Row events of one batch, summarized per model. Thread-safe so calculation
+    workers can share the batch of their request.
+
+    Args:
+        summary_rows: rows of a model per logged part; defaults to
+            MODEL_AUDIT_BATCH_SUMMARY_ROWS
+    """
+
+    def __init__(self, batch_id, source=None, user=None, summary_rows=None):
+        self.batch_id = batch_id
+        self.source = source
+        self.user = user
+        self.summary_rows = max(1, summary_rows or getattr(settings, 'MODEL_AUDIT_BATCH_SUMMARY_ROWS', 5000))
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def add(self, action, model_name, object_id, values, detail=None):
+        """
+        Record one row event. values is the tuple of saved field values; only
+        its digest is kept. detail is kept in the summary: the changes of an
+        UPDATE or the values of a DELETE. Logs the model's part once it holds
+        summary_rows rows.
+        """
+        with self._lock:
+            summary = self._summaries.get(model_name)
+            if summary is None:
+                summary = self._summaries[model_name] = ModelSummary()
+            summary.add(action, object_id, values, detail)
+            if summary.count < self.summary_rows:
+                return
+            self._summaries[model_name] = ModelSummary(summary.part + 1)
+
+        self._log(model_name, summary.as_dict(self.batch_id, self.source), completed=False)
+
+    def summaries(self):
+        """
+        One summary dict per model for the rows not logged yet, in model name order
+        """
+        with self._lock:
+            pending = sorted(self._summaries.items())
+        return [(model_name, summary.as_dict(self.batch_id, self.source)) for model_name, summary in pending]
+
+    def log_summaries(self, completed=True):
+        for model_name, summary in self.summaries():
+            self._log(model_name, summary, completed)
+
+    def _log(self, model_name, summary, completed):
+        from .model_audit import model_audit_logger
+
+        summary['completed'] = completed
+        try:
+            model_audit_logger.log_model_operation(
+                action=SUMMARY_ACTION,
+                model_name=model_name,
+                object_id=str(self.batch_id),
+                user=self.user,
+                changes=summary
+            )
+        except Exception:
+            logger.exception(f"Failed to log audit summary part {summary['part']} of {model_name} for batch {self.batch_id}")
+
+
+class aggregated_audit:
+    """
+    Context manager / decorator that aggregates the row audit events of a
+    block into per-model batch summaries. Nested blocks join the outer batch.
+
+    Args:
+        batch_id: identifier logged with the summaries; generated when omitted
+        source: what produced the batch (e.g. 'garnishment_calculation')
+        user: user the summaries are attributed to; defaults to the user of
+            the current request
+    """
+
+    def __init__(self, batch_id=None, source=None, user=None):
+        self.batch_id = batch_id
+        self.source = source
+        self.user = user
+        self._audit_batch = None
+        self._binding = None
+
+    def __enter__(self):
+        outer = get_current_audit_batch()
+        if outer is not None:
+            # e.g. an import job's batch takes the source of the import it runs
+            if outer.source is None:
+                outer.source = self.source
+            return outer
+
+        from .user_context_middleware import get_current_user
+
+        self._audit_batch = AuditBatch(
+            self.batch_id or uuid.uuid4().hex[:12],
+            source=self.source,
+            user=self.user or get_current_user(),
+        )
+        self._binding = bind_audit_batch(self._audit_batch)
+        return self._binding.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._audit_batch is None:
+            return False
+        audit_batch, self._audit_batch = self._audit_batch, None
+        self._binding.__exit__(exc_type, exc, tb)
+        self._binding = None
+        try:
+            audit_batch.log_summaries(completed=exc_type is None)
+        except Exception:
+            logger.exception(f"Failed to log audit summaries for batch {audit_batch.batch_id}")
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # A fresh instance per call, so concurrent calls get their own batch
+            with aggregated_audit(self.batch_id, self.source, self.user):
+                return func(*args, **kwargs)
+        return wrapper
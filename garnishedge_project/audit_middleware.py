@@ -2,8 +2,10 @@
 Custom middleware for comprehensive API audit logging using OpenTelemetry
 """
 import json
+import random
 import time
 import logging
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
 from django.contrib.auth import get_user_model
@@ -35,103 +37,86 @@ User = get_user_model()
 
 class AuditLoggingMiddleware(MiddlewareMixin):
     """
-    Middleware to log all API calls with comprehensive audit information
+    Middleware to log all API calls with comprehensive audit information.
+
+    Only the start time is recorded up front. The span is built when the
+    response is known: errors and requests slower than AUDIT_SLOW_REQUEST_MS
+    always get one, with headers, query parameters and payloads; other
+    requests get a span with the basic HTTP attributes at the rate of their
+    AUDIT_SAMPLING_RULES entry. Request bodies are only read when their
+    Content-Length is within AUDIT_REQUEST_BODY_MAX_BYTES.
     """
     
     def __init__(self, get_response):
         self.get_response = get_response
         super().__init__(get_response)
+        self.default_sample_rate = getattr(settings, 'AUDIT_SAMPLE_RATE', 1.0)
+        # Longest prefix first, so the most specific rule wins
+        self.sampling_rules = sorted(
+            getattr(settings, 'AUDIT_SAMPLING_RULES', {}).items(),
+            key=lambda rule: len(rule[0]),
+            reverse=True
+        )
+        self.slow_request_ms = getattr(settings, 'AUDIT_SLOW_REQUEST_MS', 1000)
+        self.body_max_bytes = getattr(settings, 'AUDIT_REQUEST_BODY_MAX_BYTES', 2000)
     
     def process_request(self, request):
-        """Process incoming request and start audit logging"""
-        # Start timing
+        """Record the request start; the span is built in process_response"""
         request._audit_start_time = time.time()
+        request._audit_start_time_ns = time.time_ns()
         
-        # Get tracer and create span (only if OpenTelemetry is enabled)
-        tracer = get_tracer()
-        span = None
-        if tracer:
-            span_name = f"{request.method} {request.path}"
-            span = tracer.start_span(span_name)
-        
-        # Set basic span attributes (only if span exists)
-        if span:
-            span.set_attribute(SpanAttributes.HTTP_METHOD, request.method)
-            span.set_attribute(SpanAttributes.HTTP_URL, request.build_absolute_uri())
-            span.set_attribute(SpanAttributes.HTTP_SCHEME, request.scheme)
-            span.set_attribute(SpanAttributes.HTTP_HOST, request.get_host())
-            span.set_attribute(SpanAttributes.HTTP_TARGET, request.path)
-            span.set_attribute(SpanAttributes.HTTP_USER_AGENT, request.META.get('HTTP_USER_AGENT', ''))
-            span.set_attribute(SpanAttributes.HTTP_REQUEST_CONTENT_LENGTH, 
-                              request.META.get('CONTENT_LENGTH', 0))
-            
-            # Add client IP information
-            client_ip = self._get_client_ip(request)
-            span.set_attribute("client.ip", client_ip)
-            
-            # Add request headers (filter sensitive ones) - limit size
-            headers = self._filter_sensitive_headers(dict(request.headers))
-            headers_json = json.dumps(headers, cls=AuditJSONEncoder)
-            if len(headers_json) < 2000:  # Limit headers size
-                span.set_attribute("http.request.headers", headers_json)
-            else:
-                span.set_attribute("http.request.headers_count", len(headers))
-                span.set_attribute("http.request.headers_truncated", True)
-            
-            # Add query parameters
-            if request.GET:
-                span.set_attribute("http.request.query_params", json.dumps(dict(request.GET), cls=AuditJSONEncoder))
-            
-            # Add request body for non-GET requests (with size limit)
-            if request.method in ['POST', 'PUT', 'PATCH'] and hasattr(request, 'body'):
-                body = request.body.decode('utf-8', errors='ignore')
-                if len(body) < 2000:  # Reduced limit to prevent large payloads
-                    span.set_attribute("http.request.body", body)
-                else:
-                    span.set_attribute("http.request.body_size", len(body))
-                    span.set_attribute("http.request.body_truncated", True)
-            
-            # Add user information if authenticated
-            if hasattr(request, 'user') and request.user.is_authenticated:
-                span.set_attribute("user.id", str(request.user.id))
-                span.set_attribute("user.username", request.user.username)
-                if hasattr(request.user, 'email'):
-                    span.set_attribute("user.email", request.user.email)
-            
-            # Add session information
-            if hasattr(request, 'session') and request.session.session_key:
-                span.set_attribute("session.id", request.session.session_key)
-            
-            # Add audit event for request start
-            add_audit_event(span, "request.started", {
-                "timestamp": time.time(),
-                "request_id": getattr(request, 'id', None)
-            })
+        # Buffer small bodies now, before the parsers consume the stream, so
+        # they can still be attached if the request fails. Larger bodies are
+        # never read here.
+        if request.method in ['POST', 'PUT', 'PATCH']:
+            content_length = self._get_content_length(request)
+            if 0 < content_length <= self.body_max_bytes:
+                try:
+                    request.body
+                except Exception:
+                    pass
         
         # Set current user for model signals (always do this)
         if hasattr(request, 'user') and request.user.is_authenticated:
             set_current_user(request.user)
-        
-        # Store span in request for later use
-        request._audit_span = span
-        
-        # Log to file only - removed console output
     
     def process_response(self, request, response):
-        """Process outgoing response and complete audit logging"""
-        if not hasattr(request, '_audit_span'):
+        """Build the audit span if the request is failed, slow or sampled"""
+        if not hasattr(request, '_audit_start_time'):
+            return response
+        
+        duration = time.time() - request._audit_start_time
+        duration_ms = round(duration * 1000, 2)
+        exception = getattr(request, '_audit_exception', None)
+        failed = response.status_code >= 400 or exception is not None
+        slow = duration_ms >= self.slow_request_ms
+        
+        if not (failed or slow or self._is_sampled(request.path)):
+            return response
+        
+        tracer = get_tracer()
+        if not tracer:
             return response
         
-        span = request._audit_span
-        start_time = getattr(request, '_audit_start_time', time.time())
-        duration = time.time() - start_time
+        span = tracer.start_span(f"{request.method} {request.path}", start_time=request._audit_start_time_ns)
+        self._set_request_attributes(span, request)
+        if failed or slow:
+            self._set_request_payload(span, request)
+        
+        add_audit_event(span, "request.started", {
+            "timestamp": request._audit_start_time,
+            "request_id": getattr(request, 'id', None)
+        })
+        
+        # Set response attributes
+        span.set_attribute(SpanAttributes.HTTP_STATUS_CODE, response.status_code)
+        span.set_attribute("http.response.duration_ms", duration_ms)
+        if slow:
+            span.set_attribute("http.response.slow", True)
         
-        # Only process span if it exists (OpenTelemetry enabled)
-        if span:
-            # Set response attributes
-            span.set_attribute(SpanAttributes.HTTP_STATUS_CODE, response.status_code)
-            span.set_attribute("http.response.duration_ms", round(duration * 1000, 2))
-            
+        self._set_db_attributes(span, request)
+        
+        if failed or slow:
             # Add response headers (filter sensitive ones) - limit size
             if hasattr(response, 'headers'):
                 headers = self._filter_sensitive_headers(dict(response.headers))
@@ -141,67 +126,136 @@ class AuditLoggingMiddleware(MiddlewareMixin):
                 else:
                     span.set_attribute("http.response.headers_count", len(headers))
                     span.set_attribute("http.response.headers_truncated", True)
-            
-            # Add response body for error responses (with size limit)
-            if response.status_code >= 400 and hasattr(response, 'content'):
-                content = response.content.decode('utf-8', errors='ignore')
-                if len(content) < 1000:  # Reduced limit to prevent large payloads
-                    span.set_attribute("http.response.body", content)
-                else:
-                    span.set_attribute("http.response.body_size", len(content))
-                    span.set_attribute("http.response.body_truncated", True)
-            
-            # Set span status based on response
-            if response.status_code >= 400:
-                set_span_status(span, success=False, 
-                              error_message=f"HTTP {response.status_code}")
+        
+        # Add response body for error responses (with size limit)
+        if response.status_code >= 400 and not response.streaming:
+            content = response.content.decode('utf-8', errors='ignore')
+            if len(content) < 1000:  # Reduced limit to prevent large payloads
+                span.set_attribute("http.response.body", content)
             else:
-                set_span_status(span, success=True)
-            
-            # Add audit event for request completion
-            add_audit_event(span, "request.completed", {
+                span.set_attribute("http.response.body_size", len(content))
+                span.set_attribute("http.response.body_truncated", True)
+        
+        if exception is not None:
+            exception_type, exception_message, stacktrace = exception
+            span.set_attribute("exception.type", exception_type)
+            span.set_attribute("exception.message", exception_message)
+            span.set_attribute("exception.stacktrace", stacktrace)
+            add_audit_event(span, "request.exception", {
                 "timestamp": time.time(),
-                "status_code": response.status_code,
-                "duration_ms": round(duration * 1000, 2)
+                "exception_type": exception_type,
+                "exception_message": exception_message
             })
-            
-            # End the span
-            span.end()
+            set_span_status(span, success=False, error_message=exception_message)
+        elif response.status_code >= 400:
+            set_span_status(span, success=False, 
+                          error_message=f"HTTP {response.status_code}")
+        else:
+            set_span_status(span, success=True)
+        
+        # Add audit event for request completion
+        add_audit_event(span, "request.completed", {
+            "timestamp": time.time(),
+            "status_code": response.status_code,
+            "duration_ms": duration_ms
+        })
         
+        span.end()
         return response
     
     def process_exception(self, request, exception):
-        """Process exceptions and log them in audit trail"""
-        if not hasattr(request, '_audit_span'):
-            return None
-        
-        span = request._audit_span
-        
-        # Only process span if it exists (OpenTelemetry enabled)
-        if span:
-            # Set exception attributes
-            span.set_attribute("exception.type", type(exception).__name__)
-            span.set_attribute("exception.message", str(exception))
-            span.set_attribute("exception.stacktrace", self._get_exception_traceback(exception))
-            
-            # Set span status to error
-            set_span_status(span, success=False, error_message=str(exception))
-            
-            # Add audit event for exception
-            add_audit_event(span, "request.exception", {
-                "timestamp": time.time(),
-                "exception_type": type(exception).__name__,
-                "exception_message": str(exception)
-            })
-            
-            # End the span
-            span.end()
+        """Keep the exception for the span built in process_response"""
+        request._audit_exception = (
+            type(exception).__name__,
+            str(exception),
+            self._get_exception_traceback(exception)
+        )
         
         logger.error(f"API Request failed: {request.method} {request.path} - "
                     f"{type(exception).__name__}: {str(exception)}")
         
         return None
     
+    def _is_sampled(self, path):
+        rate = self.default_sample_rate
+        for prefix, rule_rate in self.sampling_rules:
+            if path.startswith(prefix):
+                rate = rule_rate
+                break
+        if rate >= 1:
+            return True
+        return rate > 0 and random.random() < rate
+    
+    def _get_content_length(self, request):
+        try:
+            return int(request.META.get('CONTENT_LENGTH') or 0)
+        except (TypeError, ValueError):
+            return 0
+    
+    def _set_request_attributes(self, span, request):
+        """Basic HTTP attributes, set on every audit span"""
+        span.set_attribute(SpanAttributes.HTTP_METHOD, request.method)
+        span.set_attribute(SpanAttributes.HTTP_URL, request.build_absolute_uri())
+        span.set_attribute(SpanAttributes.HTTP_SCHEME, request.scheme)
+        span.set_attribute(SpanAttributes.HTTP_HOST, request.get_host())
+        span.set_attribute(SpanAttributes.HTTP_TARGET, request.path)
+        span.set_attribute(SpanAttributes.HTTP_USER_AGENT, request.META.get('HTTP_USER_AGENT', ''))
+        span.set_attribute(SpanAttributes.HTTP_REQUEST_CONTENT_LENGTH, self._get_content_length(request))
+        
+        # Add client IP information
+        span.set_attribute("client.ip", self._get_client_ip(request))
+        
+        # Add user information if authenticated
+        if hasattr(request, 'user') and request.user.is_authenticated:
+            span.set_attribute("user.id", str(request.user.id))
+            span.set_attribute("user.username", request.user.username)
+            if hasattr(request.user, 'email'):
+                span.set_attribute("user.email", request.user.email)
+        
+        # Add session information
+        if hasattr(request, 'session') and request.session.session_key:
+            span.set_attribute("session.id", request.session.session_key)
+    
+    def _set_request_payload(self, span, request):
+        """Headers, query parameters and body, for failed or slow requests"""
+        # Add request headers (filter sensitive ones) - limit size
+        headers = self._filter_sensitive_headers(dict(request.headers))
+        headers_json = json.dumps(headers, cls=AuditJSONEncoder)
+        if len(headers_json) < 2000:  # Limit headers size
+            span.set_attribute("http.request.headers", headers_json)
+        else:
+            span.set_attribute("http.request.headers_count", len(headers))
+            span.set_attribute("http.request.headers_truncated", True)
+        
+        # Add query parameters
+        if request.GET:
+            span.set_attribute("http.request.query_params", json.dumps(dict(request.GET), cls=AuditJSONEncoder))
+        
+        # Add the request body if it was buffered in process_request
+        if request.method in ['POST', 'PUT', 'PATCH']:
+            body = getattr(request, '_body', None)
+            if body is not None and len(body) <= self.body_max_bytes:
+                span.set_attribute("http.request.body", body.decode('utf-8', errors='ignore'))
+            else:
+                span.set_attribute("http.request.body_size", self._get_content_length(request))
+                span.set_attribute("http.request.body_truncated", True)
+    
+    def _set_db_attributes(self, span, request):
+        """Query counters collected by DatabaseAuditMiddleware"""
+        db_stats = getattr(request, '_audit_db_stats', None)
+        if not db_stats:
+            return
+        queries_executed, db_time = db_stats
+        span.set_attribute("db.queries.count", queries_executed)
+        span.set_attribute("db.queries.duration_ms", round(db_time * 1000, 2))
+        
+        # Log slow queries
+        if db_time > 1.0:  # Queries taking more than 1 second
+            add_audit_event(span, "db.slow_query", {
+                "duration_ms": round(db_time * 1000, 2),
+                "query_count": queries_executed
+            })
+    
     def _get_client_ip(self, request):
         """Extract client IP address from request"""
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -257,17 +311,8 @@ class DatabaseAuditMiddleware(MiddlewareMixin):
         queries_executed = len(connection.queries) - request._db_queries_start
         db_time = time.time() - request._db_queries_time_start
         
-        # Add database metrics to current span if available
-        span = getattr(request, '_audit_span', None)
-        if span and span.is_recording():
-            span.set_attribute("db.queries.count", queries_executed)
-            span.set_attribute("db.queries.duration_ms", round(db_time * 1000, 2))
-            
-            # Log slow queries
-            if db_time > 1.0:  # Queries taking more than 1 second
-                add_audit_event(span, "db.slow_query", {
-                    "duration_ms": round(db_time * 1000, 2),
-                    "query_count": queries_executed
-                })
+        # AuditLoggingMiddleware adds these to the request span, which is
+        # built after this middleware's process_response has run
+        request._audit_db_stats = (queries_executed, db_time)
         
         return response
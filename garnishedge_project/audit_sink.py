@@ -0,0 +1,184 @@
+"""
+Asynchronous sink for model audit records.
+
+ModelAuditLogger used to format every audit record (JSON encoding of the
+changed values) and write it to the model_audit file logger and OpenTelemetry
+on the thread doing the save. AuditSink moves that work to one background
+thread: callers put the raw record on a bounded queue and the thread writes
+records in batches, flushing when MODEL_AUDIT_BATCH_SIZE records are waiting,
+every MODEL_AUDIT_FLUSH_INTERVAL_SECONDS, and at interpreter shutdown.
+
+When the queue is full MODEL_AUDIT_QUEUE_FULL_POLICY decides what happens:
+
+- "sync": write the record on the caller's thread (default; no record is lost)
+- "block": wait up to MODEL_AUDIT_QUEUE_BLOCK_SECONDS for room, then drop
+- "drop": discard the record and count it (saves never wait on audit)
+
+Records are plain data by the time they are submitted (see
+ModelAuditLogger.log_model_operation), so the writer thread does not read
+model instances that the saving thread may still be changing.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FULL_POLICIES = ('drop', 'block', 'sync')
+
+
+class AuditSink:
+    """
+    Bounded queue plus writer thread for audit records.
+
+    Args:
+        writer: callable taking a list of records; called on the writer thread
+    """
+
+    def __init__(self, writer, queue_size=None, batch_size=None, flush_interval=None,
+                 queue_full_policy=None, block_timeout=None):
+        self.writer = writer
+        self.enabled = getattr(settings, 'MODEL_AUDIT_ASYNC', True)
+        self.batch_size = max(1, batch_size or getattr(settings, 'MODEL_AUDIT_BATCH_SIZE', 200))
+        self.flush_interval = flush_interval or getattr(settings, 'MODEL_AUDIT_FLUSH_INTERVAL_SECONDS', 1.0)
+        self.queue_full_policy = queue_full_policy or getattr(settings, 'MODEL_AUDIT_QUEUE_FULL_POLICY', 'sync')
+        if self.queue_full_policy not in QUEUE_FULL_POLICIES:
+            logger.warning(f"Unknown MODEL_AUDIT_QUEUE_FULL_POLICY '{self.queue_full_policy}', using 'sync'")
+            self.queue_full_policy = 'sync'
+        self.block_timeout = block_timeout if block_timeout is not None else \
+            getattr(settings, 'MODEL_AUDIT_QUEUE_BLOCK_SECONDS', 0.5)
+
+        self._queue = queue.Queue(maxsize=max(1, queue_size or getattr(settings, 'MODEL_AUDIT_QUEUE_SIZE', 10000)))
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+        self._flush_requested = threading.Event()
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._last_drop_warning = 0.0
+
+    def submit(self, record):
+        """
+        Hand a record to the sink. Never raises; records the sink cannot take
+        are written synchronously or counted as dropped per the queue policy.
+        """
+        if not self.enabled or self._stopped:
+            self._write([record])
+            return
+
+        self._ensure_thread()
+        try:
+            if self.queue_full_policy == 'block':
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            if self.queue_full_policy == 'sync':
+                self._write([record])
+            else:
+                self._record_drop()
+            return
+
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_requested.set()
+
+    def flush(self, timeout=5.0):
+        """
+        Write everything queued so far. Returns False if the queue could not
+        be drained within timeout.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._drain()
+            return True
+        deadline = time.monotonic() + timeout
+        self._flush_requested.set()
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def shutdown(self, timeout=5.0):
+        """
+        Stop accepting queued records and write the remaining ones.
+        """
+        self._stopped = True
+        self._flush_requested.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout)
+        self._drain()
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'queue_full_policy': self.queue_full_policy,
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='model-audit-sink', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            if not self._queue.empty():
+                # This thread keeps its own database connection between batches;
+                # drop it if it went stale. Only here: on a request thread it
+                # would close the request's connection.
+                close_old_connections()
+            self._drain()
+
+    def _drain(self):
+        while True:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, records):
+        try:
+            self.writer(records)
+            self.written += len(records)
+        except Exception:
+            self.failed += len(records)
+            logger.exception(f"Failed to write {len(records)} audit records")
+
+    def _record_drop(self):
+        with self._lock:
+            self.dropped += 1
+            now = time.monotonic()
+            # Warn at most once a minute so a flood of drops does not flood the log
+            if now - self._last_drop_warning < 60:
+                return
+            self._last_drop_warning = now
+        logger.warning(
+            f"Audit queue full ({self._queue.maxsize} records); {self.dropped} audit records dropped so far"
+        )
+
+
+def register_shutdown(sink):
+    atexit.register(sink.shutdown)
+    return sink
@@ -0,0 +1,159 @@
+"""
+Prometheus metrics.
+
+Recorded with prometheus_client and served by the /metrics endpoint:
+
+- HTTP request rate, errors (status label) and latency per resolved URL route,
+  recorded by MetricsMiddleware
+- database queries per request
+- garnishment calculations and their latency per garnishment type
+- queue depth of the background worker pools
+
+Under gunicorn every worker is a separate process, and a scrape reaches
+whichever worker answers. With PROMETHEUS_MULTIPROC_DIR set (gunicorn.conf.py
+sets it for the workers) each process writes its samples to files in that
+directory and /metrics aggregates the files of all workers, so the counters
+Prometheus sees are those of the whole service rather than of one worker.
+Without it (runserver, management commands) metrics stay in process memory.
+"""
+import hmac
+import ipaddress
+import logging
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY as DEFAULT_REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+DEFAULT_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def is_multiprocess():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def monitor_executor(pool, executor):
+    """
+    Report the number of tasks waiting in executor's queue under
+    garnishedge_worker_pool_queue_depth{pool=...}. Tasks are counted when
+    submitted and uncounted when a worker picks them up (or they are
+    cancelled), so the gauge works across processes.
+    """
+    gauge = WORKER_POOL_QUEUE_DEPTH.labels(pool=pool)
+    submit = executor.submit
+
+    def monitored_submit(fn, /, *args, **kwargs):
+        started = []
+
+        def run(*run_args, **run_kwargs):
+            started.append(True)
+            gauge.dec()
+            return fn(*run_args, **run_kwargs)
+
+        gauge.inc()
+        try:
+            future = submit(run, *args, **kwargs)
+        except Exception:
+            gauge.dec()
+            raise
+        future.add_done_callback(lambda done: gauge.dec() if not started else None)
+        return future
+
+    executor.submit = monitored_submit
+    return executor
+
+
+HTTP_REQUESTS = Counter(
+    'garnishedge_http_requests',
+    'HTTP requests by method, resolved URL route and status code.',
+    ('method', 'route', 'status'),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'garnishedge_http_request_duration_seconds',
+    'HTTP request latency by method and resolved URL route.',
+    ('method', 'route'),
+    buckets=DEFAULT_DURATION_BUCKETS,
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    'garnishedge_http_request_db_queries',
+    'Database queries run on the request thread per HTTP request.',
+    ('route',),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+CALCULATIONS = Counter(
+    'garnishedge_calculations',
+    'Garnishment calculations by garnishment type and outcome (success, error, exception).',
+    ('garnishment_type', 'outcome'),
+)
+CALCULATION_DURATION = Histogram(
+    'garnishedge_calculation_duration_seconds',
+    'Garnishment calculation latency by garnishment type.',
+    ('garnishment_type',),
+    buckets=DEFAULT_DURATION_BUCKETS,
+)
+WORKER_POOL_QUEUE_DEPTH = Gauge(
+    'garnishedge_worker_pool_queue_depth',
+    'Tasks waiting for a worker thread, by pool.',
+    ('pool',),
+    # Summed over the live worker processes
+    multiprocess_mode='livesum',
+)
+
+
+def observe_calculation(garnishment_type, outcome, duration):
+    CALCULATIONS.labels(garnishment_type=garnishment_type or 'unknown', outcome=outcome).inc()
+    CALCULATION_DURATION.labels(garnishment_type=garnishment_type or 'unknown').observe(duration)
+
+
+def render_metrics():
+    """
+    Metrics of all worker processes in multiprocess mode, else of this one
+    """
+    if is_multiprocess():
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(DEFAULT_REGISTRY)
+
+
+def _is_allowed_address(address, networks):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    for network in networks:
+        try:
+            if ip in ipaddress.ip_network(network, strict=False):
+                return True
+        except ValueError:
+            logger.warning(f"Ignoring invalid METRICS_ALLOWED_NETWORKS entry '{network}'")
+    return False
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. When METRICS_AUTH_TOKEN is set the scraper
+    must send it as a bearer token; otherwise only clients in
+    METRICS_ALLOWED_NETWORKS (loopback by default) may scrape.
+    """
+    from django.conf import settings
+    from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound
+
+    if not getattr(settings, 'METRICS_ENABLED', True):
+        return HttpResponseNotFound()
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', None)
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden()
+    elif not _is_allowed_address(
+        request.META.get('REMOTE_ADDR', ''),
+        getattr(settings, 'METRICS_ALLOWED_NETWORKS', ['127.0.0.1/32', '::1/128'])
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
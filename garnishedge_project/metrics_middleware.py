@@ -0,0 +1,72 @@
+"""
+Middleware recording request rate, errors and latency per URL route
+"""
+import time
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUEST_DB_QUERIES
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries of one request
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Records garnishedge_http_* metrics for every request. Requests are
+    labelled with the URL pattern they resolved to (e.g.
+    "employee/details/<str:ee_id>/"), not the raw path, so the number of
+    series stays bounded. Queries of streaming and file responses are
+    counted until the response is closed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start_time = time.perf_counter()
+        query_counter = QueryCounter()
+        db = connections[DEFAULT_DB_ALIAS]
+        status = 500
+        streamed = False
+        db.execute_wrappers.append(query_counter)
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            if response.streaming:
+                # Streaming and file responses query while the body is sent;
+                # count until the server closes the response
+                response._resource_closers.append(partial(self._observe_queries, request, db, query_counter))
+                streamed = True
+            return response
+        finally:
+            duration = time.perf_counter() - start_time
+            route = self._get_route(request)
+            HTTP_REQUESTS.labels(method=request.method, route=route, status=status).inc()
+            HTTP_REQUEST_DURATION.labels(method=request.method, route=route).observe(duration)
+            if not streamed:
+                self._observe_queries(request, db, query_counter)
+
+    def _observe_queries(self, request, db, query_counter):
+        # Removed by identity: wrappers of inner middleware may still be installed
+        db.execute_wrappers.remove(query_counter)
+        HTTP_REQUEST_DB_QUERIES.labels(route=self._get_route(request)).observe(query_counter.count)
+
+    def _get_route(self, request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None or not resolver_match.route:
+            return UNMATCHED_ROUTE
+        return resolver_match.route
@@ -4,13 +4,18 @@ Tracks all CRUD operations on models with detailed change tracking
 """
 import json
 import logging
+from collections import namedtuple
 from datetime import datetime
 from typing import Dict, Any, Optional
 from django.db.models import Model
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from opentelemetry import trace
 from django.core.serializers.json import DjangoJSONEncoder
 
+from .audit_batch import SUMMARY_ACTION, get_current_audit_batch
+
 logger = logging.getLogger(__name__)
 
 class AuditJSONEncoder(DjangoJSONEncoder):
@@ -35,6 +40,31 @@ class AuditJSONEncoder(DjangoJSONEncoder):
             # Fall back to string representation
             return str(obj)
 
+# The user fields the writer thread needs, copied so it never touches the user object
+AuditUser = namedtuple('AuditUser', ('id', 'username'))
+
+_json_encoder = DjangoJSONEncoder()
+
+def to_audit_value(value):
+    """
+    Convert a value to plain JSON-safe data for an audit record. Model
+    instances become their primary key, so no related object is fetched or
+    read after the caller has moved on; dates, decimals and UUIDs become
+    strings.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Model):
+        return to_audit_value(value.pk)
+    if isinstance(value, dict):
+        return {str(key): to_audit_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_audit_value(item) for item in value]
+    try:
+        return _json_encoder.default(value)
+    except TypeError:
+        return str(value)
+
 class ModelAuditLogger:
     """
     Comprehensive model audit logging system
@@ -42,7 +72,10 @@ class ModelAuditLogger:
     
     def __init__(self):
         from .audit_logger import audit_logger
+        from .audit_sink import AuditSink, register_shutdown
         self.audit_logger = audit_logger
+        # Records are formatted and written by the sink's background thread
+        self.sink = register_shutdown(AuditSink(self._write_records))
     
     def log_model_operation(self, 
                           action: str, 
@@ -64,39 +97,81 @@ class ModelAuditLogger:
             old_values: Previous values (for UPDATE)
             new_values: New values (for CREATE/UPDATE)
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        username = user.username if user and user.is_authenticated else "anonymous"
-        
-        # Format changes for display
-        changes_display = self._format_changes(changes, old_values, new_values, action)
-        
-        # Create audit record
-        audit_record = {
-            "timestamp": timestamp,
-            "user": username,
+        authenticated = bool(user and user.is_authenticated)
+        span = trace.get_current_span()
+
+        # The record is copied to plain data here, on the caller's thread: the
+        # sink formats and writes it later, when the objects passed in may have
+        # changed. Formatting and I/O are done by the sink.
+        self.sink.submit({
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "occurred_at": timezone.now(),
+            "user": AuditUser(user.id, user.username) if authenticated else None,
+            "username": user.username if authenticated else "anonymous",
+            "user_id": str(user.id) if authenticated else None,
             "action": action,
             "model": model_name,
             "object_id": str(object_id),
-            "changes": changes_display,
-            "user_id": str(user.id) if user and user.is_authenticated else None,
+            "changes": to_audit_value(changes),
+            "old_values": to_audit_value(old_values),
+            "new_values": to_audit_value(new_values),
             "ip_address": self._get_current_ip(),
-            "session_id": self._get_session_id()
-        }
-        
-        # Log to file
-        self._log_to_file(audit_record)
-        
-        # Log to OpenTelemetry
-        self._log_to_telemetry(audit_record)
-        
-        # Log to audit logger
-        self.audit_logger.log_data_access(
-            model_name,
-            action,
-            record_id=str(object_id),
-            user=user,
-            details=audit_record
-        )
+            "session_id": self._get_session_id(),
+            "span": span if span and span.is_recording() else None,
+        })
+
+    def _write_records(self, records):
+        """
+        Format a batch of queued records and write them to the audit file,
+        OpenTelemetry, the audit logger and the audit_event table
+        """
+        log_lines = []
+        for record in records:
+            # Format changes for display
+            changes_display = self._format_changes(
+                record["changes"], record["old_values"], record["new_values"], record["action"]
+            )
+
+            # Create audit record
+            audit_record = {
+                "timestamp": record["timestamp"],
+                "user": record["username"],
+                "action": record["action"],
+                "model": record["model"],
+                "object_id": record["object_id"],
+                "changes": changes_display,
+                "user_id": record["user_id"],
+                "ip_address": record["ip_address"],
+                "session_id": record["session_id"]
+            }
+            log_lines.append(self._format_log_line(audit_record))
+
+            span = record["span"]
+            if span is not None and span.is_recording():
+                with trace.use_span(span, end_on_exit=False):
+                    # Log to OpenTelemetry
+                    self._log_to_telemetry(audit_record)
+
+                    # Log to audit logger
+                    self.audit_logger.log_data_access(
+                        record["model"],
+                        record["action"],
+                        record_id=record["object_id"],
+                        user=record["user"],
+                        details=audit_record
+                    )
+
+        # Log to file, one write per batch
+        if log_lines:
+            logging.getLogger('model_audit').info("\n".join(log_lines))
+
+        if getattr(settings, 'MODEL_AUDIT_DB_ENABLED', True):
+            from user_app.services.audit_events import AuditEventStore
+
+            try:
+                AuditEventStore.write(records)
+            except Exception:
+                logger.exception(f"Failed to store {len(records)} audit events")
     
     def _format_changes(self, changes: Dict[str, Any], old_values: Dict[str, Any], 
                        new_values: Dict[str, Any], action: str) -> str:
@@ -122,6 +197,11 @@ class ModelAuditLogger:
                 return json.dumps(old_values, indent=2, cls=AuditJSONEncoder)
             return "{}"
         
+        elif action.startswith("BULK_") or action == SUMMARY_ACTION:
+            if changes:
+                return json.dumps(changes, indent=2, cls=AuditJSONEncoder)
+            return "{}"
+        
         return "{}"
     
     def _get_current_ip(self) -> str:
@@ -142,12 +222,9 @@ class ModelAuditLogger:
         except:
             return 'unknown'
     
-    def _log_to_file(self, audit_record: Dict[str, Any]):
-        """Log to dedicated audit file"""
-        audit_logger = logging.getLogger('model_audit')
-        
-        # Format as table row
-        log_message = (
+    def _format_log_line(self, audit_record: Dict[str, Any]) -> str:
+        """Format a record as a row of the dedicated audit file"""
+        return (
             f"| {audit_record['timestamp']:<15} | "
             f"{audit_record['user']:<8} | "
             f"{audit_record['action']:<6} | "
@@ -155,8 +232,6 @@ class ModelAuditLogger:
             f"{audit_record['object_id']:<8} | "
             f"{audit_record['changes']:<25} |"
         )
-        
-        audit_logger.info(log_message)
     
     def _log_to_telemetry(self, audit_record: Dict[str, Any]):
         """Log to OpenTelemetry spans"""
@@ -214,6 +289,43 @@ def log_model_delete(model_name: str, object_id: str, user = None,
         old_values=old_values
     )
 
+def log_model_bulk_operation(action: str, model_name: str, object_ids, user = None,
+                             fields = None, details: Dict[str, Any] = None):
+    """
+    Log one record for a batch of objects written with bulk_create/bulk_update,
+    which bypass the per-instance save signals.
+
+    Args:
+        action: CREATE or UPDATE (logged as BULK_CREATE / BULK_UPDATE)
+        object_ids: identifiers of the objects written (e.g. ee_ids)
+        user: defaults to the user of the current request or import job
+        fields: fields written, for updates
+        details: extra counters to include (e.g. addresses created)
+    """
+    object_ids = [str(object_id) for object_id in object_ids]
+    if not object_ids:
+        return
+    if user is None:
+        from .user_context_middleware import get_current_user
+        user = get_current_user()
+
+    changes = {"count": len(object_ids), "object_ids": object_ids}
+    if fields:
+        changes["fields"] = sorted(fields)
+    if details:
+        changes.update(details)
+    audit_batch = get_current_audit_batch()
+    if audit_batch is not None:
+        changes.setdefault("batch_id", audit_batch.batch_id)
+
+    model_audit_logger.log_model_operation(
+        action=f"BULK_{action}",
+        model_name=model_name,
+        object_id=f"{len(object_ids)} rows",
+        user=user,
+        changes=changes
+    )
+
 def log_model_read(model_name: str, object_id: str, user = None):
     """Log model read access"""
     model_audit_logger.log_model_operation(
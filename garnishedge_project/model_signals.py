@@ -2,38 +2,164 @@
 Django model signals for automatic audit logging
 """
 import json
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import pre_save, post_save, post_delete, post_init
 from django.dispatch import receiver
 from django.db import transaction
 
-# Store original values for comparison
-_original_values = {}
+from .audit_batch import get_current_audit_batch
 
-@receiver(pre_save)
-def store_original_values(sender, instance, **kwargs):
+# Attribute holding the field values an instance was loaded with, as a tuple
+# ordered like _audit_attnames(). Kept on the instance so it is freed with it.
+ORIGINAL_VALUES_ATTR = '_audit_original_values'
+
+# Placeholder for deferred fields that were not loaded
+_NOT_LOADED = object()
+
+_attnames_cache = {}
+
+# Models whose saves are not audited: the audit store itself
+AUDIT_EXCLUDED_MODELS = {'user_app.AuditEvent'}
+
+def _audit_attnames(model):
     """
-    Store original values before save for comparison
+    Concrete field (name, attname) pairs of a model, cached per model class.
+    attname is used so foreign keys compare by id without fetching the
+    related object.
     """
-    if hasattr(instance, 'pk') and instance.pk:
-        try:
-            original = sender.objects.get(pk=instance.pk)
-            _original_values[instance.pk] = {
-                'model': sender.__name__,
-                'values': {
-                    field.name: getattr(original, field.name)
-                    for field in original._meta.fields
-                    if hasattr(original, field.name)
-                }
+    attnames = _attnames_cache.get(model)
+    if attnames is None:
+        attnames = tuple((field.name, field.attname) for field in model._meta.concrete_fields)
+        _attnames_cache[model] = attnames
+    return attnames
+
+def _snapshot(instance):
+    values = instance.__dict__
+    return tuple([values.get(attname, _NOT_LOADED) for _, attname in _audit_attnames(type(instance))])
+
+def _add_to_audit_batch(audit_batch, action, instance, values, detail=None):
+    # Deferred fields are hashed as None so the batch fingerprint is stable
+    if _NOT_LOADED in values:
+        values = tuple(None if value is _NOT_LOADED else value for value in values)
+    audit_batch.add(action, type(instance).__name__, instance.pk, values, detail)
+
+def _saved_indexes(model, update_fields):
+    """
+    Positions in _audit_attnames(model) of the fields a save writes; None
+    when it writes every loaded field
+    """
+    if update_fields is None:
+        return None
+    return {
+        index for index, (field_name, attname) in enumerate(_audit_attnames(model))
+        if field_name in update_fields or attname in update_fields
+    }
+
+def _diff(model, original, instance, update_fields=None):
+    """
+    The loaded values and the {field: {'old', 'new'}} changes of a saved
+    instance, compared with the values it was loaded with. With
+    update_fields only the fields written by the save are compared.
+    """
+    saved_indexes = _saved_indexes(model, update_fields)
+    old_values = {}
+    changes = {}
+    for index, ((field_name, attname), old_value) in enumerate(zip(_audit_attnames(model), original)):
+        if old_value is _NOT_LOADED or (saved_indexes is not None and index not in saved_indexes):
+            continue
+        old_values[field_name] = old_value
+        new_value = instance.__dict__.get(attname, _NOT_LOADED)
+        if new_value is not _NOT_LOADED and old_value != new_value:
+            changes[field_name] = {
+                'old': old_value,
+                'new': new_value
             }
-        except sender.DoesNotExist:
-            pass
+    return old_values, changes
+
+def _loaded_values(instance):
+    # Foreign keys by id, so no related object is fetched
+    return {
+        field_name: instance.__dict__[attname]
+        for field_name, attname in _audit_attnames(type(instance))
+        if attname in instance.__dict__
+    }
+
+@receiver(post_init)
+def store_original_values(sender, instance, **kwargs):
+    """
+    Snapshot field values when an instance is built or loaded, so updates
+    can be diffed without re-reading the row in pre_save
+    """
+    if sender._meta.label in AUDIT_EXCLUDED_MODELS:
+        return
+    instance.__dict__[ORIGINAL_VALUES_ATTR] = _snapshot(instance)
+
+def _saved_snapshot(instance, original, update_fields):
+    """
+    The baseline for the next save: the current values of the fields this
+    save wrote, the original values of the others
+    """
+    saved = _snapshot(instance)
+    saved_indexes = _saved_indexes(type(instance), update_fields)
+    if saved_indexes is None or original is None:
+        return saved
+    return tuple(saved[index] if index in saved_indexes else old for index, old in enumerate(original))
+
+@receiver(pre_save)
+def load_deferred_original_values(sender, instance, update_fields=None, using=None, **kwargs):
+    """
+    Fields that were deferred when the instance was loaded (only()/defer())
+    have no original value to diff against. When such a field has been set
+    and is about to be saved, read its stored value with one narrow query.
+    """
+    if sender._meta.label in AUDIT_EXCLUDED_MODELS or instance._state.adding or instance.pk is None:
+        return
+    attnames = _audit_attnames(sender)
+    original = instance.__dict__.get(ORIGINAL_VALUES_ATTR) or (_NOT_LOADED,) * len(attnames)
+    if _NOT_LOADED not in original:
+        return
+
+    saved_indexes = _saved_indexes(sender, update_fields)
+    missing = [
+        index for index, ((_, attname), value) in enumerate(zip(attnames, original))
+        if value is _NOT_LOADED and attname in instance.__dict__
+        and (saved_indexes is None or index in saved_indexes)
+    ]
+    if not missing:
+        return
+    stored = sender._base_manager.using(using).filter(pk=instance.pk).values(
+        *[attnames[index][1] for index in missing]
+    ).first()
+    if stored is None:
+        return
+    original = list(original)
+    for index in missing:
+        original[index] = stored[attnames[index][1]]
+    instance.__dict__[ORIGINAL_VALUES_ATTR] = tuple(original)
 
 @receiver(post_save)
-def log_model_save(sender, instance, created, **kwargs):
+def log_model_save(sender, instance, created, update_fields=None, **kwargs):
     """
     Log model creation and updates
     """
     from .model_audit import log_model_create, log_model_update
+
+    if sender._meta.label in AUDIT_EXCLUDED_MODELS:
+        return
+
+    # Inside aggregated_audit() rows are summarised per batch instead
+    audit_batch = get_current_audit_batch()
+    if audit_batch is not None:
+        original = instance.__dict__.get(ORIGINAL_VALUES_ATTR)
+        saved = _snapshot(instance)
+        if created:
+            _add_to_audit_batch(audit_batch, 'CREATE', instance, saved)
+        elif original is not None:
+            # The per-row diff is kept in the summary; the table does not record it
+            _, changes = _diff(sender, original, instance, update_fields)
+            if changes:
+                _add_to_audit_batch(audit_batch, 'UPDATE', instance, saved, changes)
+        instance.__dict__[ORIGINAL_VALUES_ATTR] = _saved_snapshot(instance, original, update_fields)
+        return
     
     # Get the current user from thread local storage or request
     user = get_current_user()
@@ -47,11 +173,7 @@ def log_model_save(sender, instance, created, **kwargs):
     
     if created:
         # Log creation
-        new_values = {
-            field.name: getattr(instance, field.name)
-            for field in instance._meta.fields
-            if hasattr(instance, field.name)
-        }
+        new_values = _loaded_values(instance)
         
         log_model_create(
             model_name=model_name,
@@ -61,29 +183,16 @@ def log_model_save(sender, instance, created, **kwargs):
         )
     else:
         # Log update
-        original_data = _original_values.get(instance.pk, {})
-        old_values = original_data.get('values', {})
-        
-        # Calculate changes
-        changes = {}
-        for field in instance._meta.fields:
-            if hasattr(instance, field.name):
-                field_name = field.name
-                old_value = old_values.get(field_name)
-                new_value = getattr(instance, field_name)
-                
-                if old_value != new_value:
-                    changes[field_name] = {
-                        'old': old_value,
-                        'new': new_value
-                    }
+        original = instance.__dict__.get(ORIGINAL_VALUES_ATTR)
+        if original is None:
+            original = (_NOT_LOADED,) * len(_audit_attnames(sender))
+
+        # Calculate changes against the values the instance was loaded with
+        old_values, changes = _diff(sender, original, instance, update_fields)
         
         if changes:  # Only log if there were actual changes
-            new_values = {
-                field.name: getattr(instance, field.name)
-                for field in instance._meta.fields
-                if hasattr(instance, field.name)
-            }
+            # Foreign keys are logged by id, like old_values, to avoid fetching them
+            new_values = _loaded_values(instance)
             
             log_model_update(
                 model_name=model_name,
@@ -93,9 +202,11 @@ def log_model_save(sender, instance, created, **kwargs):
                 old_values=old_values,
                 new_values=new_values
             )
-        
-        # Clean up stored values
-        _original_values.pop(instance.pk, None)
+
+    # The saved values are the baseline for the next save of this instance
+    instance.__dict__[ORIGINAL_VALUES_ATTR] = _saved_snapshot(
+        instance, instance.__dict__.get(ORIGINAL_VALUES_ATTR), None if created else update_fields
+    )
 
 @receiver(post_delete)
 def log_model_delete(sender, instance, **kwargs):
@@ -103,6 +214,15 @@ def log_model_delete(sender, instance, **kwargs):
     Log model deletion
     """
     from .model_audit import log_model_delete
+
+    if sender._meta.label in AUDIT_EXCLUDED_MODELS:
+        return
+
+    audit_batch = get_current_audit_batch()
+    if audit_batch is not None:
+        # The deleted values are kept in the summary; the row is gone
+        _add_to_audit_batch(audit_batch, 'DELETE', instance, _snapshot(instance), _loaded_values(instance))
+        return
     
     user = get_current_user()
     
@@ -114,11 +234,7 @@ def log_model_delete(sender, instance, **kwargs):
     object_id = str(instance.pk)
     
     # Get the values before deletion
-    old_values = {
-        field.name: getattr(instance, field.name)
-        for field in instance._meta.fields
-        if hasattr(instance, field.name)
-    }
+    old_values = _loaded_values(instance)
     
     log_model_delete(
         model_name=model_name,
@@ -127,6 +243,15 @@ def log_model_delete(sender, instance, **kwargs):
         old_values=old_values
     )
 
+@receiver([post_save, post_delete])
+def clear_reference_data_cache(sender, **kwargs):
+    """
+    Drop cached import lookup tables when states or garnishment types change
+    """
+    if sender._meta.label in ('processor.State', 'processor.GarnishmentType'):
+        from user_app.services.import_lookups import ReferenceDataCache
+        ReferenceDataCache.clear_cache()
+
 def get_current_user():
     """
     Get the current user from thread local storage
@@ -0,0 +1,198 @@
+"""
+Per-endpoint query budgets and N+1 detection.
+
+QueryRecorder is a database execute wrapper that counts the queries of a
+block and groups them by SQL shape (the parametrised SQL with IN lists and
+multi-row VALUES collapsed). A shape repeated QUERY_N_PLUS_ONE_THRESHOLD
+times or more is reported as a likely N+1: the same lookup issued once per
+row instead of once per batch.
+
+QueryBudgetMiddleware records every request and checks it against the budget
+registered for its URL name in QUERY_BUDGETS (QUERY_BUDGET_OVERRIDES in
+settings take precedence). QUERY_BUDGET_MODE decides what a violation does:
+"off" (not recorded), "warn" (logged) or "raise" (QueryBudgetExceeded, for
+test and CI settings).
+
+In tests, wrap the request in assert_query_budget::
+
+    with assert_query_budget('employee:employee_rules'):
+        client.get('/employee/rules/')
+
+    with assert_query_budget(max_queries=5):
+        ...
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+logger = logging.getLogger(__name__)
+
+# Maximum queries per request by URL name ("namespace:name"). Budgets are for
+# a page or batch of any size: a view that needs more queries as it returns
+# more rows has an N+1 and should prefetch instead.
+QUERY_BUDGETS = {
+    'employee:employee-list-create': 10,
+    'employee:employee-detail': 10,
+    'employee:employee_rules': 10,
+    'employee:employee-garnishment-list': 10,
+    'employee:employee-garnishment-details': 12,
+    'employee:export_employees': 10,
+    'garnishment_order:garnishment-order-list-create': 10,
+    'garnishment_order:garnishment-order-detail': 10,
+    'garnishment_order:order_details': 10,
+    'payee:detail': 10,
+    'payee:sdu-by-state': 10,
+    'payee:sdu-export': 10,
+    'client:client-export': 10,
+    'ach:ach-files-list': 10,
+    'ach:ach-config-list-create': 10,
+    'ach:ach-generate': 20,
+    'export:export-job-status': 5,
+    'export:export-job-download': 5,
+    'audit:audit-event-list': 5,
+}
+
+IN_LIST_PATTERN = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+REPEATED_GROUP_PATTERN = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised in "raise" mode when a request exceeds its query budget or
+    repeats a query shape past the N+1 threshold.
+    """
+
+
+def sql_shape(sql):
+    """
+    Parametrised SQL with IN lists and multi-row VALUES collapsed, so the
+    same lookup for different rows or batch sizes has one shape.
+    """
+    shape = IN_LIST_PATTERN.sub('(...)', sql)
+    return REPEATED_GROUP_PATTERN.sub('(...)', shape)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting queries by SQL shape
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.shapes[sql_shape(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def repeated_shapes(self, threshold):
+        """
+        (shape, count) of the shapes run at least threshold times, most
+        repeated first
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+def get_query_budget(view_name):
+    overrides = getattr(settings, 'QUERY_BUDGET_OVERRIDES', {})
+    if view_name in overrides:
+        return overrides[view_name]
+    return QUERY_BUDGETS.get(view_name)
+
+
+def check_query_budget(recorder, max_queries=None, n_plus_one_threshold=None):
+    """
+    Problems found in a recorded block, as messages (empty when within budget)
+    """
+    if n_plus_one_threshold is None:
+        n_plus_one_threshold = getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 5)
+
+    problems = []
+    if max_queries is not None and recorder.count > max_queries:
+        problems.append(f"{recorder.count} queries exceed the budget of {max_queries}")
+    for shape, count in recorder.repeated_shapes(n_plus_one_threshold):
+        problems.append(f"possible N+1: query repeated {count} times: {shape[:300]}")
+    return problems
+
+
+@contextmanager
+def record_queries(using=None):
+    """
+    Record the queries run on this thread's connection inside the block
+    """
+    recorder = QueryRecorder()
+    with (connections[using] if using else connection).execute_wrapper(recorder):
+        yield recorder
+
+
+@contextmanager
+def assert_query_budget(view_name=None, max_queries=None, n_plus_one_threshold=None):
+    """
+    Test helper: fail with AssertionError if the block exceeds the budget
+    registered for view_name (or max_queries) or shows an N+1 pattern.
+    """
+    if max_queries is None and view_name is not None:
+        max_queries = get_query_budget(view_name)
+        if max_queries is None:
+            raise AssertionError(f"No query budget registered for {view_name}")
+
+    with record_queries() as recorder:
+        yield recorder
+
+    problems = check_query_budget(recorder, max_queries, n_plus_one_threshold)
+    if problems:
+        raise AssertionError(f"{view_name or 'Block'}: " + '; '.join(problems))
+
+
+class QueryBudgetMiddleware:
+    """
+    Checks each request's queries against its registered budget and for
+    repeated query shapes. Queries run by worker threads are not counted.
+
+    Streaming and file responses run their queries while the body is sent,
+    so they are recorded until the server closes the response. Django
+    swallows exceptions raised on close, so their violations are logged
+    even in "raise" mode.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.mode = getattr(settings, 'QUERY_BUDGET_MODE', 'off')
+
+    def __call__(self, request):
+        if self.mode == 'off':
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        db = connections[DEFAULT_DB_ALIAS]
+        db.execute_wrappers.append(recorder)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            db.execute_wrappers.remove(recorder)
+            raise
+
+        if response.streaming:
+            response._resource_closers.append(partial(self._finish, request, db, recorder, streamed=True))
+        else:
+            self._finish(request, db, recorder)
+        return response
+
+    def _finish(self, request, db, recorder, streamed=False):
+        db.execute_wrappers.remove(recorder)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        view_name = resolver_match.view_name if resolver_match else None
+        problems = check_query_budget(recorder, get_query_budget(view_name) if view_name else None)
+        if problems:
+            message = f"Query budget check failed for {request.method} {request.path} ({view_name}): " + \
+                '; '.join(problems)
+            if self.mode == 'raise' and not streamed:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -0,0 +1,297 @@
+"""
+On-demand request profiling.
+
+RequestProfilingMiddleware profiles a request when it carries the
+X-Profile-Request header with REQUEST_PROFILING_TOKEN, or when it is picked
+at REQUEST_PROFILING_SAMPLE_RATE. A profiled request is run under
+SamplingProfiler, which records the stack of the request thread (and of
+threads started during the request, e.g. the calculation worker pool) every
+REQUEST_PROFILING_INTERVAL_MS. Its SQL statements are recorded with their
+offsets and durations. The result is stored by ProfileStore under an id
+returned in the X-Profile-Id response header. Stacks use the folded format
+read by flamegraph.pl and speedscope.
+
+With REQUEST_PROFILING_ENABLED off the middleware removes itself from the
+middleware chain at startup, so unprofiled deployments pay nothing.
+"""
+import hmac
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile-Request'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+# Statements kept per profile; later ones are only counted
+MAX_SQL_STATEMENTS = 2000
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the profiled thread from a background thread.
+    Only the sampler thread does work between samples, so the profiled code
+    runs at full speed apart from the GIL hand-offs.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self.sample_count = 0
+        self._labels = {}
+        self._existing_threads = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._path_prefixes = sorted(
+            {str(settings.BASE_DIR) + os.sep, *(path + os.sep for path in sys.path if path)},
+            key=len,
+            reverse=True
+        )
+
+    def start(self):
+        # Threads alive now belong to other requests; threads started later
+        # are attributed to this one
+        self._existing_threads = set(sys._current_frames()) - {self.thread_id}
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        sampler_id = threading.get_ident()
+        thread_names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id or thread_id in self._existing_threads:
+                    continue
+                if thread_id == self.thread_id:
+                    root = 'request'
+                else:
+                    root = thread_names.get(thread_id)
+                    if root is None:
+                        root = thread_names[thread_id] = self._thread_name(thread_id)
+                self.stacks[self._fold(root, frame)] += 1
+            self.sample_count += 1
+
+    def _thread_name(self, thread_id):
+        for thread in threading.enumerate():
+            if thread.ident == thread_id:
+                # Pool threads are named <pool>_<n>; group the workers of a pool
+                return thread.name.rsplit('_', 1)[0]
+        return 'thread'
+
+    def _fold(self, root, frame):
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.append(root)
+        return ';'.join(reversed(labels))
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            file_name = code.co_filename
+            for prefix in self._path_prefixes:
+                if file_name.startswith(prefix):
+                    file_name = file_name[len(prefix):]
+                    break
+            label = self._labels[code] = f"{code.co_name} ({file_name}:{code.co_firstlineno})"
+        return label
+
+    def folded(self):
+        """
+        Stacks in folded format: "root;caller;callee count" per line
+        """
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+
+class SQLTimeline:
+    """
+    Database execute wrapper recording when each statement ran and for how long
+    """
+
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.statements = []
+        self.count = 0
+        self.total_duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total_duration += duration
+            # Parameters are left out so stored profiles carry no row data
+            if len(self.statements) < MAX_SQL_STATEMENTS:
+                self.statements.append({
+                    'offset_ms': round((start - self.started_at) * 1000, 3),
+                    'duration_ms': round(duration * 1000, 3),
+                    'many': many,
+                    'sql': sql,
+                })
+
+
+class ProfileStore:
+    """
+    Stores profiles as <id>.json (metadata, SQL timeline and stacks) plus
+    <id>.folded in REQUEST_PROFILE_STORAGE_DIR, keeping the newest
+    REQUEST_PROFILE_MAX_STORED.
+    """
+
+    @staticmethod
+    def storage_dir():
+        return settings.REQUEST_PROFILE_STORAGE_DIR
+
+    @classmethod
+    def path(cls, profile_id, extension):
+        # Ids are generated hex strings; anything else is not a stored profile
+        if not profile_id or not profile_id.isalnum():
+            return None
+        return os.path.join(cls.storage_dir(), f"{profile_id}.{extension}")
+
+    @classmethod
+    def save(cls, profile, folded):
+        os.makedirs(cls.storage_dir(), exist_ok=True)
+        with open(cls.path(profile['id'], 'folded'), 'w', encoding='utf-8') as folded_file:
+            folded_file.write(folded)
+        json_path = cls.path(profile['id'], 'json')
+        with open(f"{json_path}.tmp", 'w', encoding='utf-8') as json_file:
+            json.dump(profile, json_file, default=str)
+        # The .json file appears last, so listed profiles are complete
+        os.replace(f"{json_path}.tmp", json_path)
+        cls.prune()
+
+    @classmethod
+    def list(cls, limit=None):
+        """
+        Metadata of stored profiles, newest first
+        """
+        profiles = []
+        for json_path in cls._json_paths():
+            try:
+                with open(json_path, encoding='utf-8') as json_file:
+                    profile = json.load(json_file)
+            except (OSError, ValueError):
+                continue
+            profile.pop('sql', None)
+            profile.pop('top_stacks', None)
+            profiles.append(profile)
+            if limit and len(profiles) >= limit:
+                break
+        return profiles
+
+    @classmethod
+    def prune(cls):
+        max_stored = max(1, getattr(settings, 'REQUEST_PROFILE_MAX_STORED', 100))
+        for json_path in cls._json_paths()[max_stored:]:
+            for path in (json_path, json_path[:-len('json')] + 'folded'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    @classmethod
+    def _json_paths(cls):
+        storage_dir = cls.storage_dir()
+        if not os.path.isdir(storage_dir):
+            return []
+        paths = [
+            os.path.join(storage_dir, name)
+            for name in os.listdir(storage_dir) if name.endswith('.json')
+        ]
+        return sorted(paths, key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0, reverse=True)
+
+
+class RequestProfilingMiddleware:
+    """
+    Profiles requests that ask for it with the profiling token or that are
+    sampled; see the module docstring.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.token = getattr(settings, 'REQUEST_PROFILING_TOKEN', None)
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 0.0)
+        self.interval = getattr(settings, 'REQUEST_PROFILING_INTERVAL_MS', 5) / 1000
+
+    def __call__(self, request):
+        trigger = self._get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        started_at = time.perf_counter()
+        started_on = datetime.now()
+        profiler = SamplingProfiler(self.interval)
+        timeline = SQLTimeline(started_at)
+        profiler.start()
+        try:
+            with connection.execute_wrapper(timeline):
+                response = self.get_response(request)
+        finally:
+            profiler.stop()
+        duration = time.perf_counter() - started_at
+
+        try:
+            profile_id = uuid.uuid4().hex
+            self._store(profile_id, request, response, trigger, started_on, duration, profiler, timeline)
+            response[PROFILE_ID_HEADER] = profile_id
+        except Exception:
+            logger.exception(f"Failed to store profile of {request.method} {request.path}")
+        return response
+
+    def _get_trigger(self, request):
+        header = request.headers.get(PROFILE_HEADER)
+        if header and self.token and hmac.compare_digest(header, self.token):
+            return 'header'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def _store(self, profile_id, request, response, trigger, started_on, duration, profiler, timeline):
+        resolver_match = getattr(request, 'resolver_match', None)
+        profile = {
+            'id': profile_id,
+            'created_at': started_on.isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'view_name': resolver_match.view_name if resolver_match else None,
+            'status_code': response.status_code,
+            'trigger': trigger,
+            'duration_ms': round(duration * 1000, 2),
+            'request_content_length': request.META.get('CONTENT_LENGTH') or 0,
+            'sample_interval_ms': round(profiler.interval * 1000, 3),
+            'sample_count': profiler.sample_count,
+            'sql_count': timeline.count,
+            'sql_duration_ms': round(timeline.total_duration * 1000, 2),
+            'sql': timeline.statements,
+            'top_stacks': [
+                {'stack': stack, 'samples': count} for stack, count in profiler.stacks.most_common(20)
+            ],
+        }
+        ProfileStore.save(profile, profiler.folded())
+        logger.info(
+            f"Profiled {request.method} {request.path} as {profile_id} ({trigger}): "
+            f"{profile['duration_ms']} ms, {profiler.sample_count} samples, {timeline.count} queries"
+        )
@@ -61,6 +61,8 @@ AUTHENTICATION_BACKENDS = [
 INTERNAL_IPS = ['127.0.0.1',]
 
 MIDDLEWARE = [
+    # Request rate, errors and latency per route for /metrics
+    'garnishedge_project.metrics_middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,6 +77,10 @@ MIDDLEWARE = [
     # OpenTelemetry audit logging middleware
     'garnishedge_project.audit_middleware.AuditLoggingMiddleware',
     'garnishedge_project.audit_middleware.DatabaseAuditMiddleware',
+    # Per-endpoint query budgets and N+1 detection (QUERY_BUDGET_MODE)
+    'garnishedge_project.query_budget.QueryBudgetMiddleware',
+    # Opt-in request profiling (REQUEST_PROFILING_ENABLED)
+    'garnishedge_project.request_profiler.RequestProfilingMiddleware',
     "debug_toolbar.middleware.DebugToolbarMiddleware"
 ]
 
@@ -106,6 +112,16 @@ CORS_ALLOW_HEADERS = [
     'X-Session-ID',  # Uppercase version
 ]
 
+# Response headers readable by the frontend (letter generation metadata)
+CORS_EXPOSE_HEADERS = [
+    'Content-Disposition',
+    'X-Unfilled-Variables',
+    'X-Bulk-Run-Id',
+    'X-Profile-Id',
+    'X-Bulk-Total',
+    'X-Batch-Id',
+]
+
 
 TEMPLATES = [
     {
@@ -202,6 +218,160 @@ except AttributeError:
     import json
     CDC_CAPTURE_INSTANCES = json.loads(env('CDC_CAPTURE_INSTANCES', default='{}'))
 
+# With source=all the capture tables are read concurrently, each on its own
+# database connection, by up to CDC_FETCH_WORKERS threads.
+CDC_FETCH_WORKERS = env.int('CDC_FETCH_WORKERS', default=4)
+
+# -----------------------------------------------------------------------------
+# Bulk letter generation
+# -----------------------------------------------------------------------------
+# Number of worker processes used to render letters (PDF/DOCX/TXT) in
+# `LetterTemplateBulkFillAPI`, and the maximum number of letters per request.
+LETTER_BULK_RENDER_WORKERS = env.int('LETTER_BULK_RENDER_WORKERS', default=2)
+LETTER_BULK_MAX_LETTERS = env.int('LETTER_BULK_MAX_LETTERS', default=5000)
+# Progress records of bulk runs (polled at /letter/bulk-fill/progress/<run_id>/)
+# are kept this long.
+LETTER_BULK_RUN_RETENTION_HOURS = env.int('LETTER_BULK_RUN_RETENTION_HOURS', default=24)
+
+# -----------------------------------------------------------------------------
+# Background export jobs
+# -----------------------------------------------------------------------------
+# Full-table exports (employees, orders, letter CSV, ACH) are built by a small
+# thread pool into EXPORT_JOB_STORAGE_DIR and downloaded once ready. Finished
+# artifacts are reused until they expire or the underlying data changes; jobs
+# that stay pending/running longer than the stale timeout are rebuilt.
+EXPORT_JOB_STORAGE_DIR = env('EXPORT_JOB_STORAGE_DIR', default=os.path.join(BASE_DIR, 'exports'))
+EXPORT_JOB_WORKERS = env.int('EXPORT_JOB_WORKERS', default=2)
+EXPORT_JOB_TTL_MINUTES = env.int('EXPORT_JOB_TTL_MINUTES', default=30)
+EXPORT_JOB_STALE_MINUTES = env.int('EXPORT_JOB_STALE_MINUTES', default=30)
+
+# -----------------------------------------------------------------------------
+# File imports
+# -----------------------------------------------------------------------------
+# Employee, garnishment order, payee, client and PEO uploads are read and
+# written IMPORT_CHUNK_SIZE rows at a time so memory stays flat for large files.
+IMPORT_CHUNK_SIZE = env.int('IMPORT_CHUNK_SIZE', default=5000)
+# On PostgreSQL, employee/order/payee rows are COPY'd into a staging table and
+# upserted with one INSERT ... ON CONFLICT statement. Other backends (and this
+# flag set to False) use the ORM bulk_create/bulk_update path.
+IMPORT_COPY_UPSERT_ENABLED = env.bool('IMPORT_COPY_UPSERT_ENABLED', default=True)
+# States and garnishment types used to resolve imported rows are cached per
+# process for this many seconds (and dropped when either table changes).
+REFERENCE_DATA_CACHE_SECONDS = env.int('REFERENCE_DATA_CACHE_SECONDS', default=300)
+# Uploads submitted as background import jobs are stored in
+# IMPORT_JOB_STORAGE_DIR and processed by a small thread pool. Error reports of
+# finished jobs are kept for IMPORT_JOB_RETENTION_HOURS. Jobs left pending or
+# running for IMPORT_JOB_STALE_MINUTES without progress are resubmitted
+# (pending) or marked failed (running).
+IMPORT_JOB_STORAGE_DIR = env('IMPORT_JOB_STORAGE_DIR', default=os.path.join(BASE_DIR, 'imports'))
+IMPORT_JOB_WORKERS = env.int('IMPORT_JOB_WORKERS', default=2)
+IMPORT_JOB_RETENTION_HOURS = env.int('IMPORT_JOB_RETENTION_HOURS', default=72)
+IMPORT_JOB_STALE_MINUTES = env.int('IMPORT_JOB_STALE_MINUTES', default=30)
+
+# -----------------------------------------------------------------------------
+# IWO PDF ingestion
+# -----------------------------------------------------------------------------
+# Uploaded IWO PDFs are stored and analysed IWO_PDF_WORKERS at a time; PDFs
+# whose bytes match an already ingested file are not analysed again. Use
+# LocalPDFStorage / LocalStubExtractor to run without Vercel Blob and Azure.
+IWO_PDF_WORKERS = env.int('IWO_PDF_WORKERS', default=4)
+IWO_PDF_STORAGE = env('IWO_PDF_STORAGE', default='user_app.services.iwo_pdf_ingestion.VercelBlobStorage')
+IWO_PDF_EXTRACTOR = env('IWO_PDF_EXTRACTOR', default='user_app.services.iwo_pdf_ingestion.AzureDocumentExtractor')
+IWO_PDF_LOCAL_STORAGE_DIR = env('IWO_PDF_LOCAL_STORAGE_DIR', default=os.path.join(BASE_DIR, 'iwo_pdfs'))
+
+# -----------------------------------------------------------------------------
+# Model audit sink
+# -----------------------------------------------------------------------------
+# Model audit records are queued and written to the model_audit log and
+# OpenTelemetry by a background thread, in batches of MODEL_AUDIT_BATCH_SIZE or
+# every MODEL_AUDIT_FLUSH_INTERVAL_SECONDS. When the queue is full the policy
+# is "sync" (write inline, the default), "block" (wait up to
+# MODEL_AUDIT_QUEUE_BLOCK_SECONDS, then drop) or "drop" (count and discard).
+MODEL_AUDIT_ASYNC = env.bool('MODEL_AUDIT_ASYNC', default=True)
+MODEL_AUDIT_QUEUE_SIZE = env.int('MODEL_AUDIT_QUEUE_SIZE', default=10000)
+MODEL_AUDIT_BATCH_SIZE = env.int('MODEL_AUDIT_BATCH_SIZE', default=200)
+MODEL_AUDIT_FLUSH_INTERVAL_SECONDS = env.float('MODEL_AUDIT_FLUSH_INTERVAL_SECONDS', default=1.0)
+MODEL_AUDIT_QUEUE_FULL_POLICY = env('MODEL_AUDIT_QUEUE_FULL_POLICY', default='sync')
+MODEL_AUDIT_QUEUE_BLOCK_SECONDS = env.float('MODEL_AUDIT_QUEUE_BLOCK_SECONDS', default=0.5)
+# Inside aggregated_audit a BATCH_SUMMARY part is logged every
+# MODEL_AUDIT_BATCH_SUMMARY_ROWS rows of a model, so long imports keep a bounded
+# amount of audit detail in memory and leave a trail if they die midway.
+MODEL_AUDIT_BATCH_SUMMARY_ROWS = env.int('MODEL_AUDIT_BATCH_SUMMARY_ROWS', default=5000)
+
+# -----------------------------------------------------------------------------
+# Audit event store
+# -----------------------------------------------------------------------------
+# The audit sink also bulk-inserts every record into the audit_event table,
+# which admins can query at /audit/events/ by model and object id, user, batch
+# and time range. Events older than AUDIT_EVENT_RETENTION_DAYS are purged
+# nightly in chunks (0 keeps them forever).
+MODEL_AUDIT_DB_ENABLED = env.bool('MODEL_AUDIT_DB_ENABLED', default=True)
+AUDIT_EVENT_RETENTION_DAYS = env.int('AUDIT_EVENT_RETENTION_DAYS', default=365)
+AUDIT_EVENT_PAGE_SIZE = env.int('AUDIT_EVENT_PAGE_SIZE', default=100)
+
+# -----------------------------------------------------------------------------
+# Request audit spans
+# -----------------------------------------------------------------------------
+# AuditLoggingMiddleware builds a request span only once the response is known.
+# Failed requests and requests slower than AUDIT_SLOW_REQUEST_MS always get one,
+# including headers, query parameters and the request body. Other requests get
+# a span without payloads at the rate of the longest matching path prefix in
+# AUDIT_SAMPLING_RULES (e.g. {"/metrics": 0, "/garnishment/calculate/": 0.1}),
+# or AUDIT_SAMPLE_RATE. Bodies larger than AUDIT_REQUEST_BODY_MAX_BYTES
+# (by Content-Length) are never read by the middleware.
+AUDIT_SAMPLE_RATE = env.float('AUDIT_SAMPLE_RATE', default=1.0)
+try:
+    AUDIT_SAMPLING_RULES = env.json('AUDIT_SAMPLING_RULES', default={})
+except AttributeError:
+    import json
+    AUDIT_SAMPLING_RULES = json.loads(env('AUDIT_SAMPLING_RULES', default='{}'))
+AUDIT_SLOW_REQUEST_MS = env.int('AUDIT_SLOW_REQUEST_MS', default=1000)
+AUDIT_REQUEST_BODY_MAX_BYTES = env.int('AUDIT_REQUEST_BODY_MAX_BYTES', default=2000)
+
+# -----------------------------------------------------------------------------
+# Prometheus metrics
+# -----------------------------------------------------------------------------
+# Request, calculation and worker pool metrics are served at /metrics. Under
+# gunicorn, PROMETHEUS_MULTIPROC_DIR (set by gunicorn.conf.py) holds the samples
+# of every worker so a scrape reports the whole service. Set METRICS_AUTH_TOKEN
+# to require "Authorization: Bearer <token>" from the scraper; without a token
+# only clients in METRICS_ALLOWED_NETWORKS may scrape.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+METRICS_AUTH_TOKEN = env('METRICS_AUTH_TOKEN', default=None)
+METRICS_ALLOWED_NETWORKS = env.list('METRICS_ALLOWED_NETWORKS', default=['127.0.0.1/32', '::1/128'])
+
+# -----------------------------------------------------------------------------
+# Query budgets
+# -----------------------------------------------------------------------------
+# QueryBudgetMiddleware checks each request against the query budget of its
+# URL name (garnishedge_project.query_budget.QUERY_BUDGETS, overridden by
+# QUERY_BUDGET_OVERRIDES) and flags SQL repeated QUERY_N_PLUS_ONE_THRESHOLD
+# times or more as a likely N+1. QUERY_BUDGET_MODE is "off", "warn" (log a
+# warning) or "raise" (fail the request; for tests and CI).
+QUERY_BUDGET_MODE = env('QUERY_BUDGET_MODE', default='warn' if DEBUG else 'off')
+QUERY_N_PLUS_ONE_THRESHOLD = env.int('QUERY_N_PLUS_ONE_THRESHOLD', default=5)
+try:
+    QUERY_BUDGET_OVERRIDES = env.json('QUERY_BUDGET_OVERRIDES', default={})
+except AttributeError:
+    import json
+    QUERY_BUDGET_OVERRIDES = json.loads(env('QUERY_BUDGET_OVERRIDES', default='{}'))
+
+# -----------------------------------------------------------------------------
+# Request profiling
+# -----------------------------------------------------------------------------
+# With REQUEST_PROFILING_ENABLED, a request sending
+# "X-Profile-Request: <REQUEST_PROFILING_TOKEN>" (or picked at
+# REQUEST_PROFILING_SAMPLE_RATE) is run under a sampling profiler. Its stacks
+# and SQL timeline are stored in REQUEST_PROFILE_STORAGE_DIR under the id
+# returned in X-Profile-Id, and admins can list and download them at
+# /profiles/. Only the newest REQUEST_PROFILE_MAX_STORED profiles are kept.
+REQUEST_PROFILING_ENABLED = env.bool('REQUEST_PROFILING_ENABLED', default=False)
+REQUEST_PROFILING_TOKEN = env('REQUEST_PROFILING_TOKEN', default=None)
+REQUEST_PROFILING_SAMPLE_RATE = env.float('REQUEST_PROFILING_SAMPLE_RATE', default=0.0)
+REQUEST_PROFILING_INTERVAL_MS = env.float('REQUEST_PROFILING_INTERVAL_MS', default=5.0)
+REQUEST_PROFILE_STORAGE_DIR = env('REQUEST_PROFILE_STORAGE_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+REQUEST_PROFILE_MAX_STORED = env.int('REQUEST_PROFILE_MAX_STORED', default=100)
+
 FILE_UPLOAD_HANDLERS = [
     'django.core.files.uploadhandler.MemoryFileUploadHandler',
     'django.core.files.uploadhandler.TemporaryFileUploadHandler',
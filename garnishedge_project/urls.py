@@ -28,9 +28,11 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from garnishedge_project.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 
      # OpenAPI schema
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -78,6 +80,11 @@ urlpatterns = [
     path('exempt_amt/', include('processor.urls.configs.exempt_urls', namespace='exempt_amt')),
     path('exempt/', include('processor.urls.configs.exempt_rule_urls', namespace='exempt_rule')),
     path('letter/', include('user_app.urls.letter_template_urls', namespace='letter_template')),
+    path('export/', include('user_app.urls.export_job_urls', namespace='export')),
+    path('import/', include('user_app.urls.import_job_urls', namespace='import')),
+    path('payroll/', include('user_app.urls.payroll_urls', namespace='payroll')),
+    path('profiles/', include('user_app.urls.request_profile_urls', namespace='profiles')),
+    path('audit/', include('user_app.urls.audit_event_urls', namespace='audit')),
     path('ach/', include('processor.urls.configs.ach_urls', namespace='ach')),
     path('garnishment_type/', include('processor.urls.garnishment_types.garnishment_type_urls', namespace='garnishment_type')),
     path('payment-history/', include('processor.urls.garnishment_types.payment_history_urls', namespace='payment_history')),
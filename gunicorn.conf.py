@@ -0,0 +1,25 @@
+"""
+gunicorn settings loaded automatically from the working directory.
+
+Prometheus metrics are recorded per worker process. The workers share
+PROMETHEUS_MULTIPROC_DIR so /metrics can report the whole service; the
+directory is emptied when gunicorn starts and the files of a worker that
+exits are marked dead so its gauges stop being reported.
+"""
+import os
+import shutil
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/garnishedge-metrics')
+
+
+def on_starting(server):
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    # Samples left by a previous run would be added to this one
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
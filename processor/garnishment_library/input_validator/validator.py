@@ -1,7 +1,7 @@
 import json
 import logging
 from decimal import Decimal, InvalidOperation
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 from enum import Enum
@@ -117,7 +117,53 @@ class BaseValidator(ABC):
                 validated_data[key] = value
                 
         return validated_data
-    
+
+    def validate_batch(self, items: List[Union[str, dict]], start_row: int = 1) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Validate a list of inputs, building the rule set only once.
+
+        Args:
+            items: Inputs as JSON strings or dictionaries
+            start_row: Row number reported for the first item
+
+        Returns:
+            Tuple of (validated items, errors) where each error is
+            {"row": <row number>, "error": <message>}
+        """
+        self.validation_rules = self.get_validation_rules()
+        rules = self.validation_rules
+
+        validated_items = []
+        errors = []
+        for row, data in enumerate(items, start=start_row):
+            if isinstance(data, str):
+                try:
+                    data = json.loads(data)
+                except json.JSONDecodeError as e:
+                    errors.append({"row": row, "error": f"Invalid JSON format: {e}"})
+                    continue
+            if not isinstance(data, dict):
+                errors.append({"row": row, "error": "Input must be a dictionary or JSON string"})
+                continue
+
+            validated_data = {}
+            row_errors = []
+            for rule in rules:
+                try:
+                    validated_data[rule.field_name] = self._validate_field(data, rule)
+                except ValidationError as e:
+                    row_errors.append(str(e))
+            if row_errors:
+                errors.append({"row": row, "error": "; ".join(row_errors)})
+                continue
+
+            for key, value in data.items():
+                if key not in validated_data:
+                    validated_data[key] = value
+            validated_items.append(validated_data)
+
+        return validated_items, errors
+
     def _validate_field(self, data: dict, rule: ValidationRule) -> Any:
         """Validate a single field according to its rule."""
         field_value = data.get(rule.field_name)
@@ -33,6 +33,86 @@ def update_effective_dates_job():
         logger.exception(f"Error running update_effective_dates command: {e}")
 
 
+@util.close_old_connections
+def purge_expired_export_jobs_job():
+    """
+    Job function to delete expired export job artifacts.
+    """
+    from user_app.services.export_jobs import ExportJobService
+
+    try:
+        removed = ExportJobService.purge_expired()
+        if removed:
+            logger.info(f"Purged {removed} expired export jobs")
+    except Exception as e:
+        logger.exception(f"Error purging expired export jobs: {e}")
+
+
+@util.close_old_connections
+def purge_expired_import_jobs_job():
+    """
+    Job function to delete old import jobs and their error reports.
+    """
+    from user_app.services.import_jobs import ImportJobService
+
+    try:
+        removed = ImportJobService.purge_expired()
+        if removed:
+            logger.info(f"Purged {removed} expired import jobs")
+    except Exception as e:
+        logger.exception(f"Error purging expired import jobs: {e}")
+
+
+@util.close_old_connections
+def recover_stale_import_jobs_job():
+    """
+    Job function to resubmit or fail import jobs whose worker went away.
+    """
+    from user_app.services.import_jobs import ImportJobService
+
+    try:
+        resubmitted, failed = ImportJobService.recover_stale()
+        if resubmitted or failed:
+            logger.info(f"Stale import jobs: {resubmitted} resubmitted, {failed} marked failed")
+    except Exception as e:
+        logger.exception(f"Error recovering stale import jobs: {e}")
+
+
+@util.close_old_connections
+def purge_expired_audit_events_job():
+    """
+    Job function to delete audit events past their retention period.
+    """
+    from user_app.services.audit_events import AuditEventStore
+
+    try:
+        removed = AuditEventStore.purge_expired()
+        if removed:
+            logger.info(f"Purged {removed} expired audit events")
+    except Exception as e:
+        logger.exception(f"Error purging expired audit events: {e}")
+
+
+@util.close_old_connections
+def purge_expired_letter_bulk_runs_job():
+    """
+    Job function to delete the progress records of old bulk letter runs.
+    """
+    from datetime import timedelta
+
+    from django.conf import settings
+    from django.utils import timezone
+    from user_app.models import LetterBulkRun
+
+    try:
+        cutoff = timezone.now() - timedelta(hours=settings.LETTER_BULK_RUN_RETENTION_HOURS)
+        removed, _ = LetterBulkRun.objects.filter(created_at__lt=cutoff).delete()
+        if removed:
+            logger.info(f"Purged {removed} old bulk letter runs")
+    except Exception as e:
+        logger.exception(f"Error purging old bulk letter runs: {e}")
+
+
 def start_scheduler():
     """
     Start the scheduler and add scheduled jobs.
@@ -53,6 +133,56 @@ def start_scheduler():
             max_instances=1,
         )
         
+        # Remove expired export files every 30 minutes
+        scheduler.add_job(
+            purge_expired_export_jobs_job,
+            trigger=CronTrigger(minute='*/30'),
+            id="purge_expired_export_jobs",
+            name="Purge Expired Export Jobs",
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Remove finished import jobs and their error reports hourly
+        scheduler.add_job(
+            purge_expired_import_jobs_job,
+            trigger=CronTrigger(minute=15),
+            id="purge_expired_import_jobs",
+            name="Purge Expired Import Jobs",
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Resubmit or fail import jobs left behind by a restarted worker every 10 minutes
+        scheduler.add_job(
+            recover_stale_import_jobs_job,
+            trigger=CronTrigger(minute='*/10'),
+            id="recover_stale_import_jobs",
+            name="Recover Stale Import Jobs",
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Remove audit events past their retention daily at 2:30 AM
+        scheduler.add_job(
+            purge_expired_audit_events_job,
+            trigger=CronTrigger(hour=2, minute=30),
+            id="purge_expired_audit_events",
+            name="Purge Expired Audit Events",
+            replace_existing=True,
+            max_instances=1,
+        )
+        
+        # Remove progress records of old bulk letter runs hourly
+        scheduler.add_job(
+            purge_expired_letter_bulk_runs_job,
+            trigger=CronTrigger(minute=45),
+            id="purge_expired_letter_bulk_runs",
+            name="Purge Expired Letter Bulk Runs",
+            replace_existing=True,
+            max_instances=1,
+        )
+        
         # Register Django events to clean up old job executions
         register_events(scheduler)
         
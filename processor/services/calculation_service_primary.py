@@ -5,6 +5,7 @@ This service orchestrates the various specialized services for garnishment calcu
 
 import logging
 import re
+import time
 from typing import Dict, Set, List, Any
 from processor.services.config_loader import ConfigLoader
 from processor.services.fee_calculator import FeeCalculator
@@ -23,9 +24,13 @@ from user_app.constants import (
     GarnishmentResultFields as GRF,
     ErrorMessages as EM
 )
+from garnishedge_project.metrics import observe_calculation
 
 logger = logging.getLogger(__name__)
 
+# garnishment_type label of multiple garnishment calculations in the metrics
+MULTIPLE_GARNISHMENT_TYPE = 'multiple_garnishment'
+
 
 class CalculationDataView:
     """
@@ -151,6 +156,7 @@ class CalculationDataView:
         
         # Log calculation start
         self.base_service.log_calculation_start(garnishment_type_lower, record.get(EE.EMPLOYEE_ID))
+        start_time = time.perf_counter()
         
         try:
             # Route to appropriate calculation method
@@ -176,10 +182,12 @@ class CalculationDataView:
             # Log calculation end
             success = not (isinstance(result, dict) and result.get(GRF.ERROR))
             self.base_service.log_calculation_end(garnishment_type, record.get(EE.EMPLOYEE_ID), success)
+            observe_calculation(garnishment_type, 'success' if success else 'error', time.perf_counter() - start_time)
             
             return result
             
         except Exception as e:
+            observe_calculation(garnishment_type, 'exception', time.perf_counter() - start_time)
             self.base_service.log_calculation_error(garnishment_type_lower, record.get(EE.EMPLOYEE_ID), str(e))
             return {"error": f"Error calculating {garnishment_type}: {e}"}
 
@@ -189,7 +197,15 @@ class CalculationDataView:
         Calculate multiple garnishment with standardized result structure.
         Delegates to GarnishmentCalculator.
         """
-        return self.garnishment_calculator.calculate_multiple_garnishment(record, config_data, garn_fees)
+        start_time = time.perf_counter()
+        try:
+            result = self.garnishment_calculator.calculate_multiple_garnishment(record, config_data, garn_fees)
+        except Exception:
+            observe_calculation(MULTIPLE_GARNISHMENT_TYPE, 'exception', time.perf_counter() - start_time)
+            raise
+        success = not (isinstance(result, dict) and result.get(GRF.ERROR))
+        observe_calculation(MULTIPLE_GARNISHMENT_TYPE, 'success' if success else 'error', time.perf_counter() - start_time)
+        return result
 
     def calculate_garnishment_wrapper(self, record: Dict, config_data: Dict, 
                                      garn_fees: float = None) -> Any:
@@ -258,7 +274,8 @@ class CalculationDataView:
             }
 
     def process_and_store_case(self, case_info: Dict, batch_id: str, 
-                              config_data: Dict, garn_fees: float = None) -> Dict:
+                              config_data: Dict, garn_fees: float = None,
+                              store_payroll: bool = True) -> Dict:
         """
         Process and store garnishment case data in the database.
         Delegates to DatabaseManager.
@@ -272,7 +289,8 @@ class CalculationDataView:
             
             # Store the case data
             store_result = self.database_manager.process_and_store_case(
-                case_info, batch_id, config_data,result, garn_fees
+                case_info, batch_id, config_data,result, garn_fees,
+                store_payroll=store_payroll
             )
             
             if store_result.get("error"):
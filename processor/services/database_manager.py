@@ -31,9 +31,14 @@ from user_app.constants import (
     GarnishmentResultFields as GRF
 )
 from django.utils import timezone
+from garnishedge_project.model_audit import log_model_bulk_operation
+from user_app.services.import_lookups import LOOKUP_BATCH_SIZE, lookup_objects
 
 logger = logging.getLogger(__name__)
 
+# Payroll rows written per INSERT statement when storing a batch
+PAYROLL_BULK_CREATE_BATCH_SIZE = 500
+
 
 class DatabaseManager:
     """
@@ -44,9 +49,12 @@ class DatabaseManager:
         self.logger = logger
 
     def process_and_store_case(self, case_info: Dict, batch_id: str, 
-                              config_data: Dict,result:Dict, garn_fees: float = None) -> Dict:
+                              config_data: Dict,result:Dict, garn_fees: float = None,
+                              store_payroll: bool = True) -> Dict:
         """
         Process and store garnishment case data in the database.
+        Pass store_payroll=False when the caller stores the payroll rows of the
+        whole batch at once with store_payroll_batch().
         """
         try:
             with transaction.atomic():
@@ -56,7 +64,8 @@ class DatabaseManager:
 
 
                 # # Store payroll data
-                self._store_payroll_data(case_info,batch_id)
+                if store_payroll:
+                    self._store_payroll_data(case_info,batch_id)
                 # self._store_payroll_data(case_info, ee_id)
 
                 self._store_garnishment_results(case_info, ee_id, batch_id, result)
@@ -413,24 +422,89 @@ class DatabaseManager:
                 }
             batch_id: Batch identifier string (e.g., "BLUR449")
         
+        Returns:
+            Dict with status and details of stored records
+        """
+        payroll_data_list, extraction_error = self._extract_payroll_items(payroll_payload)
+        if extraction_error:
+            return extraction_error
+        return self.store_payroll_batch(payroll_data_list, batch_id)
+
+    def store_payroll_batch(self, payroll_items: List[Dict[str, Any]], batch_id: str = None,
+                            replace_employees: bool = False) -> Dict:
+        """
+        Store the payroll items of a whole calculation batch.
+
+        Clients and employees are resolved with batched `__in` queries and the
+        rows are written with chunked bulk_create, so the number of statements
+        grows with the number of chunks rather than the number of items.
+        Items that fail validation are reported in "errors" and skipped.
+        With replace_employees, the rows already stored under batch_id for the
+        employees being stored are deleted in the same transaction, so a
+        re-post replaces those employees' payroll and leaves the rest of the
+        batch alone.
+
         Returns:
             Dict with status and details of stored records
         """
         try:
-            payroll_data_list, extraction_error = self._extract_payroll_items(payroll_payload)
-            if extraction_error:
-                return extraction_error
+            if not payroll_items:
+                return {"status": "error", "message": "No payroll_data found in JSON"}
+
+            clients = self._get_clients(item.get("client_id") for item in payroll_items)
+            employees = self._get_employees(item.get("ee_id") for item in payroll_items)
 
-            stored_records: List[Dict[str, Any]] = []
+            payroll_records: List[Payroll] = []
+            stored_items: List[Dict[str, Any]] = []
             errors: List[str] = []
+            for payroll_item in payroll_items:
+                payroll_record, error_message = self._build_payroll_record(
+                    payroll_item, batch_id, clients, employees
+                )
+                if error_message:
+                    errors.append(error_message)
+                    continue
+                payroll_records.append(payroll_record)
+                stored_items.append(payroll_item)
 
             with transaction.atomic():
-                for payroll_item in payroll_data_list:
-                    record_info, error_message = self._store_single_payroll_item(payroll_item, batch_id)
-                    if error_message:
-                        errors.append(error_message)
-                        continue
-                    stored_records.append(record_info)
+                if replace_employees and batch_id and payroll_records:
+                    employee_pks = sorted({payroll_record.ee_id_id for payroll_record in payroll_records})
+                    replaced_count = 0
+                    for start in range(0, len(employee_pks), LOOKUP_BATCH_SIZE):
+                        deleted, _ = Payroll.objects.filter(
+                            batch_id=batch_id, ee_id__in=employee_pks[start:start + LOOKUP_BATCH_SIZE]
+                        ).delete()
+                        replaced_count += deleted
+                    if replaced_count:
+                        self.logger.info(
+                            f"Replacing the stored payroll rows of {len(employee_pks)} employees in batch {batch_id}"
+                        )
+                for start in range(0, len(payroll_records), PAYROLL_BULK_CREATE_BATCH_SIZE):
+                    Payroll.objects.bulk_create(
+                        payroll_records[start:start + PAYROLL_BULK_CREATE_BATCH_SIZE]
+                    )
+
+            stored_records = [
+                {
+                    'id': payroll_record.id,
+                    'ee_id': payroll_item.get("ee_id"),
+                    'client_id': payroll_item.get("client_id"),
+                    'batch_id': batch_id
+                }
+                for payroll_record, payroll_item in zip(payroll_records, stored_items)
+            ]
+
+            if stored_records:
+                self.logger.info(f"Stored {len(stored_records)} payroll rows for batch {batch_id}")
+                try:
+                    # bulk_create skips the save signals; record the batch as one audit entry
+                    log_model_bulk_operation(
+                        "CREATE", "Payroll", [item.get("ee_id") for item in stored_items],
+                        details={"batch_id": batch_id}
+                    )
+                except Exception as audit_error:
+                    self.logger.warning(f"Failed to log payroll audit for batch {batch_id}: {audit_error}")
 
             result = {
                 "status": "success" if stored_records else "error",
@@ -464,18 +538,26 @@ class DatabaseManager:
 
         return payroll_data_list, None
 
-    def _store_single_payroll_item(self, payroll_item: Dict[str, Any], batch_id: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    def _build_payroll_record(
+        self,
+        payroll_item: Dict[str, Any],
+        batch_id: Optional[str],
+        clients: Dict[str, Client],
+        employees: Dict[str, EmployeeDetail]
+    ) -> Tuple[Optional[Payroll], Optional[str]]:
         validation_error = self._validate_payroll_item(payroll_item)
         if validation_error:
             return None, validation_error
 
-        client, error = self._get_client(payroll_item.get("client_id"))
-        if error:
-            return None, error
+        client_id = payroll_item.get("client_id")
+        client = clients.get(self._lookup_key(client_id))
+        if client is None:
+            return None, f"Client with client_id '{client_id}' not found"
 
-        employee, error = self._get_employee(payroll_item.get("ee_id"))
-        if error:
-            return None, error
+        ee_id = payroll_item.get("ee_id")
+        employee = employees.get(self._lookup_key(ee_id))
+        if employee is None:
+            return None, f"Employee with ee_id '{ee_id}' not found"
 
         state_error = self._validate_employee_state(employee)
         if state_error:
@@ -497,18 +579,7 @@ class DatabaseManager:
             payroll_date=payroll_date,
             pay_date=pay_date
         )
-
-        payroll_record = Payroll.objects.create(**payroll_defaults)
-        self.logger.info(
-            f"Successfully stored payroll data for ee_id: {payroll_item.get('ee_id')}, client_id: {payroll_item.get('client_id')}"
-        )
-
-        return {
-            'id': payroll_record.id,
-            'ee_id': payroll_item.get("ee_id"),
-            'client_id': payroll_item.get("client_id"),
-            'batch_id': batch_id
-        }, None
+        return Payroll(**payroll_defaults), None
 
     def _validate_payroll_item(self, payroll_item: Dict[str, Any]) -> Optional[str]:
         client_id = payroll_item.get("client_id")
@@ -520,27 +591,43 @@ class DatabaseManager:
             return f"Missing required field payroll_date for ee_id {ee_id}"
         return None
 
-    def _get_client(self, client_id: str) -> Tuple[Optional[Client], Optional[str]]:
-        try:
-            client = Client.objects.get(client_id=client_id)
-            return client, None
-        except Client.DoesNotExist:
-            return None, f"Client with client_id '{client_id}' not found"
-        except Client.MultipleObjectsReturned:
-            self.logger.warning(f"Multiple clients found for client_id '{client_id}', using first")
-            client = Client.objects.filter(client_id=client_id).first()
-            return client, None
-
-    def _get_employee(self, ee_id: str) -> Tuple[Optional[EmployeeDetail], Optional[str]]:
-        try:
-            employee = EmployeeDetail.objects.get(ee_id=ee_id)
-            return employee, None
-        except EmployeeDetail.DoesNotExist:
-            return None, f"Employee with ee_id '{ee_id}' not found"
-        except EmployeeDetail.MultipleObjectsReturned:
-            self.logger.warning(f"Multiple employees found for ee_id '{ee_id}', using first")
-            employee = EmployeeDetail.objects.filter(ee_id=ee_id).first()
-            return employee, None
+    @staticmethod
+    def _lookup_key(value) -> str:
+        """
+        Key of the client/employee maps. The ids are matched in the database
+        (case-insensitively under the SQL Server collation), so the map lookup
+        ignores case and surrounding spaces as well.
+        """
+        return str(value).strip().casefold()
+
+    def _get_clients(self, client_ids) -> Dict[str, Client]:
+        """Clients by _lookup_key(client_id); the first one wins when a client_id is duplicated."""
+        client_ids = {str(client_id) for client_id in client_ids if client_id}
+        client_ids |= {client_id.strip() for client_id in client_ids}
+        clients: Dict[str, Client] = {}
+        matches = sorted(lookup_objects(Client, 'client_id', client_ids), key=lambda client: client.id)
+        for client in matches:
+            key = self._lookup_key(client.client_id)
+            if key in clients:
+                self.logger.warning(f"Multiple clients found for client_id '{client.client_id}', using first")
+                continue
+            clients[key] = client
+        return clients
+
+    def _get_employees(self, ee_ids) -> Dict[str, EmployeeDetail]:
+        """Employees by _lookup_key(ee_id); the first one wins when an ee_id is duplicated."""
+        ee_ids = {str(ee_id) for ee_id in ee_ids if ee_id}
+        ee_ids |= {ee_id.strip() for ee_id in ee_ids}
+        employees: Dict[str, EmployeeDetail] = {}
+        queryset = EmployeeDetail.objects.select_related('work_state')
+        matches = sorted(lookup_objects(queryset, 'ee_id', ee_ids), key=lambda employee: employee.id)
+        for employee in matches:
+            key = self._lookup_key(employee.ee_id)
+            if key in employees:
+                self.logger.warning(f"Multiple employees found for ee_id '{employee.ee_id}', using first")
+                continue
+            employees[key] = employee
+        return employees
 
     def _validate_employee_state(self, employee: Optional[EmployeeDetail]) -> Optional[str]:
         if not employee or not employee.work_state:
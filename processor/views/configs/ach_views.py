@@ -23,6 +23,19 @@ from processor.garnishment_library import ResponseHelper
 
 logger = logging.getLogger(__name__)
 
+
+class ACHGenerationError(Exception):
+    """
+    Raised when an ACH file cannot be built; carries the HTTP status to report.
+    """
+
+    def __init__(self, message, error=None, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.error = error
+        self.status_code = status_code
+
+
 class ACHFileGenerationView(APIView):
     """
     API view for generating ACH files in CCD+ format (NACHA compliant) for Child Support and FTB payments.
@@ -1270,6 +1283,198 @@ class ACHFileGenerationView(APIView):
         xml_lines.append('</ACHFile>')
         return '\n'.join(xml_lines)
 
+    def build_ach_file(self, export_format, query_params, user=None):
+        """
+        Build an ACH file from request-style parameters.
+
+        Shared by the synchronous generate endpoint and background export jobs.
+        Raises ACHGenerationError with the HTTP status to report on failure.
+
+        Returns:
+            dict: file_name, file_content (bytes), content_type, file_size, entry_count
+        """
+        # Get parameters from query string
+        case_ids_param = query_params.get('case_ids', '')
+        employee_ids_param = query_params.get('employee_ids', '')
+        pay_date_str = query_params.get('pay_date')
+        agency_payee = query_params.get('agency_payee', '')
+        store_file_param = query_params.get('store_file', 'false').lower()
+        store_file = store_file_param in ['true', '1', 'yes']
+        
+        # Parse case_ids and employee_ids from comma-separated strings
+        case_ids = [cid.strip() for cid in case_ids_param.split(',') if cid.strip()] if case_ids_param else []
+        employee_ids = [eid.strip() for eid in employee_ids_param.split(',') if eid.strip()] if employee_ids_param else []
+        
+        # Initialize file_params
+        file_params = {}
+        if pay_date_str:
+            file_params['pay_date'] = pay_date_str
+        
+        orders_data = []
+        
+        # Parse pay_date for filtering results
+        pay_date_for_query = None
+        if pay_date_str:
+            try:
+                pay_date_for_query = datetime.strptime(pay_date_str, '%Y-%m-%d').date()
+            except ValueError:
+                raise ACHGenerationError(
+                    f"Invalid pay_date format: {pay_date_str}. Expected format: YYYY-MM-DD",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+        
+        # ACH generate date (can be provided as query parameter, defaults to today)
+        ach_generate_date_str = query_params.get('ach_generate_date')
+        if ach_generate_date_str:
+            try:
+                ach_generate_date = datetime.strptime(ach_generate_date_str, '%Y-%m-%d').date()
+            except ValueError:
+                raise ACHGenerationError(
+                    f"Invalid ach_generate_date format: {ach_generate_date_str}. Expected format: YYYY-MM-DD",
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            ach_generate_date = date.today()
+        
+        # Fetch orders from database
+        # Primary logic: Use Payroll table to find employees where pay_date > ACH generate date
+        # Then check if they have orders with garnishment_type "child_support" or "ftb_ewot"
+        orders_data = self._fetch_orders_from_database(
+            case_ids=case_ids if case_ids else None,
+            employee_ids=employee_ids if employee_ids else None,
+            pay_date=pay_date_for_query,
+            use_payroll_filter=True,  # Enable Payroll-based filtering
+            ach_generate_date=ach_generate_date
+        )
+        
+        if not orders_data:
+            raise ACHGenerationError(
+                "No orders found matching the criteria",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        
+        # Validate data
+        is_valid, error_messages, failed_records = self._validate_ach_data(orders_data)
+        if not is_valid:
+            raise ACHGenerationError(
+                "Validation failed",
+                error={
+                    'errors': error_messages,
+                    'failed_records': failed_records
+                },
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Parse pay_date (Effective Entry Date) - from input
+        if pay_date_str:
+            try:
+                pay_date = datetime.strptime(pay_date_str, '%Y-%m-%d').date()
+            except ValueError:
+                pay_date = date.today()
+        else:
+            # Pay Date (Effective Entry Date) - from input
+            pay_date = file_params.get('pay_date', file_params.get('effective_date', date.today()))
+            if isinstance(pay_date, str):
+                try:
+                    pay_date = datetime.strptime(pay_date, '%Y-%m-%d').date()
+                except ValueError:
+                    pay_date = date.today()
+            elif not isinstance(pay_date, date):
+                pay_date = date.today()
+            elif isinstance(pay_date, datetime):
+                pay_date = pay_date.date()
+        
+        # Auto-generate system fields before generating ACH content to ensure consistency
+        # File ID Modifier: A letter or number (A-Z, 0-9) used to uniquely identify multiple files created on the same date
+        if 'file_id_modifier' not in file_params or not file_params.get('file_id_modifier'):
+            file_params['file_id_modifier'] = self._generate_file_id_modifier(pay_date)
+        # Batch Number: System generated sequential number
+        if 'batch_number' not in file_params or not file_params.get('batch_number'):
+            file_params['batch_number'] = self._generate_batch_number(pay_date)
+        
+        # Generate ACH content
+        ach_content, file_stats = self._generate_ach_content(orders_data, file_params)
+        
+        # Convert to requested format
+        if export_format == 'pdf':
+            try:
+                file_content = self._convert_to_pdf(ach_content)
+                content_type = 'application/pdf'
+                file_extension = 'pdf'
+            except Exception as pdf_error:
+                logger.error(f"PDF generation failed: {str(pdf_error)}")
+                raise ACHGenerationError(
+                    "Failed to generate PDF file",
+                    error=str(pdf_error),
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
+        elif export_format == 'xml':
+            file_content = self._convert_to_xml(ach_content, {
+                'pay_date': pay_date_str or str(pay_date),
+                'agency_payee': agency_payee,
+                'entry_count': file_stats['entry_count'],
+                'total_credit_amount': float(file_stats['total_credit_amount']),
+                'generated_at': datetime.now().isoformat()
+            })
+            content_type = 'application/xml'
+            file_extension = 'xml'
+        else:  # txt
+            file_content = ach_content.encode('utf-8')
+            content_type = 'text/plain'
+            file_extension = 'txt'
+        
+        # Generate filename using the file_id_modifier that was set in file_params
+        file_id_modifier = file_params.get('file_id_modifier', 'A')
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        file_name = f"ACH_{pay_date.strftime('%Y%m%d')}_{file_id_modifier}_{timestamp}.{file_extension}"
+        
+        # Calculate file size
+        file_size = len(file_content) if isinstance(file_content, bytes) else len(file_content.encode('utf-8'))
+        
+        # Save metadata to database if requested (without storing file in blob)
+        if store_file:
+            try:
+                case_ids = [order.get('case_id') for order in orders_data]
+                # Load config to get originating_dfi_id (same as peos_bank_routing_number)
+                config = AchGarnishmentConfig.objects.first()
+                if config:
+                    peos_bank_routing_number = config.peos_bank_routing_number
+                    originating_dfi_id = peos_bank_routing_number
+                    trace_base = int(originating_dfi_id[:8]) * 100000 if originating_dfi_id and len(originating_dfi_id) >= 8 else 1000000
+                else:
+                    trace_base = 1000000
+                transaction_refs = [f"Trace: {trace_base + i}" for i in range(len(orders_data))]
+                
+                # Use the batch_number that was set in file_params
+                batch_number = file_params.get('batch_number', 1)
+                
+                ach_file_record = ACHFile.objects.create(
+                    file_name=file_name,
+                    file_format=export_format,
+                    file_url=None,  # Not storing in blob, file returned in response
+                    file_size=file_size,
+                    generated_by=user if user is not None and user.is_authenticated else None,
+                    pay_date=pay_date,
+                    agency_payee=agency_payee,
+                    total_payment_count=file_stats['entry_count'],
+                    total_payment_amount=file_stats['total_credit_amount'],
+                    batch_id=str(batch_number),
+                    file_id_modifier=file_id_modifier,
+                    associated_case_ids=json.dumps(case_ids),
+                    transaction_references=json.dumps(transaction_refs)
+                )
+                logger.info(f"ACH file metadata saved: {ach_file_record.id}")
+            except Exception as e:
+                logger.error(f"Failed to save ACH file metadata: {str(e)}")
+
+        return {
+            'file_name': file_name,
+            'file_content': file_content,
+            'content_type': content_type,
+            'file_size': file_size,
+            'entry_count': file_stats['entry_count'],
+        }
+
     @swagger_auto_schema(
         operation_description="Generate ACH file in CCD+ format. Data is automatically fetched from database for garnishment_type 'child_support' and 'ftb_ewot'.",
         manual_parameters=[
@@ -1351,180 +1556,16 @@ class ACHFileGenerationView(APIView):
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Get parameters from query string
-            case_ids_param = request.query_params.get('case_ids', '')
-            employee_ids_param = request.query_params.get('employee_ids', '')
-            pay_date_str = request.query_params.get('pay_date')
-            agency_payee = request.query_params.get('agency_payee', '')
-            store_file_param = request.query_params.get('store_file', 'false').lower()
-            store_file = store_file_param in ['true', '1', 'yes']
-            
-            # Parse case_ids and employee_ids from comma-separated strings
-            case_ids = [cid.strip() for cid in case_ids_param.split(',') if cid.strip()] if case_ids_param else []
-            employee_ids = [eid.strip() for eid in employee_ids_param.split(',') if eid.strip()] if employee_ids_param else []
-            
-            # Initialize file_params
-            file_params = {}
-            if pay_date_str:
-                file_params['pay_date'] = pay_date_str
-            
-            orders_data = []
-            
-            # Parse pay_date for filtering results
-            pay_date_for_query = None
-            if pay_date_str:
-                try:
-                    pay_date_for_query = datetime.strptime(pay_date_str, '%Y-%m-%d').date()
-                except ValueError:
-                    return ResponseHelper.error_response(
-                        f"Invalid pay_date format: {pay_date_str}. Expected format: YYYY-MM-DD",
-                        status_code=status.HTTP_400_BAD_REQUEST
-                    )
-            
-            # ACH generate date (can be provided as query parameter, defaults to today)
-            ach_generate_date_str = request.query_params.get('ach_generate_date')
-            if ach_generate_date_str:
-                try:
-                    ach_generate_date = datetime.strptime(ach_generate_date_str, '%Y-%m-%d').date()
-                except ValueError:
-                    return ResponseHelper.error_response(
-                        f"Invalid ach_generate_date format: {ach_generate_date_str}. Expected format: YYYY-MM-DD",
-                        status_code=status.HTTP_400_BAD_REQUEST
-                    )
-            else:
-                ach_generate_date = date.today()
-            
-            # Fetch orders from database
-            # Primary logic: Use Payroll table to find employees where pay_date > ACH generate date
-            # Then check if they have orders with garnishment_type "child_support" or "ftb_ewot"
-            orders_data = self._fetch_orders_from_database(
-                case_ids=case_ids if case_ids else None,
-                employee_ids=employee_ids if employee_ids else None,
-                pay_date=pay_date_for_query,
-                use_payroll_filter=True,  # Enable Payroll-based filtering
-                ach_generate_date=ach_generate_date
-            )
-            
-            if not orders_data:
-                return ResponseHelper.error_response(
-                    "No orders found matching the criteria",
-                    status_code=status.HTTP_404_NOT_FOUND
-                )
-            
-            # Validate data
-            is_valid, error_messages, failed_records = self._validate_ach_data(orders_data)
-            if not is_valid:
-                return ResponseHelper.error_response(
-                    "Validation failed",
-                    error={
-                        'errors': error_messages,
-                        'failed_records': failed_records
-                    },
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Parse pay_date (Effective Entry Date) - from input
-            if pay_date_str:
-                try:
-                    pay_date = datetime.strptime(pay_date_str, '%Y-%m-%d').date()
-                except ValueError:
-                    pay_date = date.today()
-            else:
-                # Pay Date (Effective Entry Date) - from input
-                pay_date = file_params.get('pay_date', file_params.get('effective_date', date.today()))
-                if isinstance(pay_date, str):
-                    try:
-                        pay_date = datetime.strptime(pay_date, '%Y-%m-%d').date()
-                    except ValueError:
-                        pay_date = date.today()
-                elif not isinstance(pay_date, date):
-                    pay_date = date.today()
-                elif isinstance(pay_date, datetime):
-                    pay_date = pay_date.date()
-            
-            # Auto-generate system fields before generating ACH content to ensure consistency
-            # File ID Modifier: A letter or number (A-Z, 0-9) used to uniquely identify multiple files created on the same date
-            if 'file_id_modifier' not in file_params or not file_params.get('file_id_modifier'):
-                file_params['file_id_modifier'] = self._generate_file_id_modifier(pay_date)
-            # Batch Number: System generated sequential number
-            if 'batch_number' not in file_params or not file_params.get('batch_number'):
-                file_params['batch_number'] = self._generate_batch_number(pay_date)
-            
-            # Generate ACH content
-            ach_content, file_stats = self._generate_ach_content(orders_data, file_params)
-            
-            # Convert to requested format
-            if export_format == 'pdf':
-                try:
-                    file_content = self._convert_to_pdf(ach_content)
-                    content_type = 'application/pdf'
-                    file_extension = 'pdf'
-                except Exception as pdf_error:
-                    logger.error(f"PDF generation failed: {str(pdf_error)}")
-                    return ResponseHelper.error_response(
-                        "Failed to generate PDF file",
-                        error=str(pdf_error),
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
-            elif export_format == 'xml':
-                file_content = self._convert_to_xml(ach_content, {
-                    'pay_date': pay_date_str or str(pay_date),
-                    'agency_payee': agency_payee,
-                    'entry_count': file_stats['entry_count'],
-                    'total_credit_amount': float(file_stats['total_credit_amount']),
-                    'generated_at': datetime.now().isoformat()
-                })
-                content_type = 'application/xml'
-                file_extension = 'xml'
-            else:  # txt
-                file_content = ach_content.encode('utf-8')
-                content_type = 'text/plain'
-                file_extension = 'txt'
-            
-            # Generate filename using the file_id_modifier that was set in file_params
-            file_id_modifier = file_params.get('file_id_modifier', 'A')
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            file_name = f"ACH_{pay_date.strftime('%Y%m%d')}_{file_id_modifier}_{timestamp}.{file_extension}"
-            
-            # Calculate file size
-            file_size = len(file_content) if isinstance(file_content, bytes) else len(file_content.encode('utf-8'))
-            
-            # Save metadata to database if requested (without storing file in blob)
-            if store_file:
-                try:
-                    case_ids = [order.get('case_id') for order in orders_data]
-                    # Load config to get originating_dfi_id (same as peos_bank_routing_number)
-                    config = AchGarnishmentConfig.objects.first()
-                    if config:
-                        peos_bank_routing_number = config.peos_bank_routing_number
-                        originating_dfi_id = peos_bank_routing_number
-                        trace_base = int(originating_dfi_id[:8]) * 100000 if originating_dfi_id and len(originating_dfi_id) >= 8 else 1000000
-                    else:
-                        trace_base = 1000000
-                    transaction_refs = [f"Trace: {trace_base + i}" for i in range(len(orders_data))]
-                    
-                    # Use the batch_number that was set in file_params
-                    batch_number = file_params.get('batch_number', 1)
-                    
-                    ach_file_record = ACHFile.objects.create(
-                        file_name=file_name,
-                        file_format=export_format,
-                        file_url=None,  # Not storing in blob, file returned in response
-                        file_size=file_size,
-                        generated_by=request.user if request.user.is_authenticated else None,
-                        pay_date=pay_date,
-                        agency_payee=agency_payee,
-                        total_payment_count=file_stats['entry_count'],
-                        total_payment_amount=file_stats['total_credit_amount'],
-                        batch_id=str(batch_number),
-                        file_id_modifier=file_id_modifier,
-                        associated_case_ids=json.dumps(case_ids),
-                        transaction_references=json.dumps(transaction_refs)
-                    )
-                    logger.info(f"ACH file metadata saved: {ach_file_record.id}")
-                except Exception as e:
-                    logger.error(f"Failed to save ACH file metadata: {str(e)}")
-            
+            try:
+                artifact = self.build_ach_file(export_format, request.query_params, request.user)
+            except ACHGenerationError as e:
+                return ResponseHelper.error_response(e.message, error=e.error, status_code=e.status_code)
+
+            file_name = artifact['file_name']
+            file_content = artifact['file_content']
+            content_type = artifact['content_type']
+            file_size = artifact['file_size']
+
             # Prepare response with file content
             # For PDF, use FileResponse which handles binary content better
             if export_format == 'pdf':
@@ -15,13 +15,16 @@ from processor.garnishment_library.calculations.multiple_garnishment import Mult
 from datetime import datetime
 from django.db.models import Prefetch
 from user_app.models import EmployeeDetail, GarnishmentOrder
+from user_app.services.payroll_ingestion import PayrollIngestionService
+from garnishedge_project.audit_batch import aggregated_audit, bind_audit_batch
+from garnishedge_project.metrics import monitor_executor
 from garnishedge_project.model_audit import log_model_create
 from typing import Dict, Set, List, Any
 
 logger = logging.getLogger(__name__)
 
 
-def _calculate_garnishment_worker(case_info, batch_id, config_data):
+def _calculate_garnishment_worker(case_info, batch_id, config_data, audit_batch=None):
     """
     Worker function for processing garnishment calculations in separate threads.
     This function handles proper database connection management for threading.
@@ -40,7 +43,11 @@ def _calculate_garnishment_worker(case_info, batch_id, config_data):
         
         # Create a new instance of CalculationDataView for this worker thread
         calculation_service = CalculationDataView()
-        result = calculation_service.process_and_store_case(case_info, batch_id, config_data)
+        # Payroll rows are stored for the whole batch by PostCalculationView
+        with bind_audit_batch(audit_batch):
+            result = calculation_service.process_and_store_case(
+                case_info, batch_id, config_data, store_payroll=False
+            )
         
         # Close database connections after processing to free up resources
         connections.close_all()
@@ -266,6 +273,15 @@ class PostCalculationView(APIView):
                 {"error": "batch_id is required"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+        # A batch loaded through the bulk payroll API can be calculated by batch_id alone
+        payroll_already_stored = False
+        if not cases_data:
+            cases_data = PayrollIngestionService.load_payroll_data(batch_id)
+            payroll_already_stored = bool(cases_data)
+            if payroll_already_stored:
+                logger.info(f"Calculating stored payroll batch {batch_id} ({len(cases_data)} rows)")
+
         if not cases_data:
             # Log validation error
             try:
@@ -322,6 +338,7 @@ class PostCalculationView(APIView):
             not_found_employees = []
 
         output = []
+        payroll_cases = []
         calculation_service = CalculationDataView()
         try:
             # Debug: Print the structure of enriched cases
@@ -375,79 +392,97 @@ class PostCalculationView(APIView):
             if not full_config_data:
                 logger.warning(f"No configuration data loaded for types: {all_garnishment_types}")
 
-            # Step 4: Process each case with appropriate configuration
-            # Use ThreadPoolExecutor for concurrent processing with Django
-            # Threads work better with Django ORM than processes
-            max_workers = min(50, len(cases_data) + 10)  # Dynamic workers, cap at 50
+            # Row audit events of the batch are logged as one summary per model
+            with aggregated_audit(batch_id, source='garnishment_calculation') as audit_batch:
+                # Step 4: Process each case with appropriate configuration
+                # Use ThreadPoolExecutor for concurrent processing with Django
+                # Threads work better with Django ORM than processes
+                max_workers = min(50, len(cases_data) + 10)  # Dynamic workers, cap at 50
             
-            # Create executor with threading
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_case = {}
+                # Create executor with threading
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    monitor_executor('garnishment_calculation', executor)
+                    future_to_case = {}
                 
-                for case_info in cases_data:
-                    # Determine if this is a multi-garnishment case
-                    is_multi_case = calculation_service.is_multi_garnishment_case(case_info)
+                    for case_info in cases_data:
+                        # Determine if this is a multi-garnishment case
+                        is_multi_case = calculation_service.is_multi_garnishment_case(case_info)
                     
-                    if is_multi_case:
-                        # For multi-garnishment cases, get case-specific types
-                        case_types = calculation_service.get_case_garnishment_types(case_info)
-                        case_config = calculation_service.filter_config_for_case(full_config_data, case_types)
+                        if is_multi_case:
+                            # For multi-garnishment cases, get case-specific types
+                            case_types = calculation_service.get_case_garnishment_types(case_info)
+                            case_config = calculation_service.filter_config_for_case(full_config_data, case_types)
                         
-                        logger.debug(f"Multi-garnishment case detected for employee {case_info.get(EE.EMPLOYEE_ID, 'N/A')}: {case_types}")
-                    else:
-                        # For single garnishment cases, use full config (it will be filtered naturally)
-                        case_config = full_config_data
+                            logger.debug(f"Multi-garnishment case detected for employee {case_info.get(EE.EMPLOYEE_ID, 'N/A')}: {case_types}")
+                        else:
+                            # For single garnishment cases, use full config (it will be filtered naturally)
+                            case_config = full_config_data
                     
-                    # Submit case for processing using the worker function
-                    future = executor.submit(
-                        _calculate_garnishment_worker, 
-                        case_info, 
-                        batch_id, 
-                        case_config
-                    )
-                    future_to_case[future] = case_info
+                        # Submit case for processing using the worker function
+                        future = executor.submit(
+                            _calculate_garnishment_worker, 
+                            case_info, 
+                            batch_id, 
+                            case_config,
+                            audit_batch
+                        )
+                        future_to_case[future] = case_info
 
-                # Step 5: Collect results
-                from concurrent.futures import TimeoutError as FuturesTimeoutError
+                    # Step 5: Collect results
+                    from concurrent.futures import TimeoutError as FuturesTimeoutError
                 
-                for future in as_completed(future_to_case, timeout=300):  # 5 minute timeout per task
-                    case_info_original = future_to_case[future]
-                    ee_id_for_log = case_info_original.get(EE.EMPLOYEE_ID, "N/A")
+                    for future in as_completed(future_to_case, timeout=300):  # 5 minute timeout per task
+                        case_info_original = future_to_case[future]
+                        ee_id_for_log = case_info_original.get(EE.EMPLOYEE_ID, "N/A")
                     
-                    try:
-                        result = future.result(timeout=10)  # 10 second timeout for result retrieval
-                        if result:
-                            # Add metadata for multi-garnishment cases
-                            if calculation_service.is_multi_garnishment_case(case_info_original):
-                                result['is_multi_garnishment'] = True
-                                # Only set garnishment_types if it's not already populated with detailed breakdown
-                                if not result.get('garnishment_types') or len(result.get('garnishment_types', [])) == 0:
-                                    result['garnishment_types'] = list(
-                                        calculation_service.get_case_garnishment_types(case_info_original)
-                                    )
+                        try:
+                            result = future.result(timeout=10)  # 10 second timeout for result retrieval
+                            if result:
+                                # Add metadata for multi-garnishment cases
+                                if calculation_service.is_multi_garnishment_case(case_info_original):
+                                    result['is_multi_garnishment'] = True
+                                    # Only set garnishment_types if it's not already populated with detailed breakdown
+                                    if not result.get('garnishment_types') or len(result.get('garnishment_types', [])) == 0:
+                                        result['garnishment_types'] = list(
+                                            calculation_service.get_case_garnishment_types(case_info_original)
+                                        )
                             
-                            output.append(result)
-                        else:
-                            logger.warning(f"No result returned for employee {ee_id_for_log}")
+                                output.append(result)
+                                if not result.get("error"):
+                                    payroll_cases.append(case_info_original)
+                            else:
+                                logger.warning(f"No result returned for employee {ee_id_for_log}")
                             
-                    except FuturesTimeoutError as e:
-                        error_message = f"Timeout processing garnishment for employee {ee_id_for_log}"
-                        logger.error(error_message, exc_info=True)
+                        except FuturesTimeoutError as e:
+                            error_message = f"Timeout processing garnishment for employee {ee_id_for_log}"
+                            logger.error(error_message, exc_info=True)
                         
-                        output.append({
-                            "employee_id": ee_id_for_log,
-                            "error": error_message,
-                            "status": status.HTTP_500_INTERNAL_SERVER_ERROR
-                        })
-                    except Exception as e:
-                        error_message = f"Error processing garnishment for employee {ee_id_for_log}: {str(e)}"
-                        logger.error(error_message, exc_info=True)
+                            output.append({
+                                "employee_id": ee_id_for_log,
+                                "error": error_message,
+                                "status": status.HTTP_500_INTERNAL_SERVER_ERROR
+                            })
+                        except Exception as e:
+                            error_message = f"Error processing garnishment for employee {ee_id_for_log}: {str(e)}"
+                            logger.error(error_message, exc_info=True)
                         
-                        output.append({
-                            "employee_id": ee_id_for_log,
-                            "error": error_message,
-                            "status": status.HTTP_500_INTERNAL_SERVER_ERROR
-                        })
+                            output.append({
+                                "employee_id": ee_id_for_log,
+                                "error": error_message,
+                                "status": status.HTTP_500_INTERNAL_SERVER_ERROR
+                            })
+
+                # Step 6: Store the payroll rows of all calculated cases in one batch,
+                # replacing the rows an earlier post of this batch_id stored for the same employees
+                if payroll_cases and not payroll_already_stored:
+                    payroll_result = calculation_service.database_manager.store_payroll_batch(
+                        payroll_cases, batch_id, replace_employees=True
+                    )
+                    if payroll_result.get("status") != "success":
+                        logger.warning(
+                            f"Payroll storage for batch {batch_id} finished with status {payroll_result.get('status')}: "
+                            f"{payroll_result.get('errors') or payroll_result.get('message')}"
+                        )
 
         except Exception as e:
             logger.error(f"Critical error in batch processing {batch_id}: {str(e)}", exc_info=True)
@@ -473,7 +508,7 @@ class PostCalculationView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-        # Step 6: Prepare response
+        # Step 7: Prepare response
         error_count = sum(1 for item in output if "error" in item)
         success_count = len(output) - error_count
 
@@ -146,6 +146,7 @@ class CommonFields:
     CREATED_AT = 'created_at'
     UPDATED_AT = 'updated_at'
     IS_ACTIVE = 'is_active'
+    STATUS = 'status'
 
 class PriorityOrderFields:
     CURRENT_SUPPORT = "current_support"
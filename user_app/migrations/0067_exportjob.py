@@ -0,0 +1,47 @@
+# Generated by Django 5.0.9 on 2026-10-18 21:09
+
+import django.db.models.deletion
+import user_app.models.export_job.export_job
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0066_rename_originating_bank_name_achgarnishmentconfig_peos_bank_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(default=user_app.models.export_job.export_job.generate_job_id, editable=False, max_length=32, unique=True)),
+                ('export_type', models.CharField(max_length=50)),
+                ('export_format', models.CharField(max_length=10)),
+                ('parameters', models.TextField(blank=True, null=True)),
+                ('data_version', models.CharField(blank=True, max_length=512, null=True)),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('file_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('file_path', models.CharField(blank=True, max_length=500, null=True)),
+                ('content_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('row_count', models.IntegerField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('request_count', models.PositiveIntegerField(default=1)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'export_job',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['export_type', 'status'], name='export_job_export__c7199d_idx'), models.Index(fields=['expires_at'], name='export_job_expires_cb9bd9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.9 on 2026-10-18 21:32
+
+import django.db.models.deletion
+import user_app.models.import_job.import_job
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0067_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(default=user_app.models.import_job.import_job.generate_job_id, editable=False, max_length=32, unique=True)),
+                ('import_type', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('options', models.TextField(blank=True, null=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_path', models.CharField(blank=True, max_length=500, null=True)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('rows_read', models.IntegerField(default=0)),
+                ('rows_validated', models.IntegerField(default=0)),
+                ('rows_inserted', models.IntegerField(default=0)),
+                ('rows_updated', models.IntegerField(default=0)),
+                ('error_count', models.IntegerField(default=0)),
+                ('error_report_path', models.CharField(blank=True, max_length=500, null=True)),
+                ('result', models.TextField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'import_job',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['import_type', 'status'], name='import_job_import__a56c93_idx'), models.Index(fields=['completed_at'], name='import_job_complet_a75e34_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-18 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0068_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='iwopdffiles',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
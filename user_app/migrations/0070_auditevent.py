@@ -0,0 +1,37 @@
+# Generated by Django 5.0.9 on 2026-10-18 10:00
+
+import garnishedge_project.model_audit
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0069_iwopdffiles_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occurred_at', models.DateTimeField()),
+                ('action', models.CharField(max_length=20)),
+                ('model_name', models.CharField(max_length=100)),
+                ('object_id', models.CharField(max_length=255)),
+                ('user_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('username', models.CharField(blank=True, max_length=150, null=True)),
+                ('batch_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('changes', models.JSONField(blank=True, encoder=garnishedge_project.model_audit.AuditJSONEncoder, null=True)),
+                ('old_values', models.JSONField(blank=True, encoder=garnishedge_project.model_audit.AuditJSONEncoder, null=True)),
+                ('new_values', models.JSONField(blank=True, encoder=garnishedge_project.model_audit.AuditJSONEncoder, null=True)),
+                ('ip_address', models.CharField(blank=True, max_length=64, null=True)),
+                ('session_id', models.CharField(blank=True, max_length=64, null=True)),
+            ],
+            options={
+                'db_table': 'audit_event',
+                'ordering': ['-occurred_at', '-id'],
+                'indexes': [models.Index(fields=['model_name', 'object_id', '-occurred_at'], name='audit_event_object_idx'), models.Index(fields=['user_id', '-occurred_at'], name='audit_event_user_idx'), models.Index(fields=['username', '-occurred_at'], name='audit_event_username_idx'), models.Index(fields=['batch_id'], name='audit_event_batch_idx'), models.Index(fields=['-occurred_at'], name='audit_event_time_idx')],
+            },
+        ),
+    ]
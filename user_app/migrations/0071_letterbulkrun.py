@@ -0,0 +1,34 @@
+# Generated by Django 5.0.9 on 2026-10-19 09:00
+
+import django.db.models.deletion
+import user_app.models.letter_template.letter_bulk_run
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0070_auditevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LetterBulkRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_id', models.CharField(default=user_app.models.letter_template.letter_bulk_run.generate_run_id, editable=False, max_length=32, unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('rendered', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bulk_runs', to='user_app.lettertemplate')),
+            ],
+            options={
+                'db_table': 'letter_bulk_run',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='letter_bulk_created_0252e2_idx')],
+            },
+        ),
+    ]
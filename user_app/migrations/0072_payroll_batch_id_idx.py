@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processor', '0036_rename_deduction_his_case_id_idx_deduction_h_case_id_5a1658_idx_and_more'),
+        ('user_app', '0071_letterbulkrun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['batch_id'], name='payroll_batch_id_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.9 on 2026-10-20 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0072_payroll_batch_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'payroll_batch',
+            },
+        ),
+    ]
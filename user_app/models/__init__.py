@@ -8,4 +8,7 @@ from .payee import *
 from .client import *
 from .garnishment_order import *
 from .letter_template import *
-from .ach import *
\ No newline at end of file
+from .ach import *
+from .export_job import *
+from .import_job import *
+from .audit_event import *
\ No newline at end of file
@@ -0,0 +1,48 @@
+from django.db import models
+
+from garnishedge_project.model_audit import AuditJSONEncoder
+
+
+class AuditEvent(models.Model):
+    """
+    One model audit record (create, update, delete, bulk write or batch
+    summary), written in bulk by the model audit sink. Rows are append-only:
+    they are never updated, and only removed by the retention purge.
+    """
+    occurred_at = models.DateTimeField()
+    action = models.CharField(max_length=20)
+    model_name = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=255)
+
+    # Kept as text rather than a foreign key so events outlive their users
+    user_id = models.CharField(max_length=64, blank=True, null=True)
+    username = models.CharField(max_length=150, blank=True, null=True)
+
+    # Calculation or import batch the event belongs to, if any
+    batch_id = models.CharField(max_length=255, blank=True, null=True)
+
+    changes = models.JSONField(blank=True, null=True, encoder=AuditJSONEncoder)
+    old_values = models.JSONField(blank=True, null=True, encoder=AuditJSONEncoder)
+    new_values = models.JSONField(blank=True, null=True, encoder=AuditJSONEncoder)
+
+    ip_address = models.CharField(max_length=64, blank=True, null=True)
+    session_id = models.CharField(max_length=64, blank=True, null=True)
+
+    class Meta:
+        db_table = 'audit_event'
+        ordering = ['-occurred_at', '-id']
+        indexes = [
+            models.Index(fields=['model_name', 'object_id', '-occurred_at'], name='audit_event_object_idx'),
+            models.Index(fields=['user_id', '-occurred_at'], name='audit_event_user_idx'),
+            models.Index(fields=['username', '-occurred_at'], name='audit_event_username_idx'),
+            models.Index(fields=['batch_id'], name='audit_event_batch_idx'),
+            models.Index(fields=['-occurred_at'], name='audit_event_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.model_name} {self.object_id} at {self.occurred_at}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Audit events are append-only and cannot be modified")
+        super().save(*args, **kwargs)
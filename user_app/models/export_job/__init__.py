@@ -0,0 +1,3 @@
+from .export_job import ExportJob
+
+__all__ = ['ExportJob']
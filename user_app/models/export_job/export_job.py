@@ -0,0 +1,72 @@
+import uuid
+
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def generate_job_id():
+    return uuid.uuid4().hex
+
+
+class ExportJob(models.Model):
+    """
+    A background export build and the artifact it produced on local storage.
+
+    cache_key identifies the export (type, format, parameters and data version),
+    so concurrent requests for the same export share a single job and file.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    job_id = models.CharField(max_length=32, unique=True, default=generate_job_id, editable=False)
+    export_type = models.CharField(max_length=50)
+    export_format = models.CharField(max_length=10)
+    parameters = models.TextField(blank=True, null=True)  # JSON object
+    data_version = models.CharField(max_length=512, blank=True, null=True)
+    cache_key = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    # Artifact details
+    file_name = models.CharField(max_length=255, blank=True, null=True)
+    file_path = models.CharField(max_length=500, blank=True, null=True)  # Relative to EXPORT_JOB_STORAGE_DIR
+    content_type = models.CharField(max_length=100, blank=True, null=True)
+    file_size = models.BigIntegerField(blank=True, null=True)  # Size in bytes
+    row_count = models.IntegerField(blank=True, null=True)
+    error_message = models.TextField(blank=True, null=True)
+
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs'
+    )
+    request_count = models.PositiveIntegerField(default=1)
+
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'export_job'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['export_type', 'status']),
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.export_type} ({self.export_format}) - {self.status}"
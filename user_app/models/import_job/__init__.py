@@ -0,0 +1,3 @@
+from .import_job import ImportJob
+
+__all__ = ['ImportJob']
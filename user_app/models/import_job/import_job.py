@@ -0,0 +1,73 @@
+import uuid
+
+from django.db import models
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def generate_job_id():
+    return uuid.uuid4().hex
+
+
+class ImportJob(models.Model):
+    """
+    A file import (employees, orders, payees, clients, PEOs) processed in the
+    background, with progress counters and a CSV report of row-level errors.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    job_id = models.CharField(max_length=32, unique=True, default=generate_job_id, editable=False)
+    import_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    options = models.TextField(blank=True, null=True)  # JSON object
+
+    # Uploaded file, kept on local storage until the job finishes
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500, blank=True, null=True)  # Relative to IMPORT_JOB_STORAGE_DIR
+    file_size = models.BigIntegerField(blank=True, null=True)  # Size in bytes
+
+    # Progress counters, updated after every chunk
+    rows_read = models.IntegerField(default=0)
+    rows_validated = models.IntegerField(default=0)
+    rows_inserted = models.IntegerField(default=0)
+    rows_updated = models.IntegerField(default=0)
+    error_count = models.IntegerField(default=0)
+
+    error_report_path = models.CharField(max_length=500, blank=True, null=True)  # Relative to IMPORT_JOB_STORAGE_DIR
+    result = models.TextField(blank=True, null=True)  # JSON body the synchronous import endpoint would return
+    error_message = models.TextField(blank=True, null=True)
+
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='import_jobs'
+    )
+
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'import_job'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['import_type', 'status']),
+            models.Index(fields=['completed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.import_type} ({self.file_name}) - {self.status}"
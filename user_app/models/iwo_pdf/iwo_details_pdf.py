@@ -3,6 +3,7 @@ from django.db import models
 class IWOPDFFiles(models.Model):
     name = models.CharField(max_length=255)
     pdf_url = models.URLField()
+    content_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True)  # SHA-256 of the PDF bytes
     created_at = models.DateTimeField(auto_now_add=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
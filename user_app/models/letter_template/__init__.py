@@ -1,4 +1,4 @@
 from .letter_template import LetterTemplate
+from .letter_bulk_run import LetterBulkRun
 
-__all__ = ['LetterTemplate']
-
+__all__ = ['LetterTemplate', 'LetterBulkRun']
@@ -0,0 +1,57 @@
+import uuid
+
+from django.db import models
+
+
+def generate_run_id():
+    return uuid.uuid4().hex
+
+
+class LetterBulkRun(models.Model):
+    """
+    Progress of one bulk letter generation run. Kept in the database so any
+    worker process can answer progress polls for a run streamed by another.
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    run_id = models.CharField(max_length=32, unique=True, default=generate_run_id, editable=False)
+    template = models.ForeignKey(
+        'LetterTemplate',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bulk_runs'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    total = models.PositiveIntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'letter_bulk_run'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.run_id} - {self.status}"
+
+    def to_progress(self):
+        return {
+            'run_id': self.run_id,
+            'status': self.status,
+            'total': self.total,
+            'rendered': self.rendered,
+            'failed': self.failed,
+        }
@@ -1,2 +1,3 @@
 from .payroll_batch_data import PayrollBatchData
-from .payroll import Payroll
\ No newline at end of file
+from .payroll import Payroll
+from .payroll_batch import PayrollBatch
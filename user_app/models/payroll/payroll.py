@@ -62,6 +62,7 @@ class Payroll(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=['ee_id'])
+            models.Index(fields=['ee_id']),
+            models.Index(fields=['batch_id'], name='payroll_batch_id_idx'),
         ]
         db_table = "payroll"
@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class PayrollBatch(models.Model):
+    """
+    One row per batch_id published by the payroll ingestion endpoint. The row
+    is locked while a batch is swapped in, so two uploads of the same batch_id
+    cannot both find it empty.
+    """
+    batch_id = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "payroll_batch"
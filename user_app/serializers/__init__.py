@@ -10,4 +10,7 @@ from .peo_serializers import *
 from .payee_serializers import *
 from .letter_template_serializers import *
 from .ach_serializers import *
-from .change_log_serializers import *
\ No newline at end of file
+from .change_log_serializers import *
+from .export_job_serializers import *
+from .import_job_serializers import *
+from .audit_event_serializers import *
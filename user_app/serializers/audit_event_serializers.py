@@ -0,0 +1,35 @@
+from rest_framework import serializers
+
+from user_app.models import AuditEvent
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = [
+            'id', 'occurred_at', 'action', 'model_name', 'object_id', 'user_id', 'username',
+            'batch_id', 'changes', 'old_values', 'new_values', 'ip_address', 'session_id',
+        ]
+
+
+class AuditEventQuerySerializer(serializers.Serializer):
+    """
+    Validates query parameters for the audit event search endpoint.
+    """
+    model = serializers.CharField(required=False, help_text="Model name, e.g. 'Employee'.")
+    object_id = serializers.CharField(required=False, help_text="Primary key of the audited row (requires model).")
+    user = serializers.CharField(required=False, help_text="User id or username that made the change.")
+    action = serializers.CharField(required=False, help_text="CREATE, UPDATE, DELETE, BULK_* or BATCH_SUMMARY.")
+    batch_id = serializers.CharField(required=False, help_text="Calculation or import batch id.")
+    start_at = serializers.DateTimeField(required=False, help_text="Earliest event time (ISO-8601).")
+    end_at = serializers.DateTimeField(required=False, help_text="Latest event time (ISO-8601).")
+
+    def validate(self, data):
+        # object ids repeat across tables; the index is on (model, object id)
+        if data.get('object_id') and not data.get('model'):
+            raise serializers.ValidationError("object_id requires model.")
+        start_at = data.get('start_at')
+        end_at = data.get('end_at')
+        if start_at and end_at and end_at < start_at:
+            raise serializers.ValidationError("end_at must be greater than or equal to start_at.")
+        return data
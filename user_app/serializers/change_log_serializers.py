@@ -41,3 +41,20 @@ class ChangeLogQuerySerializer(serializers.Serializer):
             )
         return data
 
+
+
+class ChangeLogFeedQuerySerializer(ChangeLogQuerySerializer):
+    """
+    Validates query parameters for the incremental CDC change feed. The feed
+    has no end bound: each poll continues from `cursor`.
+    """
+
+    end_at = None
+    cursor = serializers.CharField(
+        required=False,
+        help_text="next_cursor from the previous response; omit to start at start_at or the oldest change."
+    )
+    start_at = serializers.DateTimeField(
+        required=False,
+        help_text="UTC timestamp (ISO-8601) to start sources that have no position in the cursor."
+    )
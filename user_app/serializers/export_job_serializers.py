@@ -0,0 +1,65 @@
+import json
+
+from rest_framework import serializers
+from user_app.models import ExportJob
+from user_app.services.export_definitions import EXPORT_DEFINITIONS
+
+
+class ExportJobRequestSerializer(serializers.Serializer):
+    """
+    Serializer for requesting a background export.
+    """
+    export_type = serializers.ChoiceField(
+        choices=list(EXPORT_DEFINITIONS),
+        help_text="Export to build: " + ", ".join(
+            f"{name} ({', '.join(definition.formats)})" for name, definition in EXPORT_DEFINITIONS.items()
+        )
+    )
+    export_format = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="File format; defaults to the first format supported by the export type"
+    )
+    parameters = serializers.DictField(
+        required=False,
+        default=dict,
+        help_text="Export parameters (ACH: case_ids, employee_ids, pay_date, ach_generate_date, agency_payee, store_file)"
+    )
+    refresh = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Rebuild even if a finished file for the same data is still available"
+    )
+
+    def validate(self, attrs):
+        definition = EXPORT_DEFINITIONS[attrs['export_type']]
+        export_format = (attrs.get('export_format') or definition.formats[0]).lower()
+        if export_format not in definition.formats:
+            raise serializers.ValidationError({
+                'export_format': f"Supported formats for {attrs['export_type']}: {', '.join(definition.formats)}"
+            })
+        attrs['export_format'] = export_format
+        return attrs
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Read-only representation of an export job and its artifact.
+    """
+    parameters = serializers.SerializerMethodField()
+    is_ready = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'job_id', 'export_type', 'export_format', 'parameters', 'status', 'is_ready',
+            'file_name', 'file_size', 'row_count', 'error_message', 'request_count',
+            'created_at', 'started_at', 'completed_at', 'expires_at',
+        ]
+        read_only_fields = fields
+
+    def get_parameters(self, obj):
+        return json.loads(obj.parameters) if obj.parameters else {}
+
+    def get_is_ready(self, obj):
+        return obj.status == ExportJob.STATUS_COMPLETED
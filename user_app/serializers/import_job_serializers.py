@@ -0,0 +1,53 @@
+import json
+
+from rest_framework import serializers
+from user_app.models import ImportJob
+from user_app.services.import_jobs import IMPORT_VIEWS
+
+
+class ImportJobRequestSerializer(serializers.Serializer):
+    """
+    Serializer for submitting a file as a background import job.
+    """
+    import_type = serializers.ChoiceField(
+        choices=list(IMPORT_VIEWS),
+        help_text="Import to run: " + ", ".join(IMPORT_VIEWS)
+    )
+    file = serializers.FileField(help_text="Excel or CSV file to import")
+    include_all_ids = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Employees only: return every added/updated ee_id in the job result"
+    )
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """
+    Read-only representation of an import job and its progress.
+    """
+    options = serializers.SerializerMethodField()
+    result = serializers.SerializerMethodField()
+    is_finished = serializers.SerializerMethodField()
+    has_error_report = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'job_id', 'import_type', 'file_name', 'file_size', 'options', 'status', 'is_finished',
+            'rows_read', 'rows_validated', 'rows_inserted', 'rows_updated', 'error_count',
+            'has_error_report', 'result', 'error_message',
+            'created_at', 'started_at', 'completed_at',
+        ]
+        read_only_fields = fields
+
+    def get_options(self, obj):
+        return json.loads(obj.options) if obj.options else {}
+
+    def get_result(self, obj):
+        return json.loads(obj.result) if obj.result else None
+
+    def get_is_finished(self, obj):
+        return obj.status in (ImportJob.STATUS_COMPLETED, ImportJob.STATUS_FAILED)
+
+    def get_has_error_report(self, obj):
+        return bool(obj.error_report_path)
@@ -100,4 +100,64 @@ class LetterTemplateExportSerializer(serializers.Serializer):
         default='csv',
         required=False,
         help_text="Export format: csv or txt (default: csv)"
-    )
\ No newline at end of file
+    )
+
+class LetterTemplateBulkFillSerializer(serializers.Serializer):
+    """
+    Serializer for generating one letter per employee/order and returning them as a ZIP.
+    Targets are selected by explicit employee_ids, explicit order_ids (case_id),
+    or by filters applied to garnishment orders.
+    """
+    template_id = serializers.IntegerField(required=True)
+
+    employee_ids = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        allow_empty=True,
+        help_text="Employee IDs (ee_id). One letter per employee using the most recent order."
+    )
+    order_ids = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        allow_empty=True,
+        help_text="Order IDs (case_id). One letter per order."
+    )
+    filters = serializers.DictField(
+        required=False,
+        help_text="Optional order filters: client_id, garnishment_type, issuing_state, status. One letter per matching order."
+    )
+    variable_values = serializers.DictField(
+        required=False,
+        allow_null=True,
+        help_text="Optional values applied to every letter; they override auto-fetched values."
+    )
+    format = serializers.ChoiceField(
+        choices=['pdf', 'doc', 'docx', 'txt', 'text'],
+        default='pdf',
+        required=False,
+        help_text="Export format for each letter: pdf, doc, docx, txt, or text"
+    )
+
+    ALLOWED_FILTERS = ('client_id', 'garnishment_type', 'issuing_state', 'status')
+
+    def validate_filters(self, value):
+        unknown = sorted(set(value) - set(self.ALLOWED_FILTERS))
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unsupported filters: {', '.join(unknown)}. Allowed: {', '.join(self.ALLOWED_FILTERS)}"
+            )
+        # A blank value would be skipped when filtering and select every order
+        blank = sorted(key for key, filter_value in value.items() if filter_value is None or not str(filter_value).strip())
+        if blank:
+            raise serializers.ValidationError(f"Filters must not be blank: {', '.join(blank)}")
+        return value
+
+    def validate(self, attrs):
+        """
+        Ensure at least one way of selecting letters is provided.
+        """
+        if not (attrs.get('employee_ids') or attrs.get('order_ids') or attrs.get('filters')):
+            raise serializers.ValidationError(
+                "Provide employee_ids, order_ids or filters to select the letters to generate."
+            )
+        return attrs
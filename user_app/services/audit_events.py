@@ -0,0 +1,108 @@
+"""
+Persisted model audit events.
+
+The model audit sink writes every batch of audit records to the audit_event
+table with one bulk insert (AuditEventStore.write). Queries filter on the
+indexed columns (model + object id, user, batch id, time range) and page by
+time, so "what changed on case X last month" is a single index range scan
+instead of a search through the model_audit log file.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from user_app.models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+AUDIT_EVENT_BULK_CREATE_BATCH_SIZE = 500
+AUDIT_EVENT_PURGE_CHUNK_SIZE = 5000
+
+
+class AuditEventStore:
+
+    @staticmethod
+    def write(records):
+        """
+        Insert a batch of raw audit records (as queued by ModelAuditLogger).
+        Called on the audit sink thread, or on the saving thread when the
+        sink writes synchronously.
+        """
+        events = [AuditEventStore._build_event(record) for record in records]
+        # A savepoint when called inside the caller's transaction, so a failed
+        # insert does not break it
+        with transaction.atomic():
+            AuditEvent.objects.bulk_create(events, batch_size=AUDIT_EVENT_BULK_CREATE_BATCH_SIZE)
+        return len(events)
+
+    @staticmethod
+    def _build_event(record):
+        changes = record.get('changes')
+        batch_id = changes.get('batch_id') if isinstance(changes, dict) else None
+        return AuditEvent(
+            occurred_at=record.get('occurred_at') or timezone.now(),
+            action=record['action'],
+            model_name=record['model'],
+            object_id=str(record['object_id'])[:255],
+            user_id=record.get('user_id'),
+            username=record.get('username'),
+            batch_id=str(batch_id)[:255] if batch_id else None,
+            changes=changes,
+            old_values=record.get('old_values'),
+            new_values=record.get('new_values'),
+            ip_address=record.get('ip_address'),
+            session_id=record.get('session_id'),
+        )
+
+    @staticmethod
+    def search(model_name=None, object_id=None, user=None, action=None, batch_id=None,
+               start_at=None, end_at=None):
+        """
+        Events matching the given filters, newest first. user matches the
+        user id or the username.
+        """
+        queryset = AuditEvent.objects.all()
+        if model_name:
+            queryset = queryset.filter(model_name=model_name)
+        if object_id:
+            queryset = queryset.filter(object_id=object_id)
+        if user:
+            if str(user).isdigit():
+                queryset = queryset.filter(user_id=str(user))
+            else:
+                queryset = queryset.filter(username=user)
+        if action:
+            queryset = queryset.filter(action=action.upper())
+        if batch_id:
+            queryset = queryset.filter(batch_id=batch_id)
+        if start_at:
+            queryset = queryset.filter(occurred_at__gte=start_at)
+        if end_at:
+            queryset = queryset.filter(occurred_at__lte=end_at)
+        return queryset.order_by('-occurred_at', '-id')
+
+    @staticmethod
+    def purge_expired():
+        """
+        Delete events older than AUDIT_EVENT_RETENTION_DAYS, oldest first and
+        in chunks so the table is never locked for long. Returns the number
+        of events removed.
+        """
+        retention_days = getattr(settings, 'AUDIT_EVENT_RETENTION_DAYS', None)
+        if not retention_days:
+            return 0
+        cutoff = timezone.now() - timedelta(days=retention_days)
+        removed = 0
+        while True:
+            ids = list(
+                AuditEvent.objects.filter(occurred_at__lt=cutoff)
+                .order_by('occurred_at')
+                .values_list('id', flat=True)[:AUDIT_EVENT_PURGE_CHUNK_SIZE]
+            )
+            if not ids:
+                return removed
+            deleted, _ = AuditEvent.objects.filter(id__in=ids).delete()
+            removed += deleted
@@ -0,0 +1,180 @@
+"""
+PostgreSQL COPY + staging table upserts for the import views.
+
+bulk_create(ignore_conflicts=True) followed by bulk_update sends large
+parameterized statements and silently drops rows that hit a unique conflict.
+CopyUpsertLoader instead:
+
+1. COPYs the rows into a temporary staging table shaped like the target table,
+2. runs a single INSERT ... SELECT ... ON CONFLICT (<key>) DO UPDATE into the
+   target table, and
+3. reads back which keys were inserted and which were updated.
+
+The loader only runs on PostgreSQL (and can be switched off with
+IMPORT_COPY_UPSERT_ENABLED); callers keep their ORM path for SQL Server and
+SQLite and check CopyUpsertLoader.is_available() first.
+"""
+import logging
+import uuid
+from io import StringIO
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class UpsertResult:
+    """
+    Keys written by one upsert, split by whether the row was inserted or an
+    existing row was updated.
+    """
+
+    __slots__ = ('inserted', 'updated')
+
+    def __init__(self, inserted=None, updated=None):
+        self.inserted = inserted or []
+        self.updated = updated or []
+
+
+class CopyUpsertLoader:
+    """
+    Upsert model instances into ``model``'s table keyed on the unique ``key_field``.
+
+    Args:
+        model: Django model class (EmployeeDetail, GarnishmentOrder, PayeeDetails, ...)
+        key_field: name of the unique field used as the conflict target
+        update_fields: fields overwritten when the key already exists; defaults
+            to every concrete field except the primary key, the key and auto_now_add fields
+        using: database alias
+    """
+
+    def __init__(self, model, key_field, update_fields=None, using='default'):
+        self.model = model
+        self.using = using
+        self.key_field = model._meta.get_field(key_field)
+        self.insert_fields = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        if update_fields is None:
+            update_fields = [
+                field.name for field in self.insert_fields
+                if field is not self.key_field and not getattr(field, 'auto_now_add', False)
+            ]
+        self.update_fields = [model._meta.get_field(name) for name in update_fields]
+        if not any(getattr(field, 'auto_now', False) for field in self.update_fields):
+            self.update_fields += [
+                field for field in self.insert_fields if getattr(field, 'auto_now', False)
+            ]
+
+    @staticmethod
+    def is_available(using='default'):
+        """
+        True when the COPY loader can be used on this database connection.
+        """
+        return (
+            getattr(settings, 'IMPORT_COPY_UPSERT_ENABLED', True)
+            and connections[using].vendor == 'postgresql'
+        )
+
+    def upsert(self, instances):
+        """
+        Write the instances in one COPY and one INSERT ... ON CONFLICT statement.
+
+        When several instances share a key, the last one wins. Primary keys of
+        the written rows are set back on all the instances.
+
+        Returns:
+            UpsertResult with the key values that were inserted / updated.
+        """
+        if not instances:
+            return UpsertResult()
+
+        # ON CONFLICT cannot touch the same target row twice in one statement
+        by_key = {}
+        for instance in instances:
+            by_key.setdefault(getattr(instance, self.key_field.attname), []).append(instance)
+        rows = [duplicates[-1] for duplicates in by_key.values()]
+
+        connection = connections[self.using]
+        staging_table = f"import_stage_{uuid.uuid4().hex[:12]}"
+        quote = connection.ops.quote_name
+        table = quote(self.model._meta.db_table)
+        columns = ', '.join(quote(field.column) for field in self.insert_fields)
+        key_column = quote(self.key_field.column)
+        pk_column = quote(self.model._meta.pk.column)
+        assignments = ', '.join(
+            f"{quote(field.column)} = EXCLUDED.{quote(field.column)}" for field in self.update_fields
+        )
+        conflict_action = f"DO UPDATE SET {assignments}" if assignments else "DO NOTHING"
+
+        with transaction.atomic(using=self.using), connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {quote(staging_table)} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {table} WITH NO DATA"
+            )
+            self._copy(
+                cursor,
+                f"COPY {quote(staging_table)} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                self._csv_payload(rows, connection),
+            )
+            cursor.execute(
+                f"INSERT INTO {table} AS target ({columns}) "
+                f"SELECT {columns} FROM {quote(staging_table)} "
+                f"ON CONFLICT ({key_column}) {conflict_action} "
+                f"RETURNING target.{key_column}, target.{pk_column}, (target.xmax = 0)"
+            )
+            returned = cursor.fetchall()
+
+        result = UpsertResult()
+        for key, pk, inserted in returned:
+            for instance in by_key.get(key, []):
+                instance.pk = pk
+                instance._state.adding = False
+            (result.inserted if inserted else result.updated).append(key)
+
+        logger.info(
+            f"COPY upsert into {self.model._meta.db_table}: "
+            f"{len(result.inserted)} inserted, {len(result.updated)} updated"
+        )
+        return result
+
+    def _csv_payload(self, rows, connection):
+        now = timezone.now()
+        buffer = StringIO()
+        for instance in rows:
+            values = []
+            for field in self.insert_fields:
+                if getattr(field, 'auto_now', False) or (
+                    getattr(field, 'auto_now_add', False) and getattr(instance, field.attname) is None
+                ):
+                    setattr(instance, field.attname, now)
+                value = field.get_db_prep_save(getattr(instance, field.attname), connection)
+                values.append(self._csv_value(value))
+            buffer.write(','.join(values))
+            buffer.write('\n')
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def _csv_value(value):
+        # In COPY's CSV format an unquoted empty field is NULL and a quoted one is ''
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            value = 't' if value else 'f'
+        text = str(value)
+        return '"' + text.replace('"', '""') + '"'
+
+    @staticmethod
+    def _copy(cursor, sql, payload):
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):
+            # psycopg2
+            raw_cursor.copy_expert(sql, payload)
+        else:
+            # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(payload.getvalue())
@@ -0,0 +1,459 @@
+"""
+Change data capture (CDC) sources for the change log API.
+
+A ChangeCaptureSource reads the changes of one capture instance, newest
+first by LSN. SqlServerCaptureSource reads SQL Server CDC tables;
+InMemoryCaptureSource serves a list of change rows and stands in for SQL
+Server in tests and local development.
+
+For source=all, fetch_merged_changes reads every source concurrently, each on
+its own database connection. Each source returns at most `limit` rows, already
+ordered by LSN. The per-source lists are then combined with a heap-based
+k-way merge that stops after `limit` rows.
+
+fetch_change_feed serves the incremental feed, oldest change first. An opaque
+cursor records, for each source, its capture instance and the (start_lsn,
+seqval) of the last change returned. The next poll reads only the changes
+after that position (keyset pagination on the LSN), so each poll does work
+bounded by `limit`, however long the capture tables are.
+"""
+from __future__ import annotations
+
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import OperationalError, ProgrammingError
+from django.utils import timezone
+
+from garnishedge_project.metrics import monitor_executor
+
+logger = logging.getLogger(__name__)
+
+OPERATION_CODES = {
+    "delete": 1,
+    "insert": 2,
+    "update_before": 3,
+    "update_after": 4,
+}
+OPERATION_LABELS = {code: label for label, code in OPERATION_CODES.items()}
+
+# Errors that make one source unreadable (missing capture instance, no
+# permission, connection dropped) without affecting the others
+SOURCE_ERRORS = (OperationalError, ProgrammingError)
+
+FEED_CURSOR_SALT = "user_app.change_capture.feed"
+FEED_CURSOR_VERSION = 1
+
+
+class InvalidFeedCursor(ValueError):
+    """
+    The feed cursor is malformed, was not issued by this server or no longer
+    matches the configured capture instances.
+    """
+
+
+def format_lsn(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def as_naive(dt):
+    if not dt:
+        return dt
+    return timezone.make_naive(dt) if timezone.is_aware(dt) else dt
+
+
+def change_sort_key(row: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Order of a serialized change row. LSNs are fixed-width binary(10)
+    values, so their hex strings sort in commit order across tables.
+    """
+    return row.get("start_lsn") or "", row.get("sequence_value") or ""
+
+
+def merge_changes(row_lists: Iterable[List[Dict[str, Any]]], limit: int,
+                  reverse: bool = True) -> List[Dict[str, Any]]:
+    """
+    k-way merge of change lists that are each sorted newest first (oldest
+    first with reverse=False). Only the first `limit` rows are produced.
+    """
+    return list(islice(heapq.merge(*row_lists, key=change_sort_key, reverse=reverse), limit))
+
+
+def encode_feed_cursor(positions: Dict[str, Dict[str, str]]) -> str:
+    """
+    Signed, opaque cursor for {source_key: {"capture_instance", "start_lsn",
+    "sequence_value"}}
+    """
+    payload = {
+        "v": FEED_CURSOR_VERSION,
+        "p": {
+            source_key: [position["capture_instance"], position["start_lsn"], position["sequence_value"]]
+            for source_key, position in positions.items()
+        },
+    }
+    return signing.dumps(payload, salt=FEED_CURSOR_SALT, compress=True)
+
+
+def decode_feed_cursor(cursor: str) -> Dict[str, Dict[str, str]]:
+    try:
+        payload = signing.loads(cursor, salt=FEED_CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidFeedCursor("Invalid cursor.")
+    if not isinstance(payload, dict) or payload.get("v") != FEED_CURSOR_VERSION:
+        raise InvalidFeedCursor("Unsupported cursor version.")
+    return {
+        source_key: {"capture_instance": capture_instance, "start_lsn": start_lsn, "sequence_value": sequence_value}
+        for source_key, (capture_instance, start_lsn, sequence_value) in payload["p"].items()
+    }
+
+
+class ChangeCaptureSource:
+    """
+    Interface of one CDC source (one capture instance).
+
+    Args:
+        source_key: key of the source in CDC_CAPTURE_INSTANCES, returned as
+            source_key on each row
+        table_name: table name returned on each row
+        select_columns: captured columns returned as the row payload
+    """
+    # Identifies the change stream in feed cursors; a cursor taken on one
+    # capture instance is not valid for another
+    capture_instance = None
+
+    def __init__(self, source_key: str, table_name: str, select_columns: Optional[List[str]] = None):
+        self.source_key = source_key
+        self.table_name = table_name
+        if isinstance(select_columns, str):
+            select_columns = [select_columns]
+        self.select_columns = list(select_columns or [])
+
+    def fetch_changes(self, user_id: Optional[int] = None, start_at=None, end_at=None,
+                      operation: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Up to `limit` serialized changes, newest first by (start_lsn,
+        sequence_value)
+        """
+        raise NotImplementedError
+
+    def fetch_changes_after(self, position: Optional[Tuple[bytes, bytes]] = None, user_id: Optional[int] = None,
+                            start_at=None, operation: Optional[str] = None,
+                            limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Up to `limit` serialized changes after position, a (start_lsn,
+        seqval) pair, oldest first. Without a position the changes start at
+        start_at, or at the oldest change still captured.
+        """
+        raise NotImplementedError
+
+    def serialize_row(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        changed_at = row.get("changed_at")
+        if changed_at and timezone.is_aware(changed_at):
+            changed_at = timezone.make_naive(changed_at)
+        return {
+            "table": self.table_name,
+            "changed_at": changed_at,
+            "operation": OPERATION_LABELS.get(row["operation_code"], "unknown"),
+            "modified_by": row.get("modified_by"),
+            "start_lsn": format_lsn(row.get("start_lsn")),
+            "sequence_value": format_lsn(row.get("sequence_value")),
+            "payload": {column: row.get(column) for column in self.select_columns},
+            "source_key": self.source_key,
+        }
+
+
+class SqlServerCaptureSource(ChangeCaptureSource):
+    """
+    Reads cdc.fn_cdc_get_all_changes_<capture_instance> on SQL Server / Azure
+    SQL. The capture instance and column names come from
+    CDC_CAPTURE_INSTANCES, never from the request.
+    """
+
+    def __init__(self, source_key: str, config: Dict[str, Any], using: str = DEFAULT_DB_ALIAS):
+        self.capture_instance = config["capture_instance"]
+        self.user_column = config.get("user_column", "modified_by")
+        self.using = using
+        super().__init__(
+            source_key,
+            config.get("table_name", self.capture_instance),
+            config.get("select_columns", []),
+        )
+
+    @staticmethod
+    def is_supported(using: str = DEFAULT_DB_ALIAS) -> bool:
+        engine = connections[using].settings_dict.get("ENGINE", "")
+        return "sql_server" in engine or "mssql" in engine
+
+    def fetch_changes(self, user_id=None, start_at=None, end_at=None, operation=None, limit=500):
+        with connections[self.using].cursor() as cursor:
+            start_lsn = self._resolve_start_lsn(cursor, start_at)
+            end_lsn = self._resolve_end_lsn(cursor, end_at)
+            return self._select_changes(cursor, start_lsn, end_lsn, limit, user_id, operation)
+
+    def fetch_changes_after(self, position=None, user_id=None, start_at=None, operation=None, limit=500):
+        with connections[self.using].cursor() as cursor:
+            end_lsn = self._resolve_end_lsn(cursor, None)
+            if position is None:
+                start_lsn = self._resolve_start_lsn(cursor, start_at)
+            else:
+                cursor.execute("SELECT sys.fn_cdc_get_min_lsn(%s)", [self.capture_instance])
+                min_lsn = cursor.fetchone()[0]
+                start_lsn = position[0]
+                if min_lsn is not None and bytes(min_lsn) > start_lsn:
+                    # CDC cleanup removed changes the consumer had not read yet
+                    logger.warning(
+                        f"CDC feed position of '{self.source_key}' is older than the retained changes; "
+                        f"continuing from the oldest retained change"
+                    )
+                    start_lsn = min_lsn
+            # The change functions reject windows that end before they start
+            if start_lsn is None or end_lsn is None or bytes(start_lsn) > bytes(end_lsn):
+                return []
+            return self._select_changes(
+                cursor, start_lsn, end_lsn, limit, user_id, operation, after=position, ascending=True
+            )
+
+    def _select_changes(self, cursor, start_lsn, end_lsn, limit, user_id, operation, after=None, ascending=False):
+        params: List[Any] = [limit, start_lsn, end_lsn]
+        where_clauses = ["1=1"]
+
+        if after is not None:
+            # Keyset condition: strictly after the last change returned
+            where_clauses.append(
+                "(src.__$start_lsn > %s OR (src.__$start_lsn = %s AND src.__$seqval > %s))"
+            )
+            params.extend([after[0], after[0], after[1]])
+
+        if user_id is not None:
+            where_clauses.append(f"src.[{self.user_column}] = %s")
+            params.append(user_id)
+
+        if operation:
+            where_clauses.append("src.__$operation = %s")
+            params.append(OPERATION_CODES[operation])
+
+        extra_select = "".join(f", src.[{column}] AS [{column}]" for column in self.select_columns)
+        direction = "ASC" if ascending else "DESC"
+
+        # TOP lets the server stop after `limit` rows instead of sorting
+        # the whole window for a client-side fetchmany
+        sql = f"""
+            SELECT TOP (%s)
+                sys.fn_cdc_map_lsn_to_time(src.__$start_lsn) AS changed_at,
+                src.__$start_lsn AS start_lsn,
+                src.__$seqval AS sequence_value,
+                src.__$operation AS operation_code,
+                src.[{self.user_column}] AS modified_by
+                {extra_select}
+            FROM cdc.fn_cdc_get_all_changes_{self.capture_instance} (%s, %s, 'all') AS src
+            WHERE {' AND '.join(where_clauses)}
+            ORDER BY src.__$start_lsn {direction}, src.__$seqval {direction}
+        """
+
+        cursor.execute(sql, params)
+        records = cursor.fetchall()
+        columns = [meta[0] for meta in cursor.description]
+        return [self.serialize_row(dict(zip(columns, record))) for record in records]
+
+    def _resolve_start_lsn(self, cursor, start_at) -> bytes:
+        if start_at:
+            cursor.execute(
+                "SELECT sys.fn_cdc_map_time_to_lsn(%s, %s)",
+                ["smallest greater than or equal", as_naive(start_at)],
+            )
+            mapped = cursor.fetchone()[0]
+            if mapped:
+                return mapped
+        cursor.execute("SELECT sys.fn_cdc_get_min_lsn(%s)", [self.capture_instance])
+        return cursor.fetchone()[0]
+
+    def _resolve_end_lsn(self, cursor, end_at) -> bytes:
+        if end_at:
+            cursor.execute(
+                "SELECT sys.fn_cdc_map_time_to_lsn(%s, %s)",
+                ["largest less than or equal", as_naive(end_at)],
+            )
+            mapped = cursor.fetchone()[0]
+            if mapped:
+                return mapped
+        cursor.execute("SELECT sys.fn_cdc_get_max_lsn()")
+        return cursor.fetchone()[0]
+
+
+class InMemoryCaptureSource(ChangeCaptureSource):
+    """
+    Serves change rows from a list, with the same filtering and ordering as
+    SqlServerCaptureSource. Each row is a dict with changed_at, start_lsn and
+    sequence_value (bytes), operation_code, modified_by and the select_columns.
+    """
+
+    def __init__(self, source_key: str, rows: List[Dict[str, Any]], table_name: Optional[str] = None,
+                 select_columns: Optional[List[str]] = None):
+        super().__init__(source_key, table_name or source_key, select_columns)
+        self.capture_instance = self.table_name
+        self.rows = list(rows)
+
+    def fetch_changes(self, user_id=None, start_at=None, end_at=None, operation=None, limit=500):
+        matches = self._matching_rows(user_id, start_at, end_at, operation)
+        matches.sort(key=self._position, reverse=True)
+        return [self.serialize_row(row) for row in matches[:limit]]
+
+    def fetch_changes_after(self, position=None, user_id=None, start_at=None, operation=None, limit=500):
+        matches = self._matching_rows(user_id, None if position else start_at, None, operation)
+        if position is not None:
+            matches = [row for row in matches if self._position(row) > position]
+        matches.sort(key=self._position)
+        return [self.serialize_row(row) for row in matches[:limit]]
+
+    @staticmethod
+    def _position(row):
+        return bytes(row["start_lsn"]), bytes(row["sequence_value"])
+
+    def _matching_rows(self, user_id, start_at, end_at, operation):
+        start_at, end_at = as_naive(start_at), as_naive(end_at)
+        operation_code = OPERATION_CODES[operation] if operation else None
+        return [
+            row for row in self.rows
+            if (user_id is None or row.get("modified_by") == user_id)
+            and (operation_code is None or row["operation_code"] == operation_code)
+            and (start_at is None or as_naive(row["changed_at"]) >= start_at)
+            and (end_at is None or as_naive(row["changed_at"]) <= end_at)
+        ]
+
+
+def get_capture_source(source_key: str) -> ChangeCaptureSource:
+    """
+    The source configured under source_key in CDC_CAPTURE_INSTANCES
+    """
+    return SqlServerCaptureSource(source_key, settings.CDC_CAPTURE_INSTANCES[source_key])
+
+
+def get_capture_sources() -> List[ChangeCaptureSource]:
+    return [get_capture_source(source_key) for source_key in settings.CDC_CAPTURE_INSTANCES]
+
+
+def _fetch_on_worker(fetch, source: ChangeCaptureSource):
+    try:
+        return fetch(source)
+    finally:
+        # Worker threads open their own connections; do not leave them idle
+        connections.close_all()
+
+
+def fetch_from_sources(sources: List[ChangeCaptureSource], fetch,
+                       max_workers: Optional[int] = None) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """
+    Call fetch(source) for every source concurrently.
+
+    Returns the rows by source key and the keys of the sources that could not
+    be read; those are logged and skipped.
+    """
+    if max_workers is None:
+        max_workers = getattr(settings, "CDC_FETCH_WORKERS", 4)
+    max_workers = max(1, min(max_workers, len(sources)))
+
+    rows_by_source = {}
+    failed_sources = []
+    if max_workers == 1:
+        # Nothing to overlap; read on the request's own connection
+        for source in sources:
+            try:
+                rows_by_source[source.source_key] = fetch(source)
+            except SOURCE_ERRORS as exc:
+                logger.warning(f"Unable to read CDC source '{source.source_key}': {exc}")
+                failed_sources.append(source.source_key)
+        return rows_by_source, failed_sources
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cdc-fetch") as executor:
+        monitor_executor("cdc_fetch", executor)
+        futures = [(source, executor.submit(_fetch_on_worker, fetch, source)) for source in sources]
+        for source, future in futures:
+            try:
+                rows_by_source[source.source_key] = future.result()
+            except SOURCE_ERRORS as exc:
+                logger.warning(f"Unable to read CDC source '{source.source_key}': {exc}")
+                failed_sources.append(source.source_key)
+    return rows_by_source, failed_sources
+
+
+def fetch_merged_changes(sources: List[ChangeCaptureSource], limit: int, max_workers: Optional[int] = None,
+                         **filters) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Read all sources concurrently and merge their changes, newest first.
+
+    Returns the first `limit` changes and the keys of the sources that could
+    not be read.
+    """
+    rows_by_source, failed_sources = fetch_from_sources(
+        sources, lambda source: source.fetch_changes(limit=limit, **filters), max_workers
+    )
+    return merge_changes(rows_by_source.values(), limit), failed_sources
+
+
+def fetch_change_feed(sources: List[ChangeCaptureSource], cursor: Optional[str], limit: int,
+                      max_workers: Optional[int] = None, **filters) -> Dict[str, Any]:
+    """
+    The next page of the incremental change feed, oldest change first.
+
+    Each source is read from its position in cursor (or from start_at when
+    the cursor has none). Returns the changes, the cursor to send on the
+    next poll, whether more changes were already waiting, and the keys of
+    the sources that could not be read; their positions are kept, so no
+    change is skipped.
+
+    Raises:
+        InvalidFeedCursor: the cursor is invalid or was taken on another
+            capture instance
+    """
+    positions = decode_feed_cursor(cursor) if cursor else {}
+    after = {}
+    for source in sources:
+        position = positions.get(source.source_key)
+        if position is None:
+            continue
+        if position["capture_instance"] != source.capture_instance:
+            raise InvalidFeedCursor(
+                f"Cursor position for '{source.source_key}' belongs to another capture instance."
+            )
+        try:
+            after[source.source_key] = (bytes.fromhex(position["start_lsn"]), bytes.fromhex(position["sequence_value"]))
+        except (TypeError, ValueError):
+            raise InvalidFeedCursor(f"Invalid cursor position for '{source.source_key}'.")
+
+    rows_by_source, failed_sources = fetch_from_sources(
+        sources,
+        lambda source: source.fetch_changes_after(position=after.get(source.source_key), limit=limit, **filters),
+        max_workers,
+    )
+    rows = merge_changes(rows_by_source.values(), limit, reverse=False)
+
+    # Advance each source to the last of its changes that made the page
+    capture_instances = {source.source_key: source.capture_instance for source in sources}
+    for row in rows:
+        positions[row["source_key"]] = {
+            "capture_instance": capture_instances[row["source_key"]],
+            "start_lsn": row["start_lsn"],
+            "sequence_value": row["sequence_value"],
+        }
+    return {
+        "results": rows,
+        "next_cursor": encode_feed_cursor(positions),
+        # More changes are waiting if some fetched rows did not make the page,
+        # or if a source filled its page and may have more behind it
+        "has_more": sum(map(len, rows_by_source.values())) > len(rows) or any(
+            len(source_rows) >= limit for source_rows in rows_by_source.values()
+        ),
+        "failed_sources": failed_sources,
+    }
@@ -0,0 +1,296 @@
+"""
+Column-wise normalization and validation for employee imports.
+
+EmployeeImportView used to walk the uploaded DataFrame with iterrows and clean
+every cell in Python. EmployeeImportNormalizer does the same cleaning, foreign
+key mapping (client, home/work state, filing status) and required-field checks
+as pandas operations over whole columns, and returns ready-to-write records plus
+an error frame.
+"""
+import pandas as pd
+
+from user_app.constants import EmployeeFields as EE
+from user_app.utils import DataProcessingUtils
+
+# Candidate identifier columns, after DataProcessingUtils.normalize_field_name
+EE_ID_CANDIDATES = ['ee_id', 'employee_id', 'employee id', 'ee id', 'eeid', 'id']
+
+STRING_FIELDS = [EE.FIRST_NAME, EE.MIDDLE_NAME, EE.LAST_NAME, EE.GENDER, EE.MARITAL_STATUS]
+INTEGER_FIELDS = [
+    'number_of_exemptions',
+    'number_of_student_default_loan',
+    'number_of_dependent_child',
+    EE.NUMBER_OF_ACTIVE_GARNISHMENT,
+]
+BOOLEAN_FIELDS = [EE.SUPPORT_SECOND_FAMILY, EE.GARNISHMENT_FEES_STATUS]
+DATE_FIELDS = [EE.GARNISHMENT_FEES_SUSPENDED_TILL]
+
+# Address columns -> EmplopyeeAddress field
+ADDRESS_STRING_FIELDS = {
+    'address_1': 'address_1',
+    'address_2': 'address_2',
+    'city': 'city',
+    'address_state': 'state',
+    'county': 'county',
+    'country': 'country',
+}
+ADDRESS_INTEGER_FIELDS = {
+    'zip_code': 'zip_code',
+    'geo_code': 'geo_code',
+}
+
+# Defaults applied to new employees for NOT NULL columns left blank in the file
+CREATE_DEFAULTS = {
+    'number_of_exemptions': 0,
+    'number_of_student_default_loan': 0,
+    'number_of_dependent_child': 0,
+    EE.SUPPORT_SECOND_FAMILY: False,
+    EE.GARNISHMENT_FEES_STATUS: False,
+    EE.NUMBER_OF_ACTIVE_GARNISHMENT: 0,
+    EE.SSN: '',
+}
+
+ERROR_COLUMNS = ['row', 'ee_id', 'error']
+
+
+def find_ee_id_column(columns):
+    """
+    Return the identifier column present in the (normalized) columns, or None.
+    """
+    return next((c for c in EE_ID_CANDIDATES if c in columns), None)
+
+
+class EmployeeImportBatch:
+    """
+    Result of normalizing one employee DataFrame.
+
+    create_records / update_records are lists of EmployeeDetail field dicts
+    (foreign keys already resolved to *_id values). Update records only carry
+    the fields that had a value in the file. addresses maps ee_id to
+    EmplopyeeAddress field dicts and errors is a DataFrame with ERROR_COLUMNS.
+    create_values maps the ee_id of each create record to its values in the
+    file, before defaults are applied.
+    """
+
+    __slots__ = ('create_records', 'update_records', 'addresses', 'errors', 'create_values')
+
+    def __init__(self, create_records, update_records, addresses, errors, create_values=None):
+        self.create_records = create_records
+        self.update_records = update_records
+        self.addresses = addresses
+        self.errors = errors
+        self.create_values = create_values or {}
+
+    def update_records_for(self, ee_ids):
+        """
+        Update records for create rows whose employee turned out to exist,
+        carrying only the fields that had a value in the file.
+        """
+        return [self.create_values[ee_id] for ee_id in ee_ids if ee_id in self.create_values]
+
+    def error_messages(self):
+        """
+        Format the error frame the way the import response reports validation errors.
+        """
+        messages = []
+        for row, ee_id, error in self.errors[ERROR_COLUMNS].itertuples(index=False, name=None):
+            prefix = f"Row {row} (ee_id={ee_id})" if ee_id else f"Row {row}"
+            messages.append(f"{prefix}: {error}")
+        return messages
+
+
+class EmployeeImportNormalizer:
+    """
+    Normalizes employee import frames against pre-fetched lookup tables.
+
+    Args:
+        client_mapping: client_id -> Client pk
+        state_mapping: lower-cased state name -> State pk
+        filing_status_mapping: lower-cased filing status name -> FedFilingStatus pk
+        default_filing_status: filing status name used when the file has none
+        default_marital_status: marital status used when the file has none
+    """
+
+    def __init__(self, client_mapping, state_mapping, filing_status_mapping,
+                 default_filing_status, default_marital_status):
+        self.client_mapping = client_mapping
+        self.state_mapping = state_mapping
+        self.filing_status_mapping = filing_status_mapping
+        self.default_filing_status_id = filing_status_mapping.get(
+            str(default_filing_status).strip().lower()
+        )
+        self.default_marital_status = default_marital_status
+
+    def normalize(self, df, ee_id_column, existing_ee_ids):
+        """
+        Clean, map and validate a DataFrame whose columns were already passed
+        through DataProcessingUtils.normalize_field_name.
+
+        Rows are numbered from the DataFrame index (index 0 is row 1), so
+        chunked readers keep reporting file positions.
+
+        Returns:
+            EmployeeImportBatch
+        """
+        row_numbers = pd.Series(df.index + 1, index=df.index)
+        column = self._column_getter(df)
+
+        ee_ids = DataProcessingUtils.parse_string_series(df[ee_id_column])
+        fields = pd.DataFrame({EE.EMPLOYEE_ID: ee_ids}, index=df.index)
+
+        for field in STRING_FIELDS:
+            fields[field] = DataProcessingUtils.parse_string_series(column(field))
+        for field in INTEGER_FIELDS:
+            fields[field] = DataProcessingUtils.parse_integer_series(column(field))
+        for field in BOOLEAN_FIELDS:
+            fields[field] = DataProcessingUtils.parse_boolean_series(column(field))
+        for field in DATE_FIELDS:
+            fields[field] = DataProcessingUtils.parse_date_series(column(field))
+
+        fields[EE.SSN] = DataProcessingUtils.parse_string_series(column(EE.SSN))
+
+        # Foreign keys: map cleaned keys onto the pre-fetched lookup tables
+        client_keys = DataProcessingUtils.parse_string_series(column(EE.CLIENT_ID))
+        home_state_keys = self._lookup_keys(column(EE.HOME_STATE))
+        work_state_keys = self._lookup_keys(column(EE.WORK_STATE))
+        filing_status_keys = self._lookup_keys(column(EE.FILING_STATUS))
+
+        fields['client_id'] = self._map_keys(client_keys, self.client_mapping)
+        fields['home_state_id'] = self._map_keys(home_state_keys, self.state_mapping)
+        fields['work_state_id'] = self._map_keys(work_state_keys, self.state_mapping)
+        fields['filing_status_id'] = self._map_keys(filing_status_keys, self.filing_status_mapping)
+
+        # Address columns; older files carry the address state as "state" (-> issuing_state)
+        address_state_column = 'address_state' if 'address_state' in df.columns else 'issuing_state'
+        address = pd.DataFrame(index=df.index)
+        for source, target in ADDRESS_STRING_FIELDS.items():
+            source_column = address_state_column if source == 'address_state' else source
+            address[target] = DataProcessingUtils.parse_string_series(column(source_column))
+        for source, target in ADDRESS_INTEGER_FIELDS.items():
+            address[target] = DataProcessingUtils.parse_integer_series(column(source))
+
+        # ---- validation -------------------------------------------------
+        errors = []
+        missing_id = ee_ids.isna()
+        errors.append(self._errors(row_numbers, ee_ids, missing_id, 'missing ee_id'))
+
+        is_new = ~missing_id & ~ee_ids.isin(existing_ee_ids)
+        required = {
+            'client_id': client_keys,
+            'home_state': home_state_keys,
+            'work_state': work_state_keys,
+        }
+        missing = pd.Series('', index=df.index)
+        for name, keys in required.items():
+            missing = missing.where(keys.notna(), missing + ', ' + name)
+        has_missing = is_new & (missing != '')
+        errors.append(self._errors(
+            row_numbers, ee_ids, has_missing,
+            'missing required field(s): ' + missing.str.lstrip(', ')
+        ))
+
+        # Values given in the file must map, for updates as well as new employees
+        unmapped = pd.Series('', index=df.index)
+        lookups = [
+            ('client_id', client_keys, fields['client_id']),
+            ('home_state', home_state_keys, fields['home_state_id']),
+            ('work_state', work_state_keys, fields['work_state_id']),
+            ('filing_status', filing_status_keys, fields['filing_status_id']),
+        ]
+        for name, keys, mapped in lookups:
+            unmapped = unmapped.where(
+                keys.isna() | mapped.notna(),
+                unmapped + ", " + name + " '" + keys.fillna('') + "' not found"
+            )
+        has_unmapped = ~missing_id & ~has_missing & (unmapped != '')
+        errors.append(self._errors(row_numbers, ee_ids, has_unmapped, unmapped.str.lstrip(', ')))
+
+        # A later row for the same ee_id wins, as if it had been imported afterwards
+        superseded = ~missing_id & ee_ids.duplicated(keep='last')
+        if superseded.any():
+            last_rows = row_numbers[~missing_id].groupby(ee_ids[~missing_id]).last()
+            superseded_by = ee_ids[superseded].map(last_rows).astype(int).astype(str)
+            errors.append(self._errors(
+                row_numbers, ee_ids, superseded & ~has_missing & ~has_unmapped,
+                'duplicate ee_id, superseded by row ' + superseded_by.reindex(df.index, fill_value='')
+            ))
+
+        errors = [frame for frame in errors if frame is not None]
+        if errors:
+            error_frame = pd.concat(errors, ignore_index=True).sort_values('row', kind='stable')
+        else:
+            error_frame = pd.DataFrame(columns=ERROR_COLUMNS)
+
+        # ---- records ----------------------------------------------------
+        valid = ~missing_id & ~has_missing & ~has_unmapped & ~superseded
+
+        create_mask = valid & is_new
+        update_mask = valid & ~is_new
+
+        create_frame = fields[create_mask].copy()
+        create_values = {
+            record[EE.EMPLOYEE_ID]: {key: value for key, value in record.items() if value is not None}
+            for record in self._records(create_frame)
+        }
+        create_frame[EE.MARITAL_STATUS] = create_frame[EE.MARITAL_STATUS].where(
+            create_frame[EE.MARITAL_STATUS].notna(), self.default_marital_status
+        )
+        create_frame['filing_status_id'] = create_frame['filing_status_id'].where(
+            create_frame['filing_status_id'].notna(), self.default_filing_status_id
+        )
+        for field, default in CREATE_DEFAULTS.items():
+            create_frame[field] = create_frame[field].where(create_frame[field].notna(), default)
+        create_records = self._records(create_frame)
+
+        update_records = [
+            {key: value for key, value in record.items() if value is not None}
+            for record in self._records(fields[update_mask])
+        ]
+
+        addresses = {}
+        address_rows = address[create_mask | update_mask]
+        for ee_id, record in zip(ee_ids[create_mask | update_mask], self._records(address_rows)):
+            address_data = {key: value for key, value in record.items() if value is not None}
+            if address_data:
+                addresses[ee_id] = address_data
+
+        return EmployeeImportBatch(create_records, update_records, addresses, error_frame, create_values)
+
+    @staticmethod
+    def _column_getter(df):
+        empty = pd.Series([None] * len(df), index=df.index, dtype=object)
+
+        def column(name):
+            return df[name] if name in df.columns else empty
+        return column
+
+    @staticmethod
+    def _records(frame):
+        # Row dicts built from column lists; much cheaper than to_dict('records') on object columns
+        columns = list(frame.columns)
+        return [dict(zip(columns, row)) for row in zip(*(frame[c].tolist() for c in columns))]
+
+    @staticmethod
+    def _lookup_keys(series):
+        keys = DataProcessingUtils.parse_string_series(series)
+        return keys.str.lower().astype(object).where(keys.notna(), None)
+
+    @staticmethod
+    def _map_keys(keys, mapping):
+        # Built as an object Series so primary keys stay ints (Series.map would upcast to float)
+        return pd.Series(
+            [mapping.get(key) if key is not None else None for key in keys.to_numpy()],
+            index=keys.index, dtype=object
+        )
+
+    @staticmethod
+    def _errors(row_numbers, ee_ids, mask, message):
+        if not mask.any():
+            return None
+        if isinstance(message, pd.Series):
+            message = message[mask]
+        return pd.DataFrame({
+            'row': row_numbers[mask],
+            'ee_id': ee_ids[mask],
+            'error': message,
+        }, columns=ERROR_COLUMNS)
@@ -0,0 +1,375 @@
+"""
+Export definitions shared by the synchronous export endpoints and background
+export jobs.
+
+Each ExportDefinition knows how to normalize its request parameters, compute a
+data version for cache invalidation and write the artifact to a file object.
+"""
+from datetime import date, datetime
+
+from django.db.models import Count, Max
+
+from user_app.constants import (
+    EmployeeFields as EE,
+    CalculationFields as CA,
+    CommonFields as CF
+)
+from user_app.services.export_engine import TabularExport, EXPORT_CONTENT_TYPES, ExportColumn
+
+
+EMPLOYEE_EXPORT_COLUMNS = [
+    (EE.EMPLOYEE_ID, 'ee_id'),
+    (EE.SSN, 'ssn'),
+    (EE.CLIENT_ID, 'client__client_id'),
+    (EE.FIRST_NAME, 'first_name'),
+    (EE.MIDDLE_NAME, 'middle_name'),
+    (EE.LAST_NAME, 'last_name'),
+    (EE.GENDER, 'gender'),
+    (EE.HOME_STATE, 'home_state__state'),
+    (EE.WORK_STATE, 'work_state__state'),
+    (EE.MARITAL_STATUS, 'marital_status'),
+    (EE.FILING_STATUS, 'filing_status__name'),
+    ('number_of_exemptions', 'number_of_exemptions'),
+    (EE.SUPPORT_SECOND_FAMILY, 'support_second_family'),
+    ('number_of_dependent_child', 'number_of_dependent_child'),
+    ('number_of_student_default_loan', 'number_of_student_default_loan'),
+    (EE.GARNISHMENT_FEES_STATUS, 'garnishment_fees_status'),
+    (EE.GARNISHMENT_FEES_SUSPENDED_TILL, 'garnishment_fees_suspended_till'),
+    (EE.NUMBER_OF_ACTIVE_GARNISHMENT, 'number_of_active_garnishment'),
+    (CF.STATUS, 'status'),
+    (CF.CREATED_AT, 'created_at'),
+    (CF.UPDATED_AT, 'updated_at'),
+    ('address_1', 'employee_addresses__address_1'),
+    ('address_2', 'employee_addresses__address_2'),
+    ('zip_code', 'employee_addresses__zip_code'),
+    ('geo_code', 'employee_addresses__geo_code'),
+    ('city', 'employee_addresses__city'),
+    ('address_state', 'employee_addresses__state'),
+    ('county', 'employee_addresses__county'),
+    ('country', 'employee_addresses__country'),
+    
+]
+
+GARNISHMENT_ORDER_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    (EE.CASE_ID, 'case_id'),
+    (EE.SSN, 'employee__ssn'),
+    (EE.EMPLOYEE_ID, 'employee__ee_id'),
+    ('issuing_state', 'issuing_state__state'),
+    ('garnishment_type', 'garnishment_type__type'),
+    ('garnishment_fees', 'garnishment_fees'),
+    ('voucher_for_payroll', 'voucher_for_payroll'),
+    ('override_amount', 'override_amount'),
+    ('override_start_date', 'override_start_date'),
+    ('override_stop_date', 'override_stop_date'),
+    ('paid_till_date', 'paid_till_date'),
+    ('is_consumer_debt', 'is_consumer_debt'),
+    ('issued_date', 'issued_date'),
+    ('received_date', 'received_date'),
+    ('start_date', 'start_date'),
+    ('stop_date', 'stop_date'),
+    ('ordered_amount', 'ordered_amount'),
+    ('status', 'status'),
+    ('amount_of_deduction', 'amount_of_deduction'),
+    ('current_child_support', 'current_child_support'),
+    ('current_medical_support', 'current_medical_support'),
+    ('child_support_arrear', 'child_support_arrear'),
+    ('medical_support_arrear', 'medical_support_arrear'),
+    ('current_spousal_support', 'current_spousal_support'),
+    ('spousal_support_arrear', 'spousal_support_arrear'),
+    ('fips_code', 'fips_code'),
+    ('arrear_greater_than_12_weeks', 'arrear_greater_than_12_weeks'),
+    (CA.ARREAR_AMOUNT, 'arrear_amount'),
+    ('pay_date', 'pay_date'),
+    ('pay_period_limit', 'pay_period_limit'),
+    ('total_amount_owed', 'total_amount_owed'),
+    ('monthly_limit', 'monthly_limit'),
+    ('exempt_amount', 'exempt_amount'),
+    ('ower_threshold_amount', 'ower_threshold_amount'),
+    ('lower_threshold_percent1', 'lower_threshold_percent1'),
+    ('lower_threshold_percent2', 'lower_threshold_percent2'),
+    ('mid_threshold_amount', 'mid_threshold_amount'),
+    ('mid_threshold_percent', 'mid_threshold_percent'),
+    ('upper_threshold_amount', 'upper_threshold_amount'),
+    ('upper_threshold_percent', 'upper_threshold_percent'),
+    ('de_range_lower_to_upper_threshold_percent', 'de_range_lower_to_upper_threshold_percent'),
+    ('de_range_lower_to_mid_threshold_percent', 'de_range_lower_to_mid_threshold_percent'),
+    ('de_range_mid_to_upper_threshold_percent', 'de_range_mid_to_upper_threshold_percent'),
+    ('gp_lower_threshold_amount', 'gp_lower_threshold_amount'),
+    ('gp_lower_threshold_percent1', 'gp_lower_threshold_percent1'),
+    ('exempt_amt', 'exempt_amt'),
+    ('filing_status_percent', 'filing_status_percent'),
+    ('ytd_deductions', 'ytd_deductions'),
+    ('ach_sent', 'ach_sent'),
+    ('ap_check', 'ap_check'),
+    ('date_of_ap_payment', 'date_of_ap_payment'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    
+]
+
+
+def _yes_no(value):
+    return 'Yes' if value else 'No'
+
+
+def _amount_or_zero(value):
+    return str(value) if value else '0.00'
+
+
+# Employee, order, payee and GarnishmentResult columns of the letter-template export
+LETTER_RESULT_EXPORT_COLUMNS = [
+    # Employee Details (employee_ prefix)
+    ('employee_first_name', 'ee__first_name'),
+    ('employee_middle_name', 'ee__middle_name'),
+    ('employee_last_name', 'ee__last_name'),
+    ('employee_ssn', 'ee__ssn'),
+    ('employee_home_state', 'ee__home_state__state'),
+
+    # Employee Address (employee_address_ prefix)
+    ('employee_address_address_1', 'ee__employee_addresses__address_1'),
+    ('employee_address_address_2', 'ee__employee_addresses__address_2'),
+    ('employee_address_city', 'ee__employee_addresses__city'),
+    ('employee_address_state', 'ee__employee_addresses__state'),
+    ('employee_address_zip_code', 'ee__employee_addresses__zip_code'),
+
+    # Order Details (garnishment_order_ prefix)
+    ('garnishment_order_case_id', 'case__case_id'),
+    ('garnishment_order_start_date', 'case__start_date'),
+    ExportColumn('garnishment_order_is_consumer_debt', 'case__is_consumer_debt', _yes_no),
+
+    # Payee Details (payee_ prefix)
+    ('payee_payee', 'case__payee__payee'),
+
+    # Payee Address (payee_address_ prefix)
+    ('payee_address_address_1', 'case__payee__address__address_1'),
+    ('payee_address_address_2', 'case__payee__address__address_2'),
+    ('payee_address_city', 'case__payee__address__city'),
+    ('payee_address_state', 'case__payee__address__state__state'),
+    ('payee_address_zip_code', 'case__payee__address__zip_code'),
+
+    # GarnishmentResult (result_ prefix)
+    ExportColumn('withholding_amount', 'withholding_amount', _amount_or_zero),
+    ExportColumn('withholding_limit', 'withholding_limit', _amount_or_zero),
+]
+
+
+def employee_export():
+    from user_app.models import EmployeeDetail
+    return TabularExport(
+        EmployeeDetail.objects.order_by('id'),
+        columns=EMPLOYEE_EXPORT_COLUMNS,
+        sheet_title="Employee Data",
+        filename_prefix="employee_details",
+    )
+
+
+def garnishment_order_export():
+    from user_app.models import GarnishmentOrder
+    return TabularExport(
+        GarnishmentOrder.objects.order_by('id'),
+        columns=GARNISHMENT_ORDER_EXPORT_COLUMNS,
+        sheet_title="Garnishment Orders",
+        filename_prefix="garnishment_orders",
+    )
+
+
+def letter_result_export():
+    from processor.models.garnishment_result.result import GarnishmentResult
+    return TabularExport(
+        GarnishmentResult.objects.order_by('id'),
+        columns=LETTER_RESULT_EXPORT_COLUMNS,
+        sheet_title="Garnishment Export",
+        filename_prefix="garnishment_export",
+        formats=('csv', 'txt'),
+        dated_filename=False,
+    )
+
+
+def model_version(model):
+    """
+    Cheap version stamp for a table: row count plus the latest updated_at
+    (or highest primary key for tables without an updated_at column).
+    """
+    field_names = {field.name for field in model._meta.get_fields()}
+    latest_field = 'updated_at' if 'updated_at' in field_names else 'pk'
+    stats = model.objects.aggregate(rows=Count('pk'), latest=Max(latest_field))
+    latest = stats['latest']
+    if isinstance(latest, datetime):
+        latest = latest.isoformat()
+    return f"{model._meta.db_table}:{stats['rows']}:{latest}"
+
+
+class ExportBuildError(Exception):
+    """
+    Raised when an export cannot be built for reasons the requester can fix
+    (no data, invalid parameters).
+    """
+
+    def __init__(self, message, error=None):
+        super().__init__(message)
+        self.message = message
+        self.error = error
+
+
+class ExportDefinition:
+    """
+    Base class for exports that can run as background jobs.
+    """
+    export_type = None
+    formats = ()
+    description = ''
+
+    def normalize_parameters(self, parameters):
+        """
+        Validate request parameters and return them in a canonical form, so
+        equivalent requests map to the same cache key. Raises ValueError.
+        """
+        return {}
+
+    def data_version(self, parameters):
+        return '|'.join(model_version(model) for model in self.source_models())
+
+    def source_models(self):
+        return []
+
+    def build(self, parameters, export_format, file_obj, user=None):
+        """
+        Write the artifact into file_obj and return its metadata:
+        dict(file_name, content_type, row_count).
+        """
+        raise NotImplementedError
+
+
+class TabularExportDefinition(ExportDefinition):
+    """
+    Export backed by a TabularExport factory; parameters are not supported.
+    """
+    export_factory = None
+    empty_message = 'No data found'
+
+    def build(self, parameters, export_format, file_obj, user=None):
+        export = self.export_factory()
+        if not export.queryset.exists():
+            raise ExportBuildError(self.empty_message)
+        export.write_file(file_obj, export_format)
+        return {
+            'file_name': export.filename(export_format),
+            'content_type': EXPORT_CONTENT_TYPES[export_format],
+            'row_count': export.queryset.count(),
+        }
+
+
+class EmployeeExportDefinition(TabularExportDefinition):
+    export_type = 'employees'
+    formats = ('xlsx', 'csv')
+    description = 'All employees with their address fields'
+    export_factory = staticmethod(employee_export)
+    empty_message = 'No employees found'
+
+    def source_models(self):
+        # Client, State and FedFilingStatus supply the exported client_id,
+        # state and filing status names
+        from user_app.models import EmployeeDetail, EmplopyeeAddress, Client
+        from processor.models.shared_model.state import State
+        from processor.models.federal_tax_levy.filing_status import FedFilingStatus
+        return [EmployeeDetail, EmplopyeeAddress, Client, State, FedFilingStatus]
+
+
+class GarnishmentOrderExportDefinition(TabularExportDefinition):
+    export_type = 'garnishment_orders'
+    formats = ('xlsx', 'csv')
+    description = 'All garnishment orders'
+    export_factory = staticmethod(garnishment_order_export)
+    empty_message = 'No garnishment orders found'
+
+    def source_models(self):
+        from user_app.models import GarnishmentOrder, EmployeeDetail
+        from processor.models.shared_model.state import State
+        from processor.models.shared_model.garnishment_type import GarnishmentType
+        return [GarnishmentOrder, EmployeeDetail, State, GarnishmentType]
+
+
+class LetterResultExportDefinition(TabularExportDefinition):
+    export_type = 'letter_results'
+    formats = ('csv', 'txt')
+    description = 'Employee, order, payee and GarnishmentResult data used for letters'
+    export_factory = staticmethod(letter_result_export)
+    empty_message = 'No export data found'
+
+    def source_models(self):
+        from user_app.models import EmployeeDetail, EmplopyeeAddress, GarnishmentOrder, PayeeDetails, PayeeAddress
+        from processor.models.garnishment_result.result import GarnishmentResult
+        from processor.models.shared_model.state import State
+        return [GarnishmentResult, EmployeeDetail, EmplopyeeAddress, GarnishmentOrder, PayeeDetails, PayeeAddress, State]
+
+
+class ACHExportDefinition(ExportDefinition):
+    export_type = 'ach'
+    formats = ('txt', 'pdf', 'xml')
+    description = 'ACH file in CCD+ format (same parameters as the ACH generate endpoint)'
+
+    LIST_PARAMETERS = ('case_ids', 'employee_ids')
+    DATE_PARAMETERS = ('pay_date', 'ach_generate_date')
+
+    def normalize_parameters(self, parameters):
+        normalized = {}
+        for name in self.LIST_PARAMETERS:
+            value = parameters.get(name) or []
+            if isinstance(value, str):
+                value = value.split(',')
+            values = sorted({str(item).strip() for item in value if str(item).strip()})
+            if values:
+                normalized[name] = ','.join(values)
+        for name in self.DATE_PARAMETERS:
+            value = parameters.get(name)
+            if value:
+                try:
+                    datetime.strptime(str(value), '%Y-%m-%d')
+                except ValueError:
+                    raise ValueError(f"Invalid {name} format: {value}. Expected format: YYYY-MM-DD")
+                normalized[name] = str(value)
+        # The ACH generate date defaults to today, so cached files roll over daily
+        normalized.setdefault('ach_generate_date', date.today().isoformat())
+        if parameters.get('agency_payee'):
+            normalized['agency_payee'] = str(parameters['agency_payee'])
+        if str(parameters.get('store_file', 'false')).lower() in ['true', '1', 'yes']:
+            normalized['store_file'] = 'true'
+        return normalized
+
+    def source_models(self):
+        # ACHFile is left out on purpose: building with store_file adds a row,
+        # which would otherwise invalidate the file that was just produced
+        from user_app.models import GarnishmentOrder, PayeeDetails, AchGarnishmentConfig
+        from user_app.models.payroll.payroll import Payroll
+        from processor.models.garnishment_result.result import GarnishmentResult
+        return [GarnishmentOrder, PayeeDetails, Payroll, GarnishmentResult, AchGarnishmentConfig]
+
+    def build(self, parameters, export_format, file_obj, user=None):
+        from processor.views.configs.ach_views import ACHFileGenerationView, ACHGenerationError
+
+        try:
+            artifact = ACHFileGenerationView().build_ach_file(export_format, parameters, user)
+        except ACHGenerationError as e:
+            raise ExportBuildError(e.message, e.error)
+
+        file_content = artifact['file_content']
+        if isinstance(file_content, str):
+            file_content = file_content.encode('utf-8')
+        file_obj.write(file_content)
+        return {
+            'file_name': artifact['file_name'],
+            'content_type': artifact['content_type'],
+            'row_count': artifact['entry_count'],
+        }
+
+
+EXPORT_DEFINITIONS = {
+    definition.export_type: definition
+    for definition in (
+        EmployeeExportDefinition(),
+        GarnishmentOrderExportDefinition(),
+        LetterResultExportDefinition(),
+        ACHExportDefinition(),
+    )
+}
@@ -0,0 +1,260 @@
+"""
+Background export jobs.
+
+A request for an export returns an ExportJob immediately; a small thread pool
+builds the file into EXPORT_JOB_STORAGE_DIR and the download endpoint serves it
+once the job is completed. Jobs are keyed by export type, format, normalized
+parameters and the data version of the source tables, so identical requests
+made while the data is unchanged share one build and one file.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from garnishedge_project.metrics import monitor_executor
+from user_app.models import ExportJob
+from user_app.services.export_definitions import EXPORT_DEFINITIONS, ExportBuildError
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobService:
+    """
+    Creates, runs and cleans up background export jobs.
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @staticmethod
+    def get_definition(export_type):
+        definition = EXPORT_DEFINITIONS.get(export_type)
+        if definition is None:
+            raise ValueError(
+                f"Unsupported export type '{export_type}'. Supported types: {', '.join(EXPORT_DEFINITIONS)}"
+            )
+        return definition
+
+    @staticmethod
+    def build_cache_key(export_type, export_format, parameters, data_version):
+        payload = json.dumps(
+            [export_type, export_format, parameters, data_version],
+            sort_keys=True, separators=(',', ':')
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def request_export(cls, export_type, export_format=None, parameters=None, user=None, refresh=False):
+        """
+        Return the job serving this export, creating and scheduling a build when
+        no reusable job exists.
+
+        Raises ValueError for unknown export types, formats or invalid parameters.
+
+        Returns:
+            tuple: (ExportJob, created) where created is False when an existing
+            build or artifact is shared.
+        """
+        definition = cls.get_definition(export_type)
+        export_format = (export_format or definition.formats[0]).lower()
+        if export_format not in definition.formats:
+            raise ValueError(
+                f"Unsupported export format '{export_format}' for {export_type}. "
+                f"Supported formats: {', '.join(definition.formats)}"
+            )
+
+        parameters = definition.normalize_parameters(parameters or {})
+        data_version = definition.data_version(parameters)
+        cache_key = cls.build_cache_key(export_type, export_format, parameters, data_version)
+        requested_by = user if user is not None and user.is_authenticated else None
+
+        job = ExportJob.objects.filter(cache_key=cache_key).first()
+        if job is None:
+            try:
+                with transaction.atomic():
+                    job = ExportJob.objects.create(
+                        export_type=export_type,
+                        export_format=export_format,
+                        parameters=json.dumps(parameters),
+                        data_version=data_version,
+                        cache_key=cache_key,
+                        requested_by=requested_by,
+                    )
+            except IntegrityError:
+                # Another request created the same job first; share it
+                job = ExportJob.objects.get(cache_key=cache_key)
+                cls._record_request(job)
+                return job, False
+            cls._submit(job)
+            return job, True
+
+        # refresh only discards finished artifacts; an in-flight build is always shared
+        if cls._is_reusable(job) and not (refresh and job.status == ExportJob.STATUS_COMPLETED):
+            cls._record_request(job)
+            return job, False
+
+        # Failed, expired, stale or explicitly refreshed: claim the row for a rebuild.
+        # The conditional update makes sure only one request restarts it.
+        claimed = ExportJob.objects.filter(pk=job.pk, updated_at=job.updated_at).update(
+            status=ExportJob.STATUS_PENDING,
+            requested_by=requested_by,
+            request_count=F('request_count') + 1,
+            error_message=None,
+            started_at=None,
+            completed_at=None,
+            expires_at=None,
+            updated_at=timezone.now(),
+        )
+        job.refresh_from_db()
+        if claimed:
+            cls._remove_artifact(job)
+            cls._submit(job)
+        return job, bool(claimed)
+
+    @staticmethod
+    def _record_request(job):
+        ExportJob.objects.filter(pk=job.pk).update(request_count=F('request_count') + 1)
+        job.request_count += 1
+
+    @classmethod
+    def _is_reusable(cls, job):
+        now = timezone.now()
+        if job.status == ExportJob.STATUS_COMPLETED:
+            return (
+                job.expires_at is not None
+                and job.expires_at > now
+                and cls.artifact_path(job) is not None
+                and os.path.exists(cls.artifact_path(job))
+            )
+        if job.status in (ExportJob.STATUS_PENDING, ExportJob.STATUS_RUNNING):
+            stale_after = timedelta(minutes=settings.EXPORT_JOB_STALE_MINUTES)
+            return job.updated_at > now - stale_after
+        return False
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.EXPORT_JOB_WORKERS),
+                    thread_name_prefix='export-job',
+                )
+                monitor_executor('export_jobs', cls._executor)
+            return cls._executor
+
+    @classmethod
+    def _submit(cls, job):
+        # Schedule after commit so the worker always sees the pending row
+        transaction.on_commit(lambda: cls._get_executor().submit(cls.run_job, job.pk))
+
+    @classmethod
+    def run_job(cls, job_pk):
+        """
+        Build the artifact for one job. Runs in an export worker thread.
+        """
+        try:
+            connections.close_all()
+            started = ExportJob.objects.filter(
+                pk=job_pk, status=ExportJob.STATUS_PENDING
+            ).update(status=ExportJob.STATUS_RUNNING, started_at=timezone.now(), updated_at=timezone.now())
+            if not started:
+                return
+            job = ExportJob.objects.get(pk=job_pk)
+            cls._build(job)
+        except Exception:
+            logger.exception(f"Export job {job_pk} crashed")
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def _build(cls, job):
+        definition = cls.get_definition(job.export_type)
+        parameters = json.loads(job.parameters or '{}')
+        os.makedirs(settings.EXPORT_JOB_STORAGE_DIR, exist_ok=True)
+        relative_path = f'{job.job_id}.{job.export_format}'
+        final_path = os.path.join(settings.EXPORT_JOB_STORAGE_DIR, relative_path)
+        # Unique temporary name, in case a stale build of the same job is still running
+        partial_path = f'{final_path}.{uuid.uuid4().hex}.part'
+
+        try:
+            with open(partial_path, 'wb') as file_obj:
+                metadata = definition.build(parameters, job.export_format, file_obj, user=job.requested_by)
+            os.replace(partial_path, final_path)
+        except Exception as e:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            if isinstance(e, ExportBuildError):
+                error_message = e.message if not e.error else f'{e.message}: {json.dumps(e.error, default=str)}'
+                logger.warning(f"Export job {job.job_id} ({job.export_type}) failed: {error_message}")
+            else:
+                error_message = str(e)
+                logger.exception(f"Export job {job.job_id} ({job.export_type}) failed")
+            ExportJob.objects.filter(pk=job.pk).update(
+                status=ExportJob.STATUS_FAILED,
+                error_message=error_message,
+                completed_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            return
+
+        completed_at = timezone.now()
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.STATUS_COMPLETED,
+            file_name=metadata['file_name'],
+            file_path=relative_path,
+            content_type=metadata['content_type'],
+            file_size=os.path.getsize(final_path),
+            row_count=metadata.get('row_count'),
+            completed_at=completed_at,
+            expires_at=completed_at + timedelta(minutes=settings.EXPORT_JOB_TTL_MINUTES),
+            updated_at=completed_at,
+        )
+        logger.info(
+            f"Export job {job.job_id} ({job.export_type}, {job.export_format}) completed: "
+            f"{metadata.get('row_count')} rows in {(completed_at - job.created_at).total_seconds():.1f}s"
+        )
+
+    @staticmethod
+    def artifact_path(job):
+        if not job.file_path:
+            return None
+        return os.path.join(settings.EXPORT_JOB_STORAGE_DIR, job.file_path)
+
+    @classmethod
+    def _remove_artifact(cls, job):
+        path = cls.artifact_path(job)
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove export artifact {path}: {e}")
+
+    @classmethod
+    def purge_expired(cls):
+        """
+        Delete expired completed jobs, failed jobs past their retention window
+        and their artifacts. Returns the number of jobs removed.
+        """
+        now = timezone.now()
+        retention = timedelta(minutes=settings.EXPORT_JOB_TTL_MINUTES)
+        expired = ExportJob.objects.filter(
+            status=ExportJob.STATUS_COMPLETED, expires_at__lt=now
+        ) | ExportJob.objects.filter(
+            status=ExportJob.STATUS_FAILED, updated_at__lt=now - retention
+        )
+        removed = 0
+        for job in expired:
+            cls._remove_artifact(job)
+            job.delete()
+            removed += 1
+        return removed
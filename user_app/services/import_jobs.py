@@ -0,0 +1,328 @@
+"""
+Background import jobs.
+
+An upload submitted as a job is stored in IMPORT_JOB_STORAGE_DIR and the
+request returns an ImportJob immediately. A small thread pool then runs the
+same import code as the synchronous endpoints (the views' ``run_import``),
+with an ImportProgress that saves the job's counters after every chunk and
+writes row-level errors to a downloadable CSV report. Jobs whose worker went
+away (e.g. a restart) are picked up by ``recover_stale`` on a schedule.
+"""
+import csv
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from garnishedge_project.audit_batch import aggregated_audit
+from garnishedge_project.metrics import monitor_executor
+from user_app.models import ImportJob
+from user_app.services.import_reader import ImportFileReader, CSV_EXTENSIONS, EXCEL_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Import type -> view implementing run_import(file, file_name, options, progress)
+IMPORT_VIEWS = {
+    'employees': 'user_app.views.employee_views.EmployeeImportView',
+    'garnishment_orders': 'user_app.views.garnishment_order_views.GarnishmentOrderImportView',
+    'garnishment_orders_upsert': 'user_app.views.garnishment_order_views.UpsertGarnishmentOrderView',
+    'payees': 'user_app.views.payee_views.PayeeImportView',
+    'clients': 'user_app.views.client_views.ClientImportView',
+    'peos': 'user_app.views.peo_views.PEOImportView',
+}
+
+ERROR_REPORT_COLUMNS = ['row', 'error']
+
+# Row-level messages look like "Row 12: ..." or "Row 12 (ee_id=E1): ..."
+ROW_NUMBER_PATTERN = re.compile(r'^Row (\d+)\b')
+
+
+class ImportProgress:
+    """
+    Counters for one import run. The import views report every processed
+    chunk through chunk(); without a job the counters are only kept in memory.
+    When bound to an ImportJob they are saved to the job after each chunk and
+    errors are appended to the job's CSV error report.
+    """
+
+    def __init__(self, job=None):
+        self.job = job
+        self.rows_read = 0
+        self.rows_validated = 0
+        self.rows_inserted = 0
+        self.rows_updated = 0
+        self.error_count = 0
+        self.error_report_path = None
+        self._report_file = None
+        self._report_writer = None
+
+    def chunk(self, rows_read, rows_validated=0, rows_inserted=0, rows_updated=0, errors=()):
+        """
+        Record one processed chunk of the file.
+        """
+        errors = list(errors)
+        self.rows_read += rows_read
+        self.rows_validated += rows_validated
+        self.rows_inserted += rows_inserted
+        self.rows_updated += rows_updated
+        self.error_count += len(errors)
+
+        if self.job is None:
+            return
+        if errors:
+            self._write_errors(errors)
+        ImportJob.objects.filter(pk=self.job.pk).update(updated_at=timezone.now(), **self.counters())
+
+    def counters(self):
+        return {
+            'rows_read': self.rows_read,
+            'rows_validated': self.rows_validated,
+            'rows_inserted': self.rows_inserted,
+            'rows_updated': self.rows_updated,
+            'error_count': self.error_count,
+        }
+
+    def close(self):
+        if self._report_file is not None:
+            self._report_file.close()
+            self._report_file = None
+            self._report_writer = None
+
+    def _write_errors(self, errors):
+        if self._report_writer is None:
+            self.error_report_path = f'{self.job.job_id}_errors.csv'
+            self._report_file = open(
+                os.path.join(settings.IMPORT_JOB_STORAGE_DIR, self.error_report_path),
+                'w', newline='', encoding='utf-8'
+            )
+            self._report_writer = csv.writer(self._report_file)
+            self._report_writer.writerow(ERROR_REPORT_COLUMNS)
+        for error in errors:
+            message = str(error)
+            match = ROW_NUMBER_PATTERN.match(message)
+            self._report_writer.writerow([match.group(1) if match else '', message])
+        self._report_file.flush()
+
+
+class ImportJobService:
+    """
+    Creates, runs and cleans up background import jobs.
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    @staticmethod
+    def get_view_class(import_type):
+        path = IMPORT_VIEWS.get(import_type)
+        if path is None:
+            raise ValueError(
+                f"Unsupported import type '{import_type}'. Supported types: {', '.join(IMPORT_VIEWS)}"
+            )
+        return import_string(path)
+
+    @classmethod
+    def submit(cls, import_type, uploaded_file, options=None, user=None):
+        """
+        Store the upload and schedule it for processing.
+
+        Raises ValueError for unknown import types and unsupported file formats.
+
+        Returns:
+            ImportJob: the pending job
+        """
+        view_class = cls.get_view_class(import_type)
+        extensions = getattr(view_class, 'supported_extensions', CSV_EXTENSIONS + EXCEL_EXTENSIONS)
+        if not ImportFileReader.is_supported(uploaded_file.name, extensions=extensions):
+            raise ValueError(
+                f"Unsupported file format for {import_type}. Supported formats: {', '.join(extensions)}"
+            )
+
+        job = ImportJob(
+            import_type=import_type,
+            file_name=os.path.basename(uploaded_file.name),
+            options=json.dumps(options or {}),
+            requested_by=user if user is not None and user.is_authenticated else None,
+        )
+        os.makedirs(settings.IMPORT_JOB_STORAGE_DIR, exist_ok=True)
+        extension = os.path.splitext(job.file_name)[1].lower()
+        job.file_path = f'{job.job_id}_upload{extension}'
+        with open(os.path.join(settings.IMPORT_JOB_STORAGE_DIR, job.file_path), 'wb') as file_obj:
+            for data in uploaded_file.chunks():
+                file_obj.write(data)
+        job.file_size = uploaded_file.size
+        job.save()
+
+        cls._submit(job)
+        return job
+
+    @classmethod
+    def _get_executor(cls):
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.IMPORT_JOB_WORKERS),
+                    thread_name_prefix='import-job',
+                )
+                monitor_executor('import_jobs', cls._executor)
+            return cls._executor
+
+    @classmethod
+    def _submit(cls, job):
+        # Schedule after commit so the worker always sees the pending row
+        transaction.on_commit(lambda: cls._get_executor().submit(cls.run_job, job.pk))
+
+    @classmethod
+    def run_job(cls, job_pk):
+        """
+        Process one import job. Runs in an import worker thread.
+        """
+        try:
+            connections.close_all()
+            started = ImportJob.objects.filter(
+                pk=job_pk, status=ImportJob.STATUS_PENDING
+            ).update(status=ImportJob.STATUS_RUNNING, started_at=timezone.now(), updated_at=timezone.now())
+            if not started:
+                return
+            job = ImportJob.objects.select_related('requested_by').get(pk=job_pk)
+            cls._run(job)
+        except Exception:
+            logger.exception(f"Import job {job_pk} crashed")
+            ImportJob.objects.filter(pk=job_pk, status=ImportJob.STATUS_RUNNING).update(
+                status=ImportJob.STATUS_FAILED,
+                error_message='Import job crashed',
+                completed_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def _run(cls, job):
+        from garnishedge_project.user_context_middleware import set_current_user
+
+        view = cls.get_view_class(job.import_type)()
+        options = json.loads(job.options or '{}')
+        progress = ImportProgress(job)
+        upload_path = cls.upload_path(job)
+
+        # Audit log entries written by the import are attributed to the requester,
+        # and its batch summaries are logged under the job id
+        set_current_user(job.requested_by)
+        try:
+            with aggregated_audit(job.job_id, user=job.requested_by), open(upload_path, 'rb') as file_obj:
+                response = view.run_import(file_obj, job.file_name, options=options, progress=progress)
+        finally:
+            set_current_user(None)
+            progress.close()
+            cls._remove_file(upload_path)
+
+        body = response.data
+        succeeded = response.status_code < 400
+        completed_at = timezone.now()
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.STATUS_COMPLETED if succeeded else ImportJob.STATUS_FAILED,
+            result=json.dumps(body, default=str),
+            error_message=None if succeeded else body.get('message') or body.get('error'),
+            error_report_path=progress.error_report_path,
+            file_path=None,
+            completed_at=completed_at,
+            updated_at=completed_at,
+            **progress.counters()
+        )
+        logger.info(
+            f"Import job {job.job_id} ({job.import_type}) finished with status {response.status_code}: "
+            f"{progress.rows_read} rows read, {progress.rows_inserted} inserted, "
+            f"{progress.rows_updated} updated, {progress.error_count} errors "
+            f"in {(completed_at - job.created_at).total_seconds():.1f}s"
+        )
+
+    @staticmethod
+    def upload_path(job):
+        if not job.file_path:
+            return None
+        return os.path.join(settings.IMPORT_JOB_STORAGE_DIR, job.file_path)
+
+    @staticmethod
+    def error_report_path(job):
+        if not job.error_report_path:
+            return None
+        return os.path.join(settings.IMPORT_JOB_STORAGE_DIR, job.error_report_path)
+
+    @staticmethod
+    def _remove_file(path):
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove import file {path}: {e}")
+
+    @classmethod
+    def recover_stale(cls):
+        """
+        Handle jobs whose worker went away (e.g. the process was restarted).
+        Pending jobs untouched for IMPORT_JOB_STALE_MINUTES are submitted
+        again while their upload is still stored; running jobs that saved no
+        progress for that long are marked failed, since their rows may be
+        half written. Returns (resubmitted, failed).
+        """
+        cutoff = timezone.now() - timedelta(minutes=settings.IMPORT_JOB_STALE_MINUTES)
+        resubmitted = failed = 0
+        stale_jobs = ImportJob.objects.filter(
+            status__in=[ImportJob.STATUS_PENDING, ImportJob.STATUS_RUNNING],
+            updated_at__lt=cutoff,
+        )
+        for job in stale_jobs:
+            upload_path = cls.upload_path(job)
+            if job.status == ImportJob.STATUS_PENDING and upload_path and os.path.exists(upload_path):
+                # The conditional update makes sure only one process resubmits it;
+                # run_job only starts a job that is still pending
+                claimed = ImportJob.objects.filter(
+                    pk=job.pk, status=ImportJob.STATUS_PENDING, updated_at=job.updated_at
+                ).update(updated_at=timezone.now())
+                if claimed:
+                    cls._get_executor().submit(cls.run_job, job.pk)
+                    resubmitted += 1
+                continue
+
+            now = timezone.now()
+            marked = ImportJob.objects.filter(
+                pk=job.pk, status=job.status, updated_at=job.updated_at
+            ).update(
+                status=ImportJob.STATUS_FAILED,
+                error_message='Import job stopped before completing; please upload the file again',
+                file_path=None,
+                completed_at=now,
+                updated_at=now,
+            )
+            if marked:
+                cls._remove_file(upload_path)
+                failed += 1
+        return resubmitted, failed
+
+    @classmethod
+    def purge_expired(cls):
+        """
+        Delete finished jobs older than IMPORT_JOB_RETENTION_HOURS together with
+        their error reports. Returns the number of jobs removed.
+        """
+        cutoff = timezone.now() - timedelta(hours=settings.IMPORT_JOB_RETENTION_HOURS)
+        expired = ImportJob.objects.filter(
+            status__in=[ImportJob.STATUS_COMPLETED, ImportJob.STATUS_FAILED],
+            completed_at__lt=cutoff,
+        )
+        removed = 0
+        for job in expired:
+            cls._remove_file(cls.error_report_path(job))
+            cls._remove_file(cls.upload_path(job))
+            job.delete()
+            removed += 1
+        return removed
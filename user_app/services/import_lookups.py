@@ -0,0 +1,114 @@
+"""
+Foreign-key resolution for the import views.
+
+The garnishment order imports used to build {key: id} maps from every
+EmployeeDetail, PayeeDetails and GarnishmentOrder row on each upload. The
+helpers here resolve only the keys that appear in the uploaded chunk, with
+values_list() queries split into ``__in`` batches, while shared reference data
+(states, garnishment types) comes from a process-level cache.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# SQL Server allows at most 2100 parameters per statement
+LOOKUP_BATCH_SIZE = 1000
+
+
+def lookup_ids(queryset, key_field, keys, value_field='id', batch_size=LOOKUP_BATCH_SIZE):
+    """
+    Map each of ``keys`` that exists in ``queryset`` to its ``value_field``.
+
+    Args:
+        queryset: model class or queryset to search
+        key_field: field the keys are matched against (e.g. 'ee_id', 'case_id')
+        keys: iterable of key values; None and '' are ignored
+        value_field: field returned for each key (defaults to the primary key)
+        batch_size: number of keys per ``__in`` query
+
+    Returns:
+        dict of {key: value} for the keys found
+    """
+    if not hasattr(queryset, 'filter'):
+        queryset = queryset.objects.all()
+    keys = list({key for key in keys if key is not None and key != ''})
+
+    mapping = {}
+    for start in range(0, len(keys), batch_size):
+        mapping.update(
+            queryset.filter(**{f'{key_field}__in': keys[start:start + batch_size]})
+            .values_list(key_field, value_field)
+        )
+    return mapping
+
+
+def lookup_objects(queryset, key_field, keys, batch_size=LOOKUP_BATCH_SIZE):
+    """
+    Yield the rows of ``queryset`` whose ``key_field`` is one of ``keys``,
+    with the same ``__in`` batching as lookup_ids. Use it when the caller needs
+    model instances rather than a single value per key.
+    """
+    if not hasattr(queryset, 'filter'):
+        queryset = queryset.objects.all()
+    keys = list({key for key in keys if key is not None and key != ''})
+
+    for start in range(0, len(keys), batch_size):
+        yield from queryset.filter(**{f'{key_field}__in': keys[start:start + batch_size]})
+
+
+class ReferenceDataCache:
+    """
+    Process-level cache of the small, rarely changing lookup tables used when
+    resolving imported rows. Entries expire after REFERENCE_DATA_CACHE_SECONDS
+    and are dropped whenever a State or GarnishmentType is saved or deleted
+    in this process.
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def state_mapping(cls):
+        """
+        Case-insensitive map of state name -> State.id.
+        """
+        from processor.models import State
+
+        return cls._get('state', lambda: {
+            (name or '').lower(): pk for pk, name in State.objects.values_list('id', 'state')
+        })
+
+    @classmethod
+    def garnishment_type_mapping(cls):
+        """
+        Case-insensitive map of garnishment type -> GarnishmentType.id.
+        """
+        from processor.models import GarnishmentType
+
+        return cls._get('garnishment_type', lambda: {
+            (name or '').lower(): pk for pk, name in GarnishmentType.objects.values_list('id', 'type')
+        })
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._lock:
+            cls._cache.clear()
+
+    @classmethod
+    def _get(cls, name, loader):
+        ttl = getattr(settings, 'REFERENCE_DATA_CACHE_SECONDS', 300)
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._cache.get(name)
+            if entry and now - entry[0] < ttl:
+                return entry[1]
+
+        value = loader()
+        with cls._lock:
+            cls._cache[name] = (now, value)
+        logger.debug(f"Loaded {len(value)} {name} reference rows")
+        return value
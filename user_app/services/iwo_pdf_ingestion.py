@@ -0,0 +1,274 @@
+"""
+Concurrent ingestion of uploaded IWO (Income Withholding Order) PDFs.
+
+PDFUploadView used to upload, analyse and store each file one after another.
+IWOPDFIngestionPipeline instead:
+
+1. hashes every upload (SHA-256 of the bytes) and reuses the IWOPDFFiles row
+   of a byte-identical PDF that was already ingested, so it is neither
+   uploaded nor analysed again,
+2. uploads and analyses the remaining files concurrently on a bounded thread
+   pool (IWO_PDF_WORKERS), and
+3. stores the file records and bulk-inserts the extracted WithholdingOrderData
+   rows from the request thread. If that transaction fails, each file is
+   stored again in its own transaction, so one bad value only fails its own
+   file.
+
+Storage and field extraction are pluggable (IWO_PDF_STORAGE / IWO_PDF_EXTRACTOR):
+the defaults use Vercel Blob and Azure Document Intelligence, while
+LocalPDFStorage and LocalStubExtractor let the pipeline run offline.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework import status
+
+from garnishedge_project.metrics import monitor_executor
+from user_app.models import IWOPDFFiles
+from user_app.models.iwo_pdf.iwo_pdf_extraction import WithholdingOrderData
+from user_app.serializers import IWOPDFFilesSerializer
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_ERROR_MESSAGE = 'Error occurred while uploading the file'
+STORE_ERROR_MESSAGE = 'Error occurred while saving the file'
+
+
+class VercelBlobStorage:
+    """
+    Stores uploaded PDFs in Vercel Blob storage under PDFFiles/.
+    """
+
+    def save(self, file_name, file_bytes):
+        from vercel_blob import put
+
+        blob_info = put(f"PDFFiles/{file_name}", file_bytes)
+        blob_url = blob_info.get("url")
+        if not blob_url:
+            raise ValueError("Failed to upload file to blob storage.")
+        return blob_url
+
+
+class LocalPDFStorage:
+    """
+    Stores uploaded PDFs under IWO_PDF_LOCAL_STORAGE_DIR, for offline use.
+    """
+
+    def save(self, file_name, file_bytes):
+        content_hash = hashlib.sha256(file_bytes).hexdigest()
+        os.makedirs(settings.IWO_PDF_LOCAL_STORAGE_DIR, exist_ok=True)
+        path = os.path.join(
+            settings.IWO_PDF_LOCAL_STORAGE_DIR, f"{content_hash[:16]}_{os.path.basename(file_name)}"
+        )
+        with open(path, 'wb') as file_obj:
+            file_obj.write(file_bytes)
+        return f"file://{os.path.abspath(path)}"
+
+
+class AzureDocumentExtractor:
+    """
+    Extracts IWO fields with the Azure Document Intelligence custom model.
+    """
+    model_id = "from_data"
+
+    def __init__(self):
+        endpoint = os.getenv("AZURE_ENDPOINT")
+        key = os.getenv("AZURE_KEY")
+        if not endpoint or not key:
+            raise ValueError("Azure endpoint or key not configured.")
+
+        from azure.ai.formrecognizer import DocumentAnalysisClient
+        from azure.core.credentials import AzureKeyCredential
+
+        # The client is safe to share between the pipeline's worker threads
+        self.client = DocumentAnalysisClient(endpoint=endpoint, credential=AzureKeyCredential(key))
+
+    def extract(self, file_name, file_bytes):
+        """
+        Returns one dict of field name -> value per document found in the PDF.
+        """
+        poller = self.client.begin_analyze_document(model_id=self.model_id, document=file_bytes)
+        result = poller.result()
+        return [
+            {
+                field_name: (field.value if field.value else 0)
+                for field_name, field in doc.fields.items()
+            }
+            for doc in result.documents
+        ]
+
+
+class LocalStubExtractor:
+    """
+    Offline stand-in for AzureDocumentExtractor. Every PDF yields a single
+    document with no extracted fields, so the file is still recorded and gets
+    a WithholdingOrderData row with its required columns left blank.
+    """
+
+    def extract(self, file_name, file_bytes):
+        return [{}]
+
+
+class IWOPDFIngestionPipeline:
+    """
+    Ingest a batch of uploaded IWO PDFs.
+
+    Args:
+        extractor: object with extract(file_name, file_bytes); defaults to IWO_PDF_EXTRACTOR
+        storage: object with save(file_name, file_bytes) -> url; defaults to IWO_PDF_STORAGE
+        max_workers: files uploaded/analysed at the same time; defaults to IWO_PDF_WORKERS
+    """
+
+    def __init__(self, extractor=None, storage=None, max_workers=None):
+        self.extractor = extractor or import_string(settings.IWO_PDF_EXTRACTOR)()
+        self.storage = storage or import_string(settings.IWO_PDF_STORAGE)()
+        self.max_workers = max(1, max_workers or settings.IWO_PDF_WORKERS)
+        self.duplicate_count = 0
+
+    @staticmethod
+    def content_hash(file_bytes):
+        return hashlib.sha256(file_bytes).hexdigest()
+
+    def ingest(self, files):
+        """
+        Returns one result per uploaded file, in upload order: the serialized
+        IWOPDFFiles record, or an error payload for files that failed.
+        """
+        uploads = []
+        for file in files:
+            file_bytes = file.read()
+            uploads.append((file.name, file_bytes, self.content_hash(file_bytes)))
+
+        # Byte-identical PDFs that were ingested before are not analysed again
+        hashes = {content_hash for _, _, content_hash in uploads}
+        records_by_hash = {}
+        for record in IWOPDFFiles.objects.filter(content_hash__in=hashes).order_by('id'):
+            records_by_hash.setdefault(record.content_hash, record)
+
+        # Identical files within this batch are only processed once as well
+        pending = {}
+        for file_name, file_bytes, content_hash in uploads:
+            if content_hash not in records_by_hash:
+                pending.setdefault(content_hash, (file_name, file_bytes))
+
+        errors_by_hash = {}
+        if pending:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(pending)),
+                thread_name_prefix='iwo-pdf',
+            ) as executor:
+                monitor_executor('iwo_pdf', executor)
+                futures = {
+                    content_hash: executor.submit(self._upload_and_extract, file_name, file_bytes)
+                    for content_hash, (file_name, file_bytes) in pending.items()
+                }
+                processed = {}
+                for content_hash, future in futures.items():
+                    try:
+                        processed[content_hash] = future.result()
+                    except Exception as e:
+                        logger.exception(f"Error processing IWO PDF {pending[content_hash][0]}")
+                        errors_by_hash[content_hash] = (UPLOAD_ERROR_MESSAGE, str(e))
+
+            stored, store_errors = self._store(pending, processed)
+            records_by_hash.update(stored)
+            errors_by_hash.update(store_errors)
+
+        results = []
+        for file_name, file_bytes, content_hash in uploads:
+            if content_hash in errors_by_hash:
+                message, error = errors_by_hash[content_hash]
+                results.append({
+                    'success': False,
+                    'message': message,
+                    'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    'data': None,
+                    "error": error
+                })
+                continue
+            results.append(IWOPDFFilesSerializer(records_by_hash[content_hash]).data)
+
+        self.duplicate_count = len(uploads) - len(pending)
+        logger.info(
+            f"Ingested {len(uploads)} IWO PDFs: {len(pending) - len(errors_by_hash)} analysed, "
+            f"{self.duplicate_count} duplicates reused, {len(errors_by_hash)} failed"
+        )
+        return results
+
+    def _upload_and_extract(self, file_name, file_bytes):
+        # Runs in a worker thread; no database access here
+        pdf_url = self.storage.save(file_name, file_bytes)
+        documents = self.extractor.extract(file_name, file_bytes)
+        return pdf_url, documents
+
+    def _store(self, pending, processed):
+        """
+        Store the processed files in one transaction, or file by file when
+        that fails. Returns (new records by content hash, (message, error) by
+        content hash of the files that could not be stored).
+        """
+        try:
+            return self._store_files(pending, processed), {}
+        except Exception as e:
+            if len(processed) == 1:
+                content_hash = next(iter(processed))
+                logger.exception(f"Error storing IWO PDF {pending[content_hash][0]}")
+                return {}, {content_hash: (STORE_ERROR_MESSAGE, str(e))}
+            logger.warning(
+                f"Storing {len(processed)} IWO PDFs in one transaction failed; storing them one by one",
+                exc_info=True
+            )
+
+        records, errors = {}, {}
+        for content_hash, item in processed.items():
+            try:
+                records.update(self._store_files(pending, {content_hash: item}))
+            except Exception as e:
+                logger.exception(f"Error storing IWO PDF {pending[content_hash][0]}")
+                errors[content_hash] = (STORE_ERROR_MESSAGE, str(e))
+        return records, errors
+
+    def _store_files(self, pending, processed):
+        """
+        Create the IWOPDFFiles records and bulk-insert the extracted fields.
+        Returns the new records by content hash.
+        """
+        records = {}
+        withholding_rows = []
+        with transaction.atomic():
+            for content_hash, (pdf_url, documents) in processed.items():
+                record = IWOPDFFiles.objects.create(
+                    name=pending[content_hash][0],
+                    pdf_url=pdf_url,
+                    content_hash=content_hash,
+                )
+                records[content_hash] = record
+                if documents:
+                    withholding_rows.append(self._withholding_row(record, documents[0]))
+
+            if withholding_rows:
+                WithholdingOrderData.objects.bulk_create(withholding_rows)
+        return records
+
+    @staticmethod
+    def _withholding_row(record, fields):
+        # The extracted data shares its id with the file record (see GETIWOPDFData)
+        model_fields = {
+            field.name: field for field in WithholdingOrderData._meta.concrete_fields
+            if not field.primary_key
+        }
+        unknown = sorted(set(fields) - set(model_fields))
+        if unknown:
+            logger.warning(f"Ignoring unknown IWO fields for {record.name}: {', '.join(unknown)}")
+
+        values = {name: value for name, value in fields.items() if name in model_fields}
+        for name, field in model_fields.items():
+            if name not in values and not field.null and not field.has_default() \
+                    and not getattr(field, 'auto_now', False) and not getattr(field, 'auto_now_add', False):
+                values[name] = ''
+        return WithholdingOrderData(id=record.id, **values)
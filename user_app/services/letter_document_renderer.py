@@ -0,0 +1,300 @@
+"""
+Document rendering for letter templates (PDF, DOCX, TXT).
+
+Used by LetterTemplateFillAPI for single letters and by
+LetterTemplateBulkFillAPI, which renders many letters in a process pool and
+streams them back as a ZIP archive. This module deliberately does not import
+Django so it can be loaded cheaply by pool worker processes.
+"""
+import hashlib
+import logging
+import multiprocessing
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+# PDF generation
+try:
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
+    WEASYPRINT_AVAILABLE = True
+except (ImportError, OSError):
+    WEASYPRINT_AVAILABLE = False
+    try:
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib.units import inch
+        REPORTLAB_AVAILABLE = True
+    except ImportError:
+        REPORTLAB_AVAILABLE = False
+
+# DOC generation
+try:
+    from docx import Document
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+# HTML to text conversion
+try:
+    import html2text
+    HTML2TEXT_AVAILABLE = True
+except ImportError:
+    HTML2TEXT_AVAILABLE = False
+
+
+STYLE_BLOCK_PATTERN = re.compile(r'<style[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+
+# Normalized format -> (file extension, content type)
+DOCUMENT_FORMATS = {
+    'pdf': ('pdf', 'application/pdf'),
+    'docx': ('docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    'txt': ('txt', 'text/plain'),
+}
+
+FORMAT_ALIASES = {
+    'pdf': 'pdf',
+    'doc': 'docx',
+    'docx': 'docx',
+    'txt': 'txt',
+    'text': 'txt',
+}
+
+
+class DocumentRenderingUnavailable(Exception):
+    """Raised when the library required for a format is not installed."""
+
+
+def normalize_format(export_format):
+    """
+    Map a requested export format (pdf, doc, docx, txt, text) to its canonical name.
+    Returns None for unsupported formats.
+    """
+    return FORMAT_ALIASES.get((export_format or '').lower())
+
+
+def html_to_text(html_content):
+    """
+    Basic HTML to text conversion.
+    """
+    if HTML2TEXT_AVAILABLE:
+        return html2text.html2text(html_content)
+    # Remove HTML tags
+    text = re.sub(r'<[^>]+>', '', html_content)
+    # Normalize whitespace
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def render_pdf(html_content, stylesheets=None, font_config=None):
+    """
+    Render HTML to PDF bytes with WeasyPrint, falling back to ReportLab.
+    """
+    if WEASYPRINT_AVAILABLE:
+        pdf_buffer = BytesIO()
+        HTML(string=html_content).write_pdf(
+            pdf_buffer, stylesheets=stylesheets, font_config=font_config
+        )
+        return pdf_buffer.getvalue()
+
+    if REPORTLAB_AVAILABLE:
+        pdf_buffer = BytesIO()
+        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
+        styles = getSampleStyleSheet()
+        story = []
+
+        # Convert HTML to plain text for ReportLab
+        for para in html_to_text(html_content).split('\n\n'):
+            if para.strip():
+                story.append(Paragraph(para.strip(), styles['Normal']))
+                story.append(Spacer(1, 0.2 * inch))
+
+        doc.build(story)
+        return pdf_buffer.getvalue()
+
+    raise DocumentRenderingUnavailable(
+        'PDF generation not available. Please install weasyprint or reportlab.'
+    )
+
+
+def render_docx(html_content):
+    """
+    Render HTML to DOCX bytes (one paragraph per text block).
+    """
+    if not DOCX_AVAILABLE:
+        raise DocumentRenderingUnavailable(
+            'DOCX generation not available. Please install python-docx.'
+        )
+
+    doc = Document()
+    for para in html_to_text(html_content).split('\n\n'):
+        if para.strip():
+            doc.add_paragraph(para.strip())
+
+    doc_buffer = BytesIO()
+    doc.save(doc_buffer)
+    return doc_buffer.getvalue()
+
+
+def render_txt(html_content):
+    """
+    Render HTML to UTF-8 encoded plain text.
+    """
+    return html_to_text(html_content).encode('utf-8')
+
+
+def render_document(html_content, export_format):
+    """
+    Render HTML into the requested (normalized) format and return bytes.
+    """
+    if export_format == 'pdf':
+        return render_pdf(html_content)
+    if export_format == 'docx':
+        return render_docx(html_content)
+    if export_format == 'txt':
+        return render_txt(html_content)
+    raise ValueError(f'Unsupported format: {export_format}')
+
+
+# ---------------------------------------------------------------------------
+# Pool worker state. Each worker keeps one WeasyPrint FontConfiguration and
+# caches parsed <style> blocks by content hash, so fonts and CSS are parsed
+# once per worker rather than once per document.
+# ---------------------------------------------------------------------------
+_worker_font_config = None
+_worker_stylesheets = {}
+
+
+def _init_render_worker():
+    global _worker_font_config
+    if WEASYPRINT_AVAILABLE:
+        _worker_font_config = FontConfiguration()
+
+
+def _get_worker_stylesheet(css_text):
+    css_key = hashlib.sha1(css_text.encode('utf-8')).hexdigest()
+    stylesheet = _worker_stylesheets.get(css_key)
+    if stylesheet is None:
+        stylesheet = CSS(string=css_text, font_config=_worker_font_config)
+        _worker_stylesheets[css_key] = stylesheet
+    return stylesheet
+
+
+def _render_worker(html_content, export_format):
+    """
+    Render one document inside a pool worker.
+
+    Returns (document_bytes, error_message); exactly one of them is set.
+    """
+    try:
+        if export_format == 'pdf' and WEASYPRINT_AVAILABLE:
+            css_text = '\n'.join(STYLE_BLOCK_PATTERN.findall(html_content))
+            stylesheets = None
+            if css_text.strip():
+                stylesheets = [_get_worker_stylesheet(css_text)]
+                html_content = STYLE_BLOCK_PATTERN.sub('', html_content)
+            return render_pdf(html_content, stylesheets=stylesheets, font_config=_worker_font_config), None
+        return render_document(html_content, export_format), None
+    except Exception as e:
+        return None, str(e)
+
+
+class _ZipChunkBuffer:
+    """
+    Write-only buffer handed to ZipFile; the streaming generator drains it
+    after every document so the archive is never held in memory as a whole.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class BulkLetterRenderer:
+    """
+    Renders many filled letters in a process pool and streams a ZIP archive.
+    """
+
+    def __init__(self, export_format, max_workers=2, window_size=None):
+        self.export_format = export_format
+        self.max_workers = max(1, max_workers)
+        # Number of documents in flight at once; bounds parent memory usage
+        self.window_size = window_size or self.max_workers * 4
+
+    def iter_rendered(self, documents):
+        """
+        Render (filename, html) pairs and yield (filename, bytes, error) in input order.
+        """
+        documents = iter(documents)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=context,
+            initializer=_init_render_worker,
+        ) as executor:
+            while True:
+                window = []
+                for filename, html_content in documents:
+                    window.append((filename, executor.submit(_render_worker, html_content, self.export_format)))
+                    if len(window) >= self.window_size:
+                        break
+                if not window:
+                    break
+                for filename, future in window:
+                    document_bytes, error = future.result()
+                    yield filename, document_bytes, error
+
+    def stream_zip(self, documents, progress_callback=None, errors=None):
+        """
+        Generator yielding ZIP archive bytes for the given (filename, html) pairs.
+
+        Failed documents are listed in an ``errors.txt`` entry instead of
+        aborting the whole archive; ``errors`` may carry failures recorded by
+        the caller while producing the documents. progress_callback(rendered,
+        failed) is called after each document.
+        """
+        buffer = _ZipChunkBuffer()
+        rendered = 0
+        failed = errors if errors is not None else []
+        extension = DOCUMENT_FORMATS[self.export_format][0]
+
+        with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for filename, document_bytes, error in self.iter_rendered(documents):
+                if error:
+                    failed.append(f'{filename}: {error}')
+                    logger.warning(f"Bulk letter rendering failed for {filename}: {error}")
+                else:
+                    archive.writestr(f'{filename}.{extension}', document_bytes)
+                    rendered += 1
+                if progress_callback:
+                    progress_callback(rendered, len(failed))
+                chunk = buffer.drain()
+                if chunk:
+                    yield chunk
+
+            if failed:
+                archive.writestr('errors.txt', '\n'.join(failed))
+
+        chunk = buffer.drain()
+        if chunk:
+            yield chunk
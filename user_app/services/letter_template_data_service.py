@@ -2,7 +2,7 @@
 Service to fetch and map employee, order, and Payee data for letter templates.
 """
 from django.db.models import Q
-from user_app.models import EmployeeDetail, GarnishmentOrder, PayeeDetails, Client
+from user_app.models import EmployeeDetail, GarnishmentOrder
 from datetime import datetime
 
 
@@ -10,31 +10,189 @@ class LetterTemplateDataService:
     """
     Service class to fetch and map employee, order, and Payee data
     to template variables for automatic population.
+
+    All lookups go through load_variable_groups, which resolves any number of
+    (employee_id, order_id) targets with two queries: one for employees (with
+    client, states, filing status and address) and one for their orders (with
+    state, type, payee and payee address).
     """
     
+    EMPLOYEE_RELATED = (
+        'client', 'home_state', 'work_state', 'filing_status', 'employee_addresses'
+    )
+    ORDER_RELATED = (
+        'issuing_state', 'garnishment_type', 'payee', 'payee__state',
+        'payee__address', 'payee__address__state'
+    )
+    
     @staticmethod
-    def fetch_employee_data(employee_id):
+    def _format_date(value, fmt='%Y-%m-%d'):
+        return value.strftime(fmt) if value else ''
+    
+    @staticmethod
+    def _format_amount(value):
+        return f"{value:.2f}" if value else '0.00'
+    
+    @staticmethod
+    def _load_employees(employee_ids):
         """
-        Fetch employee data by employee ID (ee_id) or primary key.
-        
-        Args:
-            employee_id: Can be ee_id (string) or primary key (int)
+        Fetch employees for the given ids in one query.
+        String ids are matched on ee_id, falling back to the primary key for
+        numeric strings; integer ids are matched on the primary key.
         
         Returns:
-            dict: Employee data mapped to template variable names
+            dict: {employee_id: EmployeeDetail} for the ids that were found
         """
-        try:
-            # Try to get by ee_id first (string), then by pk
+        ee_ids = {str(employee_id) for employee_id in employee_ids if isinstance(employee_id, str)}
+        pks = {int(employee_id) for employee_id in employee_ids
+               if isinstance(employee_id, int) or (isinstance(employee_id, str) and employee_id.isdigit())}
+        
+        query = Q(ee_id__in=ee_ids)
+        if pks:
+            query |= Q(pk__in=pks)
+        employees = list(
+            EmployeeDetail.objects.select_related(
+                *LetterTemplateDataService.EMPLOYEE_RELATED
+            ).filter(query)
+        )
+        by_ee_id = {employee.ee_id: employee for employee in employees}
+        by_pk = {employee.pk: employee for employee in employees}
+        
+        resolved = {}
+        for employee_id in employee_ids:
             if isinstance(employee_id, str):
-                employee = EmployeeDetail.objects.select_related(
-                    'client', 'home_state', 'work_state', 'filing_status'
-                ).get(ee_id=employee_id)
+                employee = by_ee_id.get(employee_id)
+                if employee is None and employee_id.isdigit():
+                    employee = by_pk.get(int(employee_id))
             else:
-                employee = EmployeeDetail.objects.select_related(
-                    'client', 'home_state', 'work_state', 'filing_status'
-                ).get(pk=employee_id)
-        except EmployeeDetail.DoesNotExist:
-            raise ValueError(f"Employee with id '{employee_id}' not found")
+                employee = by_pk.get(employee_id)
+            if employee is not None:
+                resolved[employee_id] = employee
+        return resolved
+    
+    @staticmethod
+    def _select_order(orders, order_id):
+        """
+        Pick the requested order (case_id, then primary key) or the most recent one.
+        `orders` must already be sorted newest first.
+        """
+        if not orders:
+            return None
+        if not order_id:
+            return orders[0]
+        
+        for order in orders:
+            if order.case_id == str(order_id):
+                return order
+        if isinstance(order_id, int) or str(order_id).isdigit():
+            for order in orders:
+                if order.pk == int(order_id):
+                    return order
+        raise ValueError(f"Order with id '{order_id}' not found for this employee")
+    
+    @staticmethod
+    def load_variable_groups(targets):
+        """
+        Resolve employee, order and Payee data for many targets with shared queries.
+        
+        Args:
+            targets: Iterable of (employee_id, order_id) pairs. employee_id is an
+                     ee_id or primary key; order_id is a case_id, primary key or None.
+        
+        Returns:
+            tuple: (groups, errors) where groups maps each resolved target to
+                   (employee_data, order_data, payee_data) and errors maps each
+                   failed target to its error message. order_data and payee_data
+                   may be None.
+        """
+        targets = list(dict.fromkeys(targets))
+        employees = LetterTemplateDataService._load_employees(
+            list(dict.fromkeys(employee_id for employee_id, _ in targets))
+        )
+        
+        orders_by_employee = {}
+        if employees:
+            orders = GarnishmentOrder.objects.select_related(
+                *LetterTemplateDataService.ORDER_RELATED
+            ).filter(
+                employee_id__in={employee.pk for employee in employees.values()}
+            ).order_by('-created_at')
+            for order in orders:
+                orders_by_employee.setdefault(order.employee_id, []).append(order)
+        
+        now = datetime.now()
+        groups = {}
+        errors = {}
+        employee_data_cache = {}
+        for employee_id, order_id in targets:
+            employee = employees.get(employee_id)
+            if employee is None:
+                errors[(employee_id, order_id)] = f"Employee with id '{employee_id}' not found"
+                continue
+            
+            try:
+                order = LetterTemplateDataService._select_order(
+                    orders_by_employee.get(employee.pk, []), order_id
+                )
+            except ValueError as e:
+                errors[(employee_id, order_id)] = str(e)
+                continue
+            
+            if employee.pk not in employee_data_cache:
+                employee_data_cache[employee.pk] = LetterTemplateDataService.map_employee_data(employee, now)
+            
+            groups[(employee_id, order_id)] = (
+                employee_data_cache[employee.pk],
+                LetterTemplateDataService.map_order_data(order) if order else None,
+                LetterTemplateDataService.map_payee_data(order.payee) if order and order.payee_id else None,
+            )
+        
+        return groups, errors
+    
+    @staticmethod
+    def load_template_variables(targets):
+        """
+        Resolve the combined template variables for many (employee_id, order_id) targets.
+        
+        Returns:
+            tuple: (variables, errors) where variables maps each resolved target to
+                   its combined variable dict and errors maps failed targets to messages.
+        """
+        groups, errors = LetterTemplateDataService.load_variable_groups(targets)
+        variables = {}
+        for target, (employee_data, order_data, payee_data) in groups.items():
+            template_variables = employee_data.copy()
+            if order_data:
+                template_variables.update(order_data)
+            if payee_data:
+                template_variables.update(payee_data)
+            variables[target] = template_variables
+        return variables, errors
+    
+    @staticmethod
+    def get_variable_groups(employee_id, order_id=None):
+        """
+        Fetch employee, order and Payee data for a single employee.
+        
+        Returns:
+            tuple: (employee_data, order_data, payee_data); order_data and payee_data may be None
+        
+        Raises:
+            ValueError: If the employee or requested order does not exist
+        """
+        groups, errors = LetterTemplateDataService.load_variable_groups([(employee_id, order_id)])
+        if (employee_id, order_id) in errors:
+            raise ValueError(errors[(employee_id, order_id)])
+        return groups[(employee_id, order_id)]
+    
+    @staticmethod
+    def map_employee_data(employee, now=None):
+        """
+        Map an EmployeeDetail (with related client, states, filing status and address)
+        to template variable names.
+        """
+        now = now or datetime.now()
+        fmt_date = LetterTemplateDataService._format_date
         
         # Get employee address if available
         try:
@@ -43,7 +201,7 @@ class LetterTemplateDataService:
             employee_address = None
         
         # Map employee data to template variables - all fields from EmployeeDetail model
-        employee_data = {
+        return {
             # Basic employee info
             'employee_id': employee.ee_id,
             'ee_id': employee.ee_id,
@@ -76,9 +234,9 @@ class LetterTemplateDataService:
             
             # Additional employee fields
             'garnishment_fees_status': 'Yes' if employee.garnishment_fees_status else 'No',
-            'garnishment_fees_suspended_till': employee.garnishment_fees_suspended_till.strftime('%Y-%m-%d') if employee.garnishment_fees_suspended_till else '',
+            'garnishment_fees_suspended_till': fmt_date(employee.garnishment_fees_suspended_till),
             'status': employee.status or '',
-            'is_active': 'Yes' if employee.is_active else 'No',
+            'is_active': 'Yes' if (employee.status or '').lower() == 'active' else 'No',
             
             # Employee address fields
             'employee_address_address_1': employee_address.address_1 if employee_address else '',
@@ -91,59 +249,21 @@ class LetterTemplateDataService:
             'employee_address_country': employee_address.country if employee_address else '',
             
             # Dates
-            'current_date': datetime.now().strftime('%Y-%m-%d'),
-            'current_date_formatted': datetime.now().strftime('%B %d, %Y'),
+            'current_date': now.strftime('%Y-%m-%d'),
+            'current_date_formatted': now.strftime('%B %d, %Y'),
         }
-        
-        return employee_data
     
     @staticmethod
-    def fetch_order_data(employee_id, order_id=None):
+    def map_order_data(order):
         """
-        Fetch garnishment order data for an employee.
-        
-        Args:
-            employee_id: Employee ID (ee_id) or primary key
-            order_id: Optional order ID (case_id) or primary key. If None, fetches the most recent active order.
-        
-        Returns:
-            dict: Order data mapped to template variable names, or None if no order found
+        Map a GarnishmentOrder (with related state and type) to template variable names.
         """
-        try:
-            # Get employee first
-            if isinstance(employee_id, str):
-                employee = EmployeeDetail.objects.get(ee_id=employee_id)
-            else:
-                employee = EmployeeDetail.objects.get(pk=employee_id)
-        except EmployeeDetail.DoesNotExist:
-            raise ValueError(f"Employee with id '{employee_id}' not found")
-        
-        # Fetch order(s)
-        orders = GarnishmentOrder.objects.filter(
-            employee=employee
-        ).select_related(
-            'issuing_state', 'garnishment_type'
-        ).order_by('-created_at')
-        
-        if not orders.exists():
-            return None
-        
-        # Get specific order or most recent
-        if order_id:
-            if isinstance(order_id, str):
-                order = orders.filter(case_id=order_id).first()
-                if not order:
-                    order = orders.filter(pk=order_id).first()
-            else:
-                order = orders.filter(pk=order_id).first()
-            
-            if not order:
-                raise ValueError(f"Order with id '{order_id}' not found for this employee")
-        else:
-            order = orders.first()
+        fmt_date = LetterTemplateDataService._format_date
+        fmt_amount = LetterTemplateDataService._format_amount
+        long_date = '%B %d, %Y'
         
         # Map order data to template variables - all fields from GarnishmentOrder model
-        order_data = {
+        return {
             # Order identification
             'case_id': order.case_id or '',
             'order_id': order.case_id or '',
@@ -151,59 +271,59 @@ class LetterTemplateDataService:
             'is_consumer_debt': 'Yes' if order.is_consumer_debt else 'No',
             
             # Dates
-            'issued_date': order.issued_date.strftime('%Y-%m-%d') if order.issued_date else '',
-            'issued_date_formatted': order.issued_date.strftime('%B %d, %Y') if order.issued_date else '',
-            'received_date': order.received_date.strftime('%Y-%m-%d') if order.received_date else '',
-            'received_date_formatted': order.received_date.strftime('%B %d, %Y') if order.received_date else '',
-            'start_date': order.start_date.strftime('%Y-%m-%d') if order.start_date else '',
-            'start_date_formatted': order.start_date.strftime('%B %d, %Y') if order.start_date else '',
-            'stop_date': order.stop_date.strftime('%Y-%m-%d') if order.stop_date else '',
-            'stop_date_formatted': order.stop_date.strftime('%B %d, %Y') if order.stop_date else '',
-            'override_start_date': order.override_start_date.strftime('%Y-%m-%d') if order.override_start_date else '',
-            'override_start_date_formatted': order.override_start_date.strftime('%B %d, %Y') if order.override_start_date else '',
-            'override_stop_date': order.override_stop_date.strftime('%Y-%m-%d') if order.override_stop_date else '',
-            'override_stop_date_formatted': order.override_stop_date.strftime('%B %d, %Y') if order.override_stop_date else '',
-            'paid_till_date': order.paid_till_date.strftime('%Y-%m-%d') if order.paid_till_date else '',
-            'paid_till_date_formatted': order.paid_till_date.strftime('%B %d, %Y') if order.paid_till_date else '',
-            'pay_date': order.pay_date.strftime('%Y-%m-%d') if order.pay_date else '',
-            'date_of_ap_payment': order.date_of_ap_payment.strftime('%Y-%m-%d') if order.date_of_ap_payment else '',
+            'issued_date': fmt_date(order.issued_date),
+            'issued_date_formatted': fmt_date(order.issued_date, long_date),
+            'received_date': fmt_date(order.received_date),
+            'received_date_formatted': fmt_date(order.received_date, long_date),
+            'start_date': fmt_date(order.start_date),
+            'start_date_formatted': fmt_date(order.start_date, long_date),
+            'stop_date': fmt_date(order.stop_date),
+            'stop_date_formatted': fmt_date(order.stop_date, long_date),
+            'override_start_date': fmt_date(order.override_start_date),
+            'override_start_date_formatted': fmt_date(order.override_start_date, long_date),
+            'override_stop_date': fmt_date(order.override_stop_date),
+            'override_stop_date_formatted': fmt_date(order.override_stop_date, long_date),
+            'paid_till_date': fmt_date(order.paid_till_date),
+            'paid_till_date_formatted': fmt_date(order.paid_till_date, long_date),
+            'pay_date': fmt_date(order.pay_date),
+            'date_of_ap_payment': fmt_date(order.date_of_ap_payment),
             
             # Amounts
-            'ordered_amount': f"{order.ordered_amount:.2f}" if order.ordered_amount else '0.00',
-            'withholding_amount': f"{order.amount_of_deduction:.2f}" if order.amount_of_deduction else '0.00',
-            'garnishment_fees': f"{order.garnishment_fees:.2f}" if order.garnishment_fees else '0.00',
-            'override_amount': f"{order.override_amount:.2f}" if order.override_amount else '0.00',
-            'override_limit': f"{order.override_limit:.2f}" if order.override_limit else '0.00',
-            'override_arrear': f"{order.override_arrear:.2f}" if order.override_arrear else '0.00',
-            'override_percent': f"{order.override_percent:.2f}" if order.override_percent else '0.00',
-            'arrear_amount': f"{order.arrear_amount:.2f}" if order.arrear_amount else '0.00',
-            'current_child_support': f"{order.current_child_support:.2f}" if order.current_child_support else '0.00',
-            'current_medical_support': f"{order.current_medical_support:.2f}" if order.current_medical_support else '0.00',
-            'current_spousal_support': f"{order.current_spousal_support:.2f}" if order.current_spousal_support else '0.00',
-            'child_support_arrear': f"{order.child_support_arrear:.2f}" if order.child_support_arrear else '0.00',
-            'medical_support_arrear': f"{order.medical_support_arrear:.2f}" if order.medical_support_arrear else '0.00',
-            'spousal_support_arrear': f"{order.spousal_support_arrear:.2f}" if order.spousal_support_arrear else '0.00',
-            'override_child_support': f"{order.override_child_support:.2f}" if order.override_child_support else '0.00',
-            'override_medical_support': f"{order.override_medical_support:.2f}" if order.override_medical_support else '0.00',
-            'override_spousal_support': f"{order.override_spousal_support:.2f}" if order.override_spousal_support else '0.00',
-            'override_child_support_arrear': f"{order.override_child_support_arrear:.2f}" if order.override_child_support_arrear else '0.00',
-            'override_medical_support_arrear': f"{order.override_medical_support_arrear:.2f}" if order.override_medical_support_arrear else '0.00',
-            'override_spousal_support_arrear': f"{order.override_spousal_support_arrear:.2f}" if order.override_spousal_support_arrear else '0.00',
-            'amount_of_deduction': f"{order.amount_of_deduction:.2f}" if order.amount_of_deduction else '0.00',
-            'pay_period_limit': f"{order.pay_period_limit:.2f}" if order.pay_period_limit else '0.00',
-            'total_amount_owed': f"{order.total_amount_owed:.2f}" if order.total_amount_owed else '0.00',
-            'monthly_limit': f"{order.monthly_limit:.2f}" if order.monthly_limit else '0.00',
-            'exempt_amount': f"{order.exempt_amount:.2f}" if order.exempt_amount else '0.00',
-            'ytd_deductions': f"{order.ytd_deductions:.2f}" if order.ytd_deductions else '0.00',
+            'ordered_amount': fmt_amount(order.ordered_amount),
+            'withholding_amount': fmt_amount(order.amount_of_deduction),
+            'garnishment_fees': fmt_amount(order.garnishment_fees),
+            'override_amount': fmt_amount(order.override_amount),
+            'override_limit': fmt_amount(order.override_limit),
+            'override_arrear': fmt_amount(order.override_arrear),
+            'override_percent': fmt_amount(order.override_percent),
+            'arrear_amount': fmt_amount(order.arrear_amount),
+            'current_child_support': fmt_amount(order.current_child_support),
+            'current_medical_support': fmt_amount(order.current_medical_support),
+            'current_spousal_support': fmt_amount(order.current_spousal_support),
+            'child_support_arrear': fmt_amount(order.child_support_arrear),
+            'medical_support_arrear': fmt_amount(order.medical_support_arrear),
+            'spousal_support_arrear': fmt_amount(order.spousal_support_arrear),
+            'override_child_support': fmt_amount(order.override_child_support),
+            'override_medical_support': fmt_amount(order.override_medical_support),
+            'override_spousal_support': fmt_amount(order.override_spousal_support),
+            'override_child_support_arrear': fmt_amount(order.override_child_support_arrear),
+            'override_medical_support_arrear': fmt_amount(order.override_medical_support_arrear),
+            'override_spousal_support_arrear': fmt_amount(order.override_spousal_support_arrear),
+            'amount_of_deduction': fmt_amount(order.amount_of_deduction),
+            'pay_period_limit': fmt_amount(order.pay_period_limit),
+            'total_amount_owed': fmt_amount(order.total_amount_owed),
+            'monthly_limit': fmt_amount(order.monthly_limit),
+            'exempt_amount': fmt_amount(order.exempt_amount),
+            'ytd_deductions': fmt_amount(order.ytd_deductions),
             
             # Other order fields
             'deduction_code': order.deduction_code or '',
             'deduction_basis': order.deduction_basis or '',
-            'payee_id': order.payee_id or '',
+            'payee_id': order.payee.payee_id if order.payee_id and order.payee else '',
             'fein': getattr(order, 'fein', '') or '',
             'garnishing_authority': getattr(order, 'garnishing_authority', '') or '',
             'fips_code': order.fips_code or '',
-            'payee': getattr(order, 'payee', '') or '',
+            'payee': order.payee.payee if order.payee_id and order.payee else '',
             'voucher_for_payroll': order.voucher_for_payroll or '',
             'arrear_greater_than_12_weeks': 'Yes' if order.arrear_greater_than_12_weeks else 'No',
             'ach_sent': 'Yes' if order.ach_sent else 'No',
@@ -214,62 +334,13 @@ class LetterTemplateDataService:
             'issuing_state': order.issuing_state.state_code if order.issuing_state else '',
             'issuing_state_name': order.issuing_state.state if order.issuing_state else '',
         }
-        
-        return order_data
     
     @staticmethod
-    def fetch_payee_data(employee_id, order_id=None):
+    def map_payee_data(payee):
         """
-        Fetch Payee data for an employee's order.
-        
-        Args:
-            employee_id: Employee ID (ee_id) or primary key
-            order_id: Optional order ID (case_id) or primary key. If None, uses the most recent active order.
-        
-        Returns:
-            dict: Payee data mapped to template variable names, or None if no Payee found
+        Map a PayeeDetails (with related state and address) to template variable names.
         """
-        try:
-            # Get employee first
-            if isinstance(employee_id, str):
-                employee = EmployeeDetail.objects.get(ee_id=employee_id)
-            else:
-                employee = EmployeeDetail.objects.get(pk=employee_id)
-        except EmployeeDetail.DoesNotExist:
-            raise ValueError(f"Employee with id '{employee_id}' not found")
-        
-        # Get the order
-        orders = GarnishmentOrder.objects.filter(
-            employee=employee
-        ).order_by('-created_at')
-        
-        if not orders.exists():
-            return None
-        
-        if order_id:
-            if isinstance(order_id, str):
-                order = orders.filter(case_id=order_id).first()
-                if not order:
-                    order = orders.filter(pk=order_id).first()
-            else:
-                order = orders.filter(pk=order_id).first()
-            
-            if not order:
-                raise ValueError(f"Order with id '{order_id}' not found for this employee")
-        else:
-            order = orders.first()
-        
-        # Fetch Payee data
-        payee = PayeeDetails.objects.filter(
-            case_id=order,
-            is_active=True
-        ).select_related('address__state').first()
-        
-        if not payee:
-            return None
-        
         # Get address if available
-        payee_address = None
         try:
             payee_address = payee.address
         except (AttributeError, Exception):
@@ -287,13 +358,14 @@ class LetterTemplateDataService:
             if payee_address.state:
                 address_parts.append(payee_address.state.state if hasattr(payee_address.state, 'state') else str(payee_address.state))
             if payee_address.zip_code:
-                address_parts.append(payee_address.zip_code)
+                address_parts.append(str(payee_address.zip_code))
             address_str = ', '.join(address_parts)
         
-        # Map Payee data to template variables - all fields from PayeeDetails model (keeping sdu_ prefix for backward compatibility)
-        payee_data = {
+        # Map Payee data to template variables - all fields from PayeeDetails model
+        return {
             # PayeeDetails fields
             'payee': payee.payee or '',
+            'payee_id': payee.payee_id or '',
             'payee_type': payee.payee_type or '',
             'routing_number': payee.routing_number or '',
             'bank_account': payee.bank_account or '',
@@ -301,8 +373,8 @@ class LetterTemplateDataService:
             'case_number_format': payee.case_number_format or '',
             'fips_required': 'Yes' if payee.fips_required else 'No',
             'fips_length': payee.fips_length or '',
-            'last_used': payee.last_used.strftime('%Y-%m-%d') if payee.last_used else '',
-            'is_active': 'Yes' if payee.is_active else 'No',
+            'last_used': payee.last_used or '',
+            'is_active': 'Yes' if (payee.status or '').lower() == 'active' else 'No',
             'address': address_str,
             'state': payee.state.state_code if payee.state else '',
             'state_name': payee.state.state if payee.state else '',
@@ -316,8 +388,39 @@ class LetterTemplateDataService:
             'payee_address_zip_code': payee_address.zip_code if payee_address else '',
             'payee_address_zip_plus_4': payee_address.zip_plus_4 if payee_address else '',
         }
+    
+    @staticmethod
+    def fetch_employee_data(employee_id):
+        """
+        Fetch employee data by employee ID (ee_id) or primary key.
+        
+        Returns:
+            dict: Employee data mapped to template variable names
+        """
+        employee = LetterTemplateDataService._load_employees([employee_id]).get(employee_id)
+        if employee is None:
+            raise ValueError(f"Employee with id '{employee_id}' not found")
+        return LetterTemplateDataService.map_employee_data(employee)
+    
+    @staticmethod
+    def fetch_order_data(employee_id, order_id=None):
+        """
+        Fetch garnishment order data for an employee.
         
-        return payee_data
+        Returns:
+            dict: Order data mapped to template variable names, or None if no order found
+        """
+        return LetterTemplateDataService.get_variable_groups(employee_id, order_id)[1]
+    
+    @staticmethod
+    def fetch_payee_data(employee_id, order_id=None):
+        """
+        Fetch Payee data for an employee's order.
+        
+        Returns:
+            dict: Payee data mapped to template variable names, or None if no Payee found
+        """
+        return LetterTemplateDataService.get_variable_groups(employee_id, order_id)[2]
     
     @staticmethod
     def get_all_template_variables(employee_id, order_id=None):
@@ -331,25 +434,10 @@ class LetterTemplateDataService:
         Returns:
             dict: Combined data from employee, order, and Payee mapped to template variable names
         """
-        # Fetch employee data
-        employee_data = LetterTemplateDataService.fetch_employee_data(employee_id)
-        
-        # Fetch order data (may be None)
-        order_data = LetterTemplateDataService.fetch_order_data(employee_id, order_id)
-        
-        # Fetch Payee data (may be None)
-        payee_data = LetterTemplateDataService.fetch_payee_data(employee_id, order_id)
-        
-        # Combine all data
-        template_variables = employee_data.copy()
-        
-        if order_data:
-            template_variables.update(order_data)
-        
-        if payee_data:
-            template_variables.update(payee_data)
-        
-        return template_variables
+        variables, errors = LetterTemplateDataService.load_template_variables([(employee_id, order_id)])
+        if (employee_id, order_id) in errors:
+            raise ValueError(errors[(employee_id, order_id)])
+        return variables[(employee_id, order_id)]
     #for getting available variables for drag and drop
     @staticmethod
     def get_available_variables():
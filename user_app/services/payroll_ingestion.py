@@ -0,0 +1,305 @@
+"""
+Bulk payroll ingestion.
+
+Payroll rows used to reach the Payroll table only as a side effect of a
+garnishment calculation. PayrollIngestionService loads a payroll batch on its
+own: the rows (JSON array, CSV or NDJSON) are validated with
+PayrollInputValidator in batch and written through
+DatabaseManager.store_payroll_batch, IMPORT_CHUNK_SIZE rows at a time.
+PostCalculationView can then calculate a stored batch from its batch_id.
+
+A batch_id names one set of rows: ingesting under a batch_id that already has
+rows is refused unless the caller asks to replace them, so a re-post or a
+reused id never appends to another batch. The rows are written under a staging
+batch id and moved to batch_id in one transaction once the whole upload is
+stored, under a lock on the PayrollBatch row; a failed upload leaves the
+existing batch untouched, and two uploads of one batch_id cannot both win.
+"""
+import io
+import json
+import logging
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from processor.garnishment_library.input_validator import PayrollInputValidator
+from garnishedge_project.model_audit import log_model_bulk_operation
+from processor.services.database_manager import DatabaseManager
+from user_app.constants import (
+    EmployeeFields as EE,
+    CalculationFields as CA,
+    PayrollTaxesFields as PT,
+)
+from user_app.models.payroll.payroll import Payroll
+from user_app.models.payroll.payroll_batch import PayrollBatch
+from user_app.services.import_reader import ImportFileReader
+
+logger = logging.getLogger(__name__)
+
+# Payroll tax fields; flat CSV columns / JSON keys are nested under payroll_taxes
+PAYROLL_TAX_FIELDS = (
+    PT.FEDERAL_INCOME_TAX, PT.STATE_TAX, PT.LOCAL_TAX, PT.MEDICARE_TAX,
+    PT.SOCIAL_SECURITY_TAX, PT.WILMINGTON_TAX, PT.CALIFORNIA_SDI,
+    PT.MEDICAL_INSURANCE_PRETAX, PT.LIFE_INSURANCE, PT.RETIREMENT_401K,
+    PT.INDUSTRIAL_INSURANCE, PT.UNION_DUES,
+)
+
+# Payroll columns returned when a calculation references a stored batch
+PAYROLL_AMOUNT_FIELDS = (
+    CA.WAGES, CA.COMMISSION_AND_BONUS, CA.NON_ACCOUNTABLE_ALLOWANCES,
+    CA.GROSS_PAY, CA.NET_PAY,
+)
+
+# Identifier columns read as text so values like "00123" keep their zeros
+PAYROLL_STRING_COLUMNS = [EE.CLIENT_ID, EE.EMPLOYEE_ID, EE.PAY_PERIOD, EE.PAYROLL_DATE, 'pay_date']
+
+
+class PayrollBatchExists(Exception):
+    """
+    Raised when batch_id already has stored rows and replace was not requested.
+    """
+
+    def __init__(self, batch_id):
+        super().__init__(f"Payroll batch {batch_id} already exists")
+        self.batch_id = batch_id
+
+
+class PayrollIngestionResult:
+    """
+    Counters and row-level errors of one ingestion run.
+    """
+
+    def __init__(self, batch_id, replace=False):
+        self.batch_id = batch_id
+        # Chunks are stored here and moved to batch_id once the upload is complete
+        self.staging_batch_id = PayrollIngestionService.generate_batch_id(prefix='S')
+        # The rows already stored under batch_id are deleted when the upload is published
+        self.replace = replace
+        self.rows_received = 0
+        self.rows_stored = 0
+        self.errors = []
+
+    def as_dict(self):
+        return {
+            'batch_id': self.batch_id,
+            'rows_received': self.rows_received,
+            'rows_stored': self.rows_stored,
+            'error_count': len(self.errors),
+            'errors': self.errors,
+        }
+
+
+class PayrollIngestionService:
+    """
+    Parses, validates and stores payroll batches.
+    """
+
+    @staticmethod
+    def generate_batch_id(prefix='B'):
+        # 76 random bits; GarnishmentResult.batch_id holds at most 20 characters
+        return f"{prefix}{uuid.uuid4().hex[:19].upper()}"
+
+    @staticmethod
+    def batch_exists(batch_id):
+        return Payroll.objects.filter(batch_id=batch_id).exists()
+
+    @classmethod
+    def ingest_items(cls, items, batch_id, replace=False):
+        """
+        Ingest a list of payroll item dicts (JSON array or parsed NDJSON).
+        """
+        result = PayrollIngestionResult(batch_id, replace)
+        chunk_size = max(1, settings.IMPORT_CHUNK_SIZE)
+        with cls._staged(result):
+            for start in range(0, len(items), chunk_size):
+                chunk = items[start:start + chunk_size]
+                cls._ingest_chunk(chunk, result, range(start + 1, start + len(chunk) + 1))
+        return result
+
+    @classmethod
+    def ingest_ndjson(cls, lines, batch_id, replace=False):
+        """
+        Ingest newline-delimited JSON, one payroll item per line. Blank lines
+        are skipped; lines that are not valid JSON are reported as errors.
+        """
+        result = PayrollIngestionResult(batch_id, replace)
+        chunk_size = max(1, settings.IMPORT_CHUNK_SIZE)
+        chunk, line_numbers = [], []
+        with cls._staged(result):
+            for line_number, line in enumerate(lines, start=1):
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8')
+                if not line.strip():
+                    continue
+                chunk.append(line)
+                line_numbers.append(line_number)
+                if len(chunk) >= chunk_size:
+                    cls._ingest_chunk(chunk, result, line_numbers)
+                    chunk, line_numbers = [], []
+            if chunk:
+                cls._ingest_chunk(chunk, result, line_numbers)
+        return result
+
+    @classmethod
+    def ingest_csv(cls, file_obj, batch_id, replace=False):
+        """
+        Ingest a CSV upload with one payroll item per row. Tax columns
+        (federal_income_tax, state_tax, ...) are nested under payroll_taxes.
+        """
+        result = PayrollIngestionResult(batch_id, replace)
+        reader = ImportFileReader(file_obj, file_name='payroll.csv', string_columns=PAYROLL_STRING_COLUMNS)
+        with cls._staged(result):
+            for chunk in reader.chunks():
+                chunk = chunk.astype(object)
+                chunk = chunk.where(chunk.notna(), None)
+                items = chunk.to_dict('records')
+                # Row numbers are 1-based data rows, matching the other import error reports
+                cls._ingest_chunk(items, result, [index + 1 for index in chunk.index])
+        return result
+
+    @staticmethod
+    def read_ndjson_lines(data):
+        """
+        Split an NDJSON request body or upload into lines.
+        """
+        if hasattr(data, 'read'):
+            data = data.read()
+        if isinstance(data, bytes):
+            data = data.decode('utf-8-sig')
+        return io.StringIO(data.lstrip('\ufeff'))
+
+    @classmethod
+    def _ingest_chunk(cls, items, result, row_numbers):
+        result.rows_received += len(items)
+        items = [cls._nest_payroll_taxes(item) for item in items]
+
+        row_numbers = list(row_numbers)
+        validated_items, errors = PayrollInputValidator().validate_batch(items, start_row=0)
+        for error in errors:
+            error['row'] = row_numbers[error['row']]
+        result.errors.extend(errors)
+        if not validated_items:
+            return
+
+        store_result = DatabaseManager().store_payroll_batch(validated_items, result.staging_batch_id)
+        result.rows_stored += store_result.get('stored_count', 0)
+        for error in store_result.get('errors', []):
+            result.errors.append({'row': None, 'error': error})
+        if store_result.get('message'):
+            result.errors.append({'row': None, 'error': store_result['message']})
+
+    @classmethod
+    @contextmanager
+    def _staged(cls, result):
+        """
+        Publish the staged rows of result once the block completes; discard
+        them if the block or the publish fails.
+        """
+        try:
+            yield
+            if result.rows_stored:
+                cls._publish(result)
+        except BaseException:
+            cls._discard_staged(result)
+            raise
+
+    @staticmethod
+    def _publish(result):
+        """
+        Move the staged rows to result.batch_id in one transaction. The
+        PayrollBatch row is locked first, so a concurrent upload of the same
+        batch_id waits here and then sees these rows.
+        """
+        with transaction.atomic():
+            PayrollBatch.objects.select_for_update().get_or_create(batch_id=result.batch_id)
+            existing_rows = Payroll.objects.filter(batch_id=result.batch_id)
+            replaced_count = 0
+            if existing_rows.exists():
+                if not result.replace:
+                    raise PayrollBatchExists(result.batch_id)
+                _, deleted = existing_rows.delete()
+                replaced_count = deleted.get(Payroll._meta.label, 0)
+            Payroll.objects.filter(batch_id=result.staging_batch_id).update(
+                batch_id=result.batch_id, updated_at=timezone.now()
+            )
+
+        logger.info(f"Published payroll batch {result.batch_id} from {result.staging_batch_id}")
+        try:
+            log_model_bulk_operation(
+                "UPDATE", "Payroll", [result.batch_id], fields=['batch_id'],
+                details={
+                    "batch_id": result.batch_id,
+                    "staging_batch_id": result.staging_batch_id,
+                    "rows_stored": result.rows_stored,
+                    "rows_replaced": replaced_count,
+                }
+            )
+        except Exception as audit_error:
+            logger.warning(f"Failed to log payroll audit for batch {result.batch_id}: {audit_error}")
+
+    @staticmethod
+    def _discard_staged(result):
+        if not result.rows_stored:
+            return
+        try:
+            Payroll.objects.filter(batch_id=result.staging_batch_id).delete()
+        except Exception:
+            logger.exception(f"Could not discard the staged payroll rows of {result.staging_batch_id}")
+
+    @staticmethod
+    def _nest_payroll_taxes(item):
+        """
+        Move flat tax fields into payroll_taxes, which is where the Payroll
+        columns are read from. Values already in payroll_taxes win.
+        """
+        if isinstance(item, str):
+            try:
+                item = json.loads(item)
+            except json.JSONDecodeError:
+                return item
+        if not isinstance(item, dict):
+            return item
+
+        payroll_taxes = item.get(PT.PAYROLL_TAXES)
+        flat_taxes = {field: item[field] for field in PAYROLL_TAX_FIELDS if item.get(field) is not None}
+        if not flat_taxes or (payroll_taxes is not None and not isinstance(payroll_taxes, dict)):
+            return item
+
+        item = {key: value for key, value in item.items() if key not in flat_taxes}
+        item[PT.PAYROLL_TAXES] = {**flat_taxes, **(payroll_taxes or {})}
+        return item
+
+    @staticmethod
+    def load_payroll_data(batch_id):
+        """
+        Rebuild the payroll_data of a stored batch in the format accepted by
+        PostCalculationView.
+        """
+        payroll_rows = Payroll.objects.filter(batch_id=batch_id).select_related(
+            'ee_id', 'client_id'
+        ).order_by('id')
+
+        def to_number(value):
+            return float(value) if isinstance(value, Decimal) else value
+
+        payroll_data = []
+        for payroll in payroll_rows:
+            item = {
+                EE.CLIENT_ID: payroll.client_id.client_id,
+                EE.EMPLOYEE_ID: payroll.ee_id.ee_id,
+                EE.PAY_PERIOD: payroll.pay_period,
+                EE.PAYROLL_DATE: payroll.payroll_date.isoformat(),
+            }
+            if payroll.pay_date:
+                item['pay_date'] = payroll.pay_date.isoformat()
+            for field in PAYROLL_AMOUNT_FIELDS:
+                item[field] = to_number(getattr(payroll, field))
+            item[PT.PAYROLL_TAXES] = {
+                field: to_number(getattr(payroll, field)) for field in PAYROLL_TAX_FIELDS
+            }
+            payroll_data.append(item)
+        return payroll_data
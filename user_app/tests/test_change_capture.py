@@ -0,0 +1,194 @@
+"""
+Tests for the CDC change log helpers in user_app.services.change_capture,
+run against InMemoryCaptureSource so no SQL Server is needed.
+"""
+from datetime import datetime, timedelta
+
+from django.core import signing
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+
+from user_app.services.change_capture import (
+    OPERATION_CODES,
+    InMemoryCaptureSource,
+    InvalidFeedCursor,
+    decode_feed_cursor,
+    encode_feed_cursor,
+    fetch_change_feed,
+    fetch_merged_changes,
+    merge_changes,
+)
+
+BASE_TIME = datetime(2025, 1, 1, 9, 0)
+
+
+def make_row(lsn, seqval=0, operation='insert', modified_by=1, **columns):
+    return {
+        'changed_at': BASE_TIME + timedelta(minutes=lsn),
+        'start_lsn': lsn.to_bytes(10, 'big'),
+        'sequence_value': seqval.to_bytes(10, 'big'),
+        'operation_code': OPERATION_CODES[operation],
+        'modified_by': modified_by,
+        **columns,
+    }
+
+
+def lsns(rows):
+    return [int(row['start_lsn'], 16) for row in rows]
+
+
+class FailingCaptureSource(InMemoryCaptureSource):
+    """
+    An in-memory source that raises like an unreadable capture instance
+    while failing is set.
+    """
+    failing = False
+
+    def fetch_changes(self, *args, **kwargs):
+        if self.failing:
+            raise OperationalError('capture instance unavailable')
+        return super().fetch_changes(*args, **kwargs)
+
+    def fetch_changes_after(self, *args, **kwargs):
+        if self.failing:
+            raise OperationalError('capture instance unavailable')
+        return super().fetch_changes_after(*args, **kwargs)
+
+
+class MergeChangesTests(SimpleTestCase):
+
+    def test_merges_newest_first_and_stops_at_limit(self):
+        orders = InMemoryCaptureSource('orders', [make_row(lsn) for lsn in (1, 4, 6)])
+        payees = InMemoryCaptureSource('payees', [make_row(lsn) for lsn in (2, 3, 5)])
+
+        rows = merge_changes([orders.fetch_changes(), payees.fetch_changes()], limit=4)
+
+        self.assertEqual(lsns(rows), [6, 5, 4, 3])
+
+    def test_does_not_consume_lists_past_limit(self):
+        consumed = []
+
+        def tracked(values):
+            for lsn in values:
+                consumed.append(lsn)
+                yield {'start_lsn': lsn.to_bytes(10, 'big').hex(), 'sequence_value': ''}
+
+        rows = merge_changes([tracked(range(100, 0, -2)), tracked(range(99, 0, -2))], limit=5)
+
+        self.assertEqual(lsns(rows), [100, 99, 98, 97, 96])
+        # The merge reads at most one row ahead per list
+        self.assertLessEqual(len(consumed), 5 + 2)
+
+    def test_oldest_first(self):
+        orders = InMemoryCaptureSource('orders', [make_row(1), make_row(3)])
+        payees = InMemoryCaptureSource('payees', [make_row(2)])
+
+        rows = merge_changes([orders.fetch_changes_after(), payees.fetch_changes_after()], limit=10, reverse=False)
+
+        self.assertEqual(lsns(rows), [1, 2, 3])
+
+    def test_fetch_merged_changes_skips_unreadable_sources(self):
+        failing = FailingCaptureSource('payees', [make_row(2)])
+        failing.failing = True
+        sources = [InMemoryCaptureSource('orders', [make_row(1), make_row(3)]), failing]
+
+        rows, failed_sources = fetch_merged_changes(sources, limit=10, max_workers=2)
+
+        self.assertEqual(lsns(rows), [3, 1])
+        self.assertEqual(failed_sources, ['payees'])
+
+
+class FeedCursorTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        positions = {
+            'orders': {'capture_instance': 'dbo_orders', 'start_lsn': '00' * 10, 'sequence_value': '01' * 10},
+            'payees': {'capture_instance': 'dbo_payees', 'start_lsn': 'ff' * 10, 'sequence_value': '00' * 10},
+        }
+        self.assertEqual(decode_feed_cursor(encode_feed_cursor(positions)), positions)
+
+    def test_rejects_cursor_not_issued_by_the_feed(self):
+        for cursor in ('not-a-cursor', signing.dumps({'v': 1, 'p': {}})):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidFeedCursor):
+                decode_feed_cursor(cursor)
+
+
+class ChangeFeedTests(SimpleTestCase):
+
+    def setUp(self):
+        self.orders = InMemoryCaptureSource('orders', [make_row(lsn) for lsn in (1, 3, 5, 7)])
+        self.payees = FailingCaptureSource('payees', [make_row(lsn) for lsn in (2, 4, 6)])
+        self.sources = [self.orders, self.payees]
+
+    def poll(self, cursor, limit, max_workers=2):
+        return fetch_change_feed(self.sources, cursor, limit, max_workers=max_workers)
+
+    def test_pages_through_every_change_once(self):
+        for max_workers in (1, 2):
+            with self.subTest(max_workers=max_workers):
+                seen, cursor = [], None
+                while True:
+                    page = self.poll(cursor, limit=3, max_workers=max_workers)
+                    seen.extend(lsns(page['results']))
+                    cursor = page['next_cursor']
+                    if not page['has_more']:
+                        break
+                self.assertEqual(seen, [1, 2, 3, 4, 5, 6, 7])
+
+    def test_has_more(self):
+        first = self.poll(None, limit=5)
+        self.assertEqual(lsns(first['results']), [1, 2, 3, 4, 5])
+        self.assertTrue(first['has_more'])
+
+        second = self.poll(first['next_cursor'], limit=5)
+        self.assertEqual(lsns(second['results']), [6, 7])
+        self.assertFalse(second['has_more'])
+
+        empty = self.poll(second['next_cursor'], limit=5)
+        self.assertEqual(empty['results'], [])
+        self.assertFalse(empty['has_more'])
+
+    def test_polls_pick_up_new_changes(self):
+        cursor = self.poll(None, limit=10)['next_cursor']
+        self.orders.rows.append(make_row(9))
+
+        page = self.poll(cursor, limit=10)
+
+        self.assertEqual(lsns(page['results']), [9])
+
+    def test_failed_source_keeps_its_position(self):
+        first = self.poll(None, limit=2)
+        self.assertEqual(lsns(first['results']), [1, 2])
+
+        self.payees.failing = True
+        second = self.poll(first['next_cursor'], limit=10)
+        self.assertEqual(second['failed_sources'], ['payees'])
+        self.assertEqual(lsns(second['results']), [3, 5, 7])
+        self.assertEqual(
+            decode_feed_cursor(second['next_cursor'])['payees'],
+            decode_feed_cursor(first['next_cursor'])['payees'],
+        )
+
+        # Once readable again the source resumes where it stopped
+        self.payees.failing = False
+        third = self.poll(second['next_cursor'], limit=10)
+        self.assertEqual(lsns(third['results']), [4, 6])
+
+    def test_rejects_cursor_of_another_capture_instance(self):
+        cursor = self.poll(None, limit=10)['next_cursor']
+        self.sources = [
+            InMemoryCaptureSource('orders', self.orders.rows, table_name='orders_v2'),
+            self.payees,
+        ]
+        with self.assertRaises(InvalidFeedCursor):
+            self.poll(cursor, limit=10)
+
+    def test_keyset_position_includes_sequence_value(self):
+        # Several changes of one transaction share a start_lsn
+        self.sources = [InMemoryCaptureSource('orders', [make_row(1, seqval) for seqval in range(4)])]
+
+        first = self.poll(None, limit=2)
+        second = self.poll(first['next_cursor'], limit=2)
+
+        self.assertEqual([row['sequence_value'] for row in first['results'] + second['results']],
+                         [seqval.to_bytes(10, 'big').hex() for seqval in range(4)])
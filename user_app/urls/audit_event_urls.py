@@ -0,0 +1,9 @@
+from django.urls import path
+from user_app.views import AuditEventListAPI
+
+app_name = 'audit'
+
+urlpatterns = [
+    # Search stored model audit events
+    path('events/', AuditEventListAPI.as_view(), name='audit-event-list'),
+]
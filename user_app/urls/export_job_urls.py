@@ -0,0 +1,19 @@
+from django.urls import path
+from user_app.views import (
+    ExportJobCreateAPI,
+    ExportJobStatusAPI,
+    ExportJobDownloadAPI
+)
+
+app_name = 'export'
+
+urlpatterns = [
+    # Request a background export job
+    path('jobs/', ExportJobCreateAPI.as_view(), name='export-job-create'),
+
+    # Status of an export job
+    path('jobs/<str:job_id>/', ExportJobStatusAPI.as_view(), name='export-job-status'),
+
+    # Download the finished export file
+    path('jobs/<str:job_id>/download/', ExportJobDownloadAPI.as_view(), name='export-job-download'),
+]
@@ -0,0 +1,19 @@
+from django.urls import path
+from user_app.views import (
+    ImportJobCreateAPI,
+    ImportJobStatusAPI,
+    ImportJobErrorReportAPI
+)
+
+app_name = 'import'
+
+urlpatterns = [
+    # Submit a file as a background import job
+    path('jobs/', ImportJobCreateAPI.as_view(), name='import-job-create'),
+
+    # Status and progress of an import job
+    path('jobs/<str:job_id>/', ImportJobStatusAPI.as_view(), name='import-job-status'),
+
+    # Download the CSV report of row-level errors
+    path('jobs/<str:job_id>/errors/', ImportJobErrorReportAPI.as_view(), name='import-job-errors'),
+]
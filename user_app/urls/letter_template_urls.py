@@ -9,7 +9,9 @@ from user_app.views import (
     LetterTemplateVariablesAPI,
     LetterTemplateAvailableVariablesAPI,
     LetterTemplateOrderFilterAPI,
-    LetterTemplateExportCSVAPI
+    LetterTemplateExportCSVAPI,
+    LetterTemplateBulkFillAPI,
+    LetterTemplateBulkProgressAPI
 )
 
 app_name = 'letter'
@@ -33,6 +35,12 @@ urlpatterns = [
     # Fill template variables and export
     path('fill/', LetterTemplateFillAPI.as_view(), name='letter-template-fill'),
     
+    # Fill a template for many employees/orders and stream a ZIP archive
+    path('bulk-fill/', LetterTemplateBulkFillAPI.as_view(), name='letter-template-bulk-fill'),
+    
+    # Progress of a bulk fill run
+    path('bulk-fill/progress/<str:run_id>/', LetterTemplateBulkProgressAPI.as_view(), name='letter-template-bulk-progress'),
+    
     # Get available template variables for an employee (for drag-and-drop in template editor)
     path('template-variable-values/', LetterTemplateVariablesAPI.as_view(), name='letter-template-variables'),
     
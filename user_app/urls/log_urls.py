@@ -1,10 +1,11 @@
 from django.urls import path
 
-from user_app.views.change_log_views import ChangeLogAPIView
+from user_app.views.change_log_views import ChangeLogAPIView, ChangeLogFeedAPIView
 
 app_name = "logs"
 
 urlpatterns = [
     path("cdc/<int:user_id>/", ChangeLogAPIView.as_view(), name="cdc_logs"),
+    path("cdc/<int:user_id>/feed/", ChangeLogFeedAPIView.as_view(), name="cdc_feed"),
 ]
 
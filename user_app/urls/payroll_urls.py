@@ -0,0 +1,9 @@
+from django.urls import path
+from user_app.views import PayrollBulkIngestAPI
+
+app_name = 'payroll'
+
+urlpatterns = [
+    # Load a payroll batch (JSON, CSV or NDJSON) without running a calculation
+    path('bulk/', PayrollBulkIngestAPI.as_view(), name='payroll-bulk-ingest'),
+]
@@ -0,0 +1,15 @@
+from django.urls import path
+from user_app.views import (
+    RequestProfileListAPI,
+    RequestProfileDownloadAPI
+)
+
+app_name = 'profiles'
+
+urlpatterns = [
+    # Recently stored request profiles
+    path('', RequestProfileListAPI.as_view(), name='profile-list'),
+
+    # Download one profile (JSON or folded stacks)
+    path('<str:profile_id>/download/', RequestProfileDownloadAPI.as_view(), name='profile-download'),
+]
@@ -258,6 +258,91 @@ class DataProcessingUtils:
         except Exception:
             return None
 
+    # ------------------------------------------------------------------
+    # Column-wise counterparts of the parse_* helpers above. They take a
+    # whole pandas Series (one import column) and return an object Series
+    # holding native Python values, with None for empty/invalid cells.
+    # ------------------------------------------------------------------
+
+    NULL_STRINGS = ['', 'nan', 'null', 'none']
+    TRUE_STRINGS = ['true', '1', 'yes', 'y', 'on', 'enabled']
+    FALSE_STRINGS = ['false', '0', 'no', 'n', 'off', 'disabled']
+
+    @staticmethod
+    def _series_to_text(series: pd.Series) -> pd.Series:
+        """
+        Convert a Series to stripped strings, rendering integral floats without
+        the trailing '.0' pandas adds when a numeric column has blanks.
+        """
+        if pd.api.types.is_float_dtype(series):
+            integral = series.notna() & (series % 1 == 0)
+            text = series.astype(object).where(series.notna(), None)
+            text[integral] = series[integral].astype('int64').astype(str)
+            text[series.notna() & ~integral] = series[series.notna() & ~integral].astype(str)
+        else:
+            text = series.map(
+                lambda v: str(int(v)) if isinstance(v, float) and v.is_integer() else str(v),
+                na_action='ignore'
+            )
+        if not text.notna().any():
+            return pd.Series([None] * len(series), index=series.index, dtype=object)
+        return text.astype(object).str.strip()
+
+    @staticmethod
+    def parse_string_series(series: pd.Series) -> pd.Series:
+        """
+        Vectorized parse_string_field: trimmed strings, None for blank or null-like cells.
+        """
+        text = DataProcessingUtils._series_to_text(series)
+        empty = text.isna() | text.str.lower().isin(DataProcessingUtils.NULL_STRINGS)
+        return text.astype(object).where(~empty, None)
+
+    @staticmethod
+    def parse_integer_series(series: pd.Series) -> pd.Series:
+        """
+        Vectorized parse_integer_field. Numeric cells are truncated to int; text
+        cells fall back to keeping digits and the minus sign.
+        """
+        numeric = pd.to_numeric(series, errors='coerce')
+        leftover = numeric.isna() & series.notna()
+        if leftover.any():
+            digits = series[leftover].astype(str).str.strip().str.replace(r'[^\d-]', '', regex=True)
+            numeric[leftover] = pd.to_numeric(digits.where(~digits.isin(['', '-'])), errors='coerce')
+        values = [int(value) if value == value else None for value in numeric.to_numpy()]
+        return pd.Series(values, index=series.index, dtype=object)
+
+    @staticmethod
+    def parse_boolean_series(series: pd.Series) -> pd.Series:
+        """
+        Vectorized parse_boolean_field.
+        """
+        result = pd.Series([None] * len(series), index=series.index, dtype=object)
+        text = series.astype(str).str.strip().str.lower()
+        present = series.notna()
+        result[present & text.isin(DataProcessingUtils.TRUE_STRINGS)] = True
+        result[present & text.isin(DataProcessingUtils.FALSE_STRINGS)] = False
+
+        # Plain numbers (not text) other than 0/1 are truthy/falsy by value
+        numeric_cells = present & result.isna() & series.map(
+            lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)
+        )
+        if numeric_cells.any():
+            result[numeric_cells] = series[numeric_cells].map(bool)
+        return result.where(result.notna(), None)
+
+    @staticmethod
+    def parse_date_series(series: pd.Series) -> pd.Series:
+        """
+        Vectorized parse_date_field. Each distinct value is parsed once and the
+        result mapped back onto the column.
+        """
+        present = series.dropna()
+        if present.empty:
+            return pd.Series([None] * len(series), index=series.index, dtype=object)
+        parsed = {value: DataProcessingUtils.parse_date_field(value) for value in present.unique()}
+        result = series.map(parsed, na_action='ignore').astype(object)
+        return result.where(result.notna(), None)
+
     @staticmethod
     def normalize_field_name(field_name: str) -> str:
         """
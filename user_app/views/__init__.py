@@ -10,5 +10,10 @@ from .client_views import *
 from .peo_views import *
 from .letter_template_views import *
 from .change_log_views import *
+from .export_job_views import *
+from .import_job_views import *
+from .request_profile_views import *
+from .audit_event_views import *
+from .payroll_views import *
  
 # try:
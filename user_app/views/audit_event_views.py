@@ -0,0 +1,96 @@
+import logging
+
+from django.conf import settings
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from processor.garnishment_library.utils.response import ResponseHelper
+from user_app.serializers.audit_event_serializers import AuditEventQuerySerializer, AuditEventSerializer
+from user_app.services.audit_events import AuditEventStore
+
+logger = logging.getLogger(__name__)
+
+
+class AuditEventPagination(CursorPagination):
+    """
+    Keyset pagination on the event time: each page is an index range scan,
+    however deep the client pages.
+    """
+    ordering = ('-occurred_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        self.page_size = getattr(settings, 'AUDIT_EVENT_PAGE_SIZE', 100)
+        return super().get_page_size(request)
+
+
+class AuditEventListAPI(APIView):
+    """
+    Search the stored model audit events, newest first (admins only).
+    """
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('model', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Model name'),
+            openapi.Parameter('object_id', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Primary key of the audited row (requires model)'),
+            openapi.Parameter('user', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='User id or username'),
+            openapi.Parameter('action', openapi.IN_QUERY, type=openapi.TYPE_STRING, description='Audit action'),
+            openapi.Parameter('batch_id', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Calculation or import batch id'),
+            openapi.Parameter('start_at', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date-time',
+                              description='Earliest event time'),
+            openapi.Parameter('end_at', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date-time',
+                              description='Latest event time'),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='Events per page (max 1000)'),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Page cursor from the previous response'),
+        ],
+        responses={
+            200: 'Audit events with next/previous page links',
+            400: 'Invalid filters',
+            403: 'Admin access required',
+        }
+    )
+    def get(self, request):
+        serializer = AuditEventQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return ResponseHelper.error_response(
+                'Invalid audit event filters',
+                serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        filters = serializer.validated_data
+
+        try:
+            queryset = AuditEventStore.search(
+                model_name=filters.get('model'),
+                object_id=filters.get('object_id'),
+                user=filters.get('user'),
+                action=filters.get('action'),
+                batch_id=filters.get('batch_id'),
+                start_at=filters.get('start_at'),
+                end_at=filters.get('end_at'),
+            )
+            paginator = AuditEventPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            data = {
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'results': AuditEventSerializer(page, many=True).data,
+            }
+        except Exception as e:
+            logger.exception("Failed to fetch audit events")
+            return ResponseHelper.error_response(
+                'Failed to fetch audit events',
+                str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return ResponseHelper.success_response('Audit events fetched successfully', data)
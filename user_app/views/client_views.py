@@ -15,6 +15,10 @@ import csv
 from user_app.models import Client
 from user_app.serializers import ClientSerializer
 from processor.garnishment_library import ResponseHelper
+from user_app.services.export_engine import TabularExport, EXPORT_FORMAT_PARAM
+from user_app.services.import_reader import ImportFileReader
+from user_app.services.import_jobs import ImportProgress
+from garnishedge_project.audit_batch import aggregated_audit
 
 
 class ClientDetailsAPI(APIView):
@@ -201,86 +205,103 @@ class ClientImportView(APIView):
         }
     )
     def post(self, request):
-        try:
-            if 'file' not in request.FILES:
-                return ResponseHelper.error_response(
-                    message="No file provided",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
+        if 'file' not in request.FILES:
+            return ResponseHelper.error_response(
+                message="No file provided",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            file = request.FILES['file']
-            file_name = file.name
+        file = request.FILES['file']
+        if not ImportFileReader.is_supported(file.name):
+            return ResponseHelper.error_response(
+                message="Unsupported file format. Please upload a CSV or Excel file.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            # Read file based on extension
-            if file_name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file_name.endswith(('.xlsx', '.xls', '.xlsm', '.xlsb', '.odf', '.ods', '.odt')):
-                df = pd.read_excel(file)
-            else:
-                return ResponseHelper.error_response(
-                    message="Unsupported file format. Please upload a CSV or Excel file.",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
+        return self.run_import(file, file.name)
+
+    @aggregated_audit(source='client_import')
+    def run_import(self, file, file_name, options=None, progress=None):
+        """
+        Import clients from an uploaded file and return the API response.
+        Background import jobs call this directly with an ImportProgress.
+        """
+        progress = progress or ImportProgress()
+        try:
             
             added_clients = []
             updated_clients = []
             
-            for _, row in df.iterrows():
-                try:
-                    client_data = {
-                        "client_id": row.get("client_id"),
-                        "peo": row.get("peo"),
-                        "state": row.get("state"),
-                        "legal_name": row.get("legal_name"),
-                        "dba": row.get("dba"),
-                        "service_type": row.get("service_type"),
-                        "is_active": row.get("is_active", True),
-                    }
+            # Read the file in fixed-size chunks to keep memory bounded
+            for df in ImportFileReader(file, file_name=file_name).chunks():
+                chunk_added_start = len(added_clients)
+                chunk_updated_start = len(updated_clients)
+
+                for _, row in df.iterrows():
+                    try:
+                        client_data = {
+                            "client_id": row.get("client_id"),
+                            "peo": row.get("peo"),
+                            "state": row.get("state"),
+                            "legal_name": row.get("legal_name"),
+                            "dba": row.get("dba"),
+                            "service_type": row.get("service_type"),
+                            "is_active": row.get("is_active", True),
+                        }
                     
-                    # Check if client_id exists
-                    client_id = client_data.get("client_id")
-                    if not client_id:
-                        # Skip rows without client_id
-                        continue
+                        # Check if client_id exists
+                        client_id = client_data.get("client_id")
+                        if not client_id:
+                            # Skip rows without client_id
+                            continue
                     
-                    # Try to find existing client by client_id
-                    existing_client = Client.objects.filter(client_id=client_id).first()
+                        # Try to find existing client by client_id
+                        existing_client = Client.objects.filter(client_id=client_id).first()
                     
-                    if existing_client:
-                        # Update existing client
-                        serializer = ClientSerializer(
-                            existing_client, 
-                            data=client_data, 
-                            partial=True
-                        )
-                        if serializer.is_valid():
-                            serializer.save()
-                            updated_clients.append(client_id)
-                        else:
-                            return ResponseHelper.error_response(
-                                message=f"Validation error for client_id {client_id}",
-                                error=serializer.errors,
-                                status_code=status.HTTP_400_BAD_REQUEST
+                        if existing_client:
+                            # Update existing client
+                            serializer = ClientSerializer(
+                                existing_client, 
+                                data=client_data, 
+                                partial=True
                             )
-                    else:
-                        # Create new client
-                        serializer = ClientSerializer(data=client_data)
-                        if serializer.is_valid():
-                            serializer.save()
-                            added_clients.append(client_id)
+                            if serializer.is_valid():
+                                serializer.save()
+                                updated_clients.append(client_id)
+                            else:
+                                return ResponseHelper.error_response(
+                                    message=f"Validation error for client_id {client_id}",
+                                    error=serializer.errors,
+                                    status_code=status.HTTP_400_BAD_REQUEST
+                                )
                         else:
-                            return ResponseHelper.error_response(
-                                message=f"Validation error for client_id {client_id}",
-                                error=serializer.errors,
-                                status_code=status.HTTP_400_BAD_REQUEST
-                            )
+                            # Create new client
+                            serializer = ClientSerializer(data=client_data)
+                            if serializer.is_valid():
+                                serializer.save()
+                                added_clients.append(client_id)
+                            else:
+                                return ResponseHelper.error_response(
+                                    message=f"Validation error for client_id {client_id}",
+                                    error=serializer.errors,
+                                    status_code=status.HTTP_400_BAD_REQUEST
+                                )
                             
-                except Exception as row_e:
-                    return ResponseHelper.error_response(
-                        message="Error processing row",
-                        error=str(row_e),
-                        status_code=status.HTTP_400_BAD_REQUEST
-                    )
+                    except Exception as row_e:
+                        return ResponseHelper.error_response(
+                            message="Error processing row",
+                            error=str(row_e),
+                            status_code=status.HTTP_400_BAD_REQUEST
+                        )
+
+                chunk_added = len(added_clients) - chunk_added_start
+                chunk_updated = len(updated_clients) - chunk_updated_start
+                progress.chunk(
+                    len(df),
+                    rows_validated=chunk_added + chunk_updated,
+                    rows_inserted=chunk_added,
+                    rows_updated=chunk_updated,
+                )
 
             # Build response data
             response_data = {}
@@ -316,13 +337,20 @@ class ClientImportView(APIView):
 
 class ExportClientDataView(APIView):
     """
-    API view to export client data as an Excel file.
+    API view to export client data as an Excel (or CSV) file.
     Provides robust exception handling and clear response messages.
     """
-    
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                EXPORT_FORMAT_PARAM, openapi.IN_QUERY,
+                description="File format: xlsx (default) or csv",
+                type=openapi.TYPE_STRING, enum=['xlsx', 'csv']
+            )
+        ],
         responses={
             200: 'Excel file exported successfully',
+            400: 'Unsupported export format',
             404: 'No clients found',
             500: 'Internal server error'
         }
@@ -330,50 +358,40 @@ class ExportClientDataView(APIView):
     def get(self, request):
         """
         Handles GET request to export all clients to an Excel file.
+        Rows are streamed through the shared export engine (write-only workbook / CSV).
         """
         try:
-            # Fetch all clients from the database
-            clients = Client.objects.all()
-            if not clients.exists():
+            queryset = Client.objects.order_by('id')
+            if not queryset.exists():
                 return ResponseHelper.error_response(
                     message="No clients found",
                     status_code=status.HTTP_404_NOT_FOUND
                 )
 
-            serializer = ClientSerializer(clients, many=True)
-
-            # Create Excel workbook and worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Clients"
-
-            # Define header fields
-            header_fields = [
-                "id", "client_id", "peo", "state", "legal_name", 
-                "dba", "service_type", "is_active", "created_at", "updated_at"
-            ]
-
-            ws.append(header_fields)
-
-            # Write data rows to the worksheet
-            for client in serializer.data:
-                row = [client.get(field, '') for field in header_fields]
-                ws.append(row)
-
-            # Save workbook to in-memory buffer
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            # Prepare HTTP response with Excel content
-            filename = f'clients_{datetime.today().strftime("%m-%d-%y")}.xlsx'
-            response = HttpResponse(
-                buffer,
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            export = TabularExport(
+                queryset,
+                columns=[
+                    ('id', 'id'),
+                    ('client_id', 'client_id'),
+                    ('peo', 'peo__peo_id'),
+                    ('state', 'state__state_code'),
+                    ('legal_name', 'legal_name'),
+                    ('dba', 'dba'),
+                    ('service_type', 'service_type'),
+                    ('is_active', 'is_active'),
+                    ('created_at', 'created_at'),
+                    ('updated_at', 'updated_at'),
+                ],
+                sheet_title="Clients",
+                filename_prefix="clients",
             )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
+            return export.as_response(request)
 
+        except ValueError as e:
+            return ResponseHelper.error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return ResponseHelper.error_response(
                 message="Failed to export client data",
@@ -1,5 +1,6 @@
 from rest_framework import status
 from django.http import JsonResponse, HttpResponse
+from django.utils import timezone
 from openpyxl import Workbook
 from processor.garnishment_library.utils.response import ResponseHelper
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -34,6 +35,15 @@ from user_app.constants import (
 from django.db.models import Prefetch, F
 from user_app.utils import DataProcessingUtils
 from django.core.paginator import Paginator, EmptyPage
+from user_app.services.export_engine import EXPORT_FORMAT_PARAM
+from user_app.services.export_definitions import employee_export
+from user_app.services.employee_import_normalizer import EmployeeImportNormalizer, find_ee_id_column
+from user_app.services.import_reader import ImportFileReader
+from user_app.services.bulk_upsert import CopyUpsertLoader
+from user_app.services.import_lookups import lookup_ids, lookup_objects
+from user_app.services.import_jobs import ImportProgress
+from garnishedge_project.audit_batch import aggregated_audit
+from garnishedge_project.model_audit import log_model_bulk_operation
 
 
 class EmployeeImportView(APIView):
@@ -67,179 +77,108 @@ class EmployeeImportView(APIView):
         }
     )
     def post(self, request):
+        if 'file' not in request.FILES:
+            return ResponseHelper.error_response(
+                message="No file provided",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        file = request.FILES['file']
+        if not ImportFileReader.is_supported(file.name):
+            return ResponseHelper.error_response(
+                message="Unsupported file format. Please upload a CSV or Excel file.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        options = {
+            'include_all_ids': request.data.get('include_all_ids', request.query_params.get('include_all_ids', '')),
+        }
+        return self.run_import(file, file.name, options=options)
+
+    @aggregated_audit(source='employee_import')
+    def run_import(self, file, file_name, options=None, progress=None):
+        """
+        Import employees from an uploaded file and return the API response.
+        Background import jobs call this directly with an ImportProgress.
+        """
+        options = options or {}
+        progress = progress or ImportProgress()
         try:
-            if 'file' not in request.FILES:
-                return ResponseHelper.error_response(
-                    message="No file provided",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
+            # Foreign key mappings are small; fetch them once for the whole file
+            from user_app.models import Client
+            from processor.models import State, FedFilingStatus
 
-            file = request.FILES['file']
-            file_name = file.name
+            client_mapping = dict(Client.objects.values_list('client_id', 'id'))
+            state_mapping = {str(name).strip().lower(): pk for name, pk in State.objects.values_list('state', 'id')}
+            filing_status_mapping = {
+                str(name).strip().lower(): pk for name, pk in FedFilingStatus.objects.values_list('name', 'fs_id')
+            }
+            normalizer = EmployeeImportNormalizer(
+                client_mapping,
+                state_mapping,
+                filing_status_mapping,
+                default_filing_status=DataProcessingUtils.get_default_filing_status(),
+                default_marital_status=DataProcessingUtils.get_default_marital_status(),
+            )
+
+            added_employees = []
+            updated_employees = []
+            validation_errors = []
+            ee_id_column = None
 
-            pd.set_option('display.max_columns', None)
+            # Read, validate and write the file one chunk at a time
+            reader = ImportFileReader(file, file_name=file_name)
+            for df in reader.chunks():
+                # Normalize all column names to expected keys (e.g., 'Employee ID' -> 'ee_id')
+                try:
+                    df.rename(columns=lambda c: DataProcessingUtils.normalize_field_name(c), inplace=True)
+                except Exception:
+                    pass
+
+                # Determine ee_id column after normalization
+                if ee_id_column is None:
+                    ee_id_column = find_ee_id_column(df.columns)
+                    if not ee_id_column:
+                        return ResponseHelper.error_response(
+                            message="No valid identifier column found",
+                            error="Expected one of: ee_id, employee_id, employee id, ee id, eeid, id",
+                            status_code=status.HTTP_400_BAD_REQUEST
+                        )
 
-            # Read file based on extension
-            if file_name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file_name.endswith(('.xlsx', '.xls', '.xlsm', '.xlsb', '.odf', '.ods', '.odt')):
-                df = pd.read_excel(file)
-            else:
-                return ResponseHelper.error_response(
-                    message="Unsupported file format. Please upload a CSV or Excel file.",
-                    status_code=status.HTTP_400_BAD_REQUEST
+                # Only look up the employees referenced by this chunk
+                chunk_ee_ids = DataProcessingUtils.parse_string_series(df[ee_id_column]).dropna().unique().tolist()
+                existing_employee_ids = set(lookup_ids(EmployeeDetail, 'ee_id', chunk_ee_ids))
+
+                # Clean, map and validate the chunk column-wise
+                batch = normalizer.normalize(df, ee_id_column, existing_employee_ids)
+                chunk_errors = batch.error_messages()
+                validation_errors.extend(chunk_errors)
+
+                created_ee_ids, conflicting_ee_ids = self._bulk_create_employees(batch.create_records, batch.addresses)
+                # Employees created elsewhere since the lookup are updated like any existing employee
+                update_records = batch.update_records + batch.update_records_for(conflicting_ee_ids)
+                chunk_updated_ee_ids = self._bulk_update_employees(update_records, batch.addresses)
+                added_employees.extend(created_ee_ids)
+                updated_employees.extend(chunk_updated_ee_ids)
+
+                progress.chunk(
+                    len(df),
+                    rows_validated=len(batch.create_records) + len(batch.update_records),
+                    rows_inserted=len(created_ee_ids),
+                    rows_updated=len(chunk_updated_ee_ids),
+                    errors=chunk_errors,
                 )
-            # Explicit early check: if DataFrame is empty, return a clearer error
-            if df.empty:
+
+            # Explicit early check: if the file had no rows, return a clearer error
+            if reader.row_count == 0:
                 return ResponseHelper.error_response(
                     message="No data rows found in the uploaded file",
                     error={
                         "rows": 0,
-                        "columns": list(df.columns),
+                        "columns": reader.columns,
                     },
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
-
-            # Normalize all column names to expected keys (e.g., 'Employee ID' -> 'ee_id')
-            try:
-                df.rename(columns=lambda c: DataProcessingUtils.normalize_field_name(c), inplace=True)
-            except Exception:
-                pass
-            
-            # Convert name fields to strings to preserve values like "child2"
-            # This ensures that even if Excel/pandas reads them as numbers, they're converted back to strings
-            name_fields = ['first_name', 'middle_name', 'last_name']
-            for field in name_fields:
-                if field in df.columns:
-                    # Convert to string, preserving the original value representation
-                    df[field] = df[field].apply(
-                        lambda x: str(x).strip() if pd.notna(x) and str(x).strip().lower() not in ['nan', 'none', ''] else None
-                    )
-            
-            # Determine ee_id column after normalization
-            ee_id_candidates = ['ee_id', 'employee_id', 'employee id', 'ee id', 'eeid', 'id']
-            ee_id_column = next((c for c in ee_id_candidates if c in df.columns), None)
-            if not ee_id_column:
-                return ResponseHelper.error_response(
-                    message="No valid identifier column found",
-                    error="Expected one of: ee_id, employee_id, employee id, ee id, eeid, id",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Process data in batches for better performance
-            batch_size = 200  # Increased batch size for better performance
-            added_employees = []
-            updated_employees = []
-            validation_errors = []
-            
-            # Pre-fetch existing employees to avoid repeated queries
-            existing_employee_ids = set(EmployeeDetail.objects.values_list('ee_id', flat=True))
-            # Get default values once
-            default_filing_status = DataProcessingUtils.get_default_filing_status()
-            default_marital_status = DataProcessingUtils.get_default_marital_status()
-            
-            # Pre-fetch all foreign key mappings to avoid repeated queries
-            from user_app.models import Client
-            from processor.models import State, FedFilingStatus
-            
-            client_mapping = {c.client_id: c.id for c in Client.objects.all()}
-            state_mapping = {str(s.state).strip().lower(): s.id for s in State.objects.all()}
-            filing_status_mapping = {str(f.name).strip().lower(): f.fs_id for f in FedFilingStatus.objects.all()}
-            # Process data in batches
-            for batch_start in range(0, len(df), batch_size):
-                batch_end = min(batch_start + batch_size, len(df))
-                batch_df = df.iloc[batch_start:batch_end]
-                
-                batch_employees_to_create = []
-                batch_employees_to_update = []
-                
-                for row_idx, row in batch_df.iterrows():
-                    try:
-                        # Process row data efficiently
-                        employee_data = self._process_employee_row(row, default_filing_status, default_marital_status)
-                        if not employee_data:
-                            validation_errors.append(f"Row {batch_start + row_idx + 1}: empty row after cleaning")
-                            continue
-                        # Extract ee_id from the detected identifier column first
-                        ee_id = row.get(ee_id_column)
-
-                        if ee_id is None:
-                            # Fallback to processed dict
-                            ee_id = employee_data.get(EE.EMPLOYEE_ID)
-                        # Final normalize as string to preserve prefixes/leading zeros
-                        if ee_id is not None:
-                            ee_id = str(ee_id).strip()
-                        if not ee_id:
-                            validation_errors.append(f"Row {batch_start + row_idx + 1}: missing ee_id")
-                            continue
-                        
-                        # Check if employee exists
-                        if ee_id in existing_employee_ids:
-                            # Prepare for update
-                            # normalize states/filing for mapping
-                            if EE.HOME_STATE in employee_data and employee_data.get(EE.HOME_STATE) is not None:
-                                employee_data[EE.HOME_STATE] = str(employee_data.get(EE.HOME_STATE)).strip().lower()
-                            if EE.WORK_STATE in employee_data and employee_data.get(EE.WORK_STATE) is not None:
-                                employee_data[EE.WORK_STATE] = str(employee_data.get(EE.WORK_STATE)).strip().lower()
-                            if EE.FILING_STATUS in employee_data and employee_data.get(EE.FILING_STATUS) is not None:
-                                employee_data[EE.FILING_STATUS] = str(employee_data.get(EE.FILING_STATUS)).strip().lower()
-                            batch_employees_to_update.append((ee_id, employee_data))
-                        else:
-                            # Prepare for creation - validate required FKs before queueing
-                            client_id_val = employee_data.get(EE.CLIENT_ID)
-
-
-                            home_state_val = employee_data.get(EE.HOME_STATE)
-                            work_state_val = employee_data.get(EE.WORK_STATE)
-
-                            # normalize to lowercase for mapping
-                            home_state_val = str(home_state_val).strip().lower() if home_state_val is not None else None
-                            work_state_val = str(work_state_val).strip().lower() if work_state_val is not None else None
-                            employee_data[EE.HOME_STATE] = home_state_val
-                            employee_data[EE.WORK_STATE] = work_state_val
-
-                            missing_fields = []
-
-                            if not client_id_val:
-                                missing_fields.append('client_id')
-                            if not home_state_val:
-                                missing_fields.append('home_state')
-                            if not work_state_val:
-                                missing_fields.append('work_state')
-                            if missing_fields:
-                                validation_errors.append(
-                                    f"Row {batch_start + row_idx + 1} (ee_id={ee_id}): missing required field(s): {', '.join(missing_fields)}"
-                                )
-                                continue
-
-                            mapping_missing = []
-                            if client_id_val not in client_mapping:
-                                mapping_missing.append(f"client_id '{client_id_val}' not found")
-                            if home_state_val not in state_mapping:
-                                mapping_missing.append(f"home_state '{home_state_val}' not found")
-                            if work_state_val not in state_mapping:
-                                mapping_missing.append(f"work_state '{work_state_val}' not found")
-                            if mapping_missing:
-                                validation_errors.append(
-                                    f"Row {batch_start + row_idx + 1} (ee_id={ee_id}): {', '.join(mapping_missing)}"
-                                )
-                                continue
-                            batch_employees_to_create.append((ee_id, employee_data))
-                    except Exception as row_e:
-                        validation_errors.append(f"Row {batch_start + row_idx + 1}: {str(row_e)}")
-                        continue
-                
-                # Bulk create new employees and get successfully created ee_ids
-                if batch_employees_to_create:
-                    created_ee_ids = self._bulk_create_employees(batch_employees_to_create, client_mapping, state_mapping, filing_status_mapping)
-                    added_employees.extend(created_ee_ids)
-                    # Update existing_employee_ids set to include newly created employees
-                    existing_employee_ids.update(created_ee_ids)
-                
-                # Bulk update existing employees and get successfully updated ee_ids
-                if batch_employees_to_update:
-                    updated_ee_ids = self._bulk_update_employees(batch_employees_to_update, client_mapping, state_mapping, filing_status_mapping)
-                    updated_employees.extend(updated_ee_ids)
             
             # Build response data
             response_data = {
@@ -248,11 +187,7 @@ class EmployeeImportView(APIView):
                 "validation_errors_count": len(validation_errors)
             }
             
-            include_all_ids = False
-            try:
-                include_all_ids = str(request.data.get('include_all_ids', request.query_params.get('include_all_ids', ''))).strip().lower() in ['1', 'true', 'yes']
-            except Exception:
-                include_all_ids = False
+            include_all_ids = str(options.get('include_all_ids', '')).strip().lower() in ['1', 'true', 'yes']
             
             if added_employees:
                 if include_all_ids:
@@ -296,292 +231,167 @@ class EmployeeImportView(APIView):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def _process_employee_row(self, row, default_filing_status, default_marital_status):
-        """Process a single employee row efficiently."""
-        try:
-            # Define date fields that need parsing
-
-            date_fields = ["garnishment_fees_suspended_till"]
-
-            # Address state can come from different column names depending on the file:
-            # - Exported files use "address_state"
-            # - Some older/manual files may use "state" → normalized to "issuing_state"
-            address_state_val = row.get("address_state")
-            if address_state_val is None:
-                address_state_val = row.get("issuing_state")
-
-            employee_data = {
-                EE.CLIENT_ID: row.get(EE.CLIENT_ID),
-                EE.FIRST_NAME: row.get(EE.FIRST_NAME),
-                EE.EMPLOYEE_ID: row.get(EE.EMPLOYEE_ID),
-                EE.MIDDLE_NAME: row.get(EE.MIDDLE_NAME),
-                EE.LAST_NAME: row.get(EE.LAST_NAME),
-                EE.SSN: row.get(EE.SSN),
-                EE.HOME_STATE: row.get(EE.HOME_STATE),
-                EE.WORK_STATE: row.get(EE.WORK_STATE),
-                EE.GENDER: row.get(EE.GENDER),
-                "number_of_exemptions": row.get("number_of_exemptions"),
-                EE.FILING_STATUS: row.get(EE.FILING_STATUS),
-                EE.MARITAL_STATUS: row.get(EE.MARITAL_STATUS),
-                "number_of_student_default_loan": row.get("number_of_student_default_loan"),
-                "number_of_dependent_child": row.get("number_of_dependent_child"),
-                EE.SUPPORT_SECOND_FAMILY: row.get(EE.SUPPORT_SECOND_FAMILY),
-                EE.GARNISHMENT_FEES_STATUS: row.get(EE.GARNISHMENT_FEES_STATUS),
-                EE.NUMBER_OF_ACTIVE_GARNISHMENT: row.get(EE.NUMBER_OF_ACTIVE_GARNISHMENT),
-                # Address fields (normalized by DataProcessingUtils.normalize_field_name)
-                "address_1": row.get("address_1"),
-                "address_2": row.get("address_2"),
-                "zip_code": row.get("zip_code"),
-                "geo_code": row.get("geo_code"),
-                "city": row.get("city"),
-                "address_state": address_state_val,
-                "county": row.get("county"),
-                "country": row.get("country"),
-            }
-            
-            # Parse date fields using the utility function
-            for date_field in date_fields:
-                employee_data[date_field] = DataProcessingUtils.parse_date_field(row.get(date_field))
-            
-            # Clean and normalize row data using utility functions
-            employee_data = DataProcessingUtils.clean_data_row(employee_data)
-
-            # Extract address-related fields into a nested dict for easier handling later
-            address_keys = [
-                "address_1",
-                "address_2",
-                "zip_code",
-                "geo_code",
-                "city",
-                "address_state",
-                "county",
-                "country",
-            ]
-            address_data = {}
-            for key in address_keys:
-                if key in employee_data and employee_data.get(key) is not None:
-                    address_data[key] = employee_data.pop(key)
-
-            if address_data:
-                # Map address_state -> state to align with model/serializer field name
-                if "address_state" in address_data and "state" not in address_data:
-                    address_data["state"] = address_data.pop("address_state")
-                employee_data["address"] = address_data
-            
-            # Apply basic data cleaning without strict validation
-            # employee_data = DataProcessingUtils.validate_and_clean_employee_data(employee_data)
-            
-            # Provide default values for required fields if missing
-            if not employee_data.get(EE.FILING_STATUS):
-                employee_data[EE.FILING_STATUS] = default_filing_status
-                
-            if not employee_data.get(EE.MARITAL_STATUS):
-                employee_data[EE.MARITAL_STATUS] = default_marital_status
-            return employee_data
-            
-        except Exception as e:
-            raise Exception(f"Error processing row: {str(e)}")
-    
-    def _bulk_create_employees(self, employees_data, client_mapping, state_mapping, filing_status_mapping):
-        """Bulk create employees using bulk_create for better performance. Returns list of successfully created ee_ids."""
-        if not employees_data:
-            return []
-            
-        created_ee_ids = []
-        # Track address payloads keyed by ee_id so we can create address records after employees
-        addresses_by_ee_id = {}
+    def _bulk_create_employees(self, employee_records, addresses):
+        """
+        Bulk create employees (and their addresses) from normalized records.
+        Returns (created ee_ids, ee_ids that already existed).
+        On PostgreSQL the rows go through CopyUpsertLoader, so employees created
+        concurrently are returned for the update path rather than silently
+        skipped; their stored values are left as they are.
+        """
+        if not employee_records:
+            return [], []
+
         try:
             from django.db import transaction
-            from user_app.models import Client
-            
+
             with transaction.atomic():
-                # Prepare bulk insert data
-                bulk_employees = []
-                for ee_id, emp_data in employees_data:
-                    try:
-                        # Resolve foreign keys
-                        client_id = emp_data.get(EE.CLIENT_ID)
-                        home_state = str(emp_data.get(EE.HOME_STATE)).strip().lower() if emp_data.get(EE.HOME_STATE) is not None else None
-                        work_state = str(emp_data.get(EE.WORK_STATE)).strip().lower() if emp_data.get(EE.WORK_STATE) is not None else None
-                        filing_status = str(emp_data.get(EE.FILING_STATUS)).strip().lower() if emp_data.get(EE.FILING_STATUS) is not None else None
-                        
-                        # Create missing client if needed
-                        if client_id and client_id not in client_mapping:
-                            try:
-                                client = Client.objects.create(
-                                    client_id=client_id,
-                                    legal_name=f'Client {client_id}',
-                                    is_active=True
-                                )
-                                client_mapping[client_id] = client.id
-                            except:
-                                continue  # Skip this employee if client creation fails
-                        
-                        # Validate required fields before creating
-                        if not client_mapping.get(client_id) or not state_mapping.get(home_state) or not state_mapping.get(work_state):
-                            continue  # Skip if required foreign keys are missing
-                        
-                        bulk_employees.append(EmployeeDetail(
-                            ee_id=ee_id,  # Use the ee_id from the tuple
-                            first_name=emp_data.get(EE.FIRST_NAME, ''),
-                            middle_name=emp_data.get(EE.MIDDLE_NAME),
-                            last_name=emp_data.get(EE.LAST_NAME),
-                            client_id=client_mapping.get(client_id),
-                            ssn=emp_data.get(EE.SSN, ''),
-                            home_state_id=state_mapping.get(home_state),
-                            work_state_id=state_mapping.get(work_state),
-                            gender=emp_data.get(EE.GENDER),
-                            number_of_exemptions=emp_data.get("number_of_exemptions", 0),
-                            filing_status_id=filing_status_mapping.get(filing_status),
-                            marital_status=emp_data.get(EE.MARITAL_STATUS, ''),
-                            number_of_student_default_loan=emp_data.get("number_of_student_default_loan", 0),
-                            number_of_dependent_child=emp_data.get("number_of_dependent_child", 0),
-                            support_second_family=emp_data.get(EE.SUPPORT_SECOND_FAMILY, False),
-                            garnishment_fees_status=emp_data.get(EE.GARNISHMENT_FEES_STATUS, False),
-                            garnishment_fees_suspended_till=emp_data.get("garnishment_fees_suspended_till"),
-                            number_of_active_garnishment=emp_data.get(EE.NUMBER_OF_ACTIVE_GARNISHMENT, 0),
-                            status="active"
-                        ))
-                        created_ee_ids.append(ee_id)  # Track ee_id for successful creation
-
-                        # Capture address data (if any) so we can create EmplopyeeAddress later
-                        address_data = emp_data.get("address")
-                        if address_data:
-                            # Ensure we don't accidentally mutate the original dict
-                            addresses_by_ee_id[ee_id] = dict(address_data)
-                    except Exception as e:
-
-                        continue  # Skip problematic records
-                
-                # Bulk create
-                if bulk_employees:
+                bulk_employees = [
+                    EmployeeDetail(status="active", **record) for record in employee_records
+                ]
+                conflicting_ee_ids = []
+                if CopyUpsertLoader.is_available():
+                    # No update fields: a conflict only touches updated_at, which
+                    # is enough for the row to come back in result.updated
+                    result = CopyUpsertLoader(EmployeeDetail, EE.EMPLOYEE_ID, update_fields=[]).upsert(bulk_employees)
+                    created_ee_ids = result.inserted
+                    conflicting_ee_ids = result.updated
+                else:
                     EmployeeDetail.objects.bulk_create(bulk_employees, ignore_conflicts=True)
+                    created_ee_ids = [record[EE.EMPLOYEE_ID] for record in employee_records]
 
                 # After employees are created, create their associated address records
-                if addresses_by_ee_id:
-                    employees = EmployeeDetail.objects.filter(ee_id__in=addresses_by_ee_id.keys())
-                    employees_map = {emp.ee_id: emp for emp in employees}
-
-                    address_objects = []
-                    for ee_id, addr in addresses_by_ee_id.items():
-                        employee = employees_map.get(ee_id)
-                        if not employee:
-                            continue
-
-                        # Backward compatibility: handle address_state if present
-                        addr_data = dict(addr)
-                        if "address_state" in addr_data and "state" not in addr_data:
-                            addr_data["state"] = addr_data.pop("address_state")
-
-                        try:
-                            address_objects.append(EmplopyeeAddress(ee=employee, **addr_data))
-                        except TypeError:
-                            # Skip if address payload contains unexpected keys
-                            continue
-
+                address_ee_ids = [ee_id for ee_id in created_ee_ids if ee_id in addresses]
+                if address_ee_ids:
+                    employee_pks = lookup_ids(EmployeeDetail, 'ee_id', address_ee_ids)
+                    address_objects = [
+                        EmplopyeeAddress(ee_id=employee_pks[ee_id], **addresses[ee_id])
+                        for ee_id in address_ee_ids
+                        if ee_id in employee_pks
+                    ]
                     if address_objects:
                         EmplopyeeAddress.objects.bulk_create(address_objects, ignore_conflicts=True)
-                    
-                return created_ee_ids
-                    
-        except Exception as e:
 
+            # bulk_create skips the save signals; record the chunk as a single audit entry
+            log_model_bulk_operation(
+                "CREATE", "EmployeeDetail", created_ee_ids,
+                details={"addresses_created": len(address_ee_ids)}
+            )
+            return created_ee_ids, conflicting_ee_ids
+
+        except Exception as e:
             raise Exception(f"Bulk create failed: {str(e)}")
     
-    def _bulk_update_employees(self, employees_data, client_mapping, state_mapping, filing_status_mapping):
-        """Bulk update employees efficiently."""
-        if not employees_data:
-            return
+    def _bulk_update_employees(self, employee_records, addresses):
+        """
+        Bulk update existing employees from normalized records. Each record only
+        carries the fields present in the file. Returns list of updated ee_ids.
+        """
+        if not employee_records:
+            return []
             
         try:
             from django.db import transaction
-            from user_app.models import Client
-            from processor.models import State, FedFilingStatus
             
             with transaction.atomic():
                 # Get existing employees
-                ee_ids = [emp[0] for emp in employees_data]
+                ee_ids = [record[EE.EMPLOYEE_ID] for record in employee_records]
                 existing_employees = {
-                    emp.ee_id: emp for emp in EmployeeDetail.objects.filter(ee_id__in=ee_ids)
+                    emp.ee_id: emp for emp in lookup_objects(EmployeeDetail, 'ee_id', ee_ids)
                 }
                 
                 employees_to_update = []
+                update_fields = set()
                 # Collect address payloads for employees that need address updates/creates
                 addresses_to_upsert = []
-                for ee_id, emp_data in employees_data:
-                    if ee_id in existing_employees:
-                        emp = existing_employees[ee_id]
-                        
-                        # Update fields
-                        emp.first_name = emp_data.get(EE.FIRST_NAME, emp.first_name)
-                        emp.middle_name = emp_data.get(EE.MIDDLE_NAME, emp.middle_name)
-                        emp.last_name = emp_data.get(EE.LAST_NAME, emp.last_name)
-                        emp.ssn = emp_data.get(EE.SSN, emp.ssn)
-                        emp.gender = emp_data.get(EE.GENDER, emp.gender)
-                        emp.number_of_exemptions = emp_data.get("number_of_exemptions", emp.number_of_exemptions)
-                        emp.marital_status = emp_data.get(EE.MARITAL_STATUS, emp.marital_status)
-                        emp.number_of_student_default_loan = emp_data.get("number_of_student_default_loan", emp.number_of_student_default_loan)
-                        emp.number_of_dependent_child = emp_data.get("number_of_dependent_child", emp.number_of_dependent_child)
-                        emp.support_second_family = emp_data.get(EE.SUPPORT_SECOND_FAMILY, emp.support_second_family)
-                        emp.garnishment_fees_status = emp_data.get(EE.GARNISHMENT_FEES_STATUS, emp.garnishment_fees_status)
-                        emp.garnishment_fees_suspended_till = emp_data.get("garnishment_fees_suspended_till", emp.garnishment_fees_suspended_till)
-                        emp.number_of_active_garnishment = emp_data.get(EE.NUMBER_OF_ACTIVE_GARNISHMENT, emp.number_of_active_garnishment)
-                        
-                        # Update foreign keys if provided
-                        if emp_data.get(EE.CLIENT_ID) and emp_data.get(EE.CLIENT_ID) in client_mapping:
-                            emp.client_id = client_mapping[emp_data.get(EE.CLIENT_ID)]
-                        home_state_key = str(emp_data.get(EE.HOME_STATE)).strip().lower() if emp_data.get(EE.HOME_STATE) is not None else None
-                        work_state_key = str(emp_data.get(EE.WORK_STATE)).strip().lower() if emp_data.get(EE.WORK_STATE) is not None else None
-                        filing_key = str(emp_data.get(EE.FILING_STATUS)).strip().lower() if emp_data.get(EE.FILING_STATUS) is not None else None
-                        if home_state_key and home_state_key in state_mapping:
-                            emp.home_state_id = state_mapping[home_state_key]
-                        if work_state_key and work_state_key in state_mapping:
-                            emp.work_state_id = state_mapping[work_state_key]
-                        if filing_key and filing_key in filing_status_mapping:
-                            emp.filing_status_id = filing_status_mapping[filing_key]
-                        
-                        # Capture address data (if provided) for this employee
-                        address_data = emp_data.get("address")
-                        if address_data:
-                            addr = dict(address_data)
-                            # Map address_state -> state for model compatibility
-                            if "address_state" in addr and "state" not in addr:
-                                addr["state"] = addr.pop("address_state")
-                            addresses_to_upsert.append((emp, addr))
-
-                        employees_to_update.append(emp)
+                for record in employee_records:
+                    emp = existing_employees.get(record[EE.EMPLOYEE_ID])
+                    if emp is None:
+                        continue
+
+                    for field, value in record.items():
+                        if field != EE.EMPLOYEE_ID:
+                            setattr(emp, field, value)
+                            update_fields.add(field)
+
+                    address_data = addresses.get(emp.ee_id)
+                    if address_data:
+                        addresses_to_upsert.append((emp, address_data))
+
+                    employees_to_update.append(emp)
                 
                 # Bulk update
-                if employees_to_update:
-                    EmployeeDetail.objects.bulk_update(
-                        employees_to_update,
-                        ['first_name', 'middle_name', 'last_name', 'ssn', 'gender', 
-                         'number_of_exemptions', 'marital_status', 'number_of_student_default_loan',
-                         'number_of_dependent_child', 'support_second_family', 'garnishment_fees_status',
-                         'garnishment_fees_suspended_till', 'number_of_active_garnishment', 'client_id',
-                         'home_state_id', 'work_state_id', 'filing_status_id', 'updated_at']
-                    )
+                if employees_to_update and update_fields:
+                    if CopyUpsertLoader.is_available():
+                        CopyUpsertLoader(
+                            EmployeeDetail, EE.EMPLOYEE_ID, update_fields=sorted(update_fields)
+                        ).upsert(employees_to_update)
+                    else:
+                        # bulk_update does not apply auto_now, and the export cache
+                        # versions by updated_at
+                        now = timezone.now()
+                        for obj in employees_to_update:
+                            obj.updated_at = now
+                        EmployeeDetail.objects.bulk_update(
+                            employees_to_update,
+                            sorted(update_fields) + ['updated_at']
+                        )
 
                 # Upsert address records for updated employees
-                for emp, addr in addresses_to_upsert:
-                    try:
-
-                        address_obj, created = EmplopyeeAddress.objects.get_or_create(
-                            ee=emp,
-                            defaults=addr,
-                        )
-                        if not created:
-                            for field, value in addr.items():
-                                setattr(address_obj, field, value)
-                            address_obj.save()
-                    except Exception:
-                        # Skip address update errors to avoid failing the whole batch
-                        continue
-            return [emp.ee_id for emp in employees_to_update]
+                addresses_created, addresses_updated = self._bulk_upsert_addresses(addresses_to_upsert)
+
+            updated_ee_ids = [emp.ee_id for emp in employees_to_update]
+            # bulk_update skips the save signals; record the chunk as a single audit entry
+            log_model_bulk_operation(
+                "UPDATE", "EmployeeDetail", updated_ee_ids,
+                fields=update_fields,
+                details={"addresses_created": addresses_created, "addresses_updated": addresses_updated}
+            )
+            return updated_ee_ids
 
         except Exception as e:
             raise Exception(f"Bulk update failed: {str(e)}")
 
+    def _bulk_upsert_addresses(self, addresses_to_upsert):
+        """
+        Create or update the address of each (employee, address data) pair with one
+        query for the existing addresses, one bulk_create and one bulk_update.
+        Returns (number created, number updated).
+        """
+        if not addresses_to_upsert:
+            return 0, 0
+
+        existing_addresses = {
+            address.ee_id: address
+            for address in lookup_objects(EmplopyeeAddress, 'ee_id', [emp.pk for emp, _ in addresses_to_upsert])
+        }
+        required_fields = [
+            field.attname for field in EmplopyeeAddress._meta.concrete_fields
+            if not field.null and not field.primary_key and not field.is_relation and not field.has_default()
+        ]
+
+        addresses_to_create = []
+        addresses_to_update = []
+        update_fields = set()
+        for emp, addr in addresses_to_upsert:
+            address_obj = existing_addresses.get(emp.pk)
+            if address_obj is None:
+                # A new address needs every NOT NULL column; skip incomplete ones
+                # rather than failing the whole batch
+                if all(addr.get(field) is not None for field in required_fields):
+                    addresses_to_create.append(EmplopyeeAddress(ee=emp, **addr))
+                continue
+            for field, value in addr.items():
+                setattr(address_obj, field, value)
+                update_fields.add(field)
+            addresses_to_update.append(address_obj)
+
+        if addresses_to_create:
+            EmplopyeeAddress.objects.bulk_create(addresses_to_create)
+        if addresses_to_update:
+            EmplopyeeAddress.objects.bulk_update(addresses_to_update, sorted(update_fields))
+        return len(addresses_to_create), len(addresses_to_update)
+
 
 
 
@@ -1087,79 +897,44 @@ class EmployeeDetailsByIdAPI(APIView):
 
 class ExportEmployeeDataView(APIView):
     """
-    Exports employee details as an Excel file.
+    Exports employee details as an Excel (or CSV) file.
     Includes address fields in the export.
     """
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                EXPORT_FORMAT_PARAM, openapi.IN_QUERY,
+                description="File format: xlsx (default) or csv",
+                type=openapi.TYPE_STRING, enum=['xlsx', 'csv']
+            )
+        ],
         responses={
             200: 'Employee data exported successfully as Excel file',
+            400: 'Unsupported export format',
             404: 'No employees found',
             500: 'Internal server error'
         }
     )
     def get(self, request):
+        """
+        Export all employees with their address fields.
+        Rows are streamed through the shared export engine (write-only workbook / CSV).
+        """
         try:
-            employees = EmployeeDetail.objects.select_related('client', 'home_state', 'work_state', 'filing_status').prefetch_related('employee_addresses').all()
-            if not employees.exists():
+            export = employee_export()
+            if not export.queryset.exists():
                 return ResponseHelper.error_response(
                     message="No employees found",
                     status_code=status.HTTP_404_NOT_FOUND
                 )
 
-            serializer = EmployeeDetailsSerializer(employees, many=True)        
-
-            # Define Excel workbook and worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Employee Data"
-
-            # Define headers including address fields
-            header_fields = [
-                EE.EMPLOYEE_ID, EE.SSN, EE.CLIENT_ID, EE.FIRST_NAME, EE.MIDDLE_NAME, EE.LAST_NAME, 
-                EE.GENDER, EE.HOME_STATE, EE.WORK_STATE, EE.MARITAL_STATUS, EE.FILING_STATUS,
-                'number_of_exemptions', EE.SUPPORT_SECOND_FAMILY, 'number_of_dependent_child',
-                'number_of_student_default_loan', EE.GARNISHMENT_FEES_STATUS, 
-                EE.GARNISHMENT_FEES_SUSPENDED_TILL, EE.NUMBER_OF_ACTIVE_GARNISHMENT, 
-                CF.STATUS, CF.CREATED_AT, CF.UPDATED_AT,
-                # Address fields
-                'address_1', 'address_2', 'zip_code', 'geo_code', 'city', 'address_state', 'county', 'country'
-            ]
-            ws.append(header_fields)
-
-            # Append employee data
-            for employee in serializer.data:
-                row = []
-                # Employee fields
-                for field in header_fields[:20]:  # First 20 fields are employee fields
-                    row.append(employee.get(field, ''))
-                
-                # Address fields
-                address = employee.get('address', {}) if employee.get('address') else {}
-                row.append(address.get('address_1', ''))
-                row.append(address.get('address_2', ''))
-                row.append(address.get('zip_code', ''))
-                row.append(address.get('geo_code', ''))
-                row.append(address.get('city', ''))
-                row.append(address.get('state', ''))
-                row.append(address.get('county', ''))
-                row.append(address.get('country', ''))
-                
-                ws.append(row)
-
-            # Save workbook to in-memory buffer
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            # Prepare HTTP response with Excel content
-            filename = f'employee_details_{datetime.today().strftime("%m-%d-%y")}.xlsx'
-            response = HttpResponse(
-                buffer,
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
+            return export.as_response(request)
 
+        except ValueError as e:
+            return ResponseHelper.error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return ResponseHelper.error_response(
                 message="Failed to export employee data",
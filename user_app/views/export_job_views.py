@@ -0,0 +1,139 @@
+import logging
+import os
+
+from django.http import FileResponse
+from django.utils import timezone
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.views import APIView
+
+from processor.garnishment_library.utils.response import ResponseHelper
+from user_app.models import ExportJob
+from user_app.serializers.export_job_serializers import ExportJobRequestSerializer, ExportJobSerializer
+from user_app.services.export_jobs import ExportJobService
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobCreateAPI(APIView):
+    """
+    Request a background export (employees, garnishment orders, letter results, ACH).
+    Returns the job immediately; identical requests share one build while the data is unchanged.
+    """
+
+    @swagger_auto_schema(
+        request_body=ExportJobRequestSerializer,
+        responses={
+            202: 'Export job created or shared',
+            400: 'Invalid export type, format or parameters',
+            500: 'Internal server error'
+        }
+    )
+    def post(self, request):
+        serializer = ExportJobRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return ResponseHelper.error_response(
+                'Invalid request data',
+                serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = serializer.validated_data
+        try:
+            job, created = ExportJobService.request_export(
+                data['export_type'],
+                export_format=data['export_format'],
+                parameters=data.get('parameters'),
+                user=request.user,
+                refresh=data.get('refresh', False),
+            )
+        except ValueError as e:
+            return ResponseHelper.error_response(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.exception("Failed to create export job")
+            return ResponseHelper.error_response(
+                'Failed to create export job',
+                str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        message = 'Export job created' if created else 'Existing export job reused'
+        return ResponseHelper.success_response(
+            message,
+            ExportJobSerializer(job).data,
+            status_code=status.HTTP_202_ACCEPTED
+        )
+
+
+class ExportJobStatusAPI(APIView):
+    """
+    Check the status of an export job.
+    """
+
+    @swagger_auto_schema(
+        responses={
+            200: 'Success - Returns export job status',
+            404: 'Export job not found',
+        }
+    )
+    def get(self, request, job_id):
+        job = ExportJob.objects.filter(job_id=job_id).first()
+        if job is None:
+            return ResponseHelper.error_response(
+                f'Export job "{job_id}" not found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        return ResponseHelper.success_response(
+            'Export job fetched successfully',
+            ExportJobSerializer(job).data
+        )
+
+
+class ExportJobDownloadAPI(APIView):
+    """
+    Download the file produced by a completed export job.
+    """
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('job_id', openapi.IN_PATH, type=openapi.TYPE_STRING, description='Export job id'),
+        ],
+        responses={
+            200: 'Export file',
+            404: 'Export job not found',
+            409: 'Export job is not completed yet',
+            410: 'Export file expired',
+        }
+    )
+    def get(self, request, job_id):
+        job = ExportJob.objects.filter(job_id=job_id).first()
+        if job is None:
+            return ResponseHelper.error_response(
+                f'Export job "{job_id}" not found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        if job.status != ExportJob.STATUS_COMPLETED:
+            return ResponseHelper.error_response(
+                f'Export job is {job.status}',
+                job.error_message,
+                status_code=status.HTTP_409_CONFLICT
+            )
+
+        path = ExportJobService.artifact_path(job)
+        if (job.expires_at and job.expires_at <= timezone.now()) or not path or not os.path.exists(path):
+            return ResponseHelper.error_response(
+                'Export file has expired, please request the export again',
+                status_code=status.HTTP_410_GONE
+            )
+
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=job.file_name,
+            content_type=job.content_type
+        )
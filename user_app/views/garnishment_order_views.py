@@ -3,6 +3,7 @@ from rest_framework import status
 from django.http import JsonResponse, HttpResponse
 from openpyxl import Workbook
 from processor.garnishment_library.utils.response import ResponseHelper
+from django.utils import timezone
 from rest_framework.parsers import MultiPartParser, FormParser
 from user_app.models import GarnishmentOrder
 from user_app.serializers import GarnishmentOrderSerializer
@@ -26,6 +27,77 @@ from user_app.constants import (
 from rest_framework.permissions import AllowAny
 from processor.garnishment_library import PaginationHelper
 from user_app.utils import DataProcessingUtils
+from user_app.services.export_engine import EXPORT_FORMAT_PARAM
+from user_app.services.export_definitions import garnishment_order_export
+from user_app.services.import_reader import ImportFileReader
+from user_app.services.bulk_upsert import CopyUpsertLoader
+from user_app.services.import_lookups import ReferenceDataCache, lookup_ids
+from user_app.services.import_jobs import ImportProgress
+from garnishedge_project.audit_batch import aggregated_audit
+from garnishedge_project.model_audit import log_model_bulk_operation
+
+# Fields written when an imported order updates an existing one
+ORDER_IMPORT_UPDATE_FIELDS = [
+    'is_consumer_debt', 'issued_date', 'received_date', 'start_date', 'stop_date',
+    'deduction_code', 'ordered_amount', 'garnishment_fees', 'fips_code', 'voucher_for_payroll',
+    'status', 'amount_of_deduction', 'override_amount', 'override_start_date',
+    'override_stop_date', 'paid_till_date', 'arrear_greater_than_12_weeks', 'arrear_amount',
+    'current_child_support', 'current_medical_support', 'current_spousal_support',
+    'medical_support_arrear', 'child_support_arrear', 'spousal_support_arrear',
+    # Exempt threshold/table fields
+    'ower_threshold_amount', 'lower_threshold_percent1', 'lower_threshold_percent2',
+    'mid_threshold_amount', 'mid_threshold_percent', 'upper_threshold_amount',
+    'upper_threshold_percent', 'de_range_lower_to_upper_threshold_percent',
+    'de_range_lower_to_mid_threshold_percent', 'de_range_mid_to_upper_threshold_percent',
+    'gp_lower_threshold_amount', 'gp_lower_threshold_percent1', 'exempt_amt',
+    'filing_status_percent',
+    'pay_date', 'pay_period_limit', 'total_amount_owed', 'monthly_limit', 'exempt_amount',
+    'ytd_deductions', 'ach_sent', 'ap_check', 'date_of_ap_payment',
+    'override_child_support', 'override_medical_support', 'override_spousal_support',
+    'override_child_support_arrear', 'override_medical_support_arrear', 'override_spousal_support_arrear',
+    'override_limit', 'override_percent',
+    'issuing_state_id', 'garnishment_type_id', 'payee_id',
+]
+
+
+def _skip_reason(row_numbers, case_id, reason):
+    """
+    A skipped order's message, prefixed with its file row so the import
+    error report can place it
+    """
+    row = row_numbers.get(case_id) if row_numbers else None
+    if row is not None:
+        return f"Row {row} (case_id={case_id}): {reason}"
+    return f"case_id={case_id}: {reason}"
+
+
+def _resolve_order_keys(orders):
+    """
+    Resolve the case_ids, employees and payees referenced by a chunk of processed
+    order rows. Only the keys present in ``orders`` are queried.
+
+    Returns:
+        (existing_case_ids, employee_mapping, employee_ssn_mapping, payee_mapping)
+    """
+    from user_app.models import EmployeeDetail, PayeeDetails
+
+    existing_case_ids = set(lookup_ids(
+        GarnishmentOrder, 'case_id', (order.get("case_id") for order in orders), value_field='case_id'
+    ))
+    employee_mapping = lookup_ids(EmployeeDetail, 'ee_id', (order.get("ee_id") for order in orders))
+    employee_ssn_mapping = {
+        str(ssn).strip(): pk for ssn, pk in lookup_ids(
+            EmployeeDetail, 'ssn', (str(order["ssn"]).strip() for order in orders if order.get("ssn"))
+        ).items()
+    }
+    # payee_id (string like "G3288") -> PayeeDetails.id (database ID)
+    payee_mapping = {
+        str(payee_id).strip(): pk for payee_id, pk in lookup_ids(
+            PayeeDetails, 'payee_id', (str(order["payee_id"]).strip() for order in orders if order.get("payee_id"))
+        ).items()
+    }
+    return existing_case_ids, employee_mapping, employee_ssn_mapping, payee_mapping
+
 
 class GarnishmentOrderImportView(APIView):
     """
@@ -58,90 +130,91 @@ class GarnishmentOrderImportView(APIView):
         }
     )
     def post(self, request):
-        try:
-            if 'file' not in request.FILES:
-                return ResponseHelper.error_response(
-                    message="No file provided",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
+        if 'file' not in request.FILES:
+            return ResponseHelper.error_response(
+                message="No file provided",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            file = request.FILES['file']
-            file_name = file.name
-            # Read file based on extension
-            # Use converters/dtype to force payee_id and case_id as strings to preserve alphanumeric values
-            # Excel often converts "G3288" to 3288, so we need to read these columns as strings
-            if file_name.endswith('.csv'):
-                # For CSV, specify dtype for specific columns
-                df = pd.read_csv(file, dtype={'payee_id': str, 'case_id': str}, na_values=[''])
-            elif file_name.endswith(('.xlsx', '.xls', '.xlsm', '.xlsb', '.odf', '.ods', '.odt')):
-                # For Excel, use converters to force string conversion at read time
-                # This preserves alphanumeric values like "G3288" if stored as text in Excel
-                converters = {
-                    'payee_id': str,
-                    'case_id': str
-                }
-                df = pd.read_excel(file, converters=converters)
-            else:
-                return ResponseHelper.error_response(
-                    message="Unsupported file format. Please upload a CSV or Excel file.",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Additional safety: Convert payee_id and case_id columns to string if they exist
-            # This handles edge cases and ensures consistent string type
-            if 'payee_id' in df.columns:
-                df['payee_id'] = df['payee_id'].astype(str)
-                df['payee_id'] = df['payee_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
-            if 'case_id' in df.columns:
-                df['case_id'] = df['case_id'].astype(str)
-                df['case_id'] = df['case_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
-            
-            # Normalize column names
-            df.rename(columns=lambda c: DataProcessingUtils.normalize_field_name(c), inplace=True)
-            
+        file = request.FILES['file']
+        if not ImportFileReader.is_supported(file.name):
+            return ResponseHelper.error_response(
+                message="Unsupported file format. Please upload a CSV or Excel file.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        return self.run_import(file, file.name)
+
+    @aggregated_audit(source='garnishment_order_import')
+    def run_import(self, file, file_name, options=None, progress=None):
+        """
+        Import garnishment orders from an uploaded file and return the API response.
+        Background import jobs call this directly with an ImportProgress.
+        """
+        progress = progress or ImportProgress()
+        try:
             # Process data in batches for better performance
             batch_size = 200
             added_orders = []
             updated_orders = []
             validation_errors = []
             
-            # Pre-fetch existing orders to avoid repeated queries
-            existing_case_ids = set(GarnishmentOrder.objects.values_list('case_id', flat=True))
-            
-            # Pre-fetch all foreign key mappings to avoid repeated queries
-            from user_app.models import EmployeeDetail, PayeeDetails
-            from processor.models import State, GarnishmentType
+            # States and garnishment types come from the process-level cache; existing orders,
+            # employees and payees are looked up per chunk for the keys present in the file
+            state_mapping = ReferenceDataCache.state_mapping()
+            garnishment_type_mapping = ReferenceDataCache.garnishment_type_mapping()
             
-            employee_mapping = {emp.ee_id: emp.id for emp in EmployeeDetail.objects.all()}
-            employee_ssn_mapping = {str(emp.ssn).strip(): emp.id for emp in EmployeeDetail.objects.exclude(ssn__isnull=True).exclude(ssn='')}
-            # Create case-insensitive mappings for state and garnishment type
-            state_mapping = {(s.state or '').lower(): s.id for s in State.objects.all()}
-            garnishment_type_mapping = {(gt.type or '').lower(): gt.id for gt in GarnishmentType.objects.all()}
-            # Create mapping for payee: payee_id (string like "G3288") -> PayeeDetails.id (database ID)
-            payee_mapping = {str(p.payee_id).strip(): p.id for p in PayeeDetails.objects.all()}
+            # Read and process the file in fixed-size chunks to keep memory bounded
+            for df in ImportFileReader(file, file_name=file_name, string_columns=['payee_id', 'case_id']).chunks():
+                # Additional safety: Convert payee_id and case_id columns to string if they exist
+                # This handles edge cases and ensures consistent string type
+                if 'payee_id' in df.columns:
+                    df['payee_id'] = df['payee_id'].astype(str)
+                    df['payee_id'] = df['payee_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
+                if 'case_id' in df.columns:
+                    df['case_id'] = df['case_id'].astype(str)
+                    df['case_id'] = df['case_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
             
-            # Process data in batches
-            for batch_start in range(0, len(df), batch_size):
-                batch_end = min(batch_start + batch_size, len(df))
-                batch_df = df.iloc[batch_start:batch_end]
-                
-                batch_orders_to_create = []
-                batch_orders_to_update = []
-                
-                for _, row in batch_df.iterrows():
+                # Normalize column names
+                df.rename(columns=lambda c: DataProcessingUtils.normalize_field_name(c), inplace=True)
+
+                chunk_added_start = len(added_orders)
+                chunk_updated_start = len(updated_orders)
+                chunk_errors_start = len(validation_errors)
+
+                # Process the chunk's rows first so foreign keys are resolved for this chunk only
+                chunk_orders = []
+                # case_id -> file row, for the messages of orders skipped later
+                row_numbers = {}
+                for _, row in df.iterrows():
                     try:
                         # Process row data efficiently
                         order_data = self._process_order_row(row)
-                        
+
                         if not order_data:
-                            validation_errors.append(f"Row {batch_start + _ + 1}: No order data after processing")
+                            validation_errors.append(f"Row {_ + 1}: No order data after processing")
                             continue
-                            
-                        case_id = order_data.get("case_id")
-                        if not case_id:
-                            validation_errors.append(f"Row {batch_start + _ + 1}: Missing case_id")
+
+                        if not order_data.get("case_id"):
+                            validation_errors.append(f"Row {_ + 1}: Missing case_id")
                             continue
-                        
+
+                        chunk_orders.append(order_data)
+                        row_numbers[order_data["case_id"]] = _ + 1
+
+                    except Exception as row_e:
+                        validation_errors.append(f"Row {_ + 1}: {str(row_e)}")
+                        continue
+
+                existing_case_ids, employee_mapping, employee_ssn_mapping, payee_mapping = _resolve_order_keys(chunk_orders)
+
+                for batch_start in range(0, len(chunk_orders), batch_size):
+                    batch_orders_to_create = []
+                    batch_orders_to_update = []
+
+                    for order_data in chunk_orders[batch_start:batch_start + batch_size]:
+                        case_id = order_data.get("case_id")
+
                         # Check if order exists
                         if case_id in existing_case_ids:
                             # Prepare for update
@@ -150,22 +223,33 @@ class GarnishmentOrderImportView(APIView):
                         else:
                             # Prepare for creation
                             batch_orders_to_create.append(order_data)
-                            
-                    except Exception as row_e:
-                        validation_errors.append(f"Row {batch_start + _ + 1}: {str(row_e)}")
-                        continue
-                
-                # Bulk create new orders
-                if batch_orders_to_create:
-                    created_case_ids, skip_reasons = self._bulk_create_orders(batch_orders_to_create, employee_mapping, employee_ssn_mapping, state_mapping, garnishment_type_mapping, payee_mapping)
-                    added_orders.extend(created_case_ids)
-                    validation_errors.extend(skip_reasons[:20])  # Add first 20 detailed skip reasons
-                    # Update existing_case_ids set to include newly created orders
-                    existing_case_ids.update(created_case_ids)
-                
-                # Bulk update existing orders
-                if batch_orders_to_update:
-                    self._bulk_update_orders(batch_orders_to_update, employee_mapping, state_mapping, garnishment_type_mapping, payee_mapping)
+
+                    # Bulk create new orders
+                    if batch_orders_to_create:
+                        created_case_ids, conflicting_case_ids, skip_reasons = self._bulk_create_orders(batch_orders_to_create, employee_mapping, employee_ssn_mapping, state_mapping, garnishment_type_mapping, payee_mapping, row_numbers)
+                        added_orders.extend(created_case_ids)
+                        # All of them go to the error report; only the response is truncated
+                        validation_errors.extend(skip_reasons)
+                        # Update existing_case_ids set to include newly created orders
+                        existing_case_ids.update(created_case_ids)
+                        # Orders created elsewhere since the lookup are updated like the existing ones
+                        orders_to_create_by_case_id = {order.get("case_id"): order for order in batch_orders_to_create}
+                        for case_id in conflicting_case_ids:
+                            batch_orders_to_update.append((case_id, orders_to_create_by_case_id[case_id]))
+                            updated_orders.append(case_id)
+                        existing_case_ids.update(conflicting_case_ids)
+
+                    # Bulk update existing orders
+                    if batch_orders_to_update:
+                        self._bulk_update_orders(batch_orders_to_update, employee_mapping, state_mapping, garnishment_type_mapping, payee_mapping)
+
+                progress.chunk(
+                    len(df),
+                    rows_validated=len(chunk_orders),
+                    rows_inserted=len(added_orders) - chunk_added_start,
+                    rows_updated=len(updated_orders) - chunk_updated_start,
+                    errors=validation_errors[chunk_errors_start:],
+                )
             
             # Build response data
             response_data = {
@@ -293,12 +377,13 @@ class GarnishmentOrderImportView(APIView):
         except Exception as e:
             raise Exception(f"Error processing row: {str(e)}")
     
-    def _bulk_create_orders(self, orders_data, employee_mapping, employee_ssn_mapping, state_mapping, garnishment_type_mapping, payee_mapping):
-        """Bulk create orders using bulk_create for better performance. Returns tuple of (created_case_ids, skip_reasons)."""
+    def _bulk_create_orders(self, orders_data, employee_mapping, employee_ssn_mapping, state_mapping, garnishment_type_mapping, payee_mapping, row_numbers=None):
+        """Bulk create orders using bulk_create for better performance. Returns tuple of (created_case_ids, conflicting_case_ids, skip_reasons)."""
         if not orders_data:
-            return [], []
+            return [], [], []
             
         created_case_ids = []
+        conflicting_case_ids = []
         skip_reasons = []
         try:
             from django.db import transaction
@@ -322,7 +407,7 @@ class GarnishmentOrderImportView(APIView):
                             employee_id = employee_ssn_mapping.get(key)
                         
                         if not employee_id:
-                            skip_reasons.append(f"case_id={case_id}: No employee found for ssn={ssn or 'N/A'}")
+                            skip_reasons.append(_skip_reason(row_numbers, case_id, f"No employee found for ssn={ssn or 'N/A'}"))
                             continue  # Skip if no valid employee found
                         
                         # Validate required foreign keys (case-insensitive)
@@ -343,14 +428,14 @@ class GarnishmentOrderImportView(APIView):
                         if payee_id_str:
                             payee_id = payee_mapping.get(str(payee_id_str).strip())
                             if not payee_id:
-                                skip_reasons.append(f"case_id={case_id}: No payee found for payee_id={payee_id_str}")
+                                skip_reasons.append(_skip_reason(row_numbers, case_id, f"No payee found for payee_id={payee_id_str}"))
                                 continue  # Skip if payee not found
                         
                         if not issuing_state_id:
-                            skip_reasons.append(f"case_id={case_id}: Invalid issuing_state='{issuing_state or 'N/A'}'. Available: {list(state_mapping.keys())[:5]}")
+                            skip_reasons.append(_skip_reason(row_numbers, case_id, f"Invalid issuing_state='{issuing_state or 'N/A'}'. Available: {list(state_mapping.keys())[:5]}"))
                             continue  # Skip if issuing_state is missing or invalid
                         if not garnishment_type_id:
-                            skip_reasons.append(f"case_id={case_id}: Invalid garnishment_type='{garnishment_type or 'N/A'}'. Available: {list(garnishment_type_mapping.keys())[:5]}")
+                            skip_reasons.append(_skip_reason(row_numbers, case_id, f"Invalid garnishment_type='{garnishment_type or 'N/A'}'. Available: {list(garnishment_type_mapping.keys())[:5]}"))
                             continue  # Skip if garnishment_type is missing or invalid
                         
                         bulk_orders.append(GarnishmentOrder(
@@ -398,14 +483,24 @@ class GarnishmentOrderImportView(APIView):
                         ))
                         created_case_ids.append(case_id)
                     except Exception as e:
-                        skip_reasons.append(f"case_id={case_id or 'N/A'}: Exception - {str(e)}")
+                        skip_reasons.append(_skip_reason(row_numbers, case_id or 'N/A', f"Exception - {str(e)}"))
                         continue  # Skip problematic records
                 
                 # Bulk create
                 if bulk_orders:
-                    GarnishmentOrder.objects.bulk_create(bulk_orders, ignore_conflicts=True)
+                    if CopyUpsertLoader.is_available():
+                        # No update fields: a conflict only touches updated_at, and the
+                        # caller sends the row through _bulk_update_orders instead
+                        result = CopyUpsertLoader(GarnishmentOrder, 'case_id', update_fields=[]).upsert(bulk_orders)
+                        created_case_ids = result.inserted
+                        conflicting_case_ids = result.updated
+                    else:
+                        GarnishmentOrder.objects.bulk_create(bulk_orders, ignore_conflicts=True)
+
+                # bulk_create skips the save signals; record the batch as a single audit entry
+                log_model_bulk_operation("CREATE", "GarnishmentOrder", created_case_ids)
                 
-                return created_case_ids, skip_reasons
+                return created_case_ids, conflicting_case_ids, skip_reasons
 
         except Exception as e:
             raise Exception(f"Bulk create failed: {str(e)}")
@@ -521,28 +616,26 @@ class GarnishmentOrderImportView(APIView):
                 
                 # Bulk update
                 if orders_to_update:
-                    GarnishmentOrder.objects.bulk_update(
-                        orders_to_update,
-                        ['is_consumer_debt', 'issued_date', 'received_date', 'start_date', 'stop_date',
-                         'deduction_code', 'ordered_amount', 'garnishment_fees', 'fips_code', 'voucher_for_payroll',
-                         'status', 'amount_of_deduction', 'override_amount', 'override_start_date',
-                         'override_stop_date', 'paid_till_date', 'arrear_greater_than_12_weeks', 'arrear_amount',
-                         'current_child_support', 'current_medical_support', 'current_spousal_support',
-                             'medical_support_arrear', 'child_support_arrear', 'spousal_support_arrear',
-                             # Exempt threshold/table fields
-                             'ower_threshold_amount', 'lower_threshold_percent1', 'lower_threshold_percent2',
-                             'mid_threshold_amount', 'mid_threshold_percent', 'upper_threshold_amount',
-                             'upper_threshold_percent', 'de_range_lower_to_upper_threshold_percent',
-                             'de_range_lower_to_mid_threshold_percent', 'de_range_mid_to_upper_threshold_percent',
-                             'gp_lower_threshold_amount', 'gp_lower_threshold_percent1', 'exempt_amt',
-                             'filing_status_percent',
-                         'pay_date', 'pay_period_limit', 'total_amount_owed', 'monthly_limit', 'exempt_amount',
-                         'ytd_deductions', 'ach_sent', 'ap_check', 'date_of_ap_payment',
-                         'override_child_support', 'override_medical_support', 'override_spousal_support',
-                         'override_child_support_arrear', 'override_medical_support_arrear', 'override_spousal_support_arrear',
-                         'override_limit', 'override_percent',
-                         'issuing_state_id', 'garnishment_type_id', 'updated_at']
-                    )
+                    if CopyUpsertLoader.is_available():
+                        CopyUpsertLoader(
+                            GarnishmentOrder, 'case_id', update_fields=ORDER_IMPORT_UPDATE_FIELDS
+                        ).upsert(orders_to_update)
+                    else:
+                        # bulk_update does not apply auto_now, and the export cache
+                        # versions by updated_at
+                        now = timezone.now()
+                        for obj in orders_to_update:
+                            obj.updated_at = now
+                        GarnishmentOrder.objects.bulk_update(
+                            orders_to_update,
+                            ORDER_IMPORT_UPDATE_FIELDS + ['updated_at']
+                        )
+
+                # bulk_update skips the save signals; record the batch as a single audit entry
+                log_model_bulk_operation(
+                    "UPDATE", "GarnishmentOrder", [order.case_id for order in orders_to_update],
+                    fields=ORDER_IMPORT_UPDATE_FIELDS
+                )
                     
         except Exception as e:
             raise Exception(f"Bulk update failed: {str(e)}")
@@ -715,6 +808,7 @@ class UpsertGarnishmentOrderView(APIView):
     Optimized for bulk processing with minimal database queries.
     """
     parser_classes = [MultiPartParser, FormParser]
+    supported_extensions = ('.csv', '.xls', '.xlsx')
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -744,79 +838,81 @@ class UpsertGarnishmentOrderView(APIView):
         if not file:
             return Response({'error': 'No file uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # Read file based on extension
-            # Use converters/dtype to force payee_id and case_id as strings to preserve alphanumeric values
-            # Excel often converts "G3288" to 3288, so we need to read these columns as strings
-            if file.name.endswith('.csv'):
-                # For CSV, specify dtype for specific columns
-                df = pd.read_csv(file, dtype={'payee_id': str, 'case_id': str}, na_values=[''])
-            elif file.name.endswith(('.xls', '.xlsx')):
-                # For Excel, use converters to force string conversion at read time
-                # This preserves alphanumeric values like "G3288" if stored as text in Excel
-                converters = {
-                    'payee_id': str,
-                    'case_id': str
-                }
-                df = pd.read_excel(file, converters=converters)
-            else:
-                return Response({'error': 'Unsupported file format. Use CSV or Excel.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Additional safety: Convert payee_id and case_id columns to string if they exist
-            # This handles edge cases and ensures consistent string type
-            if 'payee_id' in df.columns:
-                df['payee_id'] = df['payee_id'].astype(str)
-                df['payee_id'] = df['payee_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
-            if 'case_id' in df.columns:
-                df['case_id'] = df['case_id'].astype(str)
-                df['case_id'] = df['case_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
+        if not ImportFileReader.is_supported(file.name, extensions=self.supported_extensions):
+            return Response({'error': 'Unsupported file format. Use CSV or Excel.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Normalize column names
-            df.rename(columns=lambda c: DataProcessingUtils.normalize_field_name(c), inplace=True)
+        return self.run_import(file, file.name)
 
+    @aggregated_audit(source='garnishment_order_upsert')
+    def run_import(self, file, file_name, options=None, progress=None):
+        """
+        Upsert garnishment orders from an uploaded file and return the API response.
+        Background import jobs call this directly with an ImportProgress.
+        """
+        progress = progress or ImportProgress()
+        try:
             # Process data in batches for better performance
             batch_size = 200
             added_orders = []
             updated_orders = []
             validation_errors = []
             
-            # Pre-fetch existing orders to avoid repeated queries
-            existing_case_ids = set(GarnishmentOrder.objects.values_list('case_id', flat=True))
+            # States and garnishment types come from the process-level cache; existing orders,
+            # employees and payees are looked up per chunk for the keys present in the file
+            state_mapping = ReferenceDataCache.state_mapping()
+            garnishment_type_mapping = ReferenceDataCache.garnishment_type_mapping()
             
-            # Pre-fetch all foreign key mappings to avoid repeated queries
-            from user_app.models import EmployeeDetail, PayeeDetails
-            from processor.models import State, GarnishmentType
-            
-            employee_mapping = {emp.ee_id: emp.id for emp in EmployeeDetail.objects.all()}
-            employee_ssn_mapping = {str(emp.ssn).strip(): emp.id for emp in EmployeeDetail.objects.exclude(ssn__isnull=True).exclude(ssn='')}
-            # Create case-insensitive mappings for state and garnishment type
-            state_mapping = {(s.state or '').lower(): s.id for s in State.objects.all()}
-            garnishment_type_mapping = {(gt.type or '').lower(): gt.id for gt in GarnishmentType.objects.all()}
-            # Create mapping for payee: payee_id (string like "G3288") -> PayeeDetails.id (database ID)
-            payee_mapping = {str(p.payee_id).strip(): p.id for p in PayeeDetails.objects.all()}
-            
-            # Process data in batches
-            for batch_start in range(0, len(df), batch_size):
-                batch_end = min(batch_start + batch_size, len(df))
-                batch_df = df.iloc[batch_start:batch_end]
-                
-                batch_orders_to_create = []
-                batch_orders_to_update = []
-                
-                for _, row in batch_df.iterrows():
+            # Read and process the file in fixed-size chunks to keep memory bounded
+            for df in ImportFileReader(file, file_name=file_name, string_columns=['payee_id', 'case_id']).chunks():
+                # Additional safety: Convert payee_id and case_id columns to string if they exist
+                # This handles edge cases and ensures consistent string type
+                if 'payee_id' in df.columns:
+                    df['payee_id'] = df['payee_id'].astype(str)
+                    df['payee_id'] = df['payee_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
+                if 'case_id' in df.columns:
+                    df['case_id'] = df['case_id'].astype(str)
+                    df['case_id'] = df['case_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
+
+                # Normalize column names
+                df.rename(columns=lambda c: DataProcessingUtils.normalize_field_name(c), inplace=True)
+
+                chunk_added_start = len(added_orders)
+                chunk_updated_start = len(updated_orders)
+                chunk_errors_start = len(validation_errors)
+
+                # Process the chunk's rows first so foreign keys are resolved for this chunk only
+                chunk_orders = []
+                # case_id -> file row, for the messages of orders skipped later
+                row_numbers = {}
+                for _, row in df.iterrows():
                     try:
                         # Process row data efficiently
                         order_data = self._process_order_row(row)
-                        
+
                         if not order_data:
-                            validation_errors.append(f"Row {batch_start + _ + 1}: No order data after processing")
+                            validation_errors.append(f"Row {_ + 1}: No order data after processing")
                             continue
-                            
-                        case_id = order_data.get("case_id")
-                        if not case_id:
-                            validation_errors.append(f"Row {batch_start + _ + 1}: Missing case_id")
+
+                        if not order_data.get("case_id"):
+                            validation_errors.append(f"Row {_ + 1}: Missing case_id")
                             continue
 
+                        chunk_orders.append(order_data)
+                        row_numbers[order_data["case_id"]] = _ + 1
+
+                    except Exception as row_e:
+                        validation_errors.append(f"Row {_ + 1}: {str(row_e)}")
+                        continue
+
+                existing_case_ids, employee_mapping, employee_ssn_mapping, payee_mapping = _resolve_order_keys(chunk_orders)
+
+                for batch_start in range(0, len(chunk_orders), batch_size):
+                    batch_orders_to_create = []
+                    batch_orders_to_update = []
+
+                    for order_data in chunk_orders[batch_start:batch_start + batch_size]:
+                        case_id = order_data.get("case_id")
+
                         # Check if order exists
                         if case_id in existing_case_ids:
                             # Prepare for update
@@ -826,21 +922,32 @@ class UpsertGarnishmentOrderView(APIView):
                             # Prepare for creation
                             batch_orders_to_create.append(order_data)
 
-                    except Exception as row_e:
-                        validation_errors.append(f"Row {batch_start + _ + 1}: {str(row_e)}")
-                        continue
-                
-                # Bulk create new orders
-                if batch_orders_to_create:
-                    created_case_ids, skip_reasons = self._bulk_create_orders(batch_orders_to_create, employee_mapping, employee_ssn_mapping, state_mapping, garnishment_type_mapping, payee_mapping)
-                    added_orders.extend(created_case_ids)
-                    validation_errors.extend(skip_reasons[:20])  # Add first 20 detailed skip reasons
-                    # Update existing_case_ids set to include newly created orders
-                    existing_case_ids.update(created_case_ids)
-                
-                # Bulk update existing orders
-                if batch_orders_to_update:
-                    self._bulk_update_orders(batch_orders_to_update, employee_mapping, state_mapping, garnishment_type_mapping, payee_mapping)
+                    # Bulk create new orders
+                    if batch_orders_to_create:
+                        created_case_ids, conflicting_case_ids, skip_reasons = self._bulk_create_orders(batch_orders_to_create, employee_mapping, employee_ssn_mapping, state_mapping, garnishment_type_mapping, payee_mapping, row_numbers)
+                        added_orders.extend(created_case_ids)
+                        # All of them go to the error report; only the response is truncated
+                        validation_errors.extend(skip_reasons)
+                        # Update existing_case_ids set to include newly created orders
+                        existing_case_ids.update(created_case_ids)
+                        # Orders created elsewhere since the lookup are updated like the existing ones
+                        orders_to_create_by_case_id = {order.get("case_id"): order for order in batch_orders_to_create}
+                        for case_id in conflicting_case_ids:
+                            batch_orders_to_update.append((case_id, orders_to_create_by_case_id[case_id]))
+                            updated_orders.append(case_id)
+                        existing_case_ids.update(conflicting_case_ids)
+
+                    # Bulk update existing orders
+                    if batch_orders_to_update:
+                        self._bulk_update_orders(batch_orders_to_update, employee_mapping, state_mapping, garnishment_type_mapping, payee_mapping)
+
+                progress.chunk(
+                    len(df),
+                    rows_validated=len(chunk_orders),
+                    rows_inserted=len(added_orders) - chunk_added_start,
+                    rows_updated=len(updated_orders) - chunk_updated_start,
+                    errors=validation_errors[chunk_errors_start:],
+                )
             
             # Build response data
             response_data = {
@@ -938,12 +1045,13 @@ class UpsertGarnishmentOrderView(APIView):
         except Exception as e:
             raise Exception(f"Error processing row: {str(e)}")
     
-    def _bulk_create_orders(self, orders_data, employee_mapping, employee_ssn_mapping, state_mapping, garnishment_type_mapping, payee_mapping):
-        """Bulk create orders using bulk_create for better performance. Returns list of successfully created case_ids."""
+    def _bulk_create_orders(self, orders_data, employee_mapping, employee_ssn_mapping, state_mapping, garnishment_type_mapping, payee_mapping, row_numbers=None):
+        """Bulk create orders using bulk_create for better performance. Returns tuple of (created_case_ids, conflicting_case_ids, skip_reasons)."""
         if not orders_data:
-            return [], []
+            return [], [], []
             
         created_case_ids = []
+        conflicting_case_ids = []
         skip_reasons = []
         try:
             from django.db import transaction
@@ -971,7 +1079,7 @@ class UpsertGarnishmentOrderView(APIView):
                             employee_id = employee_ssn_mapping.get(key)
                         
                         if not employee_id:
-                            skip_reasons.append(f"case_id={case_id}: No employee found for ee_id={ee_id or 'N/A'} or ssn={ssn or 'N/A'}")
+                            skip_reasons.append(_skip_reason(row_numbers, case_id, f"No employee found for ee_id={ee_id or 'N/A'} or ssn={ssn or 'N/A'}"))
                             continue  # Skip if no valid employee found
                         
                         # Validate required foreign keys (case-insensitive)
@@ -983,14 +1091,14 @@ class UpsertGarnishmentOrderView(APIView):
                         if payee_id_str:
                             payee_id = payee_mapping.get(str(payee_id_str).strip())
                             if not payee_id:
-                                skip_reasons.append(f"case_id={case_id}: No payee found for payee_id={payee_id_str}")
+                                skip_reasons.append(_skip_reason(row_numbers, case_id, f"No payee found for payee_id={payee_id_str}"))
                                 continue  # Skip if payee not found
                         
                         if not issuing_state_id:
-                            skip_reasons.append(f"case_id={case_id}: Invalid issuing_state='{issuing_state or 'N/A'}'")
+                            skip_reasons.append(_skip_reason(row_numbers, case_id, f"Invalid issuing_state='{issuing_state or 'N/A'}'"))
                             continue  # Skip if issuing_state is missing or invalid
                         if not garnishment_type_id:
-                            skip_reasons.append(f"case_id={case_id}: Invalid garnishment_type='{garnishment_type or 'N/A'}'")
+                            skip_reasons.append(_skip_reason(row_numbers, case_id, f"Invalid garnishment_type='{garnishment_type or 'N/A'}'"))
                             continue  # Skip if garnishment_type is missing or invalid
                         
                         bulk_orders.append(GarnishmentOrder(
@@ -1038,14 +1146,24 @@ class UpsertGarnishmentOrderView(APIView):
                         ))
                         created_case_ids.append(case_id)
                     except Exception as e:
-                        skip_reasons.append(f"case_id={case_id or 'N/A'}: Exception - {str(e)}")
+                        skip_reasons.append(_skip_reason(row_numbers, case_id or 'N/A', f"Exception - {str(e)}"))
                         continue  # Skip problematic records
                 
                 # Bulk create
                 if bulk_orders:
-                    GarnishmentOrder.objects.bulk_create(bulk_orders, ignore_conflicts=True)
+                    if CopyUpsertLoader.is_available():
+                        # No update fields: a conflict only touches updated_at, and the
+                        # caller sends the row through _bulk_update_orders instead
+                        result = CopyUpsertLoader(GarnishmentOrder, 'case_id', update_fields=[]).upsert(bulk_orders)
+                        created_case_ids = result.inserted
+                        conflicting_case_ids = result.updated
+                    else:
+                        GarnishmentOrder.objects.bulk_create(bulk_orders, ignore_conflicts=True)
+
+                # bulk_create skips the save signals; record the batch as a single audit entry
+                log_model_bulk_operation("CREATE", "GarnishmentOrder", created_case_ids)
                 
-                return created_case_ids, skip_reasons
+                return created_case_ids, conflicting_case_ids, skip_reasons
                     
         except Exception as e:
             raise Exception(f"Bulk create failed: {str(e)}")
@@ -1131,28 +1249,26 @@ class UpsertGarnishmentOrderView(APIView):
                 
                 # Bulk update
                 if orders_to_update:
-                    GarnishmentOrder.objects.bulk_update(
-                        orders_to_update,
-                        ['is_consumer_debt', 'issued_date', 'received_date', 'start_date', 'stop_date',
-                         'deduction_code', 'ordered_amount', 'garnishment_fees', 'fips_code', 'voucher_for_payroll',
-                         'status', 'amount_of_deduction', 'override_amount', 'override_start_date',
-                         'override_stop_date', 'paid_till_date', 'arrear_greater_than_12_weeks', 'arrear_amount',
-                         'current_child_support', 'current_medical_support', 'current_spousal_support',
-                             'medical_support_arrear', 'child_support_arrear', 'spousal_support_arrear',
-                             # Exempt threshold/table fields
-                             'ower_threshold_amount', 'lower_threshold_percent1', 'lower_threshold_percent2',
-                             'mid_threshold_amount', 'mid_threshold_percent', 'upper_threshold_amount',
-                             'upper_threshold_percent', 'de_range_lower_to_upper_threshold_percent',
-                             'de_range_lower_to_mid_threshold_percent', 'de_range_mid_to_upper_threshold_percent',
-                             'gp_lower_threshold_amount', 'gp_lower_threshold_percent1', 'exempt_amt',
-                             'filing_status_percent',
-                         'pay_date', 'pay_period_limit', 'total_amount_owed', 'monthly_limit', 'exempt_amount',
-                         'ytd_deductions', 'ach_sent', 'ap_check', 'date_of_ap_payment',
-                         'override_child_support', 'override_medical_support', 'override_spousal_support',
-                         'override_child_support_arrear', 'override_medical_support_arrear', 'override_spousal_support_arrear',
-                         'override_limit', 'override_percent',
-                         'issuing_state_id', 'garnishment_type_id', 'updated_at']
-                    )
+                    if CopyUpsertLoader.is_available():
+                        CopyUpsertLoader(
+                            GarnishmentOrder, 'case_id', update_fields=ORDER_IMPORT_UPDATE_FIELDS
+                        ).upsert(orders_to_update)
+                    else:
+                        # bulk_update does not apply auto_now, and the export cache
+                        # versions by updated_at
+                        now = timezone.now()
+                        for obj in orders_to_update:
+                            obj.updated_at = now
+                        GarnishmentOrder.objects.bulk_update(
+                            orders_to_update,
+                            ORDER_IMPORT_UPDATE_FIELDS + ['updated_at']
+                        )
+
+                # bulk_update skips the save signals; record the batch as a single audit entry
+                log_model_bulk_operation(
+                    "UPDATE", "GarnishmentOrder", [order.case_id for order in orders_to_update],
+                    fields=ORDER_IMPORT_UPDATE_FIELDS
+                )
                     
         except Exception as e:
             raise Exception(f"Bulk update failed: {str(e)}")
@@ -1160,12 +1276,20 @@ class UpsertGarnishmentOrderView(APIView):
 
 class ExportGarnishmentOrderDataView(APIView):
     """
-    API view to export garnishment order data as an Excel file.
+    API view to export garnishment order data as an Excel (or CSV) file.
     Provides robust exception handling and clear response messages.
     """
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                EXPORT_FORMAT_PARAM, openapi.IN_QUERY,
+                description="File format: xlsx (default) or csv",
+                type=openapi.TYPE_STRING, enum=['xlsx', 'csv']
+            )
+        ],
         responses={
             200: 'Excel file exported successfully',
+            400: 'Unsupported export format',
             404: 'No garnishment orders found',
             500: 'Internal server error'
         }
@@ -1173,105 +1297,24 @@ class ExportGarnishmentOrderDataView(APIView):
     def get(self, request):
         """
         Handles GET request to export all garnishment orders to an Excel file.
+        Rows are streamed through the shared export engine (write-only workbook / CSV).
         """
         try:
-            # Fetch all garnishment orders from the database
-            orders = GarnishmentOrder.objects.all()
-            if not orders.exists():
+            export = garnishment_order_export()
+            if not export.queryset.exists():
                 return ResponseHelper.error_response(
                     message="No garnishment orders found",
                     status_code=status.HTTP_404_NOT_FOUND
                 )
 
-            serializer = GarnishmentOrderSerializer(orders, many=True)
-
-            # Create Excel workbook and worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Garnishment Orders"
-
-            # Define header fields (use constants where available)
-            header_fields = [
-            "id",
-            EE.CASE_ID,
-            EE.SSN,
-            EE.EMPLOYEE_ID,
-            "issuing_state",
-            "garnishment_type",
-            "garnishment_fees",
-            "voucher_for_payroll",
-            "override_amount",
-            "override_start_date",
-            "override_stop_date",
-            "paid_till_date",
-            "is_consumer_debt",
-            "issued_date",
-            "received_date",
-            "start_date",
-            "stop_date",
-            "ordered_amount",
-            "status",
-            "amount_of_deduction",
-            "current_child_support",
-            "current_medical_support",
-            "child_support_arrear",
-            "medical_support_arrear",
-            "current_spousal_support",
-            "spousal_support_arrear",
-            "fips_code",
-            "arrear_greater_than_12_weeks",
-            CA.ARREAR_AMOUNT,
-            "pay_date",
-            "pay_period_limit",
-            "total_amount_owed",
-            "monthly_limit",
-            "exempt_amount",
-            # Exempt threshold/table fields
-            "ower_threshold_amount",
-            "lower_threshold_percent1",
-            "lower_threshold_percent2",
-            "mid_threshold_amount",
-            "mid_threshold_percent",
-            "upper_threshold_amount",
-            "upper_threshold_percent",
-            "de_range_lower_to_upper_threshold_percent",
-            "de_range_lower_to_mid_threshold_percent",
-            "de_range_mid_to_upper_threshold_percent",
-            "gp_lower_threshold_amount",
-            "gp_lower_threshold_percent1",
-            "exempt_amt",
-            "filing_status_percent",
-            "ytd_deductions",
-            "ach_sent",
-            "ap_check",
-            "date_of_ap_payment",
-            "created_at",
-            "updated_at",
-            ]
-
-            ws.append(header_fields)
-
-            # Write data rows to the worksheet
-            for order in serializer.data:
-                row = [order.get(field, '') for field in header_fields]
-                ws.append(row)
+            return export.as_response(request)
 
-            # Save workbook to in-memory buffer
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            # Prepare HTTP response with Excel content
-            filename = f'garnishment_orders_{datetime.today().strftime("%m-%d-%y")}.xlsx'
-            response = HttpResponse(
-                buffer,
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        except ValueError as e:
+            return ResponseHelper.error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
             )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-
         except Exception as e:
-            # logger.error(f"Error exporting garnishment order data: {e}")
             return ResponseHelper.error_response(
                 message="Failed to export garnishment order data",
                 error=str(e),
@@ -1279,6 +1322,7 @@ class ExportGarnishmentOrderDataView(APIView):
             )
 
 
+
 class GarnishmentOrderAPI(APIView):
     """
     List and Create Garnishment Orders.
@@ -0,0 +1,163 @@
+import logging
+import os
+
+from django.http import FileResponse
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.views import APIView
+
+from processor.garnishment_library.utils.response import ResponseHelper
+from user_app.models import ImportJob
+from user_app.serializers.import_job_serializers import ImportJobRequestSerializer, ImportJobSerializer
+from user_app.services.import_jobs import ImportJobService
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobCreateAPI(APIView):
+    """
+    Submit an employee, garnishment order, payee, client or PEO file as a background import.
+    Returns the job immediately; poll the status endpoint for progress.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                name='import_type',
+                in_=openapi.IN_FORM,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description="employees, garnishment_orders, garnishment_orders_upsert, payees, clients or peos"
+            ),
+            openapi.Parameter(
+                name='file',
+                in_=openapi.IN_FORM,
+                type=openapi.TYPE_FILE,
+                required=True,
+                description="Excel or CSV file to import"
+            ),
+            openapi.Parameter(
+                name='include_all_ids',
+                in_=openapi.IN_FORM,
+                type=openapi.TYPE_BOOLEAN,
+                required=False,
+                description="Employees only: return every added/updated ee_id in the job result"
+            ),
+        ],
+        responses={
+            202: 'Import job created',
+            400: 'Invalid import type or unsupported file format',
+            500: 'Internal server error'
+        }
+    )
+    def post(self, request):
+        serializer = ImportJobRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return ResponseHelper.error_response(
+                'Invalid request data',
+                serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = serializer.validated_data
+        options = {}
+        if data.get('include_all_ids'):
+            options['include_all_ids'] = 'true'
+
+        try:
+            job = ImportJobService.submit(
+                data['import_type'],
+                data['file'],
+                options=options,
+                user=request.user,
+            )
+        except ValueError as e:
+            return ResponseHelper.error_response(
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.exception("Failed to create import job")
+            return ResponseHelper.error_response(
+                'Failed to create import job',
+                str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return ResponseHelper.success_response(
+            'Import job created',
+            ImportJobSerializer(job).data,
+            status_code=status.HTTP_202_ACCEPTED
+        )
+
+
+class ImportJobStatusAPI(APIView):
+    """
+    Check the status and progress counters of an import job.
+    """
+
+    @swagger_auto_schema(
+        responses={
+            200: 'Success - Returns import job status',
+            404: 'Import job not found',
+        }
+    )
+    def get(self, request, job_id):
+        job = ImportJob.objects.filter(job_id=job_id).first()
+        if job is None:
+            return ResponseHelper.error_response(
+                f'Import job "{job_id}" not found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        return ResponseHelper.success_response(
+            'Import job fetched successfully',
+            ImportJobSerializer(job).data
+        )
+
+
+class ImportJobErrorReportAPI(APIView):
+    """
+    Download the row-level errors of an import job as CSV.
+    """
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('job_id', openapi.IN_PATH, type=openapi.TYPE_STRING, description='Import job id'),
+        ],
+        responses={
+            200: 'CSV error report',
+            404: 'Import job or error report not found',
+            409: 'Import job is still running',
+        }
+    )
+    def get(self, request, job_id):
+        job = ImportJob.objects.filter(job_id=job_id).first()
+        if job is None:
+            return ResponseHelper.error_response(
+                f'Import job "{job_id}" not found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        if job.status in (ImportJob.STATUS_PENDING, ImportJob.STATUS_RUNNING):
+            return ResponseHelper.error_response(
+                f'Import job is {job.status}',
+                status_code=status.HTTP_409_CONFLICT
+            )
+
+        path = ImportJobService.error_report_path(job)
+        if not path or not os.path.exists(path):
+            return ResponseHelper.error_response(
+                'No error report for this import job',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        base_name = os.path.splitext(job.file_name)[0]
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=f'{base_name}_errors.csv',
+            content_type='text/csv'
+        )
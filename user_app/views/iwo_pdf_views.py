@@ -1,24 +1,21 @@
 
 from rest_framework import status
-from vercel_blob import put
-import numpy as np
-from azure.ai.formrecognizer import DocumentAnalysisClient
-from azure.core.credentials import AzureKeyCredential
 from rest_framework.parsers import MultiPartParser, FormParser
 import os
-from user_app.serializers import (IWOPDFFilesSerializer, WithholdingOrderDataSerializers)
+from user_app.serializers import WithholdingOrderDataSerializers
 import logging
-import time
 import random
-import secrets
 import traceback as t
-import string
 import json
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 import pandas as pd
 from user_app.models import (IWODetailsPDF, IWOPDFFiles)
 from user_app.models.iwo_pdf.iwo_pdf_extraction import WithholdingOrderData
+from user_app.services.iwo_pdf_ingestion import IWOPDFIngestionPipeline
+from user_app.services.payroll_ingestion import PayrollIngestionService
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from user_app.constants import (
@@ -115,26 +112,66 @@ class InsertIWODetailView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-# Helper function to replace NaNs with None recursively
 
+# Output columns of a converted payroll row; columns missing from the sheet default to 0
+PAYROLL_RECORD_FIELDS = [
+    EE.CLIENT_ID, EE.EMPLOYEE_ID, EE.PAY_PERIOD, EE.PAYROLL_DATE,
+    CA.WAGES, CA.COMMISSION_AND_BONUS, CA.NON_ACCOUNTABLE_ALLOWANCES, CA.GROSS_PAY,
+]
+PAYROLL_TAX_FIELDS = [
+    PT.FEDERAL_INCOME_TAX, PT.STATE_TAX, PT.LOCAL_TAX, PT.MEDICARE_TAX,
+    PT.SOCIAL_SECURITY_TAX, PT.WILMINGTON_TAX, PT.CALIFORNIA_SDI,
+    PT.MEDICAL_INSURANCE_PRETAX, PT.LIFE_INSURANCE, PT.RETIREMENT_401K,
+    PT.INDUSTRIAL_INSURANCE, PT.UNION_DUES,
+]
+PAYROLL_NO_DEFAULT_FIELDS = {EE.CLIENT_ID, EE.EMPLOYEE_ID, EE.PAY_PERIOD, EE.PAYROLL_DATE}
 
-def clean_data_for_json(data):
+
+def build_payroll_records(payroll_df):
+    """
+    Convert the renamed payroll sheet into payroll_data records.
+
+    Cleaning is done once per column: object dtype turns NumPy scalars into
+    native Python values and NaN/NaT become None, so the records zipped from
+    the column lists are JSON serializable without walking every cell.
+    """
+    row_count = len(payroll_df.index)
+    columns = {}
+    for field in PAYROLL_RECORD_FIELDS + PAYROLL_TAX_FIELDS + [CA.NET_PAY]:
+        if field in payroll_df.columns:
+            series = payroll_df[field]
+            if isinstance(series, pd.DataFrame):
+                # Duplicate headers: use the first column
+                series = series.iloc[:, 0]
+            series = series.astype(object)
+            columns[field] = series.where(series.notna(), None).tolist()
+        else:
+            default = None if field in PAYROLL_NO_DEFAULT_FIELDS else 0
+            columns[field] = [default] * row_count
+
+    taxes = [
+        dict(zip(PAYROLL_TAX_FIELDS, values))
+        for values in zip(*(columns[field] for field in PAYROLL_TAX_FIELDS))
+    ]
+    payroll_data = []
+    for values, payroll_taxes, net_pay in zip(
+        zip(*(columns[field] for field in PAYROLL_RECORD_FIELDS)), taxes, columns[CA.NET_PAY]
+    ):
+        record = dict(zip(PAYROLL_RECORD_FIELDS, values))
+        record[PT.PAYROLL_TAXES] = payroll_taxes
+        record[CA.NET_PAY] = net_pay
+        payroll_data.append(record)
+    return payroll_data
+
+
+def iter_ndjson(records):
     """
-    Recursively convert NaN to None and NumPy types to native Python types
-    so the structure is JSON serializable.
+    Yield records as newline-delimited JSON, one record per line.
     """
-    if isinstance(data, dict):
-        return {k: clean_data_for_json(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [clean_data_for_json(item) for item in data]
-    elif pd.isna(data):
-        return None
-    elif isinstance(data, (np.integer, np.floating)):
-        return data.item()
-    elif isinstance(data, (np.bool_, bool)):
-        return bool(data)
-    else:
-        return data
+    encoder = JSONEncoder()
+    for record in records:
+        yield encoder.encode(record) + "\n"
+
 
 class ConvertExcelToJsonView(APIView):
     parser_classes = [MultiPartParser, FormParser]
@@ -154,6 +191,13 @@ class ConvertExcelToJsonView(APIView):
                 type=openapi.TYPE_STRING,
                 required=False,
                 description="Optional title"
+            ),
+            openapi.Parameter(
+                name='stream',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_BOOLEAN,
+                required=False,
+                description="Stream payroll_data as NDJSON (one record per line); the batch id is sent in the X-Batch-Id header"
             )
         ],
         responses={
@@ -218,43 +262,18 @@ class ConvertExcelToJsonView(APIView):
 
 
             # Generate dynamic batch ID
-            batch_id = f"B{int(time.time() % 1000):03d}{secrets.choice(string.ascii_uppercase)}"
-
-            # Build JSON structure
-            output_json = {BatchDetail.BATCH_ID: batch_id, "payroll_data": []}
-
-            # Loop over each row in the DataFrame
-            for _, row in payroll_df.iterrows():
-                client_id = row.get(EE.CLIENT_ID)
-                ee_id = row.get(EE.EMPLOYEE_ID)
-                
-                output_json["payroll_data"].append({
-                    EE.CLIENT_ID: client_id,
-                    EE.EMPLOYEE_ID: ee_id,
-                    EE.PAY_PERIOD: row.get(EE.PAY_PERIOD),
-                    EE.PAYROLL_DATE: row.get(EE.PAYROLL_DATE),
-                    CA.WAGES: row.get(CA.WAGES, 0),
-                    CA.COMMISSION_AND_BONUS: row.get(CA.COMMISSION_AND_BONUS, 0),
-                    CA.NON_ACCOUNTABLE_ALLOWANCES: row.get(CA.NON_ACCOUNTABLE_ALLOWANCES, 0),
-                    CA.GROSS_PAY: row.get(CA.GROSS_PAY, 0),
-                    PT.PAYROLL_TAXES: {
-                        PT.FEDERAL_INCOME_TAX: row.get(PT.FEDERAL_INCOME_TAX, 0),
-                        PT.STATE_TAX: row.get(PT.STATE_TAX, 0),
-                        PT.LOCAL_TAX: row.get(PT.LOCAL_TAX, 0),
-                        PT.MEDICARE_TAX: row.get(PT.MEDICARE_TAX, 0),
-                        PT.SOCIAL_SECURITY_TAX: row.get(PT.SOCIAL_SECURITY_TAX, 0),
-                        PT.WILMINGTON_TAX: row.get(PT.WILMINGTON_TAX, 0),
-                        PT.CALIFORNIA_SDI: row.get(PT.CALIFORNIA_SDI, 0),
-                        PT.MEDICAL_INSURANCE_PRETAX: row.get(PT.MEDICAL_INSURANCE_PRETAX, 0),
-                        PT.LIFE_INSURANCE: row.get(PT.LIFE_INSURANCE, 0),
-                        PT.RETIREMENT_401K: row.get(PT.RETIREMENT_401K, 0),
-                        PT.INDUSTRIAL_INSURANCE: row.get(PT.INDUSTRIAL_INSURANCE, 0),
-                        PT.UNION_DUES: row.get(PT.UNION_DUES, 0),
-                    },
-                    CA.NET_PAY: row.get(CA.NET_PAY, 0),
-                })
+            batch_id = PayrollIngestionService.generate_batch_id()
+
+            payroll_data = build_payroll_records(payroll_df)
+
+            if str(request.query_params.get('stream', request.data.get('stream', ''))).lower() in ('1', 'true', 'yes'):
+                response = StreamingHttpResponse(
+                    iter_ndjson(payroll_data), content_type='application/x-ndjson'
+                )
+                response['X-Batch-Id'] = batch_id
+                return response
 
-            output_json = clean_data_for_json(output_json)
+            output_json = {BatchDetail.BATCH_ID: batch_id, "payroll_data": payroll_data}
             return Response(output_json, status=status.HTTP_200_OK)
         except KeyError as e:
             return Response({"error": f"Missing key in data: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
@@ -265,64 +284,6 @@ class ConvertExcelToJsonView(APIView):
 
 
 
-def handle_single_file(file):
-    """
-    Handles the upload, storage, and analysis of a single PDF file.
-    Returns serialized data or error details.
-    """
-    try:
-        file_bytes = file.read()
-        endpoint = os.getenv("AZURE_ENDPOINT")
-        key = os.getenv("AZURE_KEY")
-
-        if not endpoint or not key:
-            raise ValueError("Azure endpoint or key not configured.")
-
-        # Upload file to blob storage
-        blob_info = put(f"PDFFiles/{file.name}", file_bytes)
-        blob_url = blob_info.get("url")
-        if not blob_url:
-            raise ValueError("Failed to upload file to blob storage.")
-
-        # Save file record in database
-        obj = IWOPDFFiles.objects.create(name=file.name, pdf_url=blob_url)
-        serializer = IWOPDFFilesSerializer(obj)
-
-        # Analyze file content using Azure Form Recognizer
-        document_analysis_client = DocumentAnalysisClient(
-            endpoint=endpoint,
-            credential=AzureKeyCredential(key)
-        )
-        poller = document_analysis_client.begin_analyze_document(
-            model_id="from_data", document=file_bytes)
-        result = poller.result()
-
-        documents_data = []
-        for idx, doc in enumerate(result.documents):
-            fields = {
-                field_name: (field.value if field.value else 0)
-                for field_name, field in doc.fields.items()
-            }
-            fields["id"] = obj.id
-            documents_data.append({"fields": fields})
-
-        # Save extracted data to withholding_order_data model
-        if documents_data:
-            WithholdingOrderData.objects.create(
-                **documents_data[0]["fields"])
-
-        return serializer.data
-
-    except Exception as e:
-        # Log the error if logging is set up
-        # logger.error(f"Error in handle_single_file: {e}")
-        return {
-            'success': False,
-            'message': 'Error occurred while uploading the file',
-            'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR,
-            'data': None,
-            "error": str(e)
-        }
 file_upload_schema = openapi.Schema(
     type=openapi.TYPE_OBJECT,
     properties={
@@ -357,15 +318,14 @@ class PDFUploadView(APIView):
             if not files:
                 return Response({"error": "No files provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-            results = []
-            for file in files:
-                result = handle_single_file(file)
-                results.append(result)
+            pipeline = IWOPDFIngestionPipeline()
+            results = pipeline.ingest(files)
 
             return Response({
                 'success': True,
                 "message": "IWO PDF Files Successfully uploaded",
                 "status_code": status.HTTP_201_CREATED,
+                "skipped_duplicates": pipeline.duplicate_count,
                 "results": results
             }, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -3,47 +3,35 @@ from rest_framework import status
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.conf import settings
+from django.utils import timezone
 from io import BytesIO, StringIO
 import re
 import csv
+import logging
 
-from user_app.models import LetterTemplate, GarnishmentOrder, EmployeeDetail, PayeeDetails
-from user_app.serializers import LetterTemplateSerializer, LetterTemplateFillSerializer, LetterTemplateVariableValuesSerializer, GarnishmentOrderSerializer, LetterTemplateExportSerializer
+from user_app.models import LetterTemplate, LetterBulkRun, GarnishmentOrder, EmployeeDetail, PayeeDetails
+from user_app.serializers import LetterTemplateSerializer, LetterTemplateFillSerializer, LetterTemplateVariableValuesSerializer, GarnishmentOrderSerializer, LetterTemplateExportSerializer, LetterTemplateBulkFillSerializer
 from user_app.services.letter_template_data_service import LetterTemplateDataService
+from user_app.services.letter_template_engine import LetterTemplateEngine, CompiledLetterTemplate
+from user_app.services.export_definitions import letter_result_export
 from processor.garnishment_library.utils import ResponseHelper
 from processor.models.garnishment_result.result import GarnishmentResult
 from rest_framework.decorators import api_view
 
-# PDF generation
-try:
-    from weasyprint import HTML
-    WEASYPRINT_AVAILABLE = True
-except (ImportError, OSError) as e:
-    WEASYPRINT_AVAILABLE = False
-    try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib.units import inch
-        REPORTLAB_AVAILABLE = True
-    except ImportError:
-        REPORTLAB_AVAILABLE = False
+from user_app.services.letter_document_renderer import (
+    BulkLetterRenderer,
+    DocumentRenderingUnavailable,
+    DOCUMENT_FORMATS,
+    normalize_format,
+    html_to_text,
+    render_pdf,
+    render_docx,
+    render_txt,
+)
 
-# DOC generation
-try:
-    from docx import Document
-    from docx.shared import Inches
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-
-# HTML to text conversion
-try:
-    import html2text
-    HTML2TEXT_AVAILABLE = True
-except ImportError:
-    HTML2TEXT_AVAILABLE = False
+logger = logging.getLogger(__name__)
 
 
 class LetterTemplateListAPI(APIView):
@@ -288,9 +276,9 @@ class LetterTemplateVariablesAPI(APIView):
             
             # Fetch all data
             try:
-                employee_data = LetterTemplateDataService.fetch_employee_data(employee_id)
-                order_data = LetterTemplateDataService.fetch_order_data(employee_id, order_id)
-                payee_data = LetterTemplateDataService.fetch_payee_data(employee_id, order_id)
+                employee_data, order_data, payee_data = LetterTemplateDataService.get_variable_groups(
+                    employee_id, order_id
+                )
             except ValueError as e:
                 return ResponseHelper.error_response(
                     str(e),
@@ -472,21 +460,26 @@ class LetterTemplateFillAPI(APIView):
                 # Manual mode: Use provided variable_values
                 variable_values = manual_variable_values
             
-            # Fill template variables
-            filled_content = self._fill_template(template.html_content, variable_values)
+            # Fill template variables using the cached compiled template (single pass)
+            filled_content, missing_variables = LetterTemplateEngine.render(template, variable_values)
             
             # Generate file based on format
             if export_format == 'pdf':
-                return self._generate_pdf(filled_content, template.name)
+                response = self._generate_pdf(filled_content, template.name)
             elif export_format in ['doc', 'docx']:
-                return self._generate_docx(filled_content, template.name)
+                response = self._generate_docx(filled_content, template.name)
             elif export_format in ['txt', 'text']:
-                return self._generate_txt(filled_content, template.name)
+                response = self._generate_txt(filled_content, template.name)
             else:
                 return ResponseHelper.error_response(
                     f'Unsupported format: {export_format}. Supported formats: pdf, doc, docx, txt, text',
                     status_code=status.HTTP_400_BAD_REQUEST
                 )
+            
+            # Report placeholders that had no value so callers can spot incomplete letters
+            if missing_variables:
+                response['X-Unfilled-Variables'] = ','.join(missing_variables)
+            return response
                 
         except Exception as e:
             return ResponseHelper.error_response(
@@ -499,113 +492,280 @@ class LetterTemplateFillAPI(APIView):
         """
         Replace {{variable_name}} placeholders with actual values.
         """
-        filled_content = html_content
-        for var_name, var_value in variable_values.items():
-            # Replace {{variable_name}} with actual value
-            pattern = r'\{\{' + re.escape(var_name) + r'\}\}'
-            filled_content = re.sub(pattern, str(var_value), filled_content)
-        return filled_content
+        return CompiledLetterTemplate(html_content).render(variable_values)
     
     def _generate_pdf(self, html_content, template_name):
         """
         Generate PDF from HTML content.
         """
-        if WEASYPRINT_AVAILABLE:
-            # Use WeasyPrint for better HTML to PDF conversion
-            html = HTML(string=html_content)
-            pdf_buffer = BytesIO()
-            html.write_pdf(pdf_buffer)
-            pdf_buffer.seek(0)
-            
-            response = HttpResponse(pdf_buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{template_name}_letter.pdf"'
-            return response
-        elif REPORTLAB_AVAILABLE:
-            # Fallback to ReportLab
-            pdf_buffer = BytesIO()
-            doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Convert HTML to plain text for ReportLab
-            text_content = self._html_to_text(html_content)
-            paragraphs = text_content.split('\n\n')
-            
-            for para in paragraphs:
-                if para.strip():
-                    p = Paragraph(para.strip(), styles['Normal'])
-                    story.append(p)
-                    story.append(Spacer(1, 0.2*inch))
-            
-            doc.build(story)
-            pdf_buffer.seek(0)
-            
-            response = HttpResponse(pdf_buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{template_name}_letter.pdf"'
-            return response
-        else:
+        try:
+            pdf_bytes = render_pdf(html_content)
+        except DocumentRenderingUnavailable as e:
             return ResponseHelper.error_response(
-                'PDF generation not available. Please install weasyprint or reportlab.',
+                str(e),
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE
             )
+        
+        response = HttpResponse(pdf_bytes, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{template_name}_letter.pdf"'
+        return response
     
     def _generate_docx(self, html_content, template_name):
         """
         Generate DOCX from HTML content.
         """
-        if DOCX_AVAILABLE:
-            doc = Document()
+        try:
+            doc_bytes = render_docx(html_content)
+        except DocumentRenderingUnavailable as e:
+            return ResponseHelper.error_response(
+                str(e),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        response = HttpResponse(
+            doc_bytes,
+            content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{template_name}_letter.docx"'
+        return response
+    
+    def _generate_txt(self, html_content, template_name):
+        """
+        Generate TXT from HTML content.
+        """
+        response = HttpResponse(render_txt(html_content), content_type='text/plain')
+        response['Content-Disposition'] = f'attachment; filename="{template_name}_letter.txt"'
+        return response
+    
+    def _html_to_text(self, html_content):
+        """
+        Basic HTML to text conversion.
+        """
+        return html_to_text(html_content)
+
+
+class LetterTemplateBulkFillAPI(APIView):
+    """
+    API view to generate one letter per employee/order and stream them back as a ZIP.
+    Documents are rendered in a process pool; progress is stored in a
+    LetterBulkRun under the run id returned in the X-Bulk-Run-Id header.
+    """
+    PROGRESS_UPDATE_EVERY = 25
+    VARIABLE_LOAD_CHUNK_SIZE = 500
+    
+    @swagger_auto_schema(
+        request_body=LetterTemplateBulkFillSerializer,
+        responses={
+            200: 'ZIP archive streamed successfully',
+            400: 'Invalid data',
+            404: 'Template not found or no letters matched',
+            500: 'Internal server error'
+        }
+    )
+    def post(self, request):
+        """
+        Fill a template for many employees/orders and return a ZIP archive.
+        """
+        try:
+            serializer = LetterTemplateBulkFillSerializer(data=request.data)
+            if not serializer.is_valid():
+                return ResponseHelper.error_response(
+                    'Invalid data',
+                    serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
             
-            # Convert HTML to text and add to document
-            if HTML2TEXT_AVAILABLE:
-                text_content = html2text.html2text(html_content)
-            else:
-                text_content = self._html_to_text(html_content)
+            validated_data = serializer.validated_data
+            export_format = normalize_format(validated_data.get('format', 'pdf'))
+            manual_variable_values = validated_data.get('variable_values') or {}
             
-            paragraphs = text_content.split('\n\n')
+            try:
+                template = LetterTemplate.objects.get(pk=validated_data['template_id'])
+            except LetterTemplate.DoesNotExist:
+                return ResponseHelper.error_response(
+                    f'Letter template with id "{validated_data["template_id"]}" not found',
+                    status_code=status.HTTP_404_NOT_FOUND
+                )
             
-            for para in paragraphs:
-                if para.strip():
-                    doc.add_paragraph(para.strip())
+            targets, unmatched_order_ids = self._resolve_targets(validated_data)
+            if not targets:
+                return ResponseHelper.error_response(
+                    'No employees or orders matched the request',
+                    status_code=status.HTTP_404_NOT_FOUND
+                )
             
-            doc_buffer = BytesIO()
-            doc.save(doc_buffer)
-            doc_buffer.seek(0)
+            max_letters = getattr(settings, 'LETTER_BULK_MAX_LETTERS', 5000)
+            if len(targets) > max_letters:
+                return ResponseHelper.error_response(
+                    f'Too many letters requested ({len(targets)}). Maximum per request is {max_letters}.',
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
             
-            response = HttpResponse(
-                doc_buffer,
-                content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            total = len(targets)
+            run = LetterBulkRun.objects.create(template=template, total=total)
+            run_id = run.run_id
+            
+            errors = [f'{order_id}: order not found' for order_id in unmatched_order_ids]
+            renderer = BulkLetterRenderer(
+                export_format,
+                max_workers=getattr(settings, 'LETTER_BULK_RENDER_WORKERS', 2)
             )
-            response['Content-Disposition'] = f'attachment; filename="{template_name}_letter.docx"'
+            
+            counters = {'rendered': 0, 'published': 0}
+            
+            def on_progress(rendered, failed):
+                counters['rendered'] = rendered
+                # failed can jump by several lookup errors at once, so publish
+                # once enough letters are done rather than on exact multiples
+                if rendered + failed - counters['published'] >= self.PROGRESS_UPDATE_EVERY:
+                    counters['published'] = rendered + failed
+                    self._publish_progress(run_id, rendered, failed, LetterBulkRun.STATUS_RUNNING)
+            
+            def stream():
+                run_status = LetterBulkRun.STATUS_FAILED
+                try:
+                    documents = self._iter_filled_documents(template, targets, manual_variable_values, errors)
+                    yield from renderer.stream_zip(documents, progress_callback=on_progress, errors=errors)
+                    run_status = LetterBulkRun.STATUS_COMPLETED
+                    logger.info(
+                        f"Bulk letter run {run_id} completed: {counters['rendered']} rendered, {len(errors)} failed"
+                    )
+                finally:
+                    # Also reached when the client disconnects mid-stream
+                    self._publish_progress(run_id, counters['rendered'], len(errors), run_status)
+            
+            response = StreamingHttpResponse(stream(), content_type='application/zip')
+            response['Content-Disposition'] = f'attachment; filename="{template.name}_letters.zip"'
+            response['X-Bulk-Run-Id'] = run_id
+            response['X-Bulk-Total'] = str(total)
+            logger.info(f"Bulk letter run {run_id} started for template {template.pk} with {total} letters")
             return response
-        else:
+            
+        except Exception as e:
             return ResponseHelper.error_response(
-                'DOCX generation not available. Please install python-docx.',
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+                'Failed to generate letters',
+                str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def _generate_txt(self, html_content, template_name):
+    def _resolve_targets(self, validated_data):
         """
-        Generate TXT from HTML content.
+        Build the ordered, de-duplicated list of (employee_id, order_id) pairs to render.
+        Returns (targets, unmatched_order_ids).
         """
-        text_content = self._html_to_text(html_content)
+        targets = []
+        seen = set()
         
-        response = HttpResponse(text_content, content_type='text/plain')
-        response['Content-Disposition'] = f'attachment; filename="{template_name}_letter.txt"'
-        return response
+        def add(employee_id, order_id):
+            key = (employee_id, order_id)
+            if key not in seen:
+                seen.add(key)
+                targets.append(key)
+        
+        for employee_id in validated_data.get('employee_ids') or []:
+            if employee_id:
+                add(employee_id, None)
+        
+        order_ids = list(dict.fromkeys(order_id for order_id in validated_data.get('order_ids') or [] if order_id))
+        unmatched_order_ids = []
+        if order_ids:
+            matched = set()
+            for ee_id, case_id in GarnishmentOrder.objects.filter(
+                case_id__in=order_ids
+            ).values_list('employee__ee_id', 'case_id'):
+                matched.add(case_id)
+                add(ee_id, case_id)
+            unmatched_order_ids = [order_id for order_id in order_ids if order_id not in matched]
+        
+        filters = validated_data.get('filters') or {}
+        if filters:
+            orders = GarnishmentOrder.objects.all()
+            if filters.get('client_id'):
+                orders = orders.filter(employee__client__client_id=filters['client_id'])
+            if filters.get('garnishment_type'):
+                orders = orders.filter(garnishment_type__type__iexact=filters['garnishment_type'])
+            if filters.get('issuing_state'):
+                orders = orders.filter(issuing_state__state_code__iexact=filters['issuing_state'])
+            if filters.get('status'):
+                orders = orders.filter(status__iexact=filters['status'])
+            for ee_id, case_id in orders.order_by('employee__ee_id', 'case_id').values_list(
+                'employee__ee_id', 'case_id'
+            ):
+                add(ee_id, case_id)
+        
+        return targets, unmatched_order_ids
     
-    def _html_to_text(self, html_content):
+    def _iter_filled_documents(self, template, targets, manual_variable_values, errors):
+        """
+        Yield (filename, filled_html) for each target; lookup failures are appended to errors.
+        """
+        compiled = LetterTemplateEngine.get_compiled(template)
+        used_filenames = set()
+        for start in range(0, len(targets), self.VARIABLE_LOAD_CHUNK_SIZE):
+            chunk = targets[start:start + self.VARIABLE_LOAD_CHUNK_SIZE]
+            # Two queries per chunk regardless of how many letters it holds
+            chunk_variables, chunk_errors = LetterTemplateDataService.load_template_variables(chunk)
+            for employee_id, order_id in chunk:
+                filename = self._unique_filename(
+                    re.sub(r'[^\w\-]+', '_', f"{employee_id}_{order_id or 'letter'}"),
+                    used_filenames
+                )
+                if (employee_id, order_id) in chunk_errors:
+                    errors.append(f'{filename}: {chunk_errors[(employee_id, order_id)]}')
+                    continue
+                variable_values = {**chunk_variables[(employee_id, order_id)], **manual_variable_values}
+                yield filename, compiled.render(variable_values)
+    
+    @staticmethod
+    def _unique_filename(filename, used_filenames):
+        """
+        Suffix a counter when the sanitised name is already in the archive;
+        compared case-insensitively since ZIPs are often extracted on such filesystems.
+        """
+        candidate = filename
+        counter = 1
+        while candidate.lower() in used_filenames:
+            counter += 1
+            candidate = f'{filename}_{counter}'
+        used_filenames.add(candidate.lower())
+        return candidate
+    
+    @staticmethod
+    def _publish_progress(run_id, rendered, failed, run_status):
+        # A queryset update: no model audit record per progress tick
+        LetterBulkRun.objects.filter(run_id=run_id).update(
+            rendered=rendered,
+            failed=failed,
+            status=run_status,
+            updated_at=timezone.now()
+        )
+
+
+class LetterTemplateBulkProgressAPI(APIView):
+    """
+    API view to check the progress of a bulk letter generation run.
+    """
+    
+    @swagger_auto_schema(
+        responses={
+            200: 'Success - Returns run progress',
+            404: 'Run not found',
+        }
+    )
+    def get(self, request, run_id):
         """
-        Basic HTML to text conversion.
+        Return rendered/failed counters for a bulk letter run.
         """
-        if HTML2TEXT_AVAILABLE:
-            return html2text.html2text(html_content)
-        else:
-            # Remove HTML tags
-            text = re.sub(r'<[^>]+>', '', html_content)
-            # Normalize whitespace
-            text = re.sub(r'\s+', ' ', text)
-            return text.strip()
+        run = LetterBulkRun.objects.filter(run_id=run_id).first()
+        if run is None:
+            return ResponseHelper.error_response(
+                f'Bulk letter run "{run_id}" not found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        return ResponseHelper.success_response(
+            'Bulk letter progress fetched successfully',
+            run.to_progress()
+        )
 
 
 class LetterTemplateOrderFilterAPI(APIView):
@@ -714,65 +874,16 @@ class LetterTemplateExportCSVAPI(APIView):
             # Get export format from request body
             export_format = serializer.validated_data.get('format', 'csv').lower()
             
-            # Get all GarnishmentResult records with related data
-            results = GarnishmentResult.objects.select_related(
-                'ee',  # EmployeeDetail
-                'case',  # GarnishmentOrder
-                'case__issuing_state',  # State
-                'case__garnishment_type',  # GarnishmentType
-                'ee__home_state',  # State
-                'ee__work_state',  # State
-                'ee__client',  # Client
-                'ee__filing_status',  # FedFilingStatus
-            ).all()
-            
-            if not results.exists():
+            # Rows are projected with values_list() across employee, address,
+            # order, payee and payee address instead of per-row lookups
+            export = letter_result_export()
+            if not export.queryset.exists():
                 return ResponseHelper.error_response(
                     'No export data found',
                     status_code=status.HTTP_404_NOT_FOUND
                 )
-            
-            # Define header columns matching the row list exactly (starting from line 1008)
-            header = [
-                # Employee Details (employee_ prefix) - matches row[0-4]
-                'employee_first_name',
-                'employee_middle_name',
-                'employee_last_name',
-                'employee_ssn',
-                'employee_home_state',
-                
-                # Employee Address (employee_address_ prefix) - matches row[5-9]
-                'employee_address_address_1',
-                'employee_address_address_2',
-                'employee_address_city',
-                'employee_address_state',
-                'employee_address_zip_code',
-                
-                # Order Details (garnishment_order_ prefix) - matches row[10-12]
-                'garnishment_order_case_id',
-                'garnishment_order_start_date',
-                'garnishment_order_is_consumer_debt',
-                
-                # Payee Details (payee_ prefix) - matches row[13]
-                'payee_payee',
-                
-                # Payee Address (payee_address_ prefix) - matches row[14-18]
-                'payee_address_address_1',
-                'payee_address_address_2',
-                'payee_address_city',
-                'payee_address_state',
-                'payee_address_zip_code',
-                
-                # GarnishmentResult (result_ prefix) - matches row[19-20]
-                'withholding_amount',
-                'withholding_limit'
 
-            ]
-            
-            if export_format == 'csv':
-                return self._generate_csv(results, header)
-            else:  # txt
-                return self._generate_txt(results, header)
+            return export.as_response(export_format=export_format)
                 
         except Exception as e:
             return ResponseHelper.error_response(
@@ -780,177 +891,4 @@ class LetterTemplateExportCSVAPI(APIView):
                 str(e),
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _generate_csv(self, results, header):
-        """Generate CSV file from results."""
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Write CSV header - ONLY the 21 columns defined
-        writer.writerow(header)
-        
-        # Write data rows
-        for result in results:
-            employee = result.ee
-            order = result.case
-            
-            # Get payee details
-            payee_details = PayeeDetails.objects.filter(
-                case_id=order,
-                is_active=True
-            ).first()
-            
-            # Get employee address (OneToOneField with related_name='employee_addresses')
-            try:
-                employee_address = employee.employee_addresses
-            except (AttributeError, Exception):
-                # RelatedObjectDoesNotExist is raised when OneToOneField doesn't exist
-                employee_address = None
-            
-            # Get payee address
-            payee_address = None
-            if payee_details:
-                try:
-                    payee_address = payee_details.address
-                except AttributeError:
-                    payee_address = None
-            
-            # Build row with EXACTLY 20 fields matching the header
-            # Employee Details (employee_ prefix) - 5 fields
-            row = [
-                employee.first_name or '',
-                employee.middle_name or '',
-                employee.last_name or '',
-                employee.ssn or '',
-                employee.home_state.state if employee.home_state else '',
-                
-                # Employee Address (employee_address_ prefix) - 5 fields
-                employee_address.address_1 if employee_address else '',
-                employee_address.address_2 if employee_address else '',
-                employee_address.city if employee_address else '',
-                employee_address.state if employee_address else '',
-                str(employee_address.zip_code) if employee_address and employee_address.zip_code else '',
-                
-                # Order Details (garnishment_order_ prefix) - 3 fields
-                order.case_id or '',
-                order.start_date.strftime('%Y-%m-%d') if order.start_date else '',
-                'Yes' if order.is_consumer_debt else 'No',
-                
-                # Payee Details (payee_ prefix) - 1 field
-                payee_details.payee if payee_details else '',
-                
-                # Payee Address (payee_address_ prefix) - 5 fields
-                payee_address.address_1 if payee_address else '',
-                payee_address.address_2 if payee_address else '',
-                payee_address.city if payee_address else '',
-                payee_address.state.state if payee_address and payee_address.state else '',
-                payee_address.zip_code if payee_address else '',
-                
-                # GarnishmentResult (result_ prefix) - 2 fields
-                str(result.withholding_amount) if result.withholding_amount else '0.00',
-                str(result.withholding_limit) if result.withholding_limit else '0.00',
-            ]
-            
-            # Ensure row has exactly the same number of fields as header
-            if len(row) != len(header):
-                raise ValueError(f"Row has {len(row)} fields but header has {len(header)} fields")
-            
-            writer.writerow(row)
-        
-        # Prepare HTTP response with CSV
-        output.seek(0)
-        csv_content = output.getvalue()
-        
-        # Verify the first line (header) has exactly 21 columns
-        first_line = csv_content.split('\n')[0] if csv_content else ''
-        header_count = len(first_line.split(',')) if first_line else 0
-        if header_count != 21:
-            raise ValueError(f"CSV header has {header_count} columns, expected 21. Header: {first_line[:200]}")
-        
-        response = HttpResponse(csv_content, content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="garnishment_export.csv"'
-        return response
-    
-    def _generate_txt(self, results, header):
-        """Generate TXT file from results."""
-        output = StringIO()
-        
-        # Write header row
-        output.write('\t'.join(header))
-        output.write('\n')
-        
-        # Write data rows
-        for result in results:
-            employee = result.ee
-            order = result.case
-            
-            # Get payee details
-            payee_details = PayeeDetails.objects.filter(
-                case_id=order,
-                is_active=True
-            ).first()
-            
-            # Get employee address (OneToOneField with related_name='employee_addresses')
-            try:
-                employee_address = employee.employee_addresses
-            except (AttributeError, Exception):
-                # RelatedObjectDoesNotExist is raised when OneToOneField doesn't exist
-                employee_address = None
-            
-            # Get payee address
-            payee_address = None
-            if payee_details:
-                try:
-                    payee_address = payee_details.address
-                except AttributeError:
-                    payee_address = None
-            
-            # Build row with EXACTLY 21 fields matching the header
-            # Employee Details (employee_ prefix) - 5 fields
-            row = [
-                employee.first_name or '',
-                employee.middle_name or '',
-                employee.last_name or '',
-                employee.ssn or '',
-                employee.home_state.state if employee.home_state else '',
-                
-                # Employee Address (employee_address_ prefix) - 5 fields
-                employee_address.address_1 if employee_address else '',
-                employee_address.address_2 if employee_address else '',
-                employee_address.city if employee_address else '',
-                employee_address.state if employee_address else '',
-                str(employee_address.zip_code) if employee_address and employee_address.zip_code else '',
-                
-                # Order Details (garnishment_order_ prefix) - 3 fields
-                order.case_id or '',
-                order.start_date.strftime('%Y-%m-%d') if order.start_date else '',
-                'Yes' if order.is_consumer_debt else 'No',
-                
-                # Payee Details (payee_ prefix) - 1 field
-                payee_details.payee if payee_details else '',
-                
-                # Payee Address (payee_address_ prefix) - 5 fields
-                payee_address.address_1 if payee_address else '',
-                payee_address.address_2 if payee_address else '',
-                payee_address.city if payee_address else '',
-                payee_address.state.state if payee_address and payee_address.state else '',
-                payee_address.zip_code if payee_address else '',
-                
-                # GarnishmentResult (result_ prefix) - 2 fields
-                str(result.withholding_amount) if result.withholding_amount else '0.00',
-                str(result.withholding_limit) if result.withholding_limit else '0.00',
-            ]
-            
-            # Ensure row has exactly the same number of fields as header
-            if len(row) != len(header):
-                raise ValueError(f"Row has {len(row)} fields but header has {len(header)} fields")
-            
-            output.write('\t'.join(str(val) for val in row))
-            output.write('\n')
-        
-        # Prepare HTTP response with TXT
-        output.seek(0)
-        response = HttpResponse(output.getvalue(), content_type='text/plain')
-        response['Content-Disposition'] = 'attachment; filename="garnishment_export.txt"'
-        return response
 
@@ -18,9 +18,24 @@ from drf_yasg.utils import swagger_auto_schema
 import pandas as pd
 from django.db import transaction
 from django.core.paginator import Paginator, EmptyPage
+from django.utils import timezone
+from user_app.services.export_engine import TabularExport, EXPORT_FORMAT_PARAM
+from user_app.services.import_reader import ImportFileReader
+from user_app.services.import_jobs import ImportProgress
+from garnishedge_project.audit_batch import aggregated_audit
+from garnishedge_project.model_audit import log_model_bulk_operation
+from user_app.services.bulk_upsert import CopyUpsertLoader
+from user_app.services.import_lookups import lookup_objects
 
 logger = logging.getLogger(__name__)
 
+# Fields written when an imported payee updates an existing one
+PAYEE_IMPORT_UPDATE_FIELDS = [
+    'payee_type', 'payee', 'routing_number', 'bank_account',
+    'case_number_required', 'case_number_format', 'fips_required',
+    'fips_length', 'last_used', 'status', 'state',
+]
+
 # CRUD operations on Payee (SDU) using id
 class PayeeByIDAPIView(APIView):
     """
@@ -270,52 +285,29 @@ class PayeeImportView(APIView):
         }
     )
     def post(self, request):
-        try:
-            if 'file' not in request.FILES:
-                return ResponseHelper.error_response(
-                    message="No file provided",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
+        if 'file' not in request.FILES:
+            return ResponseHelper.error_response(
+                message="No file provided",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            file = request.FILES['file']
-            file_name = file.name
-
-            # Read file based on extension
-            # Use converters/dtype to force payee_id and case_id as strings to preserve alphanumeric values
-            # Excel often converts "G3288" to 3288, so we need to read these columns as strings
-            if file_name.endswith('.csv'):
-                # For CSV, specify dtype for specific columns
-                df = pd.read_csv(file, dtype={'payee_id': str, 'case_id': str}, na_values=[''])
-            elif file_name.endswith(('.xlsx', '.xls', '.xlsm', '.xlsb', '.odf', '.ods', '.odt')):
-                # For Excel, use converters to force string conversion at read time
-                # This preserves alphanumeric values like "G3288" if stored as text in Excel
-                # Note: If Excel has already converted "G3288" to 3288 (stored as number), 
-                # we can't recover the "G" prefix - it will be read as "3288" (string)
-                # pandas will ignore converters for columns that don't exist, so it's safe to always include them
-                converters = {
-                    'payee_id': str,
-                    'case_id': str
-                }
-                # Read the full file with converters
-                df = pd.read_excel(file, converters=converters)
-            else:
-                return ResponseHelper.error_response(
-                    message="Unsupported file format. Please upload a CSV or Excel file.",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
+        file = request.FILES['file']
+        if not ImportFileReader.is_supported(file.name):
+            return ResponseHelper.error_response(
+                message="Unsupported file format. Please upload a CSV or Excel file.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            # Additional safety: Convert payee_id and case_id columns to string if they exist
-            # This handles edge cases and ensures consistent string type
-            if 'payee_id' in df.columns:
-                df['payee_id'] = df['payee_id'].astype(str)
-                # Replace pandas NaN string representations with empty string
-                df['payee_id'] = df['payee_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
-            if 'case_id' in df.columns:
-                df['case_id'] = df['case_id'].astype(str)
-                df['case_id'] = df['case_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
+        return self.run_import(file, file.name)
 
-            # Convert dataframe to list of dicts once (faster than iterrows)
-            records = df.to_dict(orient="records")
+    @aggregated_audit(source='payee_import')
+    def run_import(self, file, file_name, options=None, progress=None):
+        """
+        Import payees from an uploaded file and return the API response.
+        Background import jobs call this directly with an ImportProgress.
+        """
+        progress = progress or ImportProgress()
+        try:
 
             # Pre-fetch all states into dictionaries for O(1) lookup (supports both name and code)
             all_states = State.objects.all()
@@ -370,256 +362,317 @@ class PayeeImportView(APIView):
                         return None
                 return None
 
-            # Prefetch existing payees and orders in bulk to avoid per-row queries
-            payee_ids_in_file = {
-                (r.get("payee_id") or "").strip()
-                for r in records
-                if r.get("payee_id")
-            }
-            case_ids_in_file = {
-                (r.get("case_id") or "").strip()
-                for r in records
-                if r.get("case_id")
-            }
-
-            existing_payees_by_payee_id = {
-                p.payee_id: p
-                for p in PayeeDetails.objects.filter(payee_id__in=payee_ids_in_file).select_related('state')
-            }
-
-            orders_by_case_id = {
-                o.case_id: o
-                for o in GarnishmentOrder.objects.filter(case_id__in=case_ids_in_file).select_related("payee", "payee__state")
-            }
-            
-            # Process all records in memory first
-            payees_to_create = []
-            payees_to_update = []
-            addresses_to_create = []
-            addresses_to_update = []
             added_payees = []
             updated_payees = []
             validation_errors = []
+
+            # Read and process the file in fixed-size chunks to keep memory bounded
+            for df in ImportFileReader(file, file_name=file_name, string_columns=['payee_id', 'case_id']).chunks():
+                # Additional safety: Convert payee_id and case_id columns to string if they exist
+                # This handles edge cases and ensures consistent string type
+                if 'payee_id' in df.columns:
+                    df['payee_id'] = df['payee_id'].astype(str)
+                    # Replace pandas NaN string representations with empty string
+                    df['payee_id'] = df['payee_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
+                if 'case_id' in df.columns:
+                    df['case_id'] = df['case_id'].astype(str)
+                    df['case_id'] = df['case_id'].replace(['nan', 'None', 'NaN', 'NAT', 'NaT'], '')
+
+                # Convert dataframe to list of dicts once (faster than iterrows)
+                records = df.to_dict(orient="records")
+
+                # Prefetch existing payees and orders in bulk to avoid per-row queries
+                payee_ids_in_file = {
+                    (r.get("payee_id") or "").strip()
+                    for r in records
+                    if r.get("payee_id")
+                }
+                case_ids_in_file = {
+                    (r.get("case_id") or "").strip()
+                    for r in records
+                    if r.get("case_id")
+                }
+
+                existing_payees_by_payee_id = {
+                    p.payee_id: p
+                    for p in lookup_objects(PayeeDetails.objects.select_related('state'), 'payee_id', payee_ids_in_file)
+                }
+
+                orders_by_case_id = {
+                    o.case_id: o
+                    for o in lookup_objects(
+                        GarnishmentOrder.objects.select_related("payee", "payee__state"), 'case_id', case_ids_in_file
+                    )
+                }
             
-            for row_idx, row in enumerate(records, start=1):
-                try:
-                    # Extract identifiers
-                    payee_id_val = (row.get("payee_id") or "").strip()
-                    raw_case_id = row.get("case_id")
-                    case_id = (raw_case_id or "").strip() if raw_case_id is not None else ""
-
-                    # Require at least one identifier
-                    if not payee_id_val and not case_id:
-                        continue
+                # Process this chunk's records in memory first
+                payees_to_create = []
+                payees_to_update = []
+                addresses_to_create = []
+                addresses_to_update = []
+                # payee_id -> (payee_data, address_data, sdu_identifier) of each payee to create
+                create_rows = {}
+                chunk_added_start = len(added_payees)
+                chunk_updated_start = len(updated_payees)
+                chunk_errors_start = len(validation_errors)
+            
+                for row_idx, row in enumerate(records, start=int(df.index[0]) + 1):
+                    try:
+                        # Extract identifiers
+                        payee_id_val = (row.get("payee_id") or "").strip()
+                        raw_case_id = row.get("case_id")
+                        case_id = (raw_case_id or "").strip() if raw_case_id is not None else ""
+
+                        # Require at least one identifier
+                        if not payee_id_val and not case_id:
+                            continue
                     
-                    # Find existing payee
-                    existing_payee = None
-                    if payee_id_val:
-                        existing_payee = existing_payees_by_payee_id.get(payee_id_val)
-                    else:
-                        order = orders_by_case_id.get(case_id)
-                        existing_payee = order.payee if order and order.payee else None
+                        # Find existing payee
+                        existing_payee = None
+                        if payee_id_val:
+                            existing_payee = existing_payees_by_payee_id.get(payee_id_val)
+                        else:
+                            order = orders_by_case_id.get(case_id)
+                            existing_payee = order.payee if order and order.payee else None
                     
-                    sdu_identifier = f"{payee_id_val or case_id}_{row.get('payee', 'unknown')}"
+                        sdu_identifier = f"{payee_id_val or case_id}_{row.get('payee', 'unknown')}"
                     
-                    # Handle state lookup (supports both name and abbreviation)
-                    state_value = row.get("state")
-                    # Check for NaN values
-                    if pd.isna(state_value) or (isinstance(state_value, str) and state_value.strip().lower() == 'nan'):
-                        validation_errors.append(f"Row {row_idx}: State is missing or invalid (NaN)")
-                        continue
-                    state_instance = get_state(state_value)
-                    if state_value and not state_instance:
-                        validation_errors.append(f"Row {row_idx}: State '{state_value}' not found (neither by name nor code)")
-                        continue
+                        # Handle state lookup (supports both name and abbreviation)
+                        state_value = row.get("state")
+                        # Check for NaN values
+                        if pd.isna(state_value) or (isinstance(state_value, str) and state_value.strip().lower() == 'nan'):
+                            validation_errors.append(f"Row {row_idx}: State is missing or invalid (NaN)")
+                            continue
+                        state_instance = get_state(state_value)
+                        if state_value and not state_instance:
+                            validation_errors.append(f"Row {row_idx}: State '{state_value}' not found (neither by name nor code)")
+                            continue
                     
-                    # Handle last_used date conversion
-                    last_used = row.get("last_used")
-                    if last_used:
-                        try:
-                            if isinstance(last_used, str):
-                                last_used = pd.to_datetime(last_used).date()
-                            elif hasattr(last_used, 'date'):
-                                last_used = last_used.date()
-                        except (ValueError, AttributeError):
-                            last_used = None
+                        # Handle last_used date conversion
+                        last_used = row.get("last_used")
+                        if last_used:
+                            try:
+                                if isinstance(last_used, str):
+                                    last_used = pd.to_datetime(last_used).date()
+                                elif hasattr(last_used, 'date'):
+                                    last_used = last_used.date()
+                            except (ValueError, AttributeError):
+                                last_used = None
                     
-                    # Handle fips_length with range validation
-                    MAX_INT = 2147483647
-                    MIN_INT = -2147483648
-                    raw_fips = row.get("fips_length")
-                    fips_length = None
-                    if raw_fips is not None and not pd.isna(raw_fips):
-                        try:
-                            if isinstance(raw_fips, (int, float)) and not isinstance(raw_fips, bool):
-                                fips_int = int(raw_fips)
-                                if fips_int > MAX_INT or fips_int < MIN_INT:
-                                    validation_errors.append(f"Row {row_idx}: 'fips_length' value {raw_fips} is out of range (must be between {MIN_INT} and {MAX_INT})")
-                                    continue
-                                fips_length = fips_int
-                            elif isinstance(raw_fips, str):
-                                s = raw_fips.strip()
-                                if s and s.lower() != 'nan' and s.isdigit():
-                                    fips_int = int(s)
+                        # Handle fips_length with range validation
+                        MAX_INT = 2147483647
+                        MIN_INT = -2147483648
+                        raw_fips = row.get("fips_length")
+                        fips_length = None
+                        if raw_fips is not None and not pd.isna(raw_fips):
+                            try:
+                                if isinstance(raw_fips, (int, float)) and not isinstance(raw_fips, bool):
+                                    fips_int = int(raw_fips)
                                     if fips_int > MAX_INT or fips_int < MIN_INT:
                                         validation_errors.append(f"Row {row_idx}: 'fips_length' value {raw_fips} is out of range (must be between {MIN_INT} and {MAX_INT})")
                                         continue
                                     fips_length = fips_int
-                        except (ValueError, TypeError, OverflowError):
-                            pass  # Invalid value, will remain None
+                                elif isinstance(raw_fips, str):
+                                    s = raw_fips.strip()
+                                    if s and s.lower() != 'nan' and s.isdigit():
+                                        fips_int = int(s)
+                                        if fips_int > MAX_INT or fips_int < MIN_INT:
+                                            validation_errors.append(f"Row {row_idx}: 'fips_length' value {raw_fips} is out of range (must be between {MIN_INT} and {MAX_INT})")
+                                            continue
+                                        fips_length = fips_int
+                            except (ValueError, TypeError, OverflowError):
+                                pass  # Invalid value, will remain None
                     
-                    # Validate required fields before processing
-                    if not payee_id_val and not case_id:
-                        continue
-                    if not row.get("payee"):
-                        validation_errors.append(f"Row {row_idx}: 'payee' field is required")
-                        continue
-                    if not state_instance:
-                        validation_errors.append(f"Row {row_idx}: Valid state is required")
-                        continue
+                        # Validate required fields before processing
+                        if not payee_id_val and not case_id:
+                            continue
+                        if not row.get("payee"):
+                            validation_errors.append(f"Row {row_idx}: 'payee' field is required")
+                            continue
+                        if not state_instance:
+                            validation_errors.append(f"Row {row_idx}: Valid state is required")
+                            continue
                     
-                    # For new payees, payee_id is required
-                    if not existing_payee and not payee_id_val:
-                        validation_errors.append(f"Row {row_idx}: 'payee_id' is required for new payees")
-                        continue
+                        # For new payees, payee_id is required
+                        if not existing_payee and not payee_id_val:
+                            validation_errors.append(f"Row {row_idx}: 'payee_id' is required for new payees")
+                            continue
                     
-                    # Prepare payee data
-                    payee_data = {
-                        "payee_id": payee_id_val,
-                        "payee_type": row.get("payee_type"),
-                        "payee": row.get("payee"),
-                        "routing_number": clean_numeric_value(row.get("routing_number")),
-                        "bank_account": clean_numeric_value(row.get("bank_account")),
-                        "case_number_required": bool(row.get("case_number_required", False)),
-                        "case_number_format": row.get("case_number_format"),
-                        "fips_required": bool(row.get("fips_required", False)),
-                        "fips_length": fips_length,
-                        "last_used": last_used,
-                        "status": row.get("status"),
-                        "state": state_instance,
-                    }
+                        # Prepare payee data
+                        payee_data = {
+                            "payee_id": payee_id_val,
+                            "payee_type": row.get("payee_type"),
+                            "payee": row.get("payee"),
+                            "routing_number": clean_numeric_value(row.get("routing_number")),
+                            "bank_account": clean_numeric_value(row.get("bank_account")),
+                            "case_number_required": bool(row.get("case_number_required", False)),
+                            "case_number_format": row.get("case_number_format"),
+                            "fips_required": bool(row.get("fips_required", False)),
+                            "fips_length": fips_length,
+                            "last_used": last_used,
+                            "status": row.get("status"),
+                            "state": state_instance,
+                        }
                     
-                    # Remove None values (except for boolean fields, required fields, and nullable numeric fields)
-                    # Keep nullable numeric fields (routing_number, bank_account) even if None to allow explicit NULL setting
-                    payee_data = {k: v for k, v in payee_data.items() if v is not None or k in ['case_number_required', 'fips_required', 'payee_id', 'payee', 'state', 'routing_number', 'bank_account']}
+                        # Remove None values (except for boolean fields, required fields, and nullable numeric fields)
+                        # Keep nullable numeric fields (routing_number, bank_account) even if None to allow explicit NULL setting
+                        payee_data = {k: v for k, v in payee_data.items() if v is not None or k in ['case_number_required', 'fips_required', 'payee_id', 'payee', 'state', 'routing_number', 'bank_account']}
                     
-                    # Prepare address data if present
-                    address_data = None
-                    if any(row.get(field) for field in ['address_1', 'address_2', 'city', 'state', 'zip_code', 'zip_plus_4']):
-                        address_state = get_state(state_value)  # Use same state lookup
-                        if address_state:
-                            # Clean zip_code and zip_plus_4 to handle NaN values
-                            zip_code_val = clean_numeric_value(row.get("zip_code"))
-                            zip_plus_4_val = clean_numeric_value(row.get("zip_plus_4"))
+                        # Prepare address data if present
+                        address_data = None
+                        if any(row.get(field) for field in ['address_1', 'address_2', 'city', 'state', 'zip_code', 'zip_plus_4']):
+                            address_state = get_state(state_value)  # Use same state lookup
+                            if address_state:
+                                # Clean zip_code and zip_plus_4 to handle NaN values
+                                zip_code_val = clean_numeric_value(row.get("zip_code"))
+                                zip_plus_4_val = clean_numeric_value(row.get("zip_plus_4"))
                             
-                            address_data = {
-                                "address_1": row.get("address_1"),
-                                "address_2": row.get("address_2"),
-                                "city": row.get("city"),
-                                "state": address_state,
-                                "zip_code": zip_code_val,
-                                "zip_plus_4": zip_plus_4_val,
-                            }
-                            # Remove None values
-                            address_data = {k: v for k, v in address_data.items() if v is not None}
-                            if not address_data:
-                                address_data = None
+                                address_data = {
+                                    "address_1": row.get("address_1"),
+                                    "address_2": row.get("address_2"),
+                                    "city": row.get("city"),
+                                    "state": address_state,
+                                    "zip_code": zip_code_val,
+                                    "zip_plus_4": zip_plus_4_val,
+                                }
+                                # Remove None values
+                                address_data = {k: v for k, v in address_data.items() if v is not None}
+                                if not address_data:
+                                    address_data = None
                     
-                    if existing_payee:
-                        # Update existing payee
-                        for attr, value in payee_data.items():
-                            setattr(existing_payee, attr, value)
-                        payees_to_update.append(existing_payee)
-                        updated_payees.append(sdu_identifier)
+                        if existing_payee:
+                            # Update existing payee
+                            for attr, value in payee_data.items():
+                                setattr(existing_payee, attr, value)
+                            payees_to_update.append(existing_payee)
+                            updated_payees.append(sdu_identifier)
                         
-                        # Handle address update/create
-                        if address_data:
-                            address_data['payee'] = existing_payee
-                            addresses_to_update.append((existing_payee, address_data))
-                    else:
-                        # Create new payee
-                        new_payee = PayeeDetails(**payee_data)
-                        payees_to_create.append(new_payee)
-                        added_payees.append(sdu_identifier)
+                            # Handle address update/create
+                            if address_data:
+                                address_data['payee'] = existing_payee
+                                addresses_to_update.append((existing_payee, address_data))
+                        else:
+                            # Create new payee
+                            new_payee = PayeeDetails(**payee_data)
+                            payees_to_create.append(new_payee)
+                            added_payees.append(sdu_identifier)
+                            create_rows[payee_id_val] = (payee_data, address_data, sdu_identifier)
                         
-                        # Store address data for later creation
-                        if address_data:
-                            addresses_to_create.append((new_payee, address_data))
+                            # Store address data for later creation
+                            if address_data:
+                                addresses_to_create.append((new_payee, address_data))
                             
-                except Exception as row_e:
-                    logger.exception(f"Error processing payee row {row_idx}: {str(row_e)}")
-                    validation_errors.append(f"Row {row_idx}: {str(row_e)}")
-                    continue  # Skip this row and continue processing other rows
+                    except Exception as row_e:
+                        logger.exception(f"Error processing payee row {row_idx}: {str(row_e)}")
+                        validation_errors.append(f"Row {row_idx}: {str(row_e)}")
+                        continue  # Skip this row and continue processing other rows
             
-            # Perform bulk operations in a transaction (even if there are validation errors)
-            try:
-                with transaction.atomic():
-                    # Bulk create new payees
-                    if payees_to_create:
-                        PayeeDetails.objects.bulk_create(payees_to_create, ignore_conflicts=False)
-                        # After bulk_create, Django sets the IDs on the objects
-                        # Create addresses for new payees using bulk_create
-                        if addresses_to_create:
-                            address_objects = [
-                                PayeeAddress(payee=payee, **addr_data)
-                                for payee, addr_data in addresses_to_create
-                            ]
-                            PayeeAddress.objects.bulk_create(address_objects, ignore_conflicts=False)
-                    
-                    # Bulk update existing payees
-                    if payees_to_update:
-                        PayeeDetails.objects.bulk_update(
-                            payees_to_update,
-                            ['payee_type', 'payee', 'routing_number', 'bank_account', 
-                             'case_number_required', 'case_number_format', 'fips_required', 
-                             'fips_length', 'last_used', 'status', 'state', 'updated_at']
-                        )
-                    # For OneToOne relationships, we need to handle updates individually
-                    # but we can batch the lookups
-                    if addresses_to_update:
-                        payee_ids = [payee.id for payee, _ in addresses_to_update]
-                        existing_addresses = {
-                            addr.payee_id: addr
-                            for addr in PayeeAddress.objects.filter(payee_id__in=payee_ids)
-                        }
-                        
-                        addresses_to_bulk_create = []
-                        addresses_to_bulk_update = []
-                        
-                        for payee, addr_data in addresses_to_update:
-                            if payee.id in existing_addresses:
-                                # Update existing address
-                                addr = existing_addresses[payee.id]
-                                for attr, value in addr_data.items():
-                                    setattr(addr, attr, value)
-                                addresses_to_bulk_update.append(addr)
+                # Perform bulk operations in a transaction (even if there are validation errors)
+                try:
+                    with transaction.atomic():
+                        # Bulk create new payees
+                        if payees_to_create:
+                            if CopyUpsertLoader.is_available():
+                                # No update fields: a conflict only touches updated_at and
+                                # the payee goes through the update path below instead
+                                result = CopyUpsertLoader(
+                                    PayeeDetails, 'payee_id', update_fields=[]
+                                ).upsert(payees_to_create)
+                                if result.updated:
+                                    self._apply_conflicting_payees(
+                                        result.updated, create_rows, payees_to_create, addresses_to_create,
+                                        payees_to_update, addresses_to_update, added_payees, updated_payees
+                                    )
                             else:
-                                # Create new address
-                                addresses_to_bulk_create.append(
+                                PayeeDetails.objects.bulk_create(payees_to_create, ignore_conflicts=False)
+                            # After bulk_create, Django sets the IDs on the objects
+                            # Create addresses for new payees using bulk_create
+                            if addresses_to_create:
+                                address_objects = [
                                     PayeeAddress(payee=payee, **addr_data)
+                                    for payee, addr_data in addresses_to_create
+                                ]
+                                PayeeAddress.objects.bulk_create(address_objects, ignore_conflicts=False)
+                    
+                        # Bulk update existing payees
+                        if payees_to_update:
+                            if CopyUpsertLoader.is_available():
+                                CopyUpsertLoader(
+                                    PayeeDetails, 'payee_id', update_fields=PAYEE_IMPORT_UPDATE_FIELDS
+                                ).upsert(payees_to_update)
+                            else:
+                                # bulk_update does not apply auto_now, and the export cache
+                                # versions by updated_at
+                                now = timezone.now()
+                                for obj in payees_to_update:
+                                    obj.updated_at = now
+                                PayeeDetails.objects.bulk_update(
+                                    payees_to_update,
+                                    PAYEE_IMPORT_UPDATE_FIELDS + ['updated_at']
                                 )
+                        # For OneToOne relationships, we need to handle updates individually
+                        # but we can batch the lookups
+                        if addresses_to_update:
+                            payee_ids = [payee.id for payee, _ in addresses_to_update]
+                            existing_addresses = {
+                                addr.payee_id: addr
+                                for addr in lookup_objects(PayeeAddress, 'payee_id', payee_ids)
+                            }
+                        
+                            addresses_to_bulk_create = []
+                            addresses_to_bulk_update = []
+                        
+                            for payee, addr_data in addresses_to_update:
+                                if payee.id in existing_addresses:
+                                    # Update existing address
+                                    addr = existing_addresses[payee.id]
+                                    for attr, value in addr_data.items():
+                                        setattr(addr, attr, value)
+                                    addresses_to_bulk_update.append(addr)
+                                else:
+                                    # Create new address
+                                    addresses_to_bulk_create.append(
+                                        PayeeAddress(payee=payee, **addr_data)
+                                    )
                         
-                        if addresses_to_bulk_create:
-                            PayeeAddress.objects.bulk_create(addresses_to_bulk_create, ignore_conflicts=False)
-                        if addresses_to_bulk_update:
-                            PayeeAddress.objects.bulk_update(
-                                addresses_to_bulk_update,
-                                ['address_1', 'address_2', 'city', 'state', 'zip_code', 'zip_plus_4']
-                            )
-            except Exception as db_error:
-                # Catch database errors and add to validation errors
-                error_msg = str(db_error)
-                if "integer out of range" in error_msg.lower() or "overflow" in error_msg.lower():
-                    # This could be fips_length or other integer fields
-                    validation_errors.append(f"Database error: Integer value out of range. Please check numeric fields (must be between -2147483648 and 2147483647)")
+                            if addresses_to_bulk_create:
+                                PayeeAddress.objects.bulk_create(addresses_to_bulk_create, ignore_conflicts=False)
+                            if addresses_to_bulk_update:
+                                PayeeAddress.objects.bulk_update(
+                                    addresses_to_bulk_update,
+                                    ['address_1', 'address_2', 'city', 'state', 'zip_code', 'zip_plus_4']
+                                )
+                except Exception as db_error:
+                    # Catch database errors and add to validation errors
+                    error_msg = str(db_error)
+                    if "integer out of range" in error_msg.lower() or "overflow" in error_msg.lower():
+                        # This could be fips_length or other integer fields
+                        validation_errors.append(f"Database error: Integer value out of range. Please check numeric fields (must be between -2147483648 and 2147483647)")
+                    else:
+                        validation_errors.append(f"Database error: {error_msg}")
+                    logger.exception(f"Error during bulk database operations: {str(db_error)}")
+                    # Drop this chunk's rows from the results since the operation failed
+                    del added_payees[chunk_added_start:]
+                    del updated_payees[chunk_updated_start:]
                 else:
-                    validation_errors.append(f"Database error: {error_msg}")
-                logger.exception(f"Error during bulk database operations: {str(db_error)}")
-                # Clear the lists since the operation failed
-                payees_to_create = []
-                payees_to_update = []
-                added_payees = []
-                updated_payees = []
+                    # Bulk writes skip the save signals; record each chunk as one audit entry per action
+                    log_model_bulk_operation(
+                        "CREATE", "PayeeDetails", [payee.payee_id for payee in payees_to_create],
+                        details={"addresses_created": len(addresses_to_create)}
+                    )
+                    log_model_bulk_operation(
+                        "UPDATE", "PayeeDetails", [payee.payee_id for payee in payees_to_update],
+                        fields=PAYEE_IMPORT_UPDATE_FIELDS,
+                        details={"addresses_upserted": len(addresses_to_update)}
+                    )
+
+                progress.chunk(
+                    len(df),
+                    rows_validated=len(payees_to_create) + len(payees_to_update),
+                    rows_inserted=len(added_payees) - chunk_added_start,
+                    rows_updated=len(updated_payees) - chunk_updated_start,
+                    errors=validation_errors[chunk_errors_start:],
+                )
 
             # Build response data
             response_data = {}
@@ -673,15 +726,52 @@ class PayeeImportView(APIView):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @staticmethod
+    def _apply_conflicting_payees(payee_ids, create_rows, payees_to_create, addresses_to_create,
+                                  payees_to_update, addresses_to_update, added_payees, updated_payees):
+        """
+        Move payees that were created elsewhere since the lookup from the create
+        lists to the update lists, so they get the file's values the way any
+        existing payee does instead of the defaults of a new one.
+        """
+        conflicting = set(payee_ids)
+        payee_ids = sorted(conflicting)
+        existing_payees = {payee.payee_id: payee for payee in lookup_objects(PayeeDetails, 'payee_id', payee_ids)}
+
+        for payee_id in payee_ids:
+            payee_data, address_data, sdu_identifier = create_rows[payee_id]
+            existing_payee = existing_payees[payee_id]
+            for attr, value in payee_data.items():
+                setattr(existing_payee, attr, value)
+            payees_to_update.append(existing_payee)
+            added_payees.remove(sdu_identifier)
+            updated_payees.append(sdu_identifier)
+            if address_data:
+                addresses_to_update.append((existing_payee, {**address_data, 'payee': existing_payee}))
+
+        payees_to_create[:] = [payee for payee in payees_to_create if payee.payee_id not in conflicting]
+        addresses_to_create[:] = [
+            (payee, address_data) for payee, address_data in addresses_to_create
+            if payee.payee_id not in conflicting
+        ]
+
 
 class ExportPayeeDataView(APIView):
     """
-    API view to export payee data as an Excel file.
+    API view to export payee data as an Excel (or CSV) file.
     Provides robust exception handling and clear response messages.
     """
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                EXPORT_FORMAT_PARAM, openapi.IN_QUERY,
+                description="File format: xlsx (default) or csv",
+                type=openapi.TYPE_STRING, enum=['xlsx', 'csv']
+            )
+        ],
         responses={
             200: 'Excel file exported successfully',
+            400: 'Unsupported export format',
             404: 'No payees found',
             500: 'Internal server error'
         }
@@ -689,69 +779,55 @@ class ExportPayeeDataView(APIView):
     def get(self, request):
         """
         Handles GET request to export all payees to an Excel file.
+        Rows are streamed through the shared export engine (write-only workbook / CSV).
         """
         try:
-            # Fetch all payees from the database
-            # Optimize query with select_related to avoid N+1 queries
-            payees = PayeeDetails.objects.select_related(
-                'state',           # PayeeDetails.state ForeignKey
-                'address',          # PayeeAddress OneToOne relationship
-                'address__state'    # PayeeAddress.state ForeignKey
-            ).all()
-            if not payees.exists():
+            queryset = PayeeDetails.objects.order_by('id')
+            if not queryset.exists():
                 return ResponseHelper.error_response(
                     message="No payees found",
                     status_code=status.HTTP_404_NOT_FOUND
                 )
 
-            serializer = PayeeSerializer(payees, many=True)
-
-            # Create Excel workbook and worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "payees"
-
-            # Define header fields - include all PayeeDetails fields and address fields
-            header_fields = [
-                "id", "payee_id", "payee_type", "payee", "case_id",
-                "routing_number", "bank_account", "case_number_required",
-                "case_number_format", "fips_required", "fips_length",
-                "last_used", "status", "state", "created_at", "updated_at",
-                "address_1", "address_2", "city", "zip_code", "zip_plus_4"
-            ]
-
-            ws.append(header_fields)
-
-            # Write data rows to the worksheet
-            for payee in serializer.data:
-                row_data = []
-                for field in header_fields:
-                    if field in ['address_1', 'address_2', 'city', 'zip_code', 'zip_plus_4']:
-                        # Extract from nested address object
-                        address = payee.get('address', {}) or {}
-                        row_data.append(address.get(field, ''))
-                    else:
-                        row_data.append(payee.get(field, ''))
-                ws.append(row_data)
-
-            # Save workbook to in-memory buffer
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            # Prepare HTTP response with Excel content
-            filename = f'payees_{datetime.today().strftime("%m-%d-%y")}.xlsx'
-            response = HttpResponse(
-                buffer,
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            export = TabularExport(
+                queryset,
+                columns=[
+                    ('id', 'id'),
+                    ('payee_id', 'payee_id'),
+                    ('payee_type', 'payee_type'),
+                    ('payee', 'payee'),
+                    ('case_id', None),
+                    ('routing_number', 'routing_number'),
+                    ('bank_account', 'bank_account'),
+                    ('case_number_required', 'case_number_required'),
+                    ('case_number_format', 'case_number_format'),
+                    ('fips_required', 'fips_required'),
+                    ('fips_length', 'fips_length'),
+                    ('last_used', 'last_used'),
+                    ('status', 'status'),
+                    ('state', 'state__state'),
+                    ('created_at', 'created_at'),
+                    ('updated_at', 'updated_at'),
+                    ('address_1', 'address__address_1'),
+                    ('address_2', 'address__address_2'),
+                    ('city', 'address__city'),
+                    ('zip_code', 'address__zip_code'),
+                    ('zip_plus_4', 'address__zip_plus_4'),
+                ],
+                sheet_title="payees",
+                filename_prefix="payees",
             )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
+            return export.as_response(request)
 
+        except ValueError as e:
+            return ResponseHelper.error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             logger.exception(f"Error exporting payee data: {str(e)}")
             return ResponseHelper.error_response(
                 message="Failed to export payee data",
                 error=str(e),
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
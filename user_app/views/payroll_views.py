@@ -0,0 +1,146 @@
+import logging
+import os
+
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.parsers import BaseParser, JSONParser, MultiPartParser, FormParser
+from rest_framework.views import APIView
+
+from processor.garnishment_library.utils.response import ResponseHelper
+from user_app.constants import BatchDetail
+from user_app.services.payroll_ingestion import PayrollBatchExists, PayrollIngestionService
+
+logger = logging.getLogger(__name__)
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+
+class NDJSONParser(BaseParser):
+    """
+    Passes a newline-delimited JSON body through as lines; each line is
+    parsed and validated on its own so one bad line does not reject the batch.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return PayrollIngestionService.read_ndjson_lines(stream)
+
+
+class PayrollBulkIngestAPI(APIView):
+    """
+    Load a payroll batch without running a garnishment calculation.
+
+    Accepts a JSON array (or {"batch_id": ..., "payroll_data": [...]}), an NDJSON
+    body, or a CSV / NDJSON file upload. Rows are validated in batch and written
+    to the Payroll table under batch_id, which POST /garnishment/calculate/ can
+    then reference instead of re-posting the payroll data. A batch_id that
+    already has rows is refused with 409 unless replace=true is passed.
+    """
+    parser_classes = [JSONParser, NDJSONParser, MultiPartParser, FormParser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                name='batch_id',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                required=False,
+                description="Batch to store the rows under; generated when omitted"
+            ),
+            openapi.Parameter(
+                name='replace',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_BOOLEAN,
+                required=False,
+                description="Replace the rows already stored under batch_id instead of refusing the batch"
+            ),
+            openapi.Parameter(
+                name='file',
+                in_=openapi.IN_FORM,
+                type=openapi.TYPE_FILE,
+                required=False,
+                description="CSV or NDJSON (.ndjson/.jsonl) payroll file"
+            ),
+        ],
+        responses={
+            201: 'Payroll rows stored; row-level errors are listed in errors',
+            400: 'No rows provided, unsupported format or no valid rows',
+            409: 'batch_id already has stored rows and replace was not requested',
+            500: 'Internal server error'
+        }
+    )
+    def post(self, request):
+        try:
+            payload = request.data
+            batch_id = request.query_params.get(BatchDetail.BATCH_ID)
+            replace = request.query_params.get('replace')
+            if isinstance(payload, dict):
+                batch_id = batch_id or payload.get(BatchDetail.BATCH_ID)
+                replace = replace or payload.get('replace')
+            replace = str(replace or '').lower() in ('1', 'true', 'yes')
+            if not batch_id:
+                batch_id = PayrollIngestionService.generate_batch_id()
+            elif not replace and PayrollIngestionService.batch_exists(batch_id):
+                # Fails fast before reading the file; the publish step re-checks under a lock
+                raise PayrollBatchExists(batch_id)
+
+            file = request.FILES.get('file')
+            if file:
+                file_name = file.name.lower()
+                if file_name.endswith('.csv'):
+                    result = PayrollIngestionService.ingest_csv(file, batch_id, replace)
+                elif file_name.endswith(NDJSON_EXTENSIONS):
+                    lines = PayrollIngestionService.read_ndjson_lines(file)
+                    result = PayrollIngestionService.ingest_ndjson(lines, batch_id, replace)
+                else:
+                    return ResponseHelper.error_response(
+                        f"Unsupported file format '{os.path.splitext(file_name)[1]}'. "
+                        "Please upload a CSV or NDJSON file.",
+                        status_code=status.HTTP_400_BAD_REQUEST
+                    )
+            elif request.content_type.split(';')[0].strip() == NDJSONParser.media_type:
+                result = PayrollIngestionService.ingest_ndjson(payload, batch_id, replace)
+            else:
+                items = payload.get('payroll_data', []) if isinstance(payload, dict) else payload
+                if not isinstance(items, list) or not items:
+                    return ResponseHelper.error_response(
+                        'No payroll data provided',
+                        status_code=status.HTTP_400_BAD_REQUEST
+                    )
+                result = PayrollIngestionService.ingest_items(items, batch_id, replace)
+        except PayrollBatchExists as e:
+            return ResponseHelper.error_response(
+                str(e),
+                'Use a new batch_id or pass replace=true to replace its rows',
+                status_code=status.HTTP_409_CONFLICT
+            )
+        except ValueError as e:
+            return ResponseHelper.error_response(
+                'Invalid payroll file',
+                str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.exception("Payroll ingestion failed")
+            return ResponseHelper.error_response(
+                'Payroll ingestion failed',
+                str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        logger.info(
+            f"Payroll batch {result.batch_id}: {result.rows_stored} of {result.rows_received} rows stored, "
+            f"{len(result.errors)} errors"
+        )
+        if not result.rows_stored:
+            return ResponseHelper.error_response(
+                'No payroll rows were stored',
+                result.as_dict(),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return ResponseHelper.success_response(
+            'Payroll data stored successfully',
+            result.as_dict(),
+            status_code=status.HTTP_201_CREATED
+        )
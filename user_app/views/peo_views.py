@@ -15,6 +15,10 @@ from rest_framework.permissions import AllowAny
 from user_app.models import PEO
 from user_app.serializers import PEOSerializer
 from processor.garnishment_library.utils import PaginationHelper ,ResponseHelper  
+from user_app.services.export_engine import TabularExport, EXPORT_FORMAT_PARAM
+from user_app.services.import_reader import ImportFileReader
+from user_app.services.import_jobs import ImportProgress
+from garnishedge_project.audit_batch import aggregated_audit
 
 
 class PEOAPI(APIView):
@@ -225,85 +229,102 @@ class PEOImportView(APIView):
         }
     )
     def post(self, request):
-        try:
-            if 'file' not in request.FILES:
-                return ResponseHelper.error_response(
-                    message="No file provided",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
+        if 'file' not in request.FILES:
+            return ResponseHelper.error_response(
+                message="No file provided",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            file = request.FILES['file']
-            file_name = file.name
+        file = request.FILES['file']
+        if not ImportFileReader.is_supported(file.name):
+            return ResponseHelper.error_response(
+                message="Unsupported file format. Please upload a CSV or Excel file.",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
 
-            # Read file based on extension
-            if file_name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file_name.endswith(('.xlsx', '.xls', '.xlsm', '.xlsb', '.odf', '.ods', '.odt')):
-                df = pd.read_excel(file)
-            else:
-                return ResponseHelper.error_response(
-                    message="Unsupported file format. Please upload a CSV or Excel file.",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
+        return self.run_import(file, file.name)
+
+    @aggregated_audit(source='peo_import')
+    def run_import(self, file, file_name, options=None, progress=None):
+        """
+        Import PEOs from an uploaded file and return the API response.
+        Background import jobs call this directly with an ImportProgress.
+        """
+        progress = progress or ImportProgress()
+        try:
             
             added_peos = []
             updated_peos = []
             
-            for _, row in df.iterrows():
-                try:
-                    peo_data = {
-                        "peo_id": row.get("peo_id"),
-                        "state_code": row.get("state_code") or row.get("state"),
-                        "name": row.get("name"),
-                        "contact_person": row.get("contact_person"),
-                        "tax_id": row.get("tax_id"),
-                        "is_active": row.get("is_active", True),
-                    }
+            # Read the file in fixed-size chunks to keep memory bounded
+            for df in ImportFileReader(file, file_name=file_name).chunks():
+                chunk_added_start = len(added_peos)
+                chunk_updated_start = len(updated_peos)
+
+                for _, row in df.iterrows():
+                    try:
+                        peo_data = {
+                            "peo_id": row.get("peo_id"),
+                            "state_code": row.get("state_code") or row.get("state"),
+                            "name": row.get("name"),
+                            "contact_person": row.get("contact_person"),
+                            "tax_id": row.get("tax_id"),
+                            "is_active": row.get("is_active", True),
+                        }
                     
-                    # Check if peo_id exists
-                    peo_id = peo_data.get("peo_id")
-                    if not peo_id:
-                        # Skip rows without peo_id
-                        continue
+                        # Check if peo_id exists
+                        peo_id = peo_data.get("peo_id")
+                        if not peo_id:
+                            # Skip rows without peo_id
+                            continue
                     
-                    # Try to find existing PEO by peo_id
-                    existing_peo = PEO.objects.filter(peo_id=peo_id).first()
+                        # Try to find existing PEO by peo_id
+                        existing_peo = PEO.objects.filter(peo_id=peo_id).first()
                     
-                    if existing_peo:
-                        # Update existing PEO
-                        serializer = PEOSerializer(
-                            existing_peo, 
-                            data=peo_data, 
-                            partial=True
-                        )
-                        if serializer.is_valid():
-                            serializer.save()
-                            updated_peos.append(peo_id)
-                        else:
-                            return ResponseHelper.error_response(
-                                message=f"Validation error for peo_id {peo_id}",
-                                error=serializer.errors,
-                                status_code=status.HTTP_400_BAD_REQUEST
+                        if existing_peo:
+                            # Update existing PEO
+                            serializer = PEOSerializer(
+                                existing_peo, 
+                                data=peo_data, 
+                                partial=True
                             )
-                    else:
-                        # Create new PEO
-                        serializer = PEOSerializer(data=peo_data)
-                        if serializer.is_valid():
-                            serializer.save()
-                            added_peos.append(peo_id)
+                            if serializer.is_valid():
+                                serializer.save()
+                                updated_peos.append(peo_id)
+                            else:
+                                return ResponseHelper.error_response(
+                                    message=f"Validation error for peo_id {peo_id}",
+                                    error=serializer.errors,
+                                    status_code=status.HTTP_400_BAD_REQUEST
+                                )
                         else:
-                            return ResponseHelper.error_response(
-                                message=f"Validation error for peo_id {peo_id}",
-                                error=serializer.errors,
-                                status_code=status.HTTP_400_BAD_REQUEST
-                            )
+                            # Create new PEO
+                            serializer = PEOSerializer(data=peo_data)
+                            if serializer.is_valid():
+                                serializer.save()
+                                added_peos.append(peo_id)
+                            else:
+                                return ResponseHelper.error_response(
+                                    message=f"Validation error for peo_id {peo_id}",
+                                    error=serializer.errors,
+                                    status_code=status.HTTP_400_BAD_REQUEST
+                                )
                             
-                except Exception as row_e:
-                    return ResponseHelper.error_response(
-                        message="Error processing row",
-                        error=str(row_e),
-                        status_code=status.HTTP_400_BAD_REQUEST
-                    )
+                    except Exception as row_e:
+                        return ResponseHelper.error_response(
+                            message="Error processing row",
+                            error=str(row_e),
+                            status_code=status.HTTP_400_BAD_REQUEST
+                        )
+
+                chunk_added = len(added_peos) - chunk_added_start
+                chunk_updated = len(updated_peos) - chunk_updated_start
+                progress.chunk(
+                    len(df),
+                    rows_validated=chunk_added + chunk_updated,
+                    rows_inserted=chunk_added,
+                    rows_updated=chunk_updated,
+                )
 
             # Build response data
             response_data = {}
@@ -339,13 +360,20 @@ class PEOImportView(APIView):
 
 class ExportPEODataView(APIView):
     """
-    API view to export PEO data as an Excel file.
+    API view to export PEO data as an Excel (or CSV) file.
     Provides robust exception handling and clear response messages.
     """
-    
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                EXPORT_FORMAT_PARAM, openapi.IN_QUERY,
+                description="File format: xlsx (default) or csv",
+                type=openapi.TYPE_STRING, enum=['xlsx', 'csv']
+            )
+        ],
         responses={
             200: 'Excel file exported successfully',
+            400: 'Unsupported export format',
             404: 'No PEOs found',
             500: 'Internal server error'
         }
@@ -353,50 +381,39 @@ class ExportPEODataView(APIView):
     def get(self, request):
         """
         Handles GET request to export all PEOs to an Excel file.
+        Rows are streamed through the shared export engine (write-only workbook / CSV).
         """
         try:
-            # Fetch all PEOs from the database
-            peos = PEO.objects.all()
-            if not peos.exists():
+            queryset = PEO.objects.order_by('id')
+            if not queryset.exists():
                 return ResponseHelper.error_response(
                     message="No PEOs found",
                     status_code=status.HTTP_404_NOT_FOUND
                 )
 
-            serializer = PEOSerializer(peos, many=True)
-
-            # Create Excel workbook and worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "PEOs"
-
-            # Define header fields
-            header_fields = [
-                "id", "peo_id", "state", "name", "contact_person", 
-                "tax_id", "is_active", "created_at", "updated_at"
-            ]
-
-            ws.append(header_fields)
-
-            # Write data rows to the worksheet
-            for peo in serializer.data:
-                row = [peo.get(field, '') for field in header_fields]
-                ws.append(row)
-
-            # Save workbook to in-memory buffer
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            # Prepare HTTP response with Excel content
-            filename = f'peos_{datetime.today().strftime("%m-%d-%y")}.xlsx'
-            response = HttpResponse(
-                buffer,
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            export = TabularExport(
+                queryset,
+                columns=[
+                    ('id', 'id'),
+                    ('peo_id', 'peo_id'),
+                    ('state', 'state__state_code'),
+                    ('name', 'name'),
+                    ('contact_person', 'contact_person'),
+                    ('tax_id', 'tax_id'),
+                    ('is_active', 'is_active'),
+                    ('created_at', 'created_at'),
+                    ('updated_at', 'updated_at'),
+                ],
+                sheet_title="PEOs",
+                filename_prefix="peos",
             )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
+            return export.as_response(request)
 
+        except ValueError as e:
+            return ResponseHelper.error_response(
+                message=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return ResponseHelper.error_response(
                 message="Failed to export PEO data",
@@ -0,0 +1,92 @@
+import logging
+import os
+
+from django.http import FileResponse
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from garnishedge_project.request_profiler import ProfileStore
+from processor.garnishment_library.utils.response import ResponseHelper
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DOWNLOAD_FORMATS = {
+    'json': 'application/json',
+    'folded': 'text/plain; charset=utf-8',
+}
+
+
+class RequestProfileListAPI(APIView):
+    """
+    Recently stored request profiles, newest first (admins only).
+    """
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description='Maximum number of profiles to return (default 50)'),
+        ],
+        responses={
+            200: 'Profile metadata',
+            403: 'Admin access required',
+        }
+    )
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            return ResponseHelper.error_response(
+                'limit must be an integer',
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return ResponseHelper.success_response(
+            'Request profiles fetched successfully',
+            ProfileStore.list(limit=max(1, limit))
+        )
+
+
+class RequestProfileDownloadAPI(APIView):
+    """
+    Download a stored profile as JSON (metadata, SQL timeline, top stacks) or
+    as folded stacks for flamegraph.pl / speedscope (admins only).
+    """
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('profile_id', openapi.IN_PATH, type=openapi.TYPE_STRING, description='Profile id'),
+            openapi.Parameter('file_format', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=list(PROFILE_DOWNLOAD_FORMATS), description='json (default) or folded'),
+        ],
+        responses={
+            200: 'Profile file',
+            400: 'Unsupported format',
+            403: 'Admin access required',
+            404: 'Profile not found',
+        }
+    )
+    def get(self, request, profile_id):
+        file_format = request.query_params.get('file_format', 'json')
+        if file_format not in PROFILE_DOWNLOAD_FORMATS:
+            return ResponseHelper.error_response(
+                f'Unsupported format "{file_format}". Use json or folded.',
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+
+        path = ProfileStore.path(profile_id, file_format)
+        if not path or not os.path.exists(path):
+            return ResponseHelper.error_response(
+                f'Profile "{profile_id}" not found',
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=os.path.basename(path),
+            content_type=PROFILE_DOWNLOAD_FORMATS[file_format]
+        )